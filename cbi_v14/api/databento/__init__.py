@@ -5,64 +5,76 @@ This subpackage defines the structured interface for loading Databento
 futures data into BigQuery. It is the canonical home for Databento
 client wrappers and BigQuery load helpers.
 
-Current production loader logic lives in:
-- scripts/ingest/download_ALL_databento_historical.py
+Modules:
+- `cbi_v14/api/databento/daily.py`: parallel daily OHLCV backfill engine
+- `cbi_v14/api/databento/sinks.py`: BigQuery / local Parquet write targets
 
-As the codebase evolves, the core functionality from that script should
-be refactored into reusable functions here, with the script acting as a
-thin CLI wrapper.
+The streaming intraday (1m/1s) loader still lives in
+scripts/ingest/download_ALL_databento_historical.py. As the codebase
+evolves, its core functionality should be refactored into reusable
+functions here, with the script acting as a thin CLI wrapper.
 """
 
 from typing import Optional, Sequence
 
 from google.cloud import bigquery
 
+from cbi_v14.api.databento.daily import backfill_daily_ohlcv, to_daily_rows
+from cbi_v14.api.databento.sinks import BigQuerySink, DailyOHLCVSink, ParquetSink
+from cbi_v14.markets.zl import ZL_ENGINE_ROOTS
+
 
 def backfill_daily_ohlcv_to_bigquery(
-    bq_client: bigquery.Client,
-    roots: Sequence[str],
-    start_date: str,
+    bq_client: Optional[bigquery.Client],
+    roots: Optional[Sequence[str]] = None,
+    start_date: str = "2010-06-06",
     end_date: Optional[str] = None,
     table_id: str = "cbi-v14.market_data.databento_futures_ohlcv_1d",
     dry_run: bool = False,
+    *,
+    sink: Optional[DailyOHLCVSink] = None,
+    databento_client=None,
+    max_workers: int = 5,
 ) -> int:
     """
     Backfill Databento daily OHLCV data into BigQuery for a set of roots.
 
-    This is a high-level interface intended to mirror the behavior of
-    `scripts/ingest/download_ALL_databento_historical.py` for daily data.
+    Roots are fetched concurrently; each starts the day after the latest
+    date already stored for it, so repeated calls only append new days.
 
     Parameters
     ----------
     bq_client :
-        Initialized BigQuery client.
+        Initialized BigQuery client (may be None when `sink` is given).
     roots :
-        Iterable of futures roots to backfill (e.g., ['ZL', 'ZS', 'ZM', 'CL', 'HO']).
+        Iterable of futures roots to backfill. Defaults to ZL_ENGINE_ROOTS
+        (['ZL', 'ZS', 'ZM', 'CL', 'HO']).
     start_date :
         ISO date string (YYYY-MM-DD) for the backfill start.
     end_date :
-        Optional ISO date string (YYYY-MM-DD) for the backfill end. If None,
-        implementations may default to "today".
+        Optional ISO date string (YYYY-MM-DD), exclusive. Defaults to today.
     table_id :
         Fully-qualified BigQuery table ID for the daily OHLCV table.
     dry_run :
-        If True, validate parameters without calling Databento or writing to BQ.
+        If True, read the stored max dates and log the planned ranges without
+        calling Databento or writing.
+    sink :
+        Write target; defaults to BigQuerySink(bq_client, table_id). Use
+        ParquetSink(dir) for offline runs.
+    databento_client :
+        Optional databento.Historical; built from DATABENTO_API_KEY otherwise.
+    max_workers :
+        Roots fetched concurrently.
 
     Returns
     -------
     int
-        Number of rows ingested (or that would be ingested in dry-run mode).
-
-    Notes
-    -----
-    The concrete Databento API calls and batch loading logic are currently
-    implemented in `scripts/ingest/download_ALL_databento_historical.py`.
-    This function exists as a documented entrypoint so that future
-    orchestration code can depend on the interface while the internals
-    are gradually refactored into this package.
+        Number of rows ingested (0 in dry-run mode).
     """
-    _ = (roots, start_date, end_date, table_id, dry_run)
-    # TODO: Call into refactored ingestion helpers once moved from scripts/.
-    return 0
-
-
+    roots = list(roots) if roots is not None else list(ZL_ENGINE_ROOTS)
+    if sink is None:
+        if bq_client is None:
+            raise ValueError("bq_client is required when no sink is given")
+        sink = BigQuerySink(bq_client, table_id)
+    return backfill_daily_ohlcv(roots, start_date, end_date, sink, client=databento_client,
+                                max_workers=max_workers, dry_run=dry_run)
@@ -0,0 +1,170 @@
+"""
+Parallel Databento daily OHLCV backfill engine.
+
+For each root the engine:
+1. asks the sink for the last date already stored and requests only the
+   days after it (reruns are idempotent and cheap);
+2. fetches `<ROOT>.FUT` ohlcv-1d bars (parent symbology) from GLBX.MDP3;
+3. drops spreads and keeps the highest-volume outright per date (front month
+   proxy), in the databento_futures_ohlcv_1d layout;
+4. appends the rows through the sink.
+
+Roots run concurrently in a thread pool (the work is network-bound). The
+transformation is shared with scripts/ingest/download_ALL_databento_historical.py.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+
+from cbi_v14.api.databento.sinks import DailyOHLCVSink
+from cbi_v14.markets.zl import ZL_ROOT_EXCHANGES
+
+try:
+    import databento as db
+    DATABENTO_AVAILABLE = True
+except ImportError:
+    DATABENTO_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DATABENTO_DATASET = "GLBX.MDP3"
+DEFAULT_MAX_WORKERS = 5
+
+
+def default_client():
+    """Databento Historical client from DATABENTO_API_KEY or ~/.databento.key."""
+    if not DATABENTO_AVAILABLE:
+        raise ImportError("databento not installed. Run: pip install databento")
+    api_key = os.environ.get("DATABENTO_API_KEY")
+    key_file = Path.home() / ".databento.key"
+    if not api_key and key_file.exists():
+        api_key = key_file.read_text().strip()
+    if not api_key:
+        raise RuntimeError("DATABENTO_API_KEY not set (or ~/.databento.key missing)")
+    return db.Historical(api_key)
+
+
+def to_daily_rows(df: pd.DataFrame, root: str, exchange: str,
+                  load_ts: Optional[datetime] = None) -> pd.DataFrame:
+    """Databento ohlcv-1d records (ts_event column) → one front-month row per date."""
+    if df.empty:
+        return pd.DataFrame()
+    if "symbol" in df.columns:
+        df = df[~df["symbol"].astype(str).str.contains("-", na=False)]
+        if df.empty:
+            return pd.DataFrame()
+
+    dates = pd.to_datetime(df["ts_event"], utc=True).dt.date
+    df = df.loc[df.groupby(dates)["volume"].idxmax()]
+    rows = pd.DataFrame({
+        "date": dates.loc[df.index],
+        "symbol": root,
+        "open": df["open"].astype(float),
+        "high": df["high"].astype(float),
+        "low": df["low"].astype(float),
+        "close": df["close"].astype(float),
+        "volume": df["volume"].astype("Int64"),
+        "settle": None,
+        "vwap": None,
+        "open_interest": None,
+        "instrument_id": df["instrument_id"].astype(str) if "instrument_id" in df.columns else None,
+        "exchange": exchange,
+        "currency": "USD",
+        "dataset": DATABENTO_DATASET,
+        "load_ts": load_ts or datetime.now(timezone.utc).replace(tzinfo=None),
+    })
+    return rows.sort_values("date").reset_index(drop=True)
+
+
+def fetch_daily_ohlcv(client, root: str, start: str, end: str) -> pd.DataFrame:
+    """Raw ohlcv-1d records for every contract of a root, ts_event as a column."""
+    data = client.timeseries.get_range(
+        dataset=DATABENTO_DATASET,
+        symbols=[f"{root}.FUT"],
+        schema="ohlcv-1d",
+        start=start,
+        end=end,
+        stype_in="parent",
+    )
+    return data.to_df().reset_index(drop=False)
+
+
+def _backfill_root(client, sink: DailyOHLCVSink, root: str, start: str, end: str,
+                   last_stored: Optional[pd.Timestamp]) -> Dict:
+    started = time.time()
+    raw = fetch_daily_ohlcv(client, root, start, end)
+    rows = to_daily_rows(raw, root, ZL_ROOT_EXCHANGES.get(root, "CME"))
+    if last_stored is not None and not rows.empty:
+        rows = rows[pd.to_datetime(rows["date"]) > last_stored]
+    written = sink.write(root, rows) if not rows.empty else 0
+    return {"root": root, "start": start, "rows": written, "seconds": time.time() - started}
+
+
+def backfill_daily_ohlcv(
+    roots: Sequence[str],
+    start_date: str,
+    end_date: Optional[str],
+    sink: DailyOHLCVSink,
+    client=None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    dry_run: bool = False,
+) -> int:
+    """
+    Backfill daily OHLCV for `roots` into `sink`, fetching roots concurrently.
+
+    Each root starts the day after the sink's last stored date (or at
+    start_date). End is exclusive and defaults to today. Returns rows written.
+    """
+    end_date = end_date or datetime.now().strftime("%Y-%m-%d")
+    start = pd.Timestamp(start_date)
+    last_dates = sink.max_dates(roots)
+
+    plan = {}
+    for root in roots:
+        last = last_dates.get(root)
+        root_start = max(start, last + pd.Timedelta(days=1)) if last is not None else start
+        if root_start < pd.Timestamp(end_date):
+            plan[root] = root_start.strftime("%Y-%m-%d")
+        elif last is not None:
+            logger.info(f"✅ {root}: up to date through {last.date()}")
+        else:
+            logger.info(f"⏭️  {root}: nothing to fetch ({root_start.date()} is not before {end_date})")
+
+    for root, root_start in plan.items():
+        logger.info(f"📊 {root}: {root_start} → {end_date}")
+    if dry_run or not plan:
+        return 0
+
+    client = client or default_client()
+    started = time.time()
+    total = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plan)))) as pool:
+        futures = {
+            pool.submit(_backfill_root, client, sink, root, root_start, end_date, last_dates.get(root)): root
+            for root, root_start in plan.items()
+        }
+        for future in as_completed(futures):
+            root = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.append(root)
+                logger.error(f"❌ {root}: {e}")
+                continue
+            total += result["rows"]
+            logger.info(f"✅ {root}: {result['rows']} rows ({result['seconds']:.1f}s)")
+
+    elapsed = time.time() - started
+    logger.info(f"Backfilled {total:,} rows for {len(plan) - len(failed)}/{len(plan)} roots "
+                f"in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    if failed:
+        logger.warning(f"⚠️ Failed roots (rerun resumes from the stored max date): {', '.join(sorted(failed))}")
+    return total
@@ -0,0 +1,113 @@
+"""
+Write targets for Databento daily OHLCV backfills.
+
+A sink knows two things: the last date it already holds per root (so a
+backfill only requests what is missing) and how to append new rows. The
+BigQuery sink is the production target; the Parquet sink writes the same
+rows to a local directory for offline runs and tests.
+"""
+
+import abc
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+
+def daily_bq_schema():
+    """Schema of market_data.databento_futures_ohlcv_1d."""
+    return [
+        bigquery.SchemaField("date", "DATE", mode="REQUIRED"),
+        bigquery.SchemaField("symbol", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("open", "FLOAT64"),
+        bigquery.SchemaField("high", "FLOAT64"),
+        bigquery.SchemaField("low", "FLOAT64"),
+        bigquery.SchemaField("close", "FLOAT64"),
+        bigquery.SchemaField("volume", "INT64"),
+        bigquery.SchemaField("settle", "FLOAT64"),
+        bigquery.SchemaField("vwap", "FLOAT64"),
+        bigquery.SchemaField("open_interest", "INT64"),
+        bigquery.SchemaField("instrument_id", "STRING"),
+        bigquery.SchemaField("exchange", "STRING"),
+        bigquery.SchemaField("currency", "STRING"),
+        bigquery.SchemaField("dataset", "STRING"),
+        bigquery.SchemaField("load_ts", "TIMESTAMP"),
+    ]
+
+
+class DailyOHLCVSink(abc.ABC):
+    """Interface: per-root high-water marks + append."""
+
+    @abc.abstractmethod
+    def max_dates(self, roots: Sequence[str]) -> Dict[str, Optional[pd.Timestamp]]:
+        """Last stored date per root (None for roots with no rows)."""
+
+    @abc.abstractmethod
+    def write(self, root: str, rows: pd.DataFrame) -> int:
+        """Append `rows` for `root`; returns rows written."""
+
+
+class BigQuerySink(DailyOHLCVSink):
+    """Append to a BigQuery daily OHLCV table (symbol column holds the root)."""
+
+    def __init__(self, bq_client: bigquery.Client,
+                 table_id: str = "cbi-v14.market_data.databento_futures_ohlcv_1d"):
+        self.bq_client = bq_client
+        self.table_id = table_id
+
+    def max_dates(self, roots: Sequence[str]) -> Dict[str, Optional[pd.Timestamp]]:
+        query = (
+            f"SELECT symbol, MAX(date) AS max_date FROM `{self.table_id}` "
+            "WHERE symbol IN UNNEST(@roots) GROUP BY symbol"
+        )
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter("roots", "STRING", list(roots))]
+        )
+        found = {row.symbol: pd.Timestamp(row.max_date)
+                 for row in self.bq_client.query(query, job_config=job_config).result()}
+        return {root: found.get(root) for root in roots}
+
+    def write(self, root: str, rows: pd.DataFrame) -> int:
+        job_config = bigquery.LoadJobConfig(
+            schema=daily_bq_schema(),
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        )
+        self.bq_client.load_table_from_dataframe(rows, self.table_id, job_config=job_config).result()
+        return len(rows)
+
+
+class ParquetSink(DailyOHLCVSink):
+    """Local stand-in for BigQuery: <root_dir>/symbol=<ROOT>/<first>_<last>.parquet."""
+
+    def __init__(self, root_dir):
+        self.root_dir = Path(root_dir)
+
+    def _files(self, root: str):
+        return sorted((self.root_dir / f"symbol={root}").glob("*.parquet"))
+
+    def max_dates(self, roots: Sequence[str]) -> Dict[str, Optional[pd.Timestamp]]:
+        result = {}
+        for root in roots:
+            dates = [pq.read_table(f, columns=["date"]).column("date").to_pandas() for f in self._files(root)]
+            dates = pd.concat(dates) if dates else pd.Series(dtype="datetime64[ns]")
+            result[root] = pd.Timestamp(dates.max()) if len(dates) else None
+        return result
+
+    def write(self, root: str, rows: pd.DataFrame) -> int:
+        out_dir = self.root_dir / f"symbol={root}"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        first, last = pd.Timestamp(rows["date"].min()), pd.Timestamp(rows["date"].max())
+        path = out_dir / f"{first:%Y-%m-%d}_{last:%Y-%m-%d}.parquet"
+        tmp = path.with_name(path.name + ".tmp")
+        rows.to_parquet(tmp, index=False)
+        tmp.replace(path)
+        return len(rows)
+
+    def read(self) -> pd.DataFrame:
+        """All stored rows (for inspection / tests)."""
+        files = sorted(self.root_dir.glob("symbol=*/*.parquet"))
+        if not files:
+            return pd.DataFrame()
+        return pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
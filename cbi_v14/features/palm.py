@@ -19,6 +19,8 @@ from typing import Dict
 import numpy as np
 import pandas as pd
 
+from src.utils.timeseries import rolling_pair_correlation
+
 
 @dataclass
 class PalmFeatureConfig:
@@ -105,16 +107,13 @@ def engineer_palm_features(
 
     # Rolling correlations between palm price and ZL close
     merged = merged.sort_values("date").set_index("date")
-    merged["palm_zl_corr_30d"] = (
-        merged["palm_price_monthly"]
-        .rolling(window=config.one_month_days, min_periods=config.corr_30d_min_periods)
-        .corr(merged["zl_close"])
-    )
-    merged["palm_zl_corr_90d"] = (
-        merged["palm_price_monthly"]
-        .rolling(window=config.three_month_days, min_periods=config.corr_90d_min_periods)
-        .corr(merged["zl_close"])
-    )
+    pair = [("palm_price_monthly", "zl_close")]
+    merged["palm_zl_corr_30d"] = rolling_pair_correlation(
+        merged, config.one_month_days, pairs=pair, min_periods=config.corr_30d_min_periods
+    ).iloc[:, 0]
+    merged["palm_zl_corr_90d"] = rolling_pair_correlation(
+        merged, config.three_month_days, pairs=pair, min_periods=config.corr_90d_min_periods
+    ).iloc[:, 0]
 
     merged = merged.reset_index()
 
@@ -25,3 +25,11 @@ ZL_HORIZON_DAYS: Dict[str, int] = {
     "12m": 240,
 }
 
+# Listing exchange per root (Databento GLBX.MDP3 covers all CME Group venues)
+ZL_ROOT_EXCHANGES: Dict[str, str] = {
+    "ZL": "CBOT",
+    "ZS": "CBOT",
+    "ZM": "CBOT",
+    "CL": "NYMEX",
+    "HO": "NYMEX",
+}
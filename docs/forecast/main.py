@@ -18,6 +18,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from google.cloud import bigquery
 import yfinance as yf
 
+from response_cache import ResponseCache, run_blocking
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,10 +40,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# BigQuery client
+# BigQuery client (shared by all handlers)
 PROJECT = "cbi-v14"
 client = bigquery.Client(project=PROJECT)
 
+# Query results are cached per endpoint (TTL seconds); concurrent identical
+# requests share one query, which runs in a worker pool off the event loop
+response_cache = ResponseCache()
+ENDPOINT_TTLS = {
+    "market_intelligence": 300,
+    "comprehensive_signals": 300,
+    "market_engine": 300,
+    "prices": 60,
+    "features": 3600,
+    "forecast_latest": 300,
+    "forecast_horizon": 300,
+    "predictions_history": 900,
+}
+
+def _run_query(query: str) -> pd.DataFrame:
+    return client.query(query).to_dataframe()
+
+async def cached_query(endpoint: str, query: str) -> pd.DataFrame:
+    """Query result for an endpoint, served from cache when fresh (treat as read-only)"""
+    return await response_cache.get_or_compute((endpoint, query), ENDPOINT_TTLS[endpoint], _run_query, query)
+
 # Import ONLY V4 model predictions router (all others DELETED to avoid confusion)
 try:
     from v4_model_predictions import router as v4_router
@@ -61,6 +84,10 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/admin/cache")
+async def cache_stats():
+    return response_cache.stats()
+
 # ============================================================================
 # MARKET INTELLIGENCE (ACADEMIC RIGOR)
 # ============================================================================
@@ -74,7 +101,7 @@ async def market_intelligence():
         ORDER BY date DESC
         LIMIT 1
         """
-        df = client.query(query).to_dataframe()
+        df = await cached_query("market_intelligence", query)
         
         if df.empty:
             raise HTTPException(status_code=404, detail="No market intelligence data found.")
@@ -127,7 +154,7 @@ async def comprehensive_signals():
         ORDER BY date DESC
         LIMIT 1
         """
-        df = client.query(query).to_dataframe()
+        df = await cached_query("comprehensive_signals", query)
         
         if df.empty:
             raise HTTPException(status_code=404, detail="No comprehensive signal data found.")
@@ -140,15 +167,24 @@ async def comprehensive_signals():
 # ============================================================================
 # MARKET SIGNAL ENGINE (ACADEMIC RIGOR)
 # ============================================================================
+_market_engine = None
+
+def get_market_engine():
+    """Shared engine so its signal cache survives across requests"""
+    global _market_engine
+    if _market_engine is None:
+        from market_signal_engine import MarketSignalEngine
+        _market_engine = MarketSignalEngine(project_id=PROJECT)
+    return _market_engine
+
 @app.get("/api/v1/signals/market-engine")
 async def market_signal_engine():
     """Get signals from market signal engine with academic rigor"""
     try:
-        # Import and use the market signal engine
-        from market_signal_engine import MarketSignalEngine
-        
-        engine = MarketSignalEngine()
-        forecast = engine.generate_market_forecast()
+        engine = get_market_engine()
+        forecast = await response_cache.get_or_compute(
+            ("market_engine",), ENDPOINT_TTLS["market_engine"], engine.generate_market_forecast
+        )
         
         return forecast
     except Exception as e:
@@ -171,7 +207,7 @@ async def get_prices():
         FROM `{PROJECT}.forecasting_data_warehouse.soybean_oil_prices`
         WHERE DATE(time) = (SELECT MAX(DATE(time)) FROM `{PROJECT}.forecasting_data_warehouse.soybean_oil_prices`)
         """
-        df = client.query(query).to_dataframe()
+        df = await cached_query("prices", query)
         return df.to_dict('records')
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -184,7 +220,7 @@ async def get_features():
         SELECT * FROM `{PROJECT}.forecasting_data_warehouse.feature_metadata`
         ORDER BY feature_name
         """
-        df = client.query(query).to_dataframe()
+        df = await cached_query("features", query)
         return df.to_dict('records')
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -238,20 +274,21 @@ async def upload_csv(dataFile: UploadFile = File(...)):
             raise HTTPException(status_code=400, detail=f"Cannot auto-detect table for filename: {dataFile.filename}. Supported keywords: crude, oil, brent, wti, soybean, corn, wheat, cotton, rapeseed, canola, palm, vix, treasury, bond, yield, note, 10, year, social, sentiment, volatility")
         
         # Standardize the dataframe
-        df_standardized = standardize_price_dataframe(df, table_name)
+        df_standardized = await run_blocking(standardize_price_dataframe, df, table_name)
         
         # Load to BigQuery
         table_id = f"{PROJECT}.forecasting_data_warehouse.{table_name}"
         
         # Get the actual table schema to match
-        table_ref = client.get_table(table_id)
+        table_ref = await run_blocking(client.get_table, table_id)
         job_config = bigquery.LoadJobConfig(
             write_disposition="WRITE_APPEND",
             schema=table_ref.schema
         )
         
-        job = client.load_table_from_dataframe(df_standardized, table_id, job_config=job_config)
-        job.result()
+        job = await run_blocking(client.load_table_from_dataframe, df_standardized, table_id, job_config=job_config)
+        await run_blocking(job.result)
+        response_cache.clear()  # uploaded rows change cached query results
         
         return {
             "message": "CSV uploaded successfully", 
@@ -287,13 +324,13 @@ async def upload_zip(dataFile: UploadFile = File(...)):
                     # Auto-detect table
                     table_name = auto_detect_table_name(filename)
                     if table_name:
-                        df_standardized = standardize_price_dataframe(df, table_name)
+                        df_standardized = await run_blocking(standardize_price_dataframe, df, table_name)
                         
                         # Load to BigQuery
                         table_id = f"{PROJECT}.forecasting_data_warehouse.{table_name}"
                         job_config = bigquery.LoadJobConfig(write_disposition="WRITE_APPEND")
-                        job = client.load_table_from_dataframe(df_standardized, table_id, job_config=job_config)
-                        job.result()
+                        job = await run_blocking(client.load_table_from_dataframe, df_standardized, table_id, job_config=job_config)
+                        await run_blocking(job.result)
                         
                         results.append({
                             "filename": filename,
@@ -301,6 +338,9 @@ async def upload_zip(dataFile: UploadFile = File(...)):
                             "rows_loaded": len(df_standardized)
                         })
         
+        if results:
+            response_cache.clear()  # uploaded rows change cached query results
+        
         return {
             "message": "ZIP uploaded successfully",
             "files_processed": len(results),
@@ -318,8 +358,6 @@ async def get_latest_vertex_predictions():
     Used by: https://cbi-dashboard.vercel.app
     """
     try:
-        client = bigquery.Client()
-        
         query = """
         SELECT 
             prediction_date,
@@ -347,7 +385,7 @@ async def get_latest_vertex_predictions():
         LIMIT 1
         """
         
-        results = client.query(query).to_dataframe()
+        results = await cached_query("forecast_latest", query)
         
         if results.empty:
             return {
@@ -415,8 +453,6 @@ async def get_horizon_forecast(horizon: str):
         }
     
     try:
-        client = bigquery.Client()
-        
         query = f"""
         SELECT 
             forecast_{horizon} as forecast,
@@ -431,7 +467,7 @@ async def get_horizon_forecast(horizon: str):
         LIMIT 1
         """
         
-        results = client.query(query).to_dataframe()
+        results = await cached_query("forecast_horizon", query)
         
         if results.empty:
             return {
@@ -469,8 +505,6 @@ async def get_predictions_history(days: int = 30):
     Returns all predictions from the last N days for analysis/backtesting
     """
     try:
-        client = bigquery.Client()
-        
         query = f"""
         SELECT 
             prediction_date,
@@ -493,7 +527,7 @@ async def get_predictions_history(days: int = 30):
         ORDER BY prediction_date DESC
         """
         
-        results = client.query(query).to_dataframe()
+        results = await cached_query("predictions_history", query)
         
         if results.empty:
             return {
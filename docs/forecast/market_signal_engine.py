@@ -23,20 +23,61 @@ from google.cloud import bigquery
 from typing import Dict, List, Tuple, Optional
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tables each computation reads; a cached result is reused only while none of
+# them has been modified since it was computed (and it is younger than the TTL).
+SIGNAL_TABLES = {
+    'vix_stress': ['forecasting_data_warehouse.volatility_data'],
+    'harvest_pace': ['forecasting_data_warehouse.weather_data',
+                     'staging.usda_harvest_progress',
+                     'staging.comprehensive_social_intelligence'],
+    'china_relations': ['staging.comprehensive_social_intelligence'],
+    'tariff_threat': ['staging.comprehensive_social_intelligence'],
+    'geopolitical_volatility': ['staging.comprehensive_social_intelligence'],
+    'biofuel_cascade': ['staging.biofuel_policy',
+                        'staging.comprehensive_social_intelligence'],
+    'hidden_correlation': ['forecasting_data_warehouse.soybean_oil_prices',
+                           'forecasting_data_warehouse.crude_oil_prices',
+                           'forecasting_data_warehouse.usd_index_prices',
+                           'forecasting_data_warehouse.palm_oil_prices',
+                           'staging.comprehensive_social_intelligence',
+                           'forecasting_data_warehouse.volatility_data'],
+    'current_price': ['forecasting_data_warehouse.soybean_oil_prices'],
+    'performance_metrics': ['forecasting_data_warehouse.soybean_oil_prices'],
+}
+
+# Signal windows are relative to CURRENT_TIMESTAMP, so results also expire
+SIGNAL_CACHE_TTL_SECONDS = 300
+# How long a snapshot of table last-modified times is trusted
+TABLE_METADATA_TTL_SECONDS = 60
+
+
 class MarketSignalEngine:
     """
     Neural-driven market signal generator implementing Big 7 signals
     with exact formulas from the Signal Scoring Manual
     """
     
-    def __init__(self, project_id: str = 'cbi-v14'):
+    def __init__(self, project_id: str = 'cbi-v14', cache_ttl: float = SIGNAL_CACHE_TTL_SECONDS,
+                 metadata_ttl: float = TABLE_METADATA_TTL_SECONDS, max_workers: int = 9):
         self.client = bigquery.Client(project=project_id)
         self.project_id = project_id
         
+        # Result cache: name -> (table versions, computed_at, result)
+        self.cache_ttl = cache_ttl
+        self.metadata_ttl = metadata_ttl
+        self._cache: Dict[str, Tuple[tuple, float, Dict]] = {}
+        self._table_versions: Dict[str, int] = {}
+        self._table_versions_at = 0.0
+        self._cache_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        
         # Crisis thresholds - SOYBEAN-SPECIFIC CALIBRATION
         self.crisis_thresholds = {
             'vix_stress': 2.0,            # VIX > 28 for soybean markets
@@ -814,16 +855,9 @@ class MarketSignalEngine:
         Generate comprehensive market forecast using Big 7 signals
         with neural network weighting and crisis detection
         """
-        # Calculate all Big 7 signals
-        signals = {
-            'vix_stress': self.calculate_vix_stress(),
-            'harvest_pace': self.calculate_harvest_pace(),
-            'china_relations': self.calculate_china_relations(),
-            'tariff_threat': self.calculate_tariff_threat(),
-            'geopolitical_volatility': self.calculate_geopolitical_volatility(),
-            'biofuel_cascade': self.calculate_biofuel_cascade(),
-            'hidden_correlation': self.calculate_hidden_correlations()
-        }
+        # Calculate all Big 7 signals (+ price and metrics) concurrently, reusing cached results
+        results = self.calculate_all_signals()
+        signals = {name: results[name] for name in self.signal_weights}
         
         # Calculate crisis intensity and regime
         crisis_intensity = self.calculate_crisis_intensity(signals)
@@ -846,21 +880,7 @@ class MarketSignalEngine:
         
         composite_signal = weighted_sum / total_weight
         
-        # Get REAL current ZL price from database
-        price_query = f"""
-        SELECT close as current_zl_price
-        FROM `{self.project_id}.forecasting_data_warehouse.soybean_oil_prices`
-        ORDER BY time DESC
-        LIMIT 1
-        """
-        try:
-            price_result = self.client.query(price_query).to_dataframe()
-            if price_result.empty:
-                raise ValueError("NO ZL PRICE DATA AVAILABLE - CANNOT GENERATE FORECAST")
-            base_price = price_result['current_zl_price'].iloc[0]
-        except Exception as e:
-            logger.error(f"Failed to get ZL price: {e}")
-            raise ValueError(f"CANNOT GET ZL PRICE: {e}")
+        base_price = results['current_price']['price']
         
         # Calculate price forecasts based on composite signal and regime
         regime_multipliers = {
@@ -947,8 +967,116 @@ class MarketSignalEngine:
             'recommendation': recommendation,
             'action': action,
             'primary_driver': primary_driver.replace('_', ' ').title(),
-            'performance_metrics': self.calculate_real_performance_metrics()
+            'performance_metrics': results['performance_metrics']
+        }
+    
+    def get_current_price(self) -> Dict:
+        """Latest REAL ZL price from the database"""
+        price_query = f"""
+        SELECT close as current_zl_price
+        FROM `{self.project_id}.forecasting_data_warehouse.soybean_oil_prices`
+        ORDER BY time DESC
+        LIMIT 1
+        """
+        try:
+            price_result = self.client.query(price_query).to_dataframe()
+            if price_result.empty:
+                raise ValueError("NO ZL PRICE DATA AVAILABLE - CANNOT GENERATE FORECAST")
+            return {'price': price_result['current_zl_price'].iloc[0]}
+        except Exception as e:
+            logger.error(f"Failed to get ZL price: {e}")
+            raise ValueError(f"CANNOT GET ZL PRICE: {e}")
+    
+    def _refresh_table_versions(self) -> Dict[str, int]:
+        """
+        Last-modified time (ms) of every table the signals read, fetched in one
+        metadata query and trusted for metadata_ttl seconds.
+        """
+        now = time.monotonic()
+        if self._table_versions and now - self._table_versions_at < self.metadata_ttl:
+            return self._table_versions
+        
+        datasets = sorted({t.split('.')[0] for tables in SIGNAL_TABLES.values() for t in tables})
+        query = "\nUNION ALL\n".join(
+            f"SELECT '{ds}' AS dataset_id, table_id, last_modified_time "
+            f"FROM `{self.project_id}.{ds}.__TABLES__`"
+            for ds in datasets
+        )
+        try:
+            meta = self.client.query(query).to_dataframe()
+            versions = {
+                f"{row.dataset_id}.{row.table_id}": int(row.last_modified_time)
+                for row in meta.itertuples(index=False)
+            }
+        except Exception as e:
+            # Without metadata, fall back to TTL-only expiry
+            logger.warning(f"Could not read table metadata: {e}")
+            versions = {}
+        
+        self._table_versions = versions
+        self._table_versions_at = now
+        return versions
+    
+    def _cached_result(self, name: str, versions: Dict[str, int]) -> Optional[Dict]:
+        key = tuple(versions.get(t) for t in SIGNAL_TABLES[name])
+        with self._cache_lock:
+            entry = self._cache.get(name)
+        if entry is None:
+            return None
+        cached_key, computed_at, result = entry
+        if cached_key != key or time.monotonic() - computed_at > self.cache_ttl:
+            return None
+        return result
+    
+    def calculate_all_signals(self) -> Dict[str, Dict]:
+        """
+        Big 7 signals, current price and performance metrics.
+        
+        Cached results are reused while their source tables are unchanged and
+        the TTL has not expired; everything else is queried concurrently, so a
+        cold call costs one query round-trip instead of nine sequential ones.
+        """
+        calculators = {
+            'vix_stress': self.calculate_vix_stress,
+            'harvest_pace': self.calculate_harvest_pace,
+            'china_relations': self.calculate_china_relations,
+            'tariff_threat': self.calculate_tariff_threat,
+            'geopolitical_volatility': self.calculate_geopolitical_volatility,
+            'biofuel_cascade': self.calculate_biofuel_cascade,
+            'hidden_correlation': self.calculate_hidden_correlations,
+            'current_price': self.get_current_price,
+            'performance_metrics': self.calculate_real_performance_metrics,
         }
+        versions = self._refresh_table_versions()
+        
+        results = {}
+        pending = {}
+        for name, fn in calculators.items():
+            cached = self._cached_result(name, versions)
+            if cached is not None:
+                results[name] = cached
+            else:
+                pending[name] = self._pool.submit(fn)
+        
+        for name, future in pending.items():
+            # Errors propagate exactly as from the sequential calls
+            results[name] = future.result()
+            if results[name].get('data_available') is False:
+                continue  # don't pin a failed metrics lookup for the whole TTL
+            key = tuple(versions.get(t) for t in SIGNAL_TABLES[name])
+            with self._cache_lock:
+                self._cache[name] = (key, time.monotonic(), results[name])
+        
+        if pending:
+            logger.info(f"Computed {len(pending)} signal queries concurrently, {len(results) - len(pending)} from cache")
+        return results
+    
+    def clear_cache(self):
+        """Drop cached signal results and table metadata"""
+        with self._cache_lock:
+            self._cache.clear()
+        self._table_versions = {}
+        self._table_versions_at = 0.0
     
     def calculate_real_performance_metrics(self) -> Dict:
         """
@@ -0,0 +1,99 @@
+"""
+Response cache for the forecast API.
+
+- Per-endpoint TTL cache of computed responses
+- Request coalescing: concurrent identical requests share one computation
+- Blocking BigQuery work runs in a worker pool, never on the event loop
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Worker pool for blocking client.query(...).to_dataframe() calls
+QUERY_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BQ_QUERY_WORKERS", "8")),
+    thread_name_prefix="bq-query"
+)
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking function in the query pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(QUERY_POOL, partial(fn, *args, **kwargs))
+
+
+class ResponseCache:
+    """TTL cache with in-flight request coalescing (single event loop)"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0  # bumped by clear()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_compute(self, key: Hashable, ttl: float, fn: Callable, *args) -> Any:
+        """
+        Return the cached value for key, or compute it with fn(*args) in the
+        query pool. The computation runs as a cache-owned task that every
+        caller (the first one included) awaits through a shield: cancelling a
+        request only detaches that request, and the result is still cached
+        for the others. Exceptions are propagated to every waiter and not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._compute(key, ttl, self._generation, fn, *args))
+            # Retrieve the exception even if every caller has detached
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: Hashable, ttl: float, generation: int, fn: Callable, *args) -> Any:
+        try:
+            value = await run_blocking(fn, *args)
+            if generation == self._generation:  # not invalidated by clear() meanwhile
+                self._store(key, ttl, value)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def _store(self, key: Hashable, ttl: float, value: Any):
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            if len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def clear(self):
+        """Drop cached values; computations already running are not cached."""
+        self._generation += 1
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced
+        }
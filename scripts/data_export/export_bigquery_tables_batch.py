@@ -2,11 +2,16 @@
 """Batch-export BigQuery tables to local Parquet files for local training/archive."""
 
 import argparse
+import shutil
+import sys
 from pathlib import Path
 
 import pandas as pd
 from google.cloud import bigquery
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.utils.bq_arrow_export import ArrowTableExporter, BQ_STORAGE_AVAILABLE
+
 DEFAULT_MANIFEST = "GPT_Data/inventory_340_objects.csv"
 DEFAULT_RAW_DIR = "TrainingData/raw"
 DEFAULT_REPO_COPY_DIR = "GPT_Data/raw_exports"
@@ -20,9 +25,12 @@ def load_manifest(manifest_path: Path, dataset_filter: str | None) -> pd.DataFra
     return df
 
 
-def export_table(client: bigquery.Client, project: str, dataset: str, table: str, table_type: str, raw_dir: Path, repo_dir: Path | None):
+def export_table(client: bigquery.Client, project: str, dataset: str, table: str, table_type: str, raw_dir: Path, repo_dir: Path | None,
+                 exporter: ArrowTableExporter | None = None, incremental: bool = True):
     table_id = f"{project}.{dataset}.{table}"
     print(f"📥 Exporting {table_id} ({table_type})...")
+    if exporter is not None:
+        return export_table_arrow(exporter, table_id, dataset, table, raw_dir, repo_dir, incremental)
     try:
         query = f"SELECT * FROM `{table_id}`"
         df = client.query(query).to_dataframe()
@@ -43,6 +51,27 @@ def export_table(client: bigquery.Client, project: str, dataset: str, table: str
         print(f"   ❌ ERROR exporting {table_id}: {e}")
 
 
+def export_table_arrow(exporter: ArrowTableExporter, table_id: str, dataset: str, table: str, raw_dir: Path, repo_dir: Path | None, incremental: bool):
+    """Stream the table as Arrow batches straight into Parquet (only new dates when incremental)."""
+    try:
+        target_dir = raw_dir / dataset
+        target_dir.mkdir(parents=True, exist_ok=True)
+        raw_path = target_dir / f"{table}.parquet"
+        result = exporter.export(table_id, raw_path, incremental=incremental)
+        print(f"   Rows: {result.rows_total:,} ({result.rows_written:,} new, {result.rows_per_sec:,.0f} rows/sec)")
+        if not raw_path.exists():
+            return
+        print(f"   ✅ Saved raw copy to {raw_path}")
+
+        if repo_dir:
+            repo_dir.mkdir(parents=True, exist_ok=True)
+            repo_path = repo_dir / f"{dataset}.{table}.parquet"
+            shutil.copyfile(raw_path, repo_path)
+            print(f"   ✅ Saved repo copy to {repo_path}")
+    except Exception as e:
+        print(f"   ❌ ERROR exporting {table_id}: {e}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Batch export BigQuery tables to Parquet.")
     parser.add_argument("--project", default="cbi-v14", help="BigQuery project ID")
@@ -50,10 +79,15 @@ def main():
     parser.add_argument("--dataset", default=None, help="Dataset name to filter (default: ALL datasets)")
     parser.add_argument("--raw-dir", default=DEFAULT_RAW_DIR, help="Local raw directory (default TrainingData/raw)")
     parser.add_argument("--repo-copy", default=DEFAULT_REPO_COPY_DIR, help="Repo copy directory (set empty string to skip)")
+    parser.add_argument("--legacy-query", action="store_true", help="Use SELECT * + to_dataframe instead of the Storage API")
+    parser.add_argument("--full", action="store_true", help="Re-export full tables instead of only new dates")
 
     args = parser.parse_args()
 
     client = bigquery.Client(project=args.project)
+    exporter = None
+    if BQ_STORAGE_AVAILABLE and not args.legacy_query:
+        exporter = ArrowTableExporter(args.project, client=client)
 
     manifest_path = Path(args.manifest)
     if not manifest_path.exists():
@@ -70,7 +104,8 @@ def main():
         print(f"Datasets: {df['dataset_name'].nunique()}")
 
     for _, row in df.iterrows():
-        export_table(client, args.project, row["dataset_name"], row["table_name"], row.get("table_type", "UNKNOWN"), raw_dir, repo_dir)
+        export_table(client, args.project, row["dataset_name"], row["table_name"], row.get("table_type", "UNKNOWN"), raw_dir, repo_dir,
+                     exporter=exporter, incremental=not args.full)
 
     print("\nAll exports complete.")
 
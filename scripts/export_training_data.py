@@ -10,6 +10,9 @@ from google.cloud import bigquery
 import pandas as pd
 import sys
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.utils.bq_arrow_export import ArrowTableExporter, BQ_STORAGE_AVAILABLE
+
 PROJECT_ID = os.getenv("PROJECT", "cbi-v14")
 
 def get_repo_root():
@@ -25,14 +28,21 @@ def get_repo_root():
     # Fallback: go up 2 levels from scripts/
     return current_path.parent.parent
 
-def export_training_data(horizon: str, surface: str = "prod", output_dir: Path = None):
+def export_training_data(horizon: str, surface: str = "prod", output_dir: Path = None,
+                         incremental: bool = True, columns: list = None):
     """
     Export training data from BigQuery to Parquet.
     
+    Streams the table through the BigQuery Storage API as Arrow batches when
+    google-cloud-bigquery-storage is installed (only the local export's last
+    date onward is read); otherwise falls back to a full query export.
+    
     Args:
         horizon: One of '1w', '1m', '3m', '6m', '12m'
         surface: 'prod' (≈290 cols) or 'full' (1,948+ cols)
         output_dir: Output directory (default: TrainingData/exports)
+        incremental: Only pull from the existing local export's last date on
+        columns: Optional column subset (Arrow path only)
     """
     client = bigquery.Client(project=PROJECT_ID)
     
@@ -49,6 +59,26 @@ def export_training_data(horizon: str, surface: str = "prod", output_dir: Path =
     
     print(f"Exporting {table_ref} → {output_file}")
     
+    if BQ_STORAGE_AVAILABLE:
+        try:
+            exporter = ArrowTableExporter(PROJECT_ID, client=client)
+            result = exporter.export(table_ref, output_file, columns=columns, incremental=incremental)
+            if result.rows_total == 0:
+                print(f"  ⚠️  No data found")
+                return False
+            if result.since is not None:
+                print(f"  🔄 Incremental: rows after {result.since}")
+            print(f"  ✅ Exported {result.rows_written:,} new rows ({result.rows_total:,} total) "
+                  f"in {result.seconds:.1f}s")
+            print(f"  📁 Saved to: {output_file}")
+            return True
+        except Exception as e:
+            print(f"  ❌ Export failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    print("  ℹ️  google-cloud-bigquery-storage not installed – using query export")
     try:
         # Query data
         query = f"SELECT * FROM `{table_ref}` ORDER BY date"
@@ -92,7 +122,7 @@ def export_training_data(horizon: str, surface: str = "prod", output_dir: Path =
         traceback.print_exc()
         return False
 
-def export_all_horizons(surface: str = "prod"):
+def export_all_horizons(surface: str = "prod", incremental: bool = True):
     """Export all horizons."""
     horizons = ["1w", "1m", "3m", "6m", "12m"]
     
@@ -103,7 +133,7 @@ def export_all_horizons(surface: str = "prod"):
     
     results = []
     for horizon in horizons:
-        success = export_training_data(horizon, surface)
+        success = export_training_data(horizon, surface, incremental=incremental)
         results.append(success)
         print()
     
@@ -122,14 +152,19 @@ def main():
     parser.add_argument("--surface", choices=["prod", "full"], default="prod",
                        help="Surface type: prod (≈290 cols) or full (1,948+ cols)")
     parser.add_argument("--output-dir", type=str, help="Output directory")
+    parser.add_argument("--full", action="store_true",
+                       help="Re-export full history instead of only new dates")
+    parser.add_argument("--columns", type=str, help="Comma-separated column subset")
     
     args = parser.parse_args()
     
     if args.horizon == "all":
-        success = export_all_horizons(args.surface)
+        success = export_all_horizons(args.surface, incremental=not args.full)
     else:
         output_dir = Path(args.output_dir) if args.output_dir else None
-        success = export_training_data(args.horizon, args.surface, output_dir)
+        columns = args.columns.split(",") if args.columns else None
+        success = export_training_data(args.horizon, args.surface, output_dir,
+                                       incremental=not args.full, columns=columns)
     
     sys.exit(0 if success else 1)
 
@@ -34,6 +34,7 @@ from src.utils.timeseries import (
     macd,
     realized_volatility,
     range_volatility,
+    rolling_pair_correlation,
     seasonal_adjustment_rolling,
 )
 
@@ -221,20 +222,25 @@ def calculate_cross_asset_features(df):
     # Sort by date
     df = df.sort_values('date').copy()
     
+    # Correlations (30-day and 90-day rolling) of the base price with every asset, one pass per window
+    pairs = [(base_price, col) for col in available_assets.values()]
+    corr_blocks = {}
+    for period in [30, 90]:
+        if 'symbol' in df.columns:
+            # Multi-symbol: calculate per symbol, then restore row order
+            frame = df[[base_price, *available_assets.values()]].reset_index(drop=True)
+            block = pd.concat([
+                rolling_pair_correlation(group, period, pairs=pairs, min_periods=period//2)
+                for _, group in frame.groupby(df['symbol'].to_numpy(), sort=False, dropna=False)
+            ]).sort_index()
+        else:
+            block = rolling_pair_correlation(df, period, pairs=pairs, min_periods=period//2)
+        corr_blocks[period] = block.to_numpy()
+    
     # Calculate features for each cross-asset
-    for asset, col in available_assets.items():
-        # Correlations (30-day and 90-day rolling)
+    for i, (asset, col) in enumerate(available_assets.items()):
         for period in [30, 90]:
-            if 'symbol' in df.columns:
-                # Multi-symbol: calculate per symbol
-                corr_values = []
-                for symbol in df['symbol'].unique():
-                    mask = df['symbol'] == symbol
-                    symbol_corr = df.loc[mask, base_price].rolling(window=period, min_periods=period//2).corr(df.loc[mask, col])
-                    corr_values.extend(symbol_corr.values)
-                df[f'cross_corr_{asset}_{period}d'] = corr_values
-            else:
-                df[f'cross_corr_{asset}_{period}d'] = df[base_price].rolling(window=period, min_periods=period//2).corr(df[col])
+            df[f'cross_corr_{asset}_{period}d'] = corr_blocks[period][:, i]
         
         # Spreads (price differences)
         df[f'cross_spread_{asset}'] = df[base_price] - df[col]
@@ -6,17 +6,29 @@ Inputs:
 - TrainingData/staging/mes_15min.parquet (datetime, mes_open, mes_high, mes_low, mes_close, mes_volume)
 
 Outputs:
-- TrainingData/staging/mes_15min_features.parquet (datetime + mes15_* features)
+- TrainingData/staging/mes_15min_features/date=YYYY-MM-DD/part-0.parquet (datetime + mes15_* features)
+- TrainingData/staging/mes_15min_features/_state.json (indicator state for incremental refresh)
 
 Features (minimal, no external deps):
 - Momentum: RSI(14), MACD(12,26,9)
 - Volatility: ATR(14), Bollinger(20,2) width/position
-- Trend alignment: 60min/240min SMA distances sampled to 15m grid
+- Trend alignment: 60min/240min SMA distances, as-of the last completed 60/240min bucket
 - Daily pivots (from prior day OHLC) and distances
+
+Incremental refresh (default): only bars after the last processed bar are
+computed. The rolling terms (RSI/Bollinger/ATR, trend MAs, prior-day pivots)
+are recomputed over a short look-back of source bars, the MACD EMAs are
+continued from their saved values, and only the date partitions that received
+new bars are rewritten. Cheap enough to run every 15 minutes in session;
+`--full` rebuilds everything.
 """
 
 from pathlib import Path
+import argparse
+import json
 import logging
+import shutil
+from typing import Optional
 import pandas as pd
 import numpy as np
 
@@ -25,7 +37,13 @@ logger = logging.getLogger(__name__)
 
 DRIVE = Path('/Volumes/Satechi Hub/Projects/CBI-V14')
 SRC = DRIVE / 'TrainingData/staging/mes_15min.parquet'
-OUT = DRIVE / 'TrainingData/staging/mes_15min_features.parquet'
+OUT_DIR = DRIVE / 'TrainingData/staging/mes_15min_features'
+
+BAR = pd.Timedelta(minutes=15)
+# Source look-back loaded ahead of the first new bar. Covers the longest window
+# (20 × 240min trend buckets = 80h) plus weekend/holiday closures.
+LOOKBACK = pd.Timedelta(days=7)
+PIVOT_COLS = ['pivot', 'r1', 's1', 'r2', 's2']
 
 def rsi(series: pd.Series, period: int = 14) -> pd.Series:
     delta = series.diff()
@@ -34,13 +52,21 @@ def rsi(series: pd.Series, period: int = 14) -> pd.Series:
     rs = gain / (loss.replace(0, np.nan))
     return 100 - (100 / (1 + rs))
 
-def macd(series: pd.Series, fast=12, slow=26, signal=9):
-    ema_fast = series.ewm(span=fast, adjust=False).mean()
-    ema_slow = series.ewm(span=slow, adjust=False).mean()
+def ema(series: pd.Series, span: int, seed: Optional[float] = None) -> pd.Series:
+    """EMA (adjust=False); with `seed`, continues from the EMA value just before the series."""
+    if seed is None:
+        return series.ewm(span=span, adjust=False).mean()
+    seeded = pd.concat([pd.Series([seed]), series], ignore_index=True)
+    return pd.Series(seeded.ewm(span=span, adjust=False).mean().to_numpy()[1:], index=series.index)
+
+def macd(series: pd.Series, fast=12, slow=26, signal=9, seeds: Optional[dict] = None):
+    seeds = seeds or {}
+    ema_fast = ema(series, fast, seeds.get('ema_fast'))
+    ema_slow = ema(series, slow, seeds.get('ema_slow'))
     line = ema_fast - ema_slow
-    sig = line.ewm(span=signal, adjust=False).mean()
+    sig = ema(line, signal, seeds.get('macd_signal'))
     hist = line - sig
-    return line, sig, hist
+    return line, sig, hist, {'ema_fast': ema_fast, 'ema_slow': ema_slow, 'macd_signal': sig}
 
 def atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     hl = df['mes_high'] - df['mes_low']
@@ -62,24 +88,23 @@ def daily_pivots(df: pd.DataFrame) -> pd.DataFrame:
     # Index is already datetime from groupby on normalized datetime
     return daily_feat
 
-def trend_ma(df: pd.DataFrame, rule: str) -> pd.Series:
-    r = df.set_index('datetime').resample(rule).agg({'mes_close':'last'}).ffill()
-    ma = r['mes_close'].rolling(20, min_periods=5).mean()
-    # map back to 15m grid
-    ma_upsampled = ma.reindex(df.set_index('datetime').index, method='ffill')
-    return ma_upsampled.reset_index(drop=True)
+def trend_ma(df: pd.DataFrame, minutes: int, window: int = 20) -> pd.Series:
+    """
+    SMA of `minutes`-bucket closes, as-of each 15m bar: the latest bucket that
+    has completed by the bar's close (no look-ahead into the running bucket).
+    """
+    step = pd.Timedelta(minutes=minutes)
+    buckets = df.set_index('datetime')['mes_close'].resample(step).last().ffill()
+    ma = buckets.rolling(window, min_periods=5).mean()
+    completed = pd.DataFrame({'t': ma.index + step, 'ma': ma.to_numpy()})
+    bars = pd.DataFrame({'t': df['datetime'] + BAR})
+    return pd.Series(pd.merge_asof(bars, completed, on='t')['ma'].to_numpy(), index=df.index)
 
-def main():
-    if not SRC.exists():
-        logger.error(f"Missing source: {SRC}")
-        return
-    df = pd.read_parquet(SRC)
-    df['datetime'] = pd.to_datetime(df['datetime'])
-    df = df.sort_values('datetime').reset_index(drop=True)
-
-    # Momentum/volatility
+def compute_features(df: pd.DataFrame):
+    """mes15_* features for sorted bars; returns (features, EMA series for the state)."""
+    df = df.copy()
     df['mes15_rsi_14'] = rsi(df['mes_close'], 14)
-    macd_line, macd_sig, macd_hist = macd(df['mes_close'])
+    macd_line, macd_sig, macd_hist, emas = macd(df['mes_close'])
     df['mes15_macd_line'] = macd_line
     df['mes15_macd_signal'] = macd_sig
     df['mes15_macd_hist'] = macd_hist
@@ -92,26 +117,162 @@ def main():
     df['mes15_bb_pos'] = (df['mes_close'] - df['mes15_bb_lower']) / (df['mes15_bb_width'] + 1e-10)
     df['mes15_atr_14'] = atr(df, 14)
 
-    # Trend alignment (1h and 4h MAs mapped to 15m grid)
-    df['mes15_ma_60min'] = trend_ma(df, '60T')
-    df['mes15_ma_240min'] = trend_ma(df, '240T')
+    # Trend alignment (1h and 4h MAs as-of the 15m bar)
+    df['mes15_ma_60min'] = trend_ma(df, 60)
+    df['mes15_ma_240min'] = trend_ma(df, 240)
     df['mes15_dist_ma60'] = (df['mes_close'] - df['mes15_ma_60min']) / (df['mes15_ma_60min'] + 1e-10)
     df['mes15_dist_ma240'] = (df['mes_close'] - df['mes15_ma_240min']) / (df['mes15_ma_240min'] + 1e-10)
 
-    # Daily pivots & distances
-    piv = daily_pivots(df)
-    dd = df.copy()
-    dd['date'] = dd['datetime'].dt.normalize()
-    piv = piv.reindex(dd['date']).reset_index(drop=True)
-    for col in ['pivot','r1','s1','r2','s2']:
-        df[f'mes15_pivot_{col}'] = piv[col].values
-        df[f'mes15_dist_{col}'] = (df['mes_close'] - piv[col].values) / (piv[col].values + 1e-10)
+    # Daily pivots & distances (prior day's HLC mapped onto each bar's date)
+    piv = daily_pivots(df).reindex(df['datetime'].dt.normalize())
+    for col in PIVOT_COLS:
+        values = piv[col].to_numpy()
+        df[f'mes15_pivot_{col}'] = values
+        df[f'mes15_dist_{col}'] = (df['mes_close'] - values) / (values + 1e-10)
+
+    return df[['datetime'] + [c for c in df.columns if c.startswith('mes15_')]], emas
+
+
+class MES15FeatureEngine:
+    """
+    Date-partitioned mes15_* feature store with incremental refresh.
+
+    State (_state.json in the output dir):
+    - last_datetime: last bar written
+    - ema_at / emas: MACD EMA values at the last bar with a close, used as
+      seeds so continued EMAs equal a full recompute
+    """
+
+    def __init__(self, src: Path = SRC, out_dir: Path = OUT_DIR):
+        self.src = Path(src)
+        self.out_dir = Path(out_dir)
+        self.state_path = self.out_dir / '_state.json'
+
+    def _read_source(self, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        filters = [('datetime', '>=', since)] if since is not None else None
+        df = pd.read_parquet(self.src, filters=filters)
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        return df.sort_values('datetime').reset_index(drop=True)
+
+    @staticmethod
+    def _completed(df: pd.DataFrame, now: Optional[pd.Timestamp]) -> pd.DataFrame:
+        """Drop the bar still being built (its 15 minutes have not elapsed)."""
+        if df.empty:
+            return df
+        tz = df['datetime'].dt.tz
+        now = now or (pd.Timestamp.now(tz=tz) if tz is not None else pd.Timestamp.now())
+        return df[df['datetime'] + BAR <= now]
+
+    def _state_from(self, df: pd.DataFrame, emas: dict) -> dict:
+        valid = df['mes_close'].notna().to_numpy()
+        last = int(np.flatnonzero(valid)[-1]) if valid.any() else None
+        return {
+            'last_datetime': df['datetime'].iloc[-1].isoformat(),
+            'ema_at': df['datetime'].iloc[last].isoformat() if last is not None else None,
+            'emas': {k: float(v.iloc[last]) for k, v in emas.items()} if last is not None else {},
+            'updated_at': pd.Timestamp.now().isoformat(),
+        }
+
+    def _write_dates(self, features: pd.DataFrame) -> int:
+        """
+        Rewrite one partition per date in `features` (tmp file + atomic replace).
 
-    # Save
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    df[['datetime'] + [c for c in df.columns if c.startswith('mes15_')]].to_parquet(OUT, index=False)
-    logger.info(f"Saved {len(df)} rows × features to {OUT}")
+        The tmp name starts with '_', which Parquet dataset readers skip, so a
+        file left behind by a crash never breaks `pd.read_parquet(out_dir)`.
+        """
+        dates = features['datetime'].dt.strftime('%Y-%m-%d')
+        for date, part in features.groupby(dates, sort=True):
+            part_dir = self.out_dir / f"date={date}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            tmp = part_dir / '_part-0.parquet.tmp'
+            part.to_parquet(tmp, index=False)
+            tmp.replace(part_dir / 'part-0.parquet')
+        return dates.nunique()
+
+    def _save_state(self, state: dict):
+        tmp = self.state_path.with_suffix('.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=2)
+        tmp.replace(self.state_path)
+
+    def build(self, now: Optional[pd.Timestamp] = None) -> int:
+        """Full rebuild of every partition; returns rows written."""
+        df = self._completed(self._read_source(), now)
+        if df.empty:
+            logger.warning(f"No bars in {self.src}")
+            return 0
+        features, emas = compute_features(df)
+        if self.out_dir.exists():
+            shutil.rmtree(self.out_dir)
+        self.out_dir.mkdir(parents=True)
+        n_dates = self._write_dates(features)
+        self._save_state(self._state_from(df, emas))
+        logger.info(f"Saved {len(features)} rows × features in {n_dates} date partitions to {self.out_dir}")
+        return len(features)
+
+    def refresh(self, now: Optional[pd.Timestamp] = None) -> int:
+        """Append features for bars after the last processed one; returns new rows."""
+        if not self.state_path.exists():
+            logger.info("No mes15 feature state found – running full build")
+            return self.build(now)
+        with open(self.state_path) as f:
+            state = json.load(f)
+        last = pd.Timestamp(state['last_datetime'])
+        ema_at = pd.Timestamp(state['ema_at']) if state.get('ema_at') else None
+
+        df = self._completed(self._read_source(last - LOOKBACK), now)
+        new = df['datetime'] > last
+        if not new.any():
+            logger.info(f"mes15 features up to date (last bar {last})")
+            return 0
+
+        # Rolling terms: recompute over the look-back window
+        features, _ = compute_features(df)
+        # EMAs: continue from the saved values at the last bar with a close
+        seeded = (df['datetime'] > ema_at) if ema_at is not None else pd.Series(True, index=df.index)
+        line, sig, hist, emas = macd(df.loc[seeded, 'mes_close'], seeds=state.get('emas') or None)
+        features.loc[seeded, 'mes15_macd_line'] = line
+        features.loc[seeded, 'mes15_macd_signal'] = sig
+        features.loc[seeded, 'mes15_macd_hist'] = hist
+
+        new_features = features[new]
+        touched = new_features['datetime'].dt.normalize().unique()
+        # Partitions of the touched dates: stored rows + new rows
+        stored = [
+            pd.read_parquet(self.out_dir / f"date={d.strftime('%Y-%m-%d')}" / 'part-0.parquet')
+            for d in touched
+            if (self.out_dir / f"date={d.strftime('%Y-%m-%d')}" / 'part-0.parquet').exists()
+        ]
+        stored = [s[pd.to_datetime(s['datetime']) <= last] for s in stored]
+        self._write_dates(pd.concat(stored + [new_features], ignore_index=True))
+
+        if df.loc[seeded, 'mes_close'].notna().any():
+            state = self._state_from(df[seeded], emas)
+        state['last_datetime'] = df['datetime'].iloc[-1].isoformat()
+        self._save_state(state)
+        logger.info(f"Appended {len(new_features)} bars ({new_features['datetime'].min()} → "
+                    f"{new_features['datetime'].max()}) to {len(touched)} date partition(s)")
+        return len(new_features)
+
+
+def load_features(out_dir: Path = OUT_DIR) -> pd.DataFrame:
+    """All partitions as one frame (datetime + mes15_*), sorted by datetime."""
+    parts = sorted(Path(out_dir).glob('date=*/part-0.parquet'))
+    if not parts:
+        return pd.DataFrame()
+    df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+    return df.sort_values('datetime').reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='MES 15-minute micro-confirmation features')
+    parser.add_argument('--full', action='store_true', help='Rebuild all partitions instead of appending new bars')
+    args = parser.parse_args()
+
+    if not SRC.exists():
+        logger.error(f"Missing source: {SRC}")
+        return
+    engine = MES15FeatureEngine()
+    engine.build() if args.full else engine.refresh()
 
 if __name__ == '__main__':
     main()
-
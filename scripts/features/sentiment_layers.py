@@ -19,15 +19,27 @@ This module calculates 9 orthogonal sentiment layers that drive procurement deci
 
 Output: raw_intelligence.sentiment_daily with procurement_sentiment_index + pinball triggers
 
+Incremental refresh: SentimentLayerEngine keeps per-input watermarks and the
+running moments behind every full-history z-score, so a daily refresh only
+recomputes the dates that have new inputs (plus a per-input row lookback for the
+shift/rolling terms) instead of rebuilding 2000-01-01 to today. Layers are
+computed in parallel and the title filters are pre-compiled regexes.
+
 Author: AI Assistant
 Date: November 19, 2025
 Status: Production - Verified 2025 Backtest
 Reference: docs/plans/MASTER_PLAN.md (Sentiment Architecture section)
 """
 
+import json
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
 import pandas as pd
 import numpy as np
-from scipy.stats import zscore
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
@@ -35,6 +47,516 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+HISTORY_START = pd.Timestamp('2000-01-01')
+
+# Rows of history loaded ahead of the refresh window, per input (per symbol for
+# databento). Each covers the longest row-based term on that input's own
+# sampling: 21-row RIN shift on weekly EIA, 21-row CL shift on daily futures,
+# 5-row DXY change on FRED. Inputs not listed are only used date-by-date.
+INPUT_LOOKBACK_ROWS = {'eia': 21, 'databento': 21, 'fred': 5}
+LOOKBACK_MARGIN_ROWS = 5
+
+# Pre-compiled title filters (case-insensitive)
+ZL_NEWS_PATTERN = re.compile(r'soybean oil|\bzl\b|boho|crush', re.IGNORECASE)
+PALM_LEVY_PATTERN = re.compile(r'indonesia levy|palm export|malaysia stockpile', re.IGNORECASE)
+
+INPUT_NAMES = ['news', 'policy', 'eia', 'weather', 'usda', 'cftc', 'databento', 'fred']
+
+LAYER_COLUMNS = [
+    'core_zl_price_sentiment',
+    'biofuel_policy_sentiment',
+    'geopolitical_tariff_sentiment',
+    'south_america_weather_sentiment',
+    'palm_substitution_sentiment',
+    'energy_complex_sentiment',
+    'macro_risk_sentiment',
+    'ice_microstructure_sentiment',
+    'spec_positioning_sentiment',
+]
+
+PINBALL_COLUMNS = ['tariff_pinball', 'rin_moon_pinball', 'drought_pinball', 'trump_tweet_storm', 'spec_blowoff']
+
+OUTPUT_COLUMNS = ['date'] + LAYER_COLUMNS + ['procurement_sentiment_index'] + PINBALL_COLUMNS
+
+
+def _to_day(values: pd.Series) -> pd.Series:
+    """Normalize dates/timestamps to tz-naive midnight Timestamps."""
+    days = pd.to_datetime(values)
+    if getattr(days.dt, 'tz', None) is not None:
+        days = days.dt.tz_localize(None)
+    return days.dt.normalize()
+
+
+def _cut_to_window(frame: pd.DataFrame, since: pd.Timestamp, lookback_rows: int,
+                   group_col: Optional[str] = None) -> pd.DataFrame:
+    """Rows on/after `since` plus the last `lookback_rows` rows before it (per group; frame sorted by date)."""
+    before = frame[frame['date'] < since]
+    if group_col is not None and group_col in frame.columns:
+        before = before.groupby(group_col, sort=False).tail(lookback_rows)
+    else:
+        before = before.tail(lookback_rows)
+    return pd.concat([before, frame[frame['date'] >= since]])
+
+
+def _tail(frame: pd.DataFrame, lookback_rows: int, since: Optional[pd.Timestamp]) -> pd.DataFrame:
+    """Rows on/after `since` plus `lookback_rows` rows before it (frame sorted by date)."""
+    if since is None or frame.empty:
+        return frame
+    start = int(np.searchsorted(frame['date'].values, np.datetime64(since), side='left'))
+    return frame.iloc[max(start - lookback_rows, 0):]
+
+
+class SentimentLayerEngine:
+    """
+    Event-driven builder for raw_intelligence.sentiment_daily.
+
+    build() computes the full history (same output as calculate_sentiment_daily).
+    refresh() loads the persisted output and state, computes only the window
+    from the earliest new input date to today, and splices it in.
+
+    State (JSON next to the output):
+    - watermarks: last input date already processed, per input
+    - moments: [n, sum, sum_sq] behind each full-history z-score, so new rows
+      are normalized exactly as a full rebuild would normalize them today.
+      Rows before the window keep the values they were written with.
+    """
+
+    def __init__(self,
+                 output_path: Optional[Path] = None,
+                 state_path: Optional[Path] = None,
+                 max_workers: int = 4):
+        self.output_path = Path(output_path) if output_path else None
+        if state_path is None and self.output_path is not None:
+            state_path = self.output_path.with_name(self.output_path.stem + '_state.json')
+        self.state_path = Path(state_path) if state_path else None
+        self.max_workers = max_workers
+        self.watermarks: Dict[str, Optional[pd.Timestamp]] = {}
+        self.moments: Dict[str, list] = {}
+        self.last_window_start: Optional[pd.Timestamp] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> bool:
+        if self.state_path is None or not self.state_path.exists():
+            return False
+        with open(self.state_path) as f:
+            state = json.load(f)
+        self.watermarks = {k: pd.Timestamp(v) if v else None for k, v in state.get('watermarks', {}).items()}
+        self.moments = state.get('moments', {})
+        return True
+
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        state = {
+            'updated_at': datetime.now().isoformat(),
+            'watermarks': {k: v.strftime('%Y-%m-%d') if v is not None else None for k, v in self.watermarks.items()},
+            'moments': self.moments,
+        }
+        with open(self.state_path, 'w') as f:
+            json.dump(state, f, indent=2)
+
+    def _zscore(self, key: str, values: pd.Series, watermark: Optional[pd.Timestamp], ddof: int = 0):
+        """
+        Full-history z-score using running moments.
+
+        Rows dated after `watermark` are folded into the stored moments first,
+        so with empty state this equals scipy.stats.zscore over the series.
+        Returns (z-scored series, std).
+        """
+        new_values = values if watermark is None else values[values.index > watermark]
+        with self._lock:
+            n, total, total_sq = self.moments.get(key, [0, 0.0, 0.0])
+            n += int(new_values.count())
+            total += float(new_values.sum())
+            total_sq += float((new_values ** 2).sum())
+            self.moments[key] = [n, total, total_sq]
+
+        if n - ddof <= 0:
+            return pd.Series(0.0, index=values.index), 0.0
+        mean = total / n
+        std = float(np.sqrt(max(total_sq - n * mean ** 2, 0.0) / (n - ddof)))
+        if std == 0:
+            return pd.Series(0.0, index=values.index), std
+        return ((values - mean) / std).fillna(0), std
+
+    # ------------------------------------------------------------------
+    # Inputs
+    # ------------------------------------------------------------------
+
+    def _prepare_inputs(self, raw: Dict[str, pd.DataFrame], since: Optional[pd.Timestamp]) -> Dict[str, pd.DataFrame]:
+        """Normalize dates once, cut to the refresh window (+per-input row lookback) and tag news rows."""
+        inputs = {}
+        for name in INPUT_NAMES:
+            data = raw.get(name)
+            if data is None or data.empty:
+                inputs[name] = pd.DataFrame()
+                continue
+
+            data = data.copy()
+            if name == 'news':
+                # Harmonize ScrapeCreators / policy-signal column names
+                if 'title' not in data.columns and 'policy_trump_title' in data.columns:
+                    data = data.rename(columns={'policy_trump_title': 'title'})
+                if 'vader_compound' not in data.columns and 'policy_trump_sentiment_score' in data.columns:
+                    data = data.rename(columns={'policy_trump_sentiment_score': 'vader_compound'})
+                if 'date' not in data.columns and 'published_at' in data.columns:
+                    data['date'] = data['published_at']
+
+            if 'date' not in data.columns:
+                if 'timestamp' in data.columns:
+                    data['date'] = data['timestamp']
+                else:
+                    logger.warning(f"{name} dataframe missing date/timestamp column")
+                    inputs[name] = pd.DataFrame()
+                    continue
+
+            data['date'] = _to_day(data['date'])
+            data = data.sort_values('date', kind='stable')
+            if since is not None:
+                lookback_rows = INPUT_LOOKBACK_ROWS.get(name, 0)
+                if lookback_rows:
+                    lookback_rows += LOOKBACK_MARGIN_ROWS
+                data = _cut_to_window(data, since, lookback_rows,
+                                      group_col='symbol' if name == 'databento' else None)
+
+            if name == 'news' and 'title' in data.columns:
+                titles = data['title'].astype('string')
+                data['_is_zl'] = titles.str.contains(ZL_NEWS_PATTERN, na=False).astype(bool)
+                data['_is_levy'] = titles.str.contains(PALM_LEVY_PATTERN, na=False).astype(bool)
+
+            inputs[name] = data
+        return inputs
+
+    def _new_input_start(self, raw: Dict[str, pd.DataFrame]) -> Optional[pd.Timestamp]:
+        """Earliest input date not yet covered by the stored watermarks."""
+        starts = []
+        for name in INPUT_NAMES:
+            data = raw.get(name)
+            if data is None or data.empty:
+                continue
+            date_col = 'date' if 'date' in data.columns else 'published_at' if 'published_at' in data.columns else 'timestamp'
+            if date_col not in data.columns:
+                continue
+            days = _to_day(data[date_col])
+            watermark = self.watermarks.get(name)
+            newer = days[days > watermark] if watermark is not None else days
+            if not newer.empty:
+                starts.append(newer.min())
+        return min(starts) if starts else None
+
+    def _advance_watermarks(self, inputs: Dict[str, pd.DataFrame]):
+        for name, data in inputs.items():
+            if not data.empty:
+                latest = data['date'].max()
+                current = self.watermarks.get(name)
+                self.watermarks[name] = latest if current is None else max(current, latest)
+
+    @staticmethod
+    def _series(data: pd.DataFrame, column: str) -> pd.Series:
+        """Column indexed by date, 0 if missing (matches the original .get defaults)."""
+        if data.empty or column not in data.columns:
+            return pd.Series(dtype=float)
+        return data.set_index('date')[column].fillna(0)
+
+    # ------------------------------------------------------------------
+    # Layers (each returns its columns on the window index)
+    # ------------------------------------------------------------------
+
+    def _layer_core_zl(self, inp, index):
+        """LAYER 1: Core ZL Price Sentiment (Blended: News 60% + Truth Social 15% + X 25%)"""
+        news = inp['news']
+        news_score = x_score = truth_score = pd.Series(0.0, index=index)
+
+        if not news.empty and 'vader_compound' in news.columns:
+            zl_news = news[news['_is_zl']] if '_is_zl' in news.columns else news.iloc[0:0]
+            if not zl_news.empty:
+                # VADER benchmark: 72-78% accuracy
+                boost = np.log1p(zl_news['keyword_hits']) * 2.5 if 'keyword_hits' in zl_news.columns else 0.0
+                weighted = zl_news['vader_compound'] * (1 + boost)
+                news_score = weighted.groupby(zl_news['date']).mean().reindex(index).fillna(0)
+
+            if 'source' in news.columns:
+                # Truth Social (only if ≥3 posts/day – reduces noise 40%)
+                truth = news[news['source'] == 'truth_social'].groupby('date')['vader_compound'].agg(['mean', 'size'])
+                if not truth.empty:
+                    truth_weight = np.where(truth['size'] >= 3, np.minimum(truth['size'] / 8.0, 2.0), 0)
+                    truth_score = (truth['mean'] * truth_weight).reindex(index, fill_value=0).fillna(0)
+
+                # X/Twitter (full stream, filtered)
+                x = news[news['source'] == 'twitter_x'].groupby('date')['vader_compound'].agg(['mean', 'size'])
+                if not x.empty:
+                    x_score = x['mean'].where(x['size'] > 10, 0).reindex(index).fillna(0)
+
+        # FINAL BLEND (verified: correlates 0.62 with ZL returns 2024-2025)
+        return pd.DataFrame({
+            'core_zl_price_sentiment': (0.60 * news_score + 0.25 * x_score + 0.15 * truth_score).clip(-1.5, 1.5)
+        }, index=index)
+
+    def _layer_biofuel(self, inp, index):
+        """LAYER 2: Biofuel Policy & Demand (Verified: 20-28% ZL variance, EIA RIN +180% Q1 2025)"""
+        eia, policy = inp['eia'], inp['policy']
+
+        rin_capped = pd.Series(0.0, index=index)
+        crush_z = pd.Series(0.0, index=index)
+        if not eia.empty and 'rin_d4' in eia.columns:
+            rin = _tail(eia, 21, index[0]).set_index('date')['rin_d4']
+            rin_log_change = np.log(rin / rin.shift(21)).fillna(0)
+            rin_capped = np.clip(rin_log_change, -1.5, 1.5).reindex(index, fill_value=0)  # 2σ cap (avoids 2024 outliers)
+        if not eia.empty and 'biodiesel_margin' in eia.columns:
+            crush_z, _ = self._zscore('eia.biodiesel_margin', self._series(eia, 'biodiesel_margin'), self.watermarks.get('eia'))
+            crush_z = crush_z.reindex(index, fill_value=0)
+
+        epa_event = self._series(policy, 'epa_rfs_event').reindex(index, fill_value=0)
+
+        return pd.DataFrame({
+            'biofuel_policy_sentiment': (0.55 * rin_capped + 0.30 * epa_event + 0.15 * crush_z).clip(-1.5, 1.5)
+        }, index=index)
+
+    def _layer_tariffs(self, inp, index):
+        """LAYER 3: Geopolitical Tariffs (internal signal – verified +15% spikes on Phase One collapse)"""
+        tariff = self._series(inp['policy'], 'geopolitical_tariff_score').reindex(index, fill_value=0).fillna(0)
+        return pd.DataFrame({'geopolitical_tariff_sentiment': tariff}, index=index)
+
+    def _layer_weather(self, inp, index):
+        """LAYER 4: South America Weather & Supply (Verified: -18% on La Niña droughts, USDA yield cuts 4.3B bu)"""
+        arg_drought = self._series(inp['weather'], 'argentina_drought_zscore').reindex(index, fill_value=0)
+        bra_rain = self._series(inp['weather'], 'brazil_rain_anomaly').reindex(index, fill_value=0)
+        wasde_surprise = self._series(inp['usda'], 'wasde_yield_surprise').reindex(index, fill_value=0)
+        return pd.DataFrame({
+            'south_america_weather_sentiment': (0.45 * arg_drought + 0.35 * bra_rain + 0.20 * wasde_surprise).clip(-1.5, 1.5)
+        }, index=index)
+
+    def _layer_palm(self, inp, index):
+        """LAYER 5: Palm Oil Substitution Risk (Verified: +16% on Indonesia levy hikes, MPOB stockpile surges)"""
+        news = inp['news']
+        levy_score = pd.Series(0.0, index=index)
+        if not news.empty and '_is_levy' in news.columns:
+            levy_news = news[news['_is_levy']]
+            if not levy_news.empty:
+                levy_daily = levy_news.groupby('date').agg({'vader_compound': 'mean', 'keyword_hits': 'sum'})
+                levy_score = (levy_daily['vader_compound'] * levy_daily['keyword_hits'] / 10).reindex(index, fill_value=0)
+
+        # MPOB stockpile – placeholder until an MPOB data source exists
+        malay_stock_z = pd.Series(0.0, index=index)
+
+        return pd.DataFrame({
+            'palm_substitution_sentiment': (0.75 * levy_score + 0.25 * malay_stock_z).clip(-1.5, 1.5)
+        }, index=index)
+
+    def _symbol_close(self, databento, symbol, lookback_rows, since):
+        if databento.empty or 'symbol' not in databento.columns:
+            return pd.DataFrame()
+        return _tail(databento[databento['symbol'] == symbol], lookback_rows, since)
+
+    def _layer_energy(self, inp, index):
+        """LAYER 6: Energy Complex Spillover (Verified: Crude backwardation +9% ZL lift, EIA cracks)"""
+        databento = inp['databento']
+        watermark = self.watermarks.get('databento')
+        cl_backward = hobo_z = pd.Series(0.0, index=index)
+
+        cl_data = self._symbol_close(databento, 'CL', 21, index[0])
+        ho_data = self._symbol_close(databento, 'HO', 0, index[0])
+        if not cl_data.empty and 'close' in cl_data.columns:
+            cl_close = cl_data.set_index('date')['close']
+            _, cl_std = self._zscore('databento.CL.close', cl_close, watermark, ddof=1)
+            if cl_std > 0:
+                cl_backward = ((cl_close - cl_close.shift(21)) / cl_std).fillna(0).reindex(index, fill_value=0)
+
+            # HOBO spread (HO - CL)
+            if not ho_data.empty and 'close' in ho_data.columns:
+                hobo_spread = (ho_data.set_index('date')['close'] - cl_close).fillna(0)
+                hobo_z, _ = self._zscore('databento.HOBO.spread', hobo_spread, watermark)
+                hobo_z = hobo_z.reindex(index, fill_value=0)
+
+        # RB crack (would need RB - CL calculation)
+        rb_crack_z = pd.Series(0.0, index=index)
+
+        return pd.DataFrame({
+            'energy_complex_sentiment': (0.65 * cl_backward + 0.20 * hobo_z + 0.15 * rb_crack_z).clip(-1.5, 1.5)
+        }, index=index)
+
+    def _layer_macro(self, inp, index):
+        """LAYER 7: Macro Risk-On / Risk-Off (Verified: VVIX >140 = -1.5, DXY +2% = -1.2)"""
+        fred = inp['fred']
+        watermark = self.watermarks.get('fred')
+        vvix_z = dxy_5d = move_z = pd.Series(0.0, index=index)
+
+        if not fred.empty:
+            if 'vvix' in fred.columns:
+                vvix_z, _ = self._zscore('fred.vvix', self._series(fred, 'vvix'), watermark)
+                vvix_z = vvix_z.reindex(index, fill_value=0)
+            if 'dxy' in fred.columns:
+                dxy = _tail(fred, 5, index[0]).set_index('date')['dxy']
+                dxy_5d = (dxy.pct_change(5).fillna(0) * (-15)).reindex(index, fill_value=0)  # Inverted for commodities
+            if 'move_index' in fred.columns:
+                move_z, _ = self._zscore('fred.move_index', self._series(fred, 'move_index'), watermark)
+                move_z = move_z.reindex(index, fill_value=0)
+
+        # Trump tweet storm (5+ tweets in past 24 hours)
+        trump_storm = inp['truth_counts'].reindex(index, fill_value=0) / 5
+
+        return pd.DataFrame({
+            'macro_risk_sentiment': (0.45 * vvix_z + 0.30 * dxy_5d + 0.15 * move_z + 0.10 * trump_storm).clip(-1.5, 1.5)
+        }, index=index)
+
+    def _layer_microstructure(self, inp, index):
+        """LAYER 8: ICE & Microstructure (Weekly filter – too noisy daily)"""
+        zl_vol_z = zl_oi_change = pd.Series(0.0, index=index)
+
+        zl_data = self._symbol_close(inp['databento'], 'ZL', 5, index[0])
+        if not zl_data.empty and 'volume' in zl_data.columns:
+            zl_daily = zl_data.set_index('date')
+            vol_5d = zl_daily['volume'].rolling(5).mean().fillna(0)
+            zl_vol_z, _ = self._zscore('databento.ZL.volume_5d', vol_5d, self.watermarks.get('databento'))
+            zl_vol_z = zl_vol_z.reindex(index, fill_value=0)
+            if 'oi' in zl_daily.columns:
+                zl_oi_change = zl_daily['oi'].pct_change(3).fillna(0).reindex(index, fill_value=0)
+
+        margin_change = self._series(inp['policy'], 'ice_margin_change_pct').reindex(index, fill_value=0)
+
+        return pd.DataFrame({
+            'ice_microstructure_sentiment': (0.60 * zl_vol_z + 0.25 * zl_oi_change + 0.15 * margin_change).clip(-1.5, 1.5)
+        }, index=index)
+
+    def _layer_positioning(self, inp, index):
+        """LAYER 9: Spec Positioning & COT Extremes (Weekly only – Tuesday release)"""
+        cftc = inp['cftc']
+        watermark = self.watermarks.get('cftc')
+        managed_z = producer_z = pd.Series(0.0, index=index)
+
+        if 'managed_money_netlong' in cftc.columns:
+            managed_z, _ = self._zscore('cftc.managed_money_netlong', self._series(cftc, 'managed_money_netlong'), watermark)
+            managed_z = managed_z.reindex(index, fill_value=0)
+        if 'producer_merchant_short' in cftc.columns:
+            producer_z, _ = self._zscore('cftc.producer_merchant_short', self._series(cftc, 'producer_merchant_short'), watermark)
+            producer_z = producer_z.reindex(index, fill_value=0)
+
+        return pd.DataFrame({
+            'spec_positioning_sentiment': (0.80 * managed_z + 0.20 * producer_z).clip(-1.5, 1.5)
+        }, index=index)
+
+    # ------------------------------------------------------------------
+    # Window computation
+    # ------------------------------------------------------------------
+
+    def _compute_window(self, raw: Dict[str, pd.DataFrame], since: Optional[pd.Timestamp], end: pd.Timestamp) -> pd.DataFrame:
+        start = since if since is not None else HISTORY_START
+        index = pd.date_range(start, end, name='date')
+        inputs = self._prepare_inputs(raw, since)
+
+        news = inputs['news']
+        if not news.empty and 'source' in news.columns:
+            inputs['truth_counts'] = news[news['source'] == 'truth_social'].groupby('date').size()
+        else:
+            inputs['truth_counts'] = pd.Series(dtype=float)
+
+        layers = [
+            self._layer_core_zl, self._layer_biofuel, self._layer_tariffs,
+            self._layer_weather, self._layer_palm, self._layer_energy,
+            self._layer_macro, self._layer_microstructure, self._layer_positioning,
+        ]
+        logger.info(f"Calculating 9 sentiment layers for {len(index):,} days "
+                    f"({index[0].date()} to {index[-1].date()})...")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            frames = list(pool.map(lambda layer: layer(inputs, index), layers))
+        df = pd.concat(frames, axis=1)
+
+        # FINAL PROCUREMENT SENTIMENT INDEX (Traffic Light Driver – Verified +19.4% Alpha)
+        df['procurement_sentiment_index'] = (
+            0.25 * df['core_zl_price_sentiment'] +
+            0.20 * df['biofuel_policy_sentiment'] +
+            0.18 * df['geopolitical_tariff_sentiment'] +
+            0.12 * df['south_america_weather_sentiment'] +
+            0.10 * df['palm_substitution_sentiment'] +
+            0.08 * df['energy_complex_sentiment'] +
+            0.07 * df['macro_risk_sentiment']
+        ).round(4)
+
+        # PINBALL TRIGGERS (Monte-Carlo Shocks – Verified 2025 Backtest)
+        df['tariff_pinball'] = (df['geopolitical_tariff_sentiment'] <= -1.3).astype(int)
+        df['rin_moon_pinball'] = (df['biofuel_policy_sentiment'] >= 1.2).astype(int)
+        df['drought_pinball'] = (df['south_america_weather_sentiment'] <= -1.1).astype(int)
+        # Trump tweet storm (5+ tweets in past 24 hours + macro risk)
+        df['trump_tweet_storm'] = (
+            (df['macro_risk_sentiment'] <= -1.0) &
+            (inputs['truth_counts'].reindex(index, fill_value=0) >= 5)
+        ).astype(int)
+        df['spec_blowoff'] = (df['spec_positioning_sentiment'] >= 1.4).astype(int)
+
+        self._advance_watermarks({name: inputs[name] for name in INPUT_NAMES})
+        return df.reset_index()[OUTPUT_COLUMNS]
+
+    def build(self, raw: Dict[str, pd.DataFrame], end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Full rebuild from HISTORY_START; resets state and persists if paths are set."""
+        self.watermarks, self.moments = {}, {}
+        end = end or pd.Timestamp.now()
+        self.last_window_start = HISTORY_START
+        result = self._compute_window(raw, None, end)
+        if self.output_path is not None:
+            result.to_parquet(self.output_path, index=False)
+            self._save_state()
+        return result
+
+    def refresh(self, raw: Dict[str, pd.DataFrame], end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Incremental refresh: recompute from the earliest new input date (or the
+        day after the last stored row) through `end`, splice into the stored
+        output and persist. Falls back to build() when no state exists.
+        """
+        end = (end or pd.Timestamp.now()).normalize()
+        if self.output_path is None or not self.output_path.exists() or not self._load_state():
+            logger.info("No sentiment_daily state found – running full build")
+            return self.build(raw, end)
+
+        stored = pd.read_parquet(self.output_path)
+        stored['date'] = pd.to_datetime(stored['date'])
+        candidates = [stored['date'].max() + timedelta(days=1)]
+        new_start = self._new_input_start(raw)
+        if new_start is not None:
+            candidates.append(max(new_start, HISTORY_START))
+        since = min(candidates)
+
+        if since > end:
+            logger.info("sentiment_daily already up to date")
+            self.last_window_start = None
+            return stored
+
+        self.last_window_start = since
+        window = self._compute_window(raw, since, end)
+        result = pd.concat([stored[stored['date'] < since], window], ignore_index=True)
+        result.to_parquet(self.output_path, index=False)
+        self._save_state()
+
+        logger.info(f"✅ Sentiment layers refreshed: {len(window)} days recomputed ({since.date()} to {end.date()})")
+        return result
+
+
+def verify_refresh(raw: Dict[str, pd.DataFrame], refreshed: pd.DataFrame, since: pd.Timestamp,
+                   end: Optional[pd.Timestamp] = None, atol: float = 1e-9) -> pd.Series:
+    """
+    Check a refresh against a full in-memory rebuild on the recomputed dates.
+
+    Rows before `since` are not compared: they keep the z-score normalization
+    they were written with. Returns the max absolute difference per column and
+    raises AssertionError if any exceeds `atol`.
+    """
+    end = (end or pd.Timestamp.now()).normalize()
+    rebuilt = SentimentLayerEngine().build(raw, end)
+    columns = OUTPUT_COLUMNS[1:]
+    left = refreshed[refreshed['date'] >= since].set_index('date')[columns]
+    right = rebuilt[rebuilt['date'] >= since].set_index('date')[columns]
+    if not left.index.equals(right.index):
+        raise AssertionError(f"refresh covers {len(left)} dates from {since.date()}, rebuild {len(right)}")
+    diff = (left.astype(float) - right.astype(float)).abs().max()
+    worst = diff[diff > atol]
+    if not worst.empty:
+        raise AssertionError(f"refresh differs from full rebuild: {worst.round(6).to_dict()}")
+    return diff
+
 
 def calculate_sentiment_daily(
     df_news: pd.DataFrame,  # ScrapeCreators news_articles (from raw_intelligence.news_articles)
@@ -51,6 +573,9 @@ def calculate_sentiment_daily(
     
     Verified vs 2025 backtest: Biofuel 20-28% variance, tariffs +15% spikes.
     
+    Full rebuild from 2000-01-01. Use SentimentLayerEngine.refresh() for the
+    daily incremental update.
+    
     Args:
         df_news: News articles with columns: date, title, vader_compound, keyword_hits, source
         df_policy: Policy signals with columns: date, geopolitical_tariff_score, epa_rfs_event, ice_margin_change_pct
@@ -80,419 +605,11 @@ def calculate_sentiment_daily(
         - trump_tweet_storm
         - spec_blowoff
     """
-    # Create date index
-    start_date = pd.Timestamp('2000-01-01')
-    end_date = pd.Timestamp.now()
-    df = pd.DataFrame(index=pd.date_range(start_date, end_date, name='date'))
-    df.index.name = 'date'
-    
-    # Ensure all input dataframes have date column
-    for name, data in [
-        ('news', df_news), ('policy', df_policy), ('eia', df_eia), 
-        ('weather', df_weather), ('usda', df_usda), ('cftc', df_cftc),
-        ('databento', df_databento), ('fred', df_fred)
-    ]:
-        if not data.empty and 'date' not in data.columns:
-            if 'timestamp' in data.columns:
-                data['date'] = pd.to_datetime(data['timestamp']).dt.date
-            else:
-                logger.warning(f"{name} dataframe missing date/timestamp column")
-    
-    # ===================================================================
-    # LAYER 1: Core ZL Price Sentiment (Blended: News 60% + Truth Social 15% + X 25%)
-    # ===================================================================
-    logger.info("Calculating Layer 1: Core ZL Price Sentiment...")
-    
-    # News (ScrapeCreators only - harmonize columns)
-    if not df_news.empty:
-        if 'title' not in df_news.columns and 'policy_trump_title' in df_news.columns:
-            df_news = df_news.rename(columns={'policy_trump_title': 'title'})
-        if 'vader_compound' not in df_news.columns and 'policy_trump_sentiment_score' in df_news.columns:
-            df_news = df_news.rename(columns={'policy_trump_sentiment_score': 'vader_compound'})
-        if 'date' not in df_news.columns and 'published_at' in df_news.columns:
-            df_news['date'] = pd.to_datetime(df_news['published_at']).dt.date
-    zl_news = df_news[
-        df_news.get('title', pd.Series('', index=df_news.index)).str.contains('soybean oil|\\bzl\\b|boho|crush', case=False, na=False)
-    ].copy() if not df_news.empty else pd.DataFrame()
-    
-    if not zl_news.empty:
-        zl_news['keyword_boost'] = np.log1p(zl_news.get('keyword_hits', 0)) * 2.5  # VADER benchmark: 72-78% accuracy
-        zl_news['date'] = pd.to_datetime(zl_news['date']).dt.date
-        news_daily = zl_news.groupby('date').agg({
-            'vader_compound': lambda x: (x * (1 + zl_news.loc[x.index, 'keyword_boost'])).mean()
-        }).rename(columns={'vader_compound': 'news_score'})
-    else:
-        news_daily = pd.DataFrame()
-    
-    # Truth Social (only if ≥3 posts/day – reduces noise 40%)
-    truth_zl = df_news[df_news['source'] == 'truth_social'].copy() if not df_news.empty else pd.DataFrame()
-    if not truth_zl.empty:
-        truth_zl['date'] = pd.to_datetime(truth_zl['date']).dt.date
-        truth_daily = truth_zl.groupby('date').agg({
-            'vader_compound': 'mean',
-            'source': 'count'
-        }).rename(columns={'vader_compound': 'truth_score', 'source': 'truth_volume'})
-        truth_daily['truth_weight'] = truth_daily['truth_volume'].apply(lambda v: min(v / 8.0, 2.0) if v >= 3 else 0)
-    else:
-        truth_daily = pd.DataFrame()
-    
-    # X/Twitter (full stream, filtered)
-    x_zl = df_news[df_news['source'] == 'twitter_x'].copy() if not df_news.empty else pd.DataFrame()
-    if not x_zl.empty:
-        x_zl['date'] = pd.to_datetime(x_zl['date']).dt.date
-        x_daily = x_zl.groupby('date').agg({
-            'vader_compound': 'mean',
-            'source': 'count'
-        }).rename(columns={'vader_compound': 'x_score', 'source': 'x_volume'})
-        x_daily['x_score'] = x_daily['x_score'].where(x_daily['x_volume'] > 10, 0)
-    else:
-        x_daily = pd.DataFrame()
-    
-    # FINAL BLEND (verified: correlates 0.62 with ZL returns 2024-2025)
-    df['news_score'] = news_daily['news_score'] if not news_daily.empty else 0
-    df['x_score'] = x_daily['x_score'] if not x_daily.empty else 0
-    df['truth_score'] = (truth_daily['truth_score'] * truth_daily['truth_weight']).reindex(df.index, fill_value=0) if not truth_daily.empty else 0
-    
-    df['core_zl_price_sentiment'] = (
-        0.60 * df['news_score'].fillna(0) +
-        0.25 * df['x_score'].fillna(0) +
-        0.15 * df['truth_score'].fillna(0)
-    ).clip(-1.5, 1.5)
-    
-    # ===================================================================
-    # LAYER 2: Biofuel Policy & Demand (Verified: 20-28% ZL variance, EIA RIN +180% Q1 2025)
-    # ===================================================================
-    logger.info("Calculating Layer 2: Biofuel Policy & Demand...")
-    
-    if not df_eia.empty and 'rin_d4' in df_eia.columns:
-        df_eia['date'] = pd.to_datetime(df_eia['date']).dt.date
-        eia_daily = df_eia.set_index('date').sort_index()
-        rin_log_change = np.log(eia_daily['rin_d4'] / eia_daily['rin_d4'].shift(21)).fillna(0)
-        rin_capped = np.clip(rin_log_change, -1.5, 1.5)  # 2σ cap (avoids 2024 outliers)
-    else:
-        rin_capped = pd.Series(0, index=df.index)
-    
-    if not df_policy.empty:
-        df_policy['date'] = pd.to_datetime(df_policy['date']).dt.date
-        policy_daily = df_policy.set_index('date').sort_index()
-        epa_event = policy_daily.get('epa_rfs_event', pd.Series(0, index=policy_daily.index)).fillna(0)
-    else:
-        epa_event = pd.Series(0, index=df.index)
-    
-    if not df_eia.empty and 'biodiesel_margin' in df_eia.columns:
-        crush_z = pd.Series(
-            zscore(df_eia['biodiesel_margin'].fillna(0), nan_policy='omit'),
-            index=df_eia['date']
-        ).fillna(0)
-    else:
-        crush_z = pd.Series(0, index=df.index)
-    
-    # Align all series to df index
-    rin_capped = rin_capped.reindex(df.index, fill_value=0) if isinstance(rin_capped, pd.Series) else pd.Series(0, index=df.index)
-    epa_event = epa_event.reindex(df.index, fill_value=0) if isinstance(epa_event, pd.Series) else pd.Series(0, index=df.index)
-    crush_z = crush_z.reindex(df.index, fill_value=0) if isinstance(crush_z, pd.Series) else pd.Series(0, index=df.index)
-    
-    df['biofuel_policy_sentiment'] = (
-        0.55 * rin_capped +
-        0.30 * epa_event +
-        0.15 * crush_z
-    ).clip(-1.5, 1.5)
-    
-    # ===================================================================
-    # LAYER 3: Geopolitical Tariffs (Your internal signal – verified +15% spikes on Phase One collapse)
-    # ===================================================================
-    logger.info("Calculating Layer 3: Geopolitical Tariffs...")
-    
-    if not df_policy.empty and 'geopolitical_tariff_score' in df_policy.columns:
-        df_policy['date'] = pd.to_datetime(df_policy['date']).dt.date
-        tariff_daily = df_policy.set_index('date').sort_index()
-        df['geopolitical_tariff_sentiment'] = tariff_daily['geopolitical_tariff_score'].reindex(df.index, fill_value=0).fillna(0)
-    else:
-        df['geopolitical_tariff_sentiment'] = 0
-    
-    # ===================================================================
-    # LAYER 4: South America Weather & Supply (Verified: -18% on La Niña droughts, USDA yield cuts 4.3B bu)
-    # ===================================================================
-    logger.info("Calculating Layer 4: South America Weather & Supply...")
-    
-    if not df_weather.empty:
-        df_weather['date'] = pd.to_datetime(df_weather['date']).dt.date
-        weather_daily = df_weather.set_index('date').sort_index()
-        arg_drought = weather_daily.get('argentina_drought_zscore', pd.Series(0, index=weather_daily.index)).fillna(0)
-        bra_rain = weather_daily.get('brazil_rain_anomaly', pd.Series(0, index=weather_daily.index)).fillna(0)
-    else:
-        arg_drought = pd.Series(0, index=df.index)
-        bra_rain = pd.Series(0, index=df.index)
-    
-    if not df_usda.empty and 'wasde_yield_surprise' in df_usda.columns:
-        df_usda['date'] = pd.to_datetime(df_usda['date']).dt.date
-        usda_daily = df_usda.set_index('date').sort_index()
-        wasde_surprise = usda_daily['wasde_yield_surprise'].fillna(0)
-    else:
-        wasde_surprise = pd.Series(0, index=df.index)
-    
-    # Align to df index
-    arg_drought = arg_drought.reindex(df.index, fill_value=0)
-    bra_rain = bra_rain.reindex(df.index, fill_value=0)
-    wasde_surprise = wasde_surprise.reindex(df.index, fill_value=0)
-    
-    df['south_america_weather_sentiment'] = (
-        0.45 * arg_drought +
-        0.35 * bra_rain +
-        0.20 * wasde_surprise
-    ).clip(-1.5, 1.5)
-    
-    # ===================================================================
-    # LAYER 5: Palm Oil Substitution Risk (Verified: +16% on Indonesia levy hikes, MPOB stockpile surges)
-    # ===================================================================
-    logger.info("Calculating Layer 5: Palm Oil Substitution Risk...")
-    
-    # Palm levy news from news articles
-    if not df_news.empty:
-        levy_news = df_news[
-            df_news['title'].str.contains('indonesia levy|palm export|malaysia stockpile', case=False, na=False)
-        ].copy()
-        if not levy_news.empty:
-            levy_news['date'] = pd.to_datetime(levy_news['date']).dt.date
-            levy_daily = levy_news.groupby('date').agg({
-                'vader_compound': 'mean',
-                'keyword_hits': 'sum'
-            })
-            levy_score = (levy_daily['vader_compound'] * levy_daily['keyword_hits'] / 10).reindex(df.index, fill_value=0)
-        else:
-            levy_score = pd.Series(0, index=df.index)
-    else:
-        levy_score = pd.Series(0, index=df.index)
-    
-    # MPOB stockpile (if available in news or separate source)
-    # For now, placeholder - would need MPOB data source
-    malay_stock_z = pd.Series(0, index=df.index)
-    
-    df['palm_substitution_sentiment'] = (
-        0.75 * levy_score +
-        0.25 * malay_stock_z
-    ).clip(-1.5, 1.5)
-    
-    # ===================================================================
-    # LAYER 6: Energy Complex Spillover (Verified: Crude backwardation +9% ZL lift, EIA cracks)
-    # ===================================================================
-    logger.info("Calculating Layer 6: Energy Complex Spillover...")
-    
-    if not df_databento.empty:
-        # Filter to CL (crude), HO (heating oil), RB (gasoline)
-        cl_data = df_databento[df_databento['symbol'] == 'CL'].copy() if 'symbol' in df_databento.columns else pd.DataFrame()
-        ho_data = df_databento[df_databento['symbol'] == 'HO'].copy() if 'symbol' in df_databento.columns else pd.DataFrame()
-        rb_data = df_databento[df_databento['symbol'] == 'RB'].copy() if 'symbol' in df_databento.columns else pd.DataFrame()
-        
-        if not cl_data.empty and 'close' in cl_data.columns:
-            cl_data['date'] = pd.to_datetime(cl_data['date']).dt.date
-            cl_daily = cl_data.set_index('date').sort_index()
-            cl_backward = ((cl_daily['close'] - cl_daily['close'].shift(21)) / cl_daily['close'].std()).fillna(0)
-        else:
-            cl_backward = pd.Series(0, index=df.index)
-        
-        # HOBO spread (HO - CL)
-        if not ho_data.empty and not cl_data.empty and 'close' in ho_data.columns and 'close' in cl_data.columns:
-            ho_daily = ho_data.set_index('date').sort_index()
-            hobo_spread = (ho_daily['close'] - cl_daily['close']).fillna(0)
-            hobo_z = pd.Series(zscore(hobo_spread, nan_policy='omit'), index=hobo_spread.index).fillna(0)
-        else:
-            hobo_z = pd.Series(0, index=df.index)
-        
-        # RB crack (would need RB - CL calculation)
-        rb_crack_z = pd.Series(0, index=df.index)
-    else:
-        cl_backward = pd.Series(0, index=df.index)
-        hobo_z = pd.Series(0, index=df.index)
-        rb_crack_z = pd.Series(0, index=df.index)
-    
-    # Align to df index
-    cl_backward = cl_backward.reindex(df.index, fill_value=0)
-    hobo_z = hobo_z.reindex(df.index, fill_value=0)
-    rb_crack_z = rb_crack_z.reindex(df.index, fill_value=0)
-    
-    df['energy_complex_sentiment'] = (
-        0.65 * cl_backward +
-        0.20 * hobo_z +
-        0.15 * rb_crack_z
-    ).clip(-1.5, 1.5)
-    
-    # ===================================================================
-    # LAYER 7: Macro Risk-On / Risk-Off (Verified: VVIX >140 = -1.5, DXY +2% = -1.2)
-    # ===================================================================
-    logger.info("Calculating Layer 7: Macro Risk-On / Risk-Off...")
-    
-    if not df_fred.empty:
-        df_fred['date'] = pd.to_datetime(df_fred['date']).dt.date
-        fred_daily = df_fred.set_index('date').sort_index()
-        
-        if 'vvix' in fred_daily.columns:
-            vvix_z = pd.Series(zscore(fred_daily['vvix'].fillna(0), nan_policy='omit'), index=fred_daily.index).fillna(0)
-        else:
-            vvix_z = pd.Series(0, index=df.index)
-        
-        if 'dxy' in fred_daily.columns:
-            dxy_5d = (fred_daily['dxy'].pct_change(5).fillna(0) * (-15))  # Inverted for commodities
-        else:
-            dxy_5d = pd.Series(0, index=df.index)
-        
-        if 'move_index' in fred_daily.columns:
-            move_z = pd.Series(zscore(fred_daily['move_index'].fillna(0), nan_policy='omit'), index=fred_daily.index).fillna(0)
-        else:
-            move_z = pd.Series(0, index=df.index)
-    else:
-        vvix_z = pd.Series(0, index=df.index)
-        dxy_5d = pd.Series(0, index=df.index)
-        move_z = pd.Series(0, index=df.index)
-    
-    # Trump tweet storm (5+ tweets in past 24 hours)
-    if not df_news.empty:
-        truth_posts = df_news[df_news['source'] == 'truth_social'].copy()
-        if not truth_posts.empty:
-            truth_posts['date'] = pd.to_datetime(truth_posts['date']).dt.date
-            truth_daily_count = truth_posts.groupby('date').size()
-            trump_storm = (truth_daily_count / 5).reindex(df.index, fill_value=0)  # 5+ tweets = storm
-        else:
-            trump_storm = pd.Series(0, index=df.index)
-    else:
-        trump_storm = pd.Series(0, index=df.index)
-    
-    # Align to df index
-    vvix_z = vvix_z.reindex(df.index, fill_value=0)
-    dxy_5d = dxy_5d.reindex(df.index, fill_value=0)
-    move_z = move_z.reindex(df.index, fill_value=0)
-    trump_storm = trump_storm.reindex(df.index, fill_value=0)
-    
-    df['macro_risk_sentiment'] = (
-        0.45 * vvix_z +
-        0.30 * dxy_5d +
-        0.15 * move_z +
-        0.10 * trump_storm
-    ).clip(-1.5, 1.5)
-    
-    # ===================================================================
-    # LAYER 8: ICE & Microstructure (Weekly filter – too noisy daily)
-    # ===================================================================
-    logger.info("Calculating Layer 8: ICE & Microstructure...")
-    
-    if not df_databento.empty:
-        zl_data = df_databento[df_databento['symbol'] == 'ZL'].copy() if 'symbol' in df_databento.columns else pd.DataFrame()
-        if not zl_data.empty and 'volume' in zl_data.columns:
-            zl_data['date'] = pd.to_datetime(zl_data['date']).dt.date
-            zl_daily = zl_data.set_index('date').sort_index()
-            zl_vol_z = pd.Series(
-                zscore(zl_daily['volume'].rolling(5).mean().fillna(0), nan_policy='omit'),
-                index=zl_daily.index
-            ).fillna(0)
-            zl_oi_change = zl_daily['oi'].pct_change(3).fillna(0) if 'oi' in zl_daily.columns else pd.Series(0, index=zl_daily.index)
-        else:
-            zl_vol_z = pd.Series(0, index=df.index)
-            zl_oi_change = pd.Series(0, index=df.index)
-    else:
-        zl_vol_z = pd.Series(0, index=df.index)
-        zl_oi_change = pd.Series(0, index=df.index)
-    
-    if not df_policy.empty and 'ice_margin_change_pct' in df_policy.columns:
-        df_policy['date'] = pd.to_datetime(df_policy['date']).dt.date
-        policy_daily = df_policy.set_index('date').sort_index()
-        margin_change = policy_daily['ice_margin_change_pct'].fillna(0)
-    else:
-        margin_change = pd.Series(0, index=df.index)
-    
-    # Align to df index
-    zl_vol_z = zl_vol_z.reindex(df.index, fill_value=0)
-    zl_oi_change = zl_oi_change.reindex(df.index, fill_value=0)
-    margin_change = margin_change.reindex(df.index, fill_value=0)
-    
-    df['ice_microstructure_sentiment'] = (
-        0.60 * zl_vol_z +
-        0.25 * zl_oi_change +
-        0.15 * margin_change
-    ).clip(-1.5, 1.5)
-    
-    # ===================================================================
-    # LAYER 9: Spec Positioning & COT Extremes (Weekly only – Tuesday release)
-    # ===================================================================
-    logger.info("Calculating Layer 9: Spec Positioning & COT Extremes...")
-    
-    if not df_cftc.empty:
-        df_cftc['date'] = pd.to_datetime(df_cftc['date']).dt.date
-        cftc_daily = df_cftc.set_index('date').sort_index()
-        
-        if 'managed_money_netlong' in cftc_daily.columns:
-            managed_z = pd.Series(
-                zscore(cftc_daily['managed_money_netlong'].fillna(0), nan_policy='omit'),
-                index=cftc_daily.index
-            ).fillna(0)
-        else:
-            managed_z = pd.Series(0, index=df.index)
-        
-        if 'producer_merchant_short' in cftc_daily.columns:
-            producer_z = pd.Series(
-                zscore(cftc_daily['producer_merchant_short'].fillna(0), nan_policy='omit'),
-                index=cftc_daily.index
-            ).fillna(0)
-        else:
-            producer_z = pd.Series(0, index=df.index)
-    else:
-        managed_z = pd.Series(0, index=df.index)
-        producer_z = pd.Series(0, index=df.index)
-    
-    # Align to df index
-    managed_z = managed_z.reindex(df.index, fill_value=0)
-    producer_z = producer_z.reindex(df.index, fill_value=0)
-    
-    df['spec_positioning_sentiment'] = (
-        0.80 * managed_z +
-        0.20 * producer_z
-    ).clip(-1.5, 1.5)
-    
-    # ===================================================================
-    # FINAL PROCUREMENT SENTIMENT INDEX (Traffic Light Driver – Verified +19.4% Alpha)
-    # ===================================================================
-    logger.info("Calculating Final Procurement Sentiment Index...")
-    
-    df['procurement_sentiment_index'] = (
-        0.25 * df['core_zl_price_sentiment'] +
-        0.20 * df['biofuel_policy_sentiment'] +
-        0.18 * df['geopolitical_tariff_sentiment'] +
-        0.12 * df['south_america_weather_sentiment'] +
-        0.10 * df['palm_substitution_sentiment'] +
-        0.08 * df['energy_complex_sentiment'] +
-        0.07 * df['macro_risk_sentiment']
-    ).round(4)
-    
-    # ===================================================================
-    # PINBALL TRIGGERS (Monte-Carlo Shocks – Verified 2025 Backtest)
-    # ===================================================================
-    logger.info("Calculating Pinball Triggers...")
-    
-    df['tariff_pinball'] = (df['geopolitical_tariff_sentiment'] <= -1.3).astype(int)
-    df['rin_moon_pinball'] = (df['biofuel_policy_sentiment'] >= 1.2).astype(int)
-    df['drought_pinball'] = (df['south_america_weather_sentiment'] <= -1.1).astype(int)
-    
-    # Trump tweet storm (5+ tweets in past 24 hours + macro risk)
-    if not df_news.empty:
-        truth_posts = df_news[df_news['source'] == 'truth_social'].copy()
-        if not truth_posts.empty:
-            truth_posts['date'] = pd.to_datetime(truth_posts['date']).dt.date
-            truth_daily_count = truth_posts.groupby('date').size()
-            df['trump_tweet_storm'] = (
-                (df['macro_risk_sentiment'] <= -1.0) & 
-                (truth_daily_count.reindex(df.index, fill_value=0) >= 5)
-            ).astype(int)
-        else:
-            df['trump_tweet_storm'] = 0
-    else:
-        df['trump_tweet_storm'] = 0
-    
-    df['spec_blowoff'] = (df['spec_positioning_sentiment'] >= 1.4).astype(int)
-    
-    # Clean up intermediate columns
-    df = df.drop(columns=['news_score', 'x_score', 'truth_score'], errors='ignore')
-    
-    # Reset index to make date a column
-    result = df.reset_index()
+    engine = SentimentLayerEngine()
+    result = engine.build({
+        'news': df_news, 'policy': df_policy, 'eia': df_eia, 'weather': df_weather,
+        'usda': df_usda, 'cftc': df_cftc, 'databento': df_databento, 'fred': df_fred
+    })
     result = result.dropna(subset=['date'])
     
     logger.info(f"✅ Sentiment layers computed: {len(result)} rows")
@@ -504,25 +621,30 @@ def calculate_sentiment_daily(
 
 if __name__ == "__main__":
     # Example usage – pull from staging files or BigQuery
-    from pathlib import Path
-    
     DRIVE = Path("/Volumes/Satechi Hub/Projects/CBI-V14/TrainingData")
     
-    # Load staging files (using actual file names)
-    df_news = pd.read_parquet(DRIVE / "staging/policy_trump_signals.parquet") if (DRIVE / "staging/policy_trump_signals.parquet").exists() else pd.DataFrame()  # Placeholder - would need actual news_articles
-    df_policy = pd.read_parquet(DRIVE / "staging/policy_trump_signals.parquet") if (DRIVE / "staging/policy_trump_signals.parquet").exists() else pd.DataFrame()
-    df_eia = pd.read_parquet(DRIVE / "staging/eia_energy_granular.parquet") if (DRIVE / "staging/eia_energy_granular.parquet").exists() else pd.DataFrame()
-    df_weather = pd.read_parquet(DRIVE / "staging/weather_granular.parquet") if (DRIVE / "staging/weather_granular.parquet").exists() else pd.DataFrame()  # Fixed: weather_granular.parquet not weather_granular_daily.parquet
-    df_usda = pd.read_parquet(DRIVE / "staging/usda_reports_granular.parquet") if (DRIVE / "staging/usda_reports_granular.parquet").exists() else pd.DataFrame()
-    df_cftc = pd.read_parquet(DRIVE / "staging/cftc_commitments.parquet") if (DRIVE / "staging/cftc_commitments.parquet").exists() else pd.DataFrame()
-    df_databento = pd.DataFrame()  # Would load from BigQuery or staging
-    df_fred = pd.read_parquet(DRIVE / "staging/fred_macro_expanded.parquet") if (DRIVE / "staging/fred_macro_expanded.parquet").exists() else pd.DataFrame()
+    def _load(name):
+        path = DRIVE / f"staging/{name}.parquet"
+        return pd.read_parquet(path) if path.exists() else pd.DataFrame()
     
-    result = calculate_sentiment_daily(
-        df_news, df_policy, df_eia, df_weather, df_usda, df_cftc, df_databento, df_fred
-    )
+    # Load staging files (using actual file names)
+    df_policy = _load("policy_trump_signals")
+    inputs = {
+        'news': df_policy.copy(),  # Placeholder - would need actual news_articles
+        'policy': df_policy,
+        'eia': _load("eia_energy_granular"),
+        'weather': _load("weather_granular"),  # Fixed: weather_granular.parquet not weather_granular_daily.parquet
+        'usda': _load("usda_reports_granular"),
+        'cftc': _load("cftc_commitments"),
+        'databento': pd.DataFrame(),  # Would load from BigQuery or staging
+        'fred': _load("fred_macro_expanded"),
+    }
     
     output_file = DRIVE / "staging/sentiment_daily.parquet"
-    result.to_parquet(output_file, index=False)
+    engine = SentimentLayerEngine(output_path=output_file)
+    result = engine.refresh(inputs)
     print(f"✅ Sentiment layers computed – saved to {output_file}")
+    if '--verify' in sys.argv and engine.last_window_start is not None:
+        verify_refresh(inputs, result, engine.last_window_start)
+        print(f"✅ Refresh matches a full rebuild from {engine.last_window_start.date()}")
     print(f"   Ready for master_features join")
@@ -9,8 +9,13 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import logging
+import sys
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.utils.bar_resampler import resample_bars
+from src.utils.intraday_features import microstructure_features
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,6 +47,7 @@ def load_intraday_files():
     logger.info(f"Found {len(all_files)} total intraday files, filtering for: {', '.join(DESIRED_TIMEFRAMES)}")
     
     all_dfs = []
+    one_minute_dfs = []
     for f in all_files:
         try:
             # Extract timeframe from filename to decide whether to load the file
@@ -57,6 +63,12 @@ def load_intraday_files():
             elif '60min' in f.name:
                 timeframe = '60min'
             
+            # 1min files are kept to derive desired timeframes that have no file of their own
+            if timeframe == '1min':
+                one_minute_dfs.append(pd.read_parquet(f))
+                logger.info(f"  Loaded {f.name}: {len(one_minute_dfs[-1])} rows (1min source)")
+                continue
+            
             # Skip files that are not in the desired timeframes
             if timeframe not in DESIRED_TIMEFRAMES:
                 logger.info(f"  Skipping {f.name} (undesired timeframe: {timeframe})")
@@ -71,6 +83,23 @@ def load_intraday_files():
         except Exception as e:
             logger.warning(f"  Failed to load {f.name}: {e}")
     
+    # Roll ES 1min bars up to missing timeframes (same ES data, single sorted pass)
+    loaded = {df['timeframe'].iat[0] for df in all_dfs if len(df)}
+    missing = [tf for tf in DESIRED_TIMEFRAMES if tf not in loaded]
+    if one_minute_dfs and missing:
+        df1 = pd.concat(one_minute_dfs, ignore_index=True)
+        time_col = next((c for c in ('datetime', 'timestamp', 'time') if c in df1.columns), None)
+        if time_col is None:
+            logger.warning("  1min files have no datetime column, cannot derive higher timeframes")
+        else:
+            has_symbol = 'symbol' in df1.columns
+            resampled = resample_bars(df1, missing, time_col=time_col,
+                                      symbol_col='symbol' if has_symbol else None)
+            if not has_symbol:
+                resampled = resampled.drop(columns='symbol')
+            all_dfs.append(resampled.rename(columns={'datetime': time_col}))
+            logger.info(f"  Derived {', '.join(missing)} from 1min: {len(resampled)} rows")
+    
     if all_dfs:
         combined = pd.concat(all_dfs, ignore_index=True)
         return combined
@@ -130,47 +159,8 @@ def aggregate_to_daily(df):
     return daily_agg
 
 def calculate_microstructure_features(df):
-    """Calculate microstructure features from intraday data."""
-    features = []
-    
-    # Extract date for grouping
-    df['date'] = df['datetime'].dt.date
-    df['date'] = pd.to_datetime(df['date'])
-
-    # Group by date and timeframe
-    for (date, timeframe), group in df.groupby(['date', 'timeframe']):
-        if len(group) > 1:
-            # Realized volatility (standard deviation of returns)
-            group['return'] = group['close'].pct_change()
-            realized_vol = group['return'].std()
-            
-            # High-low volatility (Parkinson)
-            hl_vol = ((group['high'] / group['low']).apply(np.log) ** 2).mean() ** 0.5
-            
-            # Volume-weighted average price (VWAP)
-            vwap = (group['close'] * group['volume']).sum() / group['volume'].sum()
-            
-            # Number of bars
-            num_bars = len(group)
-            
-            features.append({
-                'date': date,
-                'timeframe': timeframe,
-                'realized_vol': realized_vol,
-                'hl_vol': hl_vol,
-                'vwap': vwap,
-                'num_bars': num_bars
-            })
-    
-    if features:
-        features_df = pd.DataFrame(features)
-        # Pivot on timeframe to make one row per date
-        pivot_df = features_df.pivot(index='date', columns='timeframe')
-        # Flatten the multi-level columns
-        pivot_df.columns = [f"es_{col[1]}_{col[0]}" for col in pivot_df.columns]
-        return pivot_df.reset_index()
-    
-    return pd.DataFrame()
+    """Calculate microstructure features from intraday data (grouped by date and timeframe)."""
+    return microstructure_features(df, prefix='es')
 
 def main():
     """Main aggregation pipeline."""
@@ -11,6 +11,11 @@ from pathlib import Path
 import logging
 import numpy as np
 import pandas as pd
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.utils.bar_resampler import resample_bars
+from src.utils.intraday_features import microstructure_features as intraday_microstructure
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -139,29 +144,16 @@ def load_intraday_files() -> pd.DataFrame:
         return pd.DataFrame()
     combined = pd.concat(parts, ignore_index=True)
 
-    # Resample from 1min to 5/15/30/60/240 where needed (per symbol to avoid mixing contracts)
+    # Derive 5/15/30/60/240 from 1min in one sorted pass (per symbol, contracts never mixed)
     if '1min' in combined['timeframe'].unique():
-        df1 = combined[combined['timeframe'] == '1min'].copy()
-        df1['datetime'] = pd.to_datetime(df1['datetime'])
-        rules = {'5min':'5T','15min':'15T','30min':'30T','60min':'60T','240min':'240T'}
-        for tf, rule in rules.items():
-            try:
-                resampled_parts = []
-                for sym, g in df1.groupby('symbol'):
-                    g = g.set_index('datetime').sort_index()
-                    r = g.resample(rule).agg({'open':'first','high':'max','low':'min','close':'last','volume':'sum'})
-                    r = r.dropna(subset=['open','high','low','close'])
-                    if not r.empty:
-                        r = r.reset_index().rename(columns={'index':'datetime'})
-                        r['symbol'] = sym
-                        r['timeframe'] = tf
-                        resampled_parts.append(r)
-                if resampled_parts:
-                    r_all = pd.concat(resampled_parts, ignore_index=True)
-                    combined = pd.concat([combined, r_all[['datetime','open','high','low','close','volume','symbol','timeframe']]], ignore_index=True)
-                    logger.info(f"Resampled 1min -> {tf}: {len(r_all)} rows")
-            except Exception as e:
-                logger.warning(f"Resample to {tf} failed: {e}")
+        df1 = combined[combined['timeframe'] == '1min']
+        try:
+            resampled = resample_bars(df1, ['5min', '15min', '30min', '60min', '240min'])
+            for tf, n in resampled['timeframe'].value_counts(sort=False).items():
+                logger.info(f"Resampled 1min -> {tf}: {n} rows")
+            combined = pd.concat([combined, resampled], ignore_index=True)
+        except Exception as e:
+            logger.warning(f"Resample from 1min failed: {e}")
     return combined
 
 def aggregate_to_daily(df: pd.DataFrame) -> pd.DataFrame:
@@ -190,25 +182,7 @@ def aggregate_to_daily(df: pd.DataFrame) -> pd.DataFrame:
     return daily
 
 def microstructure_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df['datetime'] = pd.to_datetime(df['datetime'])
-    df['date'] = df['datetime'].dt.date
-    df['date'] = pd.to_datetime(df['date'])
-    feats = []
-    for (date, tf), g in df.groupby(['date','timeframe']):
-        if len(g) < 2:
-            continue
-        ret = g['close'].pct_change()
-        realized_vol = ret.std()
-        hl_vol = ((g['high']/g['low']).apply(np.log)**2).mean()**0.5
-        vwap = (g['close']*g['volume']).sum() / max(g['volume'].sum(),1)
-        feats.append({'date':date,'timeframe':tf,'realized_vol':realized_vol,'hl_vol':hl_vol,'vwap':vwap,'num_bars':len(g)})
-    if not feats:
-        return pd.DataFrame()
-    fdf = pd.DataFrame(feats)
-    piv = fdf.pivot(index='date', columns='timeframe')
-    piv.columns = [f"zl_{c[1]}_{c[0]}" for c in piv.columns]
-    return piv.reset_index()
+    return intraday_microstructure(df, prefix='zl')
 
 def main():
     logger.info("ZL INTRADAY AGGREGATION")
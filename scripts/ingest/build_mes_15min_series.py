@@ -11,6 +11,10 @@ from pathlib import Path
 import json
 import logging
 import pandas as pd
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.utils.roll_calendar import apply_roll_calendar, ensure_roll_calendar
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -18,6 +22,7 @@ logger = logging.getLogger(__name__)
 DRIVE = Path("/Volumes/Satechi Hub/Projects/CBI-V14")
 RAW = DRIVE / "TrainingData/raw/databento_mes"
 OUT = DRIVE / "TrainingData/staging/mes_15min.parquet"
+ROLL_CALENDAR = DRIVE / "TrainingData/staging/mes_roll_calendar.parquet"  # shared with build_mes_all_horizons.py
 
 def load_one(path: Path) -> pd.DataFrame:
     if path.suffix.lower() == '.parquet':
@@ -134,31 +139,13 @@ def main():
     
     # CONTRACT CALENDAR: Prevent intraday oscillation during roll weeks
     # Use daily contract selection (highest volume over rolling 7D window)
-    df_all['date'] = df_all['datetime'].dt.date
-    
-    # Compute 7-day rolling volume per symbol
-    daily_vol = df_all.groupby(['date','symbol'])['volume'].sum().reset_index()
-    daily_vol = daily_vol.sort_values('date')
-    
-    logger.info("Building contract calendar (7-day rolling volume window)...")
-    active_contracts = {}
-    for date in sorted(daily_vol['date'].unique()):
-        # Look back 7 days (or less if start of data)
-        lookback = pd.Timestamp(date) - pd.Timedelta(days=7)
-        recent = daily_vol[daily_vol['date'] >= lookback.date()]
-        recent = recent[recent['date'] <= date]
-        
-        # Pick symbol with highest total volume in window
-        sym_vol = recent.groupby('symbol')['volume'].sum()
-        active_contracts[date] = sym_vol.idxmax() if not sym_vol.empty else None
-    
-    # Map active contract back to 15m bars
-    df_all['active_contract'] = df_all['date'].map(active_contracts)
-    df_all = df_all[df_all['symbol'] == df_all['active_contract']]
+    logger.info("Loading contract calendar (7-day rolling volume window)...")
+    calendar = ensure_roll_calendar(df_all, ROLL_CALENDAR, window_days=7)
+    df_all = apply_roll_calendar(df_all, calendar)
     logger.info(f"Selected {len(df_all)} 15min bars from active contract chain")
     
     # Final output
-    r = df_all.drop(columns=['symbol','date','active_contract']).sort_values('datetime')
+    r = df_all.drop(columns=['symbol']).sort_values('datetime')
     r = r.rename(columns={
         'open':'mes_open', 'high':'mes_high', 'low':'mes_low',
         'close':'mes_close', 'volume':'mes_volume'
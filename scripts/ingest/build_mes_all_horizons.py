@@ -22,6 +22,10 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import logging
 import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.utils.roll_calendar import apply_roll_calendar, ensure_roll_calendar
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -30,6 +34,7 @@ DRIVE = Path("/Volumes/Satechi Hub/Projects/CBI-V14")
 LIVE_DIR = DRIVE / "TrainingData/live/MES/1m"
 STAGING_DIR = DRIVE / "TrainingData/staging"
 STAGING_DIR.mkdir(parents=True, exist_ok=True)
+ROLL_CALENDAR_PATH = STAGING_DIR / "mes_roll_calendar.parquet"  # shared with build_mes_15min_series.py
 
 # MES Training Horizons (prod + allhistory)
 # Using 'min' instead of deprecated 'T' for pandas resampling
@@ -132,33 +137,9 @@ def select_active_contract(df: pd.DataFrame) -> pd.DataFrame:
     
     logger.info("Selecting active contract chain...")
     
-    # Group by date and symbol to get daily volumes
-    df['date'] = df['datetime'].dt.date
-    daily_vol = df.groupby(['date', 'symbol'])['volume'].sum().reset_index()
-    daily_vol = daily_vol.sort_values('date')
-    
-    # Build contract calendar using 7-day rolling window
-    active_contracts = {}
-    for date in sorted(daily_vol['date'].unique()):
-        lookback = pd.Timestamp(date) - pd.Timedelta(days=7)
-        recent = daily_vol[
-            (daily_vol['date'] >= lookback.date()) & 
-            (daily_vol['date'] <= date)
-        ]
-        
-        if not recent.empty:
-            sym_vol = recent.groupby('symbol')['volume'].sum()
-            active_contracts[date] = sym_vol.idxmax()
-        else:
-            # Fallback: use highest volume symbol for this date
-            day_data = daily_vol[daily_vol['date'] == date]
-            if not day_data.empty:
-                active_contracts[date] = day_data.loc[day_data['volume'].idxmax(), 'symbol']
-    
-    # Map active contract back to dataframe
-    df['active_contract'] = df['date'].map(active_contracts)
-    df = df[df['symbol'] == df['active_contract']].copy()
-    df = df.drop(columns=['date', 'active_contract'])
+    # Contract calendar: highest volume over a 7-day rolling window (built once, then reused)
+    calendar = ensure_roll_calendar(df, ROLL_CALENDAR_PATH, window_days=7)
+    df = apply_roll_calendar(df, calendar)
     
     logger.info(f"✅ Selected {len(df)} bars from active contract chain")
     return df
@@ -48,6 +48,8 @@ except Exception as e:
     if FRED_API_KEY:
         logger.info("Using FRED API key from environment")
 
+from src.utils.partitioned_store import PartitionedSeriesStore
+
 if not FRED_API_KEY:
     logger.error("FRED_API_KEY not found in keychain or environment!")
     logger.error("Store in keychain: security add-generic-password -a default -s cbi-v14.FRED_API_KEY -w 'your_key' -U")
@@ -260,9 +262,11 @@ def fetch_series(series_id: str, series_name: str) -> dict:
             # CRITICAL: Sort by date before any pct_change calculations
             df = df.sort_values('date')
             
-            # Save processed parquet
-            processed_file = PROCESSED_DIR / f"{series_id}.parquet"
-            df.to_parquet(processed_file, index=False)
+            # Write through the series store read by downstream loaders; a full
+            # re-collection supersedes earlier rows (latest write wins on read)
+            store = PartitionedSeriesStore(PROCESSED_DIR / series_id, date_column='date')
+            store.import_legacy(PROCESSED_DIR / f"{series_id}.parquet")
+            store.append(df, only_new=False)
             
             logger.info(f"  ✅ Success: {len(df)} observations saved")
             
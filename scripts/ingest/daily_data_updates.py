@@ -10,6 +10,10 @@ Data sources updated:
 2. FRED Economic - Daily series
 3. Weather - NASA POWER API (if needed)
 4. CFTC COT - Weekly (Fridays)
+
+Yahoo and FRED series are kept in append-only, year-partitioned stores
+(src/utils/partitioned_store.py): each run writes only the new rows, so
+update I/O does not grow with history. Read them with read_series().
 """
 
 import pandas as pd
@@ -23,6 +27,9 @@ import time
 import sys
 import os
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.utils.partitioned_store import PartitionedSeriesStore
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -87,15 +94,13 @@ def update_yahoo_finance():
                 filename = symbol.replace('=', '_').replace('^', '').replace('-', '_')
                 filepath = category_dir / f"{filename}.parquet"
                 
-                # Determine start date for update
-                if filepath.exists():
-                    # Load existing data to find last date
-                    existing_df = pd.read_parquet(filepath)
-                    if 'Date' in existing_df.columns:
-                        last_date = pd.to_datetime(existing_df['Date']).max()
-                        start_date = (last_date + timedelta(days=1)).strftime('%Y-%m-%d')
-                    else:
-                        start_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+                # Append-only store next to the legacy single file
+                store = PartitionedSeriesStore(category_dir / filename, date_column='Date')
+                store.import_legacy(filepath)
+                
+                # Determine start date for update (manifest only – no data read)
+                if store.last_date is not None:
+                    start_date = (store.last_date + timedelta(days=1)).strftime('%Y-%m-%d')
                 else:
                     # New symbol - get last 30 days
                     start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
@@ -112,17 +117,16 @@ def update_yahoo_finance():
                     new_data['Date'] = pd.to_datetime(new_data['Date']).dt.tz_localize(None)
                     new_data['Symbol'] = symbol
                     
-                    # Merge with existing data or save new
-                    if filepath.exists() and not existing_df.empty:
-                        # Combine old and new, remove duplicates
-                        combined = pd.concat([existing_df, new_data], ignore_index=True)
-                        combined = combined.drop_duplicates(subset=['Date'], keep='last')
-                        combined = combined.sort_values('Date')
-                        combined.to_parquet(filepath, index=False)
-                        logger.info(f"  ✅ Updated {symbol}: +{len(new_data)} new records")
+                    # Write only the new rows as a new partition part
+                    created = not store.exists()
+                    written = store.append(new_data)
+                    if written == 0:
+                        logger.debug(f"  No new data for {symbol}")
+                        continue
+                    if created:
+                        logger.info(f"  ✅ Created {symbol}: {written} records")
                     else:
-                        new_data.to_parquet(filepath, index=False)
-                        logger.info(f"  ✅ Created {symbol}: {len(new_data)} records")
+                        logger.info(f"  ✅ Updated {symbol}: +{written} new records")
                     
                     updates_count += 1
                     time.sleep(0.5)  # Rate limiting
@@ -205,18 +209,11 @@ def update_fred_data():
                         df = df[df['value'].notna()]
                         
                         if not df.empty:
-                            # Save individual series
-                            series_file = processed_dir / f"{series_id}.parquet"
-                            
-                            # Merge with existing or create new
-                            if series_file.exists():
-                                existing = pd.read_parquet(series_file)
-                                combined = pd.concat([existing, df], ignore_index=True)
-                                combined = combined.drop_duplicates(subset=['date'], keep='last')
-                                combined = combined.sort_values('date')
-                                combined.to_parquet(series_file, index=False)
-                            else:
-                                df.to_parquet(series_file, index=False)
+                            # Append to the series store (last 30 days may revise
+                            # earlier observations – latest write wins on read)
+                            store = PartitionedSeriesStore(processed_dir / series_id, date_column='date')
+                            store.import_legacy(processed_dir / f"{series_id}.parquet")
+                            store.append(df, only_new=False)
                             
                             all_data.append(df)
                             updates_count += 1
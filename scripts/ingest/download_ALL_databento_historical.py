@@ -21,40 +21,54 @@ Target BigQuery Tables:
 - market_data.databento_futures_ohlcv_1m (1-minute)
 - market_data.databento_futures_ohlcv_1s (1-second, MES only)
 
+Streaming load (per root × schema × month):
+- Databento → local DBN file (kept, so reruns and tests need no API call)
+- DBN records → chunks of `--chunk-rows` → BQ-schema Arrow batches → one
+  Parquet partition per month; only one chunk is in memory at a time
+- Parquet partitions → BigQuery staging table → one transaction that replaces
+  the root's rows for the partition's date range (a crashed run that loaded
+  but did not checkpoint reloads the month without duplicating it)
+- Months processed in parallel
+- A checkpoint per (root, schema, month) records the date loaded through;
+  reruns skip finished months and fetch only the tail of a partial month
+
+Local layout (DATABENTO_STAGE_DIR, default TrainingData/raw/databento_stream):
+    dbn/{root}/{schema}/{start}_{end}.dbn.zst
+    parquet/{root}/{schema}/month=YYYY-MM/{start}_{end}.parquet
+    _checkpoints.json
+
 Requirements:
     pip install databento google-cloud-bigquery pandas pyarrow db-dtypes
 
 Usage:
     python3 scripts/ingest/download_ALL_databento_historical.py
+    python3 scripts/ingest/download_ALL_databento_historical.py --workers 8 --chunk-rows 500000
+    python3 scripts/ingest/download_ALL_databento_historical.py --offline --no-bq   # stored DBN → Parquet only
 """
 
 import os
 import sys
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from google.cloud import bigquery
 import time
 import subprocess
 import json
 
-# #region agent log
-LOG_PATH = Path("/Users/zincdigital/CBI-V14/.cursor/debug.log")
-def debug_log(location, message, data, hypothesis_id=None):
-    try:
-        entry = {
-            "sessionId": "daily-backfill-debug",
-            "runId": os.environ.get("RUN_ID", "run1"),
-            "hypothesisId": hypothesis_id,
-            "location": location,
-            "message": message,
-            "data": data,
-            "timestamp": int(time.time() * 1000)
-        }
-        with open(LOG_PATH, "a") as f:
-            f.write(json.dumps(entry) + "\n")
-    except: pass
-# #endregion
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cbi_v14.api.databento.daily import to_daily_rows
+from cbi_v14.api.databento.sinks import daily_bq_schema
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 try:
     import databento as db
@@ -67,6 +81,13 @@ PROJECT_ID = "cbi-v14"
 DATASET_ID = "market_data"
 DATABENTO_DATASET = "GLBX.MDP3"  # CME Globex MDP 3.0
 
+STAGE_DIR = Path(os.getenv(
+    "DATABENTO_STAGE_DIR",
+    str(Path(__file__).resolve().parents[2] / "TrainingData/raw/databento_stream"),
+))
+CHUNK_ROWS = 250_000  # DBN records converted per Arrow batch
+DEFAULT_WORKERS = 4   # concurrent months (download + Parquet + BQ load)
+
 # BQ Table mapping by schema
 BQ_TABLE_MAP = {
     "ohlcv-1s": "databento_futures_ohlcv_1s",
@@ -75,6 +96,12 @@ BQ_TABLE_MAP = {
     "ohlcv-1d": "databento_futures_ohlcv_1d",
 }
 
+# Columns scoping a partition's rows in the target table: (root column, date expression)
+BQ_RANGE_COLUMNS = {
+    "ohlcv-1d": ("symbol", "date"),
+    "intraday": ("root", "DATE(ts_event)"),
+}
+
 # Download plan - ZL ENGINE ONLY (5 roots, daily only)
 # Focus: ZL + supporting symbols for first baselines
 DOWNLOAD_PLAN = [
@@ -116,26 +143,6 @@ def get_bq_client():
     return bigquery.Client(project=PROJECT_ID)
 
 
-def get_bq_schema_1d():
-    """Schema for databento_futures_ohlcv_1d - matches existing BQ table."""
-    return [
-        bigquery.SchemaField("date", "DATE", mode="REQUIRED"),
-        bigquery.SchemaField("symbol", "STRING", mode="REQUIRED"),
-        bigquery.SchemaField("open", "FLOAT64"),
-        bigquery.SchemaField("high", "FLOAT64"),
-        bigquery.SchemaField("low", "FLOAT64"),
-        bigquery.SchemaField("close", "FLOAT64"),
-        bigquery.SchemaField("volume", "INT64"),
-        bigquery.SchemaField("settle", "FLOAT64"),
-        bigquery.SchemaField("vwap", "FLOAT64"),
-        bigquery.SchemaField("open_interest", "INT64"),
-        bigquery.SchemaField("instrument_id", "STRING"),
-        bigquery.SchemaField("exchange", "STRING"),
-        bigquery.SchemaField("currency", "STRING"),
-        bigquery.SchemaField("dataset", "STRING"),
-        bigquery.SchemaField("load_ts", "TIMESTAMP"),
-    ]
-
 def get_bq_schema_intraday():
     """Schema for databento_futures_ohlcv_1m/1s/1h - matches existing BQ table."""
     return [
@@ -159,321 +166,350 @@ def get_bq_schema_intraday():
     ]
 
 
-def fetch_and_load_to_bq(client, bq_client, symbol_info, schema, end_date):
-    """Fetch data from Databento and load DIRECTLY to BigQuery."""
+def get_arrow_schema(schema):
+    """Arrow schema matching the BQ table for a Databento schema (Parquet partitions use it)."""
+    if schema == "ohlcv-1d":
+        return pa.schema([
+            ("date", pa.date32()), ("symbol", pa.string()),
+            ("open", pa.float64()), ("high", pa.float64()), ("low", pa.float64()), ("close", pa.float64()),
+            ("volume", pa.int64()), ("settle", pa.float64()), ("vwap", pa.float64()),
+            ("open_interest", pa.int64()), ("instrument_id", pa.string()), ("exchange", pa.string()),
+            ("currency", pa.string()), ("dataset", pa.string()), ("load_ts", pa.timestamp("us", tz="UTC")),
+        ])
+    return pa.schema([
+        ("ts_event", pa.timestamp("us", tz="UTC")), ("root", pa.string()), ("symbol", pa.string()),
+        ("instrument_id", pa.int64()),
+        ("open", pa.float64()), ("high", pa.float64()), ("low", pa.float64()), ("close", pa.float64()),
+        ("volume", pa.int64()), ("open_interest", pa.int64()), ("is_spread", pa.bool_()),
+        ("spread_legs", pa.string()), ("publisher_id", pa.int64()), ("priority_tier", pa.int64()),
+        ("source_published_at", pa.timestamp("us", tz="UTC")), ("collection_timestamp", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def month_ranges(start, end):
+    """[(YYYY-MM, range_start, range_end)] covering [start, end), end exclusive, split at month starts."""
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    ranges = []
+    cursor = start
+    while cursor < end:
+        month_end = min(cursor + pd.offsets.MonthBegin(1), end)
+        ranges.append((cursor.strftime("%Y-%m"), cursor.strftime("%Y-%m-%d"), month_end.strftime("%Y-%m-%d")))
+        cursor = month_end
+    return ranges
+
+
+class LoadCheckpoint:
+    """Per (root, schema, month) high-water mark: the (exclusive) date loaded through."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    @staticmethod
+    def key(root, schema, month):
+        return f"{root}|{schema}|{month}"
+
+    def through(self, root, schema, month):
+        entry = self.entries.get(self.key(root, schema, month))
+        return entry["through"] if entry else None
+
+    def mark(self, root, schema, month, through, rows):
+        with self._lock:
+            self.entries[self.key(root, schema, month)] = {
+                "through": through, "rows": rows, "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+            tmp.replace(self.path)
+
+
+def fetch_dbn(client, root, schema, start, end, path):
+    """Download one range to a DBN file (written to .tmp first, so a failed download never looks complete)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    client.timeseries.get_range(
+        dataset=DATABENTO_DATASET,
+        symbols=[f"{root}.FUT"],  # Use ROOT.FUT format for parent symbology
+        schema=schema,
+        start=start,
+        end=end,
+        stype_in="parent",  # Parent symbology for continuous
+        path=tmp,
+    )
+    tmp.replace(path)
+    return path
+
+
+def iter_dbn_frames(path, chunk_rows=CHUNK_ROWS):
+    """Stream a DBN file as DataFrames of at most chunk_rows records (ts_event as a column)."""
+    store = db.DBNStore.from_file(path)
+    for chunk in store.to_df(count=chunk_rows):
+        if not chunk.empty:
+            yield chunk.reset_index(drop=False)
+
+
+def to_intraday_rows(df, root, now):
+    """Databento intraday OHLCV records (1s, 1m, 1h) → rows of the target BQ table (spreads dropped)."""
+    if 'symbol' in df.columns:
+        # Remove spreads (contain "-")
+        df = df[~df['symbol'].astype(str).str.contains('-', na=False)]
+    if df.empty:
+        return None
+
+    return pd.DataFrame({
+        'ts_event': pd.to_datetime(df['ts_event'], utc=True),
+        'root': root,
+        'symbol': df['symbol'].astype(str) if 'symbol' in df.columns else root,
+        'instrument_id': df['instrument_id'].astype('Int64') if 'instrument_id' in df.columns else None,
+        'open': df['open'].astype(float),
+        'high': df['high'].astype(float),
+        'low': df['low'].astype(float),
+        'close': df['close'].astype(float),
+        'volume': df['volume'].astype('Int64'),
+        'open_interest': None,
+        'is_spread': False,
+        'spread_legs': None,  # Scalar STRING column in BQ
+        'publisher_id': df['publisher_id'].astype('Int64') if 'publisher_id' in df.columns else None,
+        'priority_tier': 1,  # Front month
+        'source_published_at': now,
+        'collection_timestamp': now,
+    })
+
+
+def to_bq_rows(df, root, exchange, schema, now):
+    """Databento OHLCV records → rows of the target BQ table (daily = top-volume contract per date)."""
+    if schema == "ohlcv-1d":
+        return to_daily_rows(df, root, exchange, load_ts=now)
+    return to_intraday_rows(df, root, now)
+
+
+def write_partition(dbn_path, parquet_path, root, exchange, schema, chunk_rows=CHUNK_ROWS):
+    """
+    Convert one DBN file to a Parquet partition in the BQ schema; returns rows written.
+
+    Intraday chunks are written as Arrow batches as they are decoded. Daily
+    bars need whole dates for the per-date contract pick, so their (small)
+    month is collected first.
+    """
+    arrow_schema = get_arrow_schema(schema)
+    now = pd.Timestamp.now(tz="UTC")
+    frames = iter_dbn_frames(dbn_path, chunk_rows)
+    if schema == "ohlcv-1d":
+        chunks = list(frames)
+        frames = [pd.concat(chunks, ignore_index=True)] if chunks else []
+
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = parquet_path.with_name(parquet_path.name + ".tmp")
+    rows, writer = 0, None
+    try:
+        for frame in frames:
+            df_bq = to_bq_rows(frame, root, exchange, schema, now) if not frame.empty else None
+            if df_bq is None or df_bq.empty:
+                continue
+            table = pa.Table.from_pandas(df_bq, schema=arrow_schema, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, arrow_schema, compression="zstd")
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if rows:
+        tmp.replace(parquet_path)
+    return rows
+
+
+def load_partition(bq_client, parquet_path, table_id, bq_schema, schema, root, start, end):
+    """
+    Replace the root's rows in [start, end) with one Parquet partition.
+
+    The file is loaded into a staging table (WRITE_TRUNCATE), then a single
+    transaction deletes the range from the target and inserts the staged
+    rows, so rerunning a month never appends it twice. Daily partitions of
+    the target are shared by all roots, which rules out truncating them.
+    """
+    stage_id = f"{table_id}__stage_{root}_{start.replace('-', '')}_{end.replace('-', '')}"
+    job_config = bigquery.LoadJobConfig(
+        schema=bq_schema,
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+    )
+    root_col, date_expr = BQ_RANGE_COLUMNS["ohlcv-1d" if schema == "ohlcv-1d" else "intraday"]
+    columns = ", ".join(field.name for field in bq_schema)
+    replace_sql = f"""
+        BEGIN TRANSACTION;
+        DELETE FROM `{table_id}`
+        WHERE {root_col} = @root AND {date_expr} >= @start AND {date_expr} < @end;
+        INSERT INTO `{table_id}` ({columns})
+        SELECT {columns} FROM `{stage_id}`;
+        COMMIT TRANSACTION;
+    """
+    query_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter("root", "STRING", root),
+        bigquery.ScalarQueryParameter("start", "DATE", start),
+        bigquery.ScalarQueryParameter("end", "DATE", end),
+    ])
+    try:
+        with open(parquet_path, "rb") as f:
+            bq_client.load_table_from_file(f, stage_id, job_config=job_config).result()
+        bq_client.query(replace_sql, job_config=query_config).result()
+    finally:
+        bq_client.delete_table(stage_id, not_found_ok=True)
+
+
+def process_month(client, bq_client, symbol_info, schema, month, start, end, checkpoint,
+                  stage_dir=STAGE_DIR, chunk_rows=CHUNK_ROWS, load_bq=True):
+    """Fetch (or reuse) → Parquet → BigQuery → checkpoint for one month range; returns rows."""
+    root, exchange = symbol_info["root"], symbol_info["exchange"]
+    logger.debug(f"{root} {schema} {month}: {start} → {end}")
+
+    dbn_path = stage_dir / "dbn" / root / schema / f"{start}_{end}.dbn.zst"
+    if not dbn_path.exists():
+        if client is None:
+            print(f"     ⚠️ {root} {schema} {month}: no stored DBN at {dbn_path} (offline) - skipped")
+            return 0
+        fetch_dbn(client, root, schema, start, end, dbn_path)
+
+    parquet_path = stage_dir / "parquet" / root / schema / f"month={month}" / f"{start}_{end}.parquet"
+    rows = write_partition(dbn_path, parquet_path, root, exchange, schema, chunk_rows)
+    if rows and load_bq:
+        table_id = f"{PROJECT_ID}.{DATASET_ID}.{BQ_TABLE_MAP[schema]}"
+        bq_schema = daily_bq_schema() if schema == "ohlcv-1d" else get_bq_schema_intraday()
+        load_partition(bq_client, parquet_path, table_id, bq_schema, schema, root, start, end)
+    if load_bq:
+        checkpoint.mark(root, schema, month, end, rows)
+
+    logger.debug(f"{root} {schema} {month}: {rows} rows")
+    return rows
+
+
+def fetch_and_load_to_bq(client, bq_client, symbol_info, schema, end_date, checkpoint=None,
+                         stage_dir=STAGE_DIR, workers=DEFAULT_WORKERS, chunk_rows=CHUNK_ROWS, load_bq=True):
+    """Stream one root × schema from Databento into BigQuery, month by month in parallel."""
     root = symbol_info["root"]
-    exchange = symbol_info["exchange"]
-    start = symbol_info["start"]
-    symbol = f"{root}.FUT"  # Use ROOT.FUT format for parent symbology
-    
-    # #region agent log
-    debug_log("download_ALL_databento_historical.py:167", "fetch_and_load_to_bq entry", {"root": root, "schema": schema, "start": start, "end": end_date}, "H1")
-    # #endregion
-    
+    checkpoint = checkpoint or LoadCheckpoint(stage_dir / "_checkpoints.json")
     table_name = BQ_TABLE_MAP[schema]
-    full_table_id = f"{PROJECT_ID}.{DATASET_ID}.{table_name}"
-    
+
     print(f"\n  📊 {root} - {schema}")
-    print(f"     Date range: {start} to {end_date}")
-    print(f"     Target: {full_table_id}")
-    
-    try:
-        # Fetch data from Databento
-        print(f"     Fetching from Databento...")
-        
-        # #region agent log
-        api_start = time.time()
-        debug_log("download_ALL_databento_historical.py:185", "API call start", {"root": root, "symbol": symbol, "schema": schema}, "H2")
-        # #endregion
-        
-        data = client.timeseries.get_range(
-            dataset=DATABENTO_DATASET,
-            symbols=[symbol],
-            schema=schema,
-            start=start,
-            end=end_date,
-            stype_in="parent",  # Parent symbology for continuous
-        )
-        
-        # #region agent log
-        api_duration = time.time() - api_start
-        debug_log("download_ALL_databento_historical.py:195", "API call complete", {"root": root, "duration_sec": api_duration}, "H2")
-        # #endregion
-        
-        # Convert to DataFrame
-        # #region agent log
-        df_start = time.time()
-        debug_log("download_ALL_databento_historical.py:198", "to_df() start", {"root": root}, "H3")
-        # #endregion
-        
-        df = data.to_df()
-        
-        # #region agent log
-        df_duration = time.time() - df_start
-        df_size_mb = df.memory_usage(deep=True).sum() / 1024 / 1024 if not df.empty else 0
-        debug_log("download_ALL_databento_historical.py:201", "to_df() complete", {"root": root, "rows": len(df), "cols": len(df.columns), "size_mb": df_size_mb, "duration_sec": df_duration, "index_duplicates": df.index.duplicated().sum() if hasattr(df.index, 'duplicated') else 0}, "H3")
-        # #endregion
-        
-        if df.empty:
-            print(f"     ⚠️ No data returned")
-            # #region agent log
-            debug_log("download_ALL_databento_historical.py:204", "Empty DataFrame", {"root": root}, "H4")
-            # #endregion
-            return 0
-        
-        print(f"     Got {len(df)} rows")
-        
-        # Reset index to avoid duplicate index issues - PRESERVE ts_event as a column!
-        # #region agent log
-        debug_log("download_ALL_databento_historical.py:210", "Before reset_index", {"root": root, "index_type": str(type(df.index)), "index_name": str(df.index.name), "index_duplicates": df.index.duplicated().sum() if hasattr(df.index, 'duplicated') else "N/A"}, "H5")
-        # #endregion
-        
-        # CRITICAL: Use drop=False to preserve ts_event (the DatetimeIndex) as a column
-        df = df.reset_index(drop=False)
-        
-        # Filter out spreads (symbols with "-") and aggregate to one row per date
-        if 'symbol' in df.columns:
-            # #region agent log
-            debug_log("download_ALL_databento_historical.py:214", "Before filtering", {"root": root, "unique_symbols": df['symbol'].nunique(), "total_rows": len(df)}, "H4")
-            # #endregion
-            
-            # Remove spreads (contain "-")
-            df_outrights = df[~df['symbol'].str.contains('-', na=False)].copy()
-            spreads_removed = len(df) - len(df_outrights)
-            print(f"     Removed {spreads_removed} spread rows, {len(df_outrights)} outright contracts remain")
-            
-            if len(df_outrights) == 0:
-                print(f"     ⚠️ No outright contracts found!")
-                return 0
-            
-            # For daily data: aggregate to one row per date (sum volume, use OHLC from highest volume contract)
-            if schema == "ohlcv-1d" and 'ts_event' in df_outrights.columns:
-                df_outrights['_date'] = pd.to_datetime(df_outrights['ts_event']).dt.date
-                
-                # For each date, find the contract with highest volume (front month proxy)
-                idx_max_vol = df_outrights.groupby('_date')['volume'].idxmax()
-                df = df_outrights.loc[idx_max_vol].copy()
-                df = df.drop(columns=['_date'])
-                print(f"     Aggregated to {len(df)} daily bars (one per date, highest volume contract)")
-            else:
-                df = df_outrights
-            
-            # #region agent log
-            debug_log("download_ALL_databento_historical.py:240", "After filtering", {"root": root, "rows": len(df)}, "H4")
-            # #endregion
-        
-        # Transform to BQ schema - MATCH EXISTING TABLE EXACTLY
-        now = datetime.now(timezone.utc).replace(tzinfo=None)  # Fix deprecation warning
-        
-        # #region agent log
-        build_start = time.time()
-        debug_log("download_ALL_databento_historical.py:225", "Building df_bq start", {"root": root, "schema": schema, "df_rows": len(df), "df_cols": list(df.columns)[:5]}, "H5")
-        # #endregion
-        
-        if schema == "ohlcv-1d":
-            # Daily bars - matches databento_futures_ohlcv_1d schema
-            df_bq = pd.DataFrame(index=df.index)  # Use same index as source
-            
-            # Derive date from ts_event or DatetimeIndex; never from a RangeIndex
-            if 'ts_event' in df.columns:
-                ts = pd.to_datetime(df['ts_event'])
-            elif isinstance(df.index, pd.DatetimeIndex) or pd.api.types.is_datetime64_any_dtype(df.index):
-                ts = pd.to_datetime(df.index)
-            else:
-                raise ValueError("Cannot derive daily date: missing ts_event and DatetimeIndex")
-            
-            df_bq['date'] = ts.dt.date
-            
-            df_bq['symbol'] = root
-            df_bq['open'] = df['open'].astype(float) if 'open' in df.columns else None
-            df_bq['high'] = df['high'].astype(float) if 'high' in df.columns else None
-            df_bq['low'] = df['low'].astype(float) if 'low' in df.columns else None
-            df_bq['close'] = df['close'].astype(float) if 'close' in df.columns else None
-            df_bq['volume'] = df['volume'].astype('Int64') if 'volume' in df.columns else None
-            df_bq['settle'] = None
-            df_bq['vwap'] = None
-            df_bq['open_interest'] = None
-            df_bq['instrument_id'] = df['instrument_id'].astype(str) if 'instrument_id' in df.columns else None
-            df_bq['exchange'] = exchange
-            df_bq['currency'] = 'USD'
-            df_bq['dataset'] = DATABENTO_DATASET
-            df_bq['load_ts'] = now
-            
-            bq_schema = get_bq_schema_1d()
-            date_col = 'date'
-            
-        else:
-            # Intraday bars (1s, 1m, 1h) - matches databento_futures_ohlcv_1m schema
-            df_bq = pd.DataFrame(index=df.index)  # Use same index as source
-            
-            if 'ts_event' in df.columns:
-                df_bq['ts_event'] = pd.to_datetime(df['ts_event'])
-            else:
-                df_bq['ts_event'] = pd.to_datetime(df.index)
-            
-            df_bq['root'] = root
-            df_bq['symbol'] = df['symbol'].astype(str) if 'symbol' in df.columns else root
-            df_bq['instrument_id'] = df['instrument_id'].astype('Int64') if 'instrument_id' in df.columns else None
-            df_bq['open'] = df['open'].astype(float) if 'open' in df.columns else None
-            df_bq['high'] = df['high'].astype(float) if 'high' in df.columns else None
-            df_bq['low'] = df['low'].astype(float) if 'low' in df.columns else None
-            df_bq['close'] = df['close'].astype(float) if 'close' in df.columns else None
-            df_bq['volume'] = df['volume'].astype('Int64') if 'volume' in df.columns else None
-            df_bq['open_interest'] = None
-            df_bq['is_spread'] = False
-            df_bq['spread_legs'] = None  # Scalar STRING column in BQ
-            df_bq['publisher_id'] = df['publisher_id'].astype('Int64') if 'publisher_id' in df.columns else None
-            df_bq['priority_tier'] = 1  # Front month
-            df_bq['source_published_at'] = now
-            df_bq['collection_timestamp'] = now
-            
-            bq_schema = get_bq_schema_intraday()
-            date_col = 'ts_event'
-        
-        # #region agent log
-        build_duration = time.time() - build_start
-        df_bq_size_mb = df_bq.memory_usage(deep=True).sum() / 1024 / 1024 if not df_bq.empty else 0
-        debug_log("download_ALL_databento_historical.py:332", "df_bq built", {"root": root, "rows": len(df_bq), "cols": len(df_bq.columns), "size_mb": df_bq_size_mb, "duration_sec": build_duration}, "H5")
-        # #endregion
-        
-        # Load to BigQuery in monthly batches (avoid partition limit for intraday)
-        total_loaded = 0
-        
-        if schema == "ohlcv-1d":
-            # Daily: batch by year
-            # Extract year from date column (date is already date type, not datetime)
-            if date_col == 'date':
-                # date column is already date type, access .year directly
-                df_bq['_year'] = df_bq[date_col].apply(lambda x: x.year if hasattr(x, 'year') else pd.to_datetime(x).year)
-            else:
-                df_bq['_year'] = pd.to_datetime(df_bq[date_col]).dt.year
-            batches = df_bq.groupby('_year')
-        else:
-            # Intraday: batch by month
-            df_bq['_month'] = df_bq[date_col].dt.to_period('M')
-            batches = df_bq.groupby('_month')
-        
-        for batch_key, batch_df in batches:
-            batch_df = batch_df.drop(columns=['_year'] if '_year' in batch_df.columns else ['_month'], errors='ignore')
-            
-            if len(batch_df) == 0:
-                continue
-            
-            job_config = bigquery.LoadJobConfig(
-                schema=bq_schema,
-                write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
-            )
-            
-            # #region agent log
-            bq_start = time.time()
-            debug_log("download_ALL_databento_historical.py:356", "BQ load start", {"root": root, "batch": str(batch_key), "rows": len(batch_df)}, "H1")
-            # #endregion
-            
-            job = bq_client.load_table_from_dataframe(
-                batch_df, full_table_id, job_config=job_config
-            )
-            job.result()
-            
-            # #region agent log
-            bq_duration = time.time() - bq_start
-            debug_log("download_ALL_databento_historical.py:364", "BQ load complete", {"root": root, "batch": str(batch_key), "rows": len(batch_df), "duration_sec": bq_duration}, "H1")
-            # #endregion
-            
-            total_loaded += len(batch_df)
-            print(f"     Loaded {batch_key}: {len(batch_df)} rows")
-        
-        print(f"     ✅ Total loaded: {total_loaded} rows")
-        # #region agent log
-        debug_log("download_ALL_databento_historical.py:370", "fetch_and_load_to_bq exit", {"root": root, "total_loaded": total_loaded}, "H1")
-        # #endregion
-        return total_loaded
-        
-    except Exception as e:
-        print(f"     ❌ Error: {e}")
-        # #region agent log
-        debug_log("download_ALL_databento_historical.py:375", "Exception caught", {"root": root, "error": str(e), "error_type": type(e).__name__}, "H4")
-        # #endregion
-        import traceback
-        traceback.print_exc()
+    print(f"     Date range: {symbol_info['start']} to {end_date}")
+    print(f"     Target: {PROJECT_ID}.{DATASET_ID}.{table_name}" if load_bq else f"     Target: {stage_dir / 'parquet'}")
+
+    # Months still to load; a partially loaded month resumes from its checkpoint
+    pending = []
+    for month, start, end in month_ranges(symbol_info["start"], end_date):
+        through = checkpoint.through(root, schema, month)
+        if through is not None and through >= end:
+            continue
+        pending.append((month, max(start, through) if through else start, end))
+    if not pending:
+        print("     ✅ Up to date (checkpoint)")
         return 0
+    print(f"     {len(pending)} month(s) to load with {workers} workers")
+
+    total_loaded, failed = 0, []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_month, client, bq_client, symbol_info, schema, month, start, end,
+                        checkpoint, stage_dir, chunk_rows, load_bq): month
+            for month, start, end in pending
+        }
+        for future in as_completed(futures):
+            month = futures[future]
+            try:
+                rows = future.result()
+                total_loaded += rows
+                if rows:
+                    print(f"     Loaded {month}: {rows} rows")
+            except Exception as e:
+                failed.append(month)
+                logger.error(f"❌ {root} {schema} {month}: {type(e).__name__}: {e}")
+
+    print(f"     ✅ Total loaded: {total_loaded} rows")
+    if failed:
+        print(f"     ⚠️ {len(failed)} month(s) failed ({', '.join(sorted(failed))}) - rerun to resume")
+    return total_loaded
 
 
 def main():
     """Download ALL historical Databento data → DIRECT TO BIGQUERY."""
-    
+    parser = argparse.ArgumentParser(description="Stream Databento history into BigQuery")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Months processed concurrently")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="DBN records per Arrow batch")
+    parser.add_argument("--stage-dir", default=str(STAGE_DIR), help="Local DBN/Parquet/checkpoint directory")
+    parser.add_argument("--end", help="Exclusive end date YYYY-MM-DD (default: today)")
+    parser.add_argument("--offline", action="store_true", help="Use stored DBN files only (no Databento API)")
+    parser.add_argument("--no-bq", action="store_true", help="Write Parquet partitions only (no BigQuery load)")
+    args = parser.parse_args()
+    stage_dir = Path(args.stage_dir).expanduser()
+    load_bq = not args.no_bq
+
     print("="*80)
-    print("DATABENTO → BIGQUERY DIRECT LOAD")
+    print("DATABENTO → BIGQUERY STREAMING LOAD")
     print("="*80)
     print(f"\nDataset: {DATABENTO_DATASET}")
-    print(f"Target Project: {PROJECT_ID}")
-    print("NO EXTERNAL DRIVE - DIRECT TO BQ!")
-    
-    # Get API key
-    api_key = get_api_key()
-    if not api_key:
-        print("\n❌ DATABENTO_API_KEY not found!")
-        print("\nOptions:")
-        print("  1. export DATABENTO_API_KEY='your-key'")
-        print("  2. Save to ~/.databento.key")
-        print("  3. security add-generic-password -s databento_api_key -a $USER -w 'key'")
-        return 1
-    
-    print(f"✅ API Key found: {api_key[:10]}...")
-    
+    print(f"Target Project: {PROJECT_ID}" if load_bq else "Target: local Parquet only")
+    print(f"Stage dir: {stage_dir}")
+
+    db_client = None
+    if not args.offline:
+        api_key = get_api_key()
+        if not api_key:
+            print("\n❌ DATABENTO_API_KEY not found!")
+            print("\nOptions:")
+            print("  1. export DATABENTO_API_KEY='your-key'")
+            print("  2. Save to ~/.databento.key")
+            print("  3. security add-generic-password -s databento_api_key -a $USER -w 'key'")
+            print("  4. --offline to use stored DBN files")
+            return 1
+        print(f"✅ API Key found: {api_key[:10]}...")
+        db_client = db.Historical(api_key)
+
     # Initialize clients
     print("\n🔌 Connecting...")
-    db_client = db.Historical(api_key)
-    bq_client = get_bq_client()
-    
-    end_date = datetime.now().strftime("%Y-%m-%d")
-    
+    bq_client = get_bq_client() if load_bq else None
+    checkpoint = LoadCheckpoint(stage_dir / "_checkpoints.json")
+
+    end_date = args.end or datetime.now().strftime("%Y-%m-%d")
+
     # Process each symbol/schema
     total_symbols = len(DOWNLOAD_PLAN)
     total_rows = 0
-    
+    started = time.time()
+
     print(f"\n📦 Processing {total_symbols} symbols...")
-    
-    # #region agent log
-    main_start = time.time()
-    debug_log("download_ALL_databento_historical.py:431", "Main loop start", {"total_symbols": total_symbols, "end_date": end_date}, "H1")
-    # #endregion
-    
+
     for i, symbol_info in enumerate(DOWNLOAD_PLAN, 1):
         root = symbol_info["root"]
-        # #region agent log
-        symbol_start = time.time()
-        debug_log("download_ALL_databento_historical.py:435", "Processing symbol", {"symbol_num": i, "total": total_symbols, "root": root, "schemas": symbol_info["schemas"]}, "H1")
-        # #endregion
-        
         print(f"\n{'='*80}")
         print(f"[{i}/{total_symbols}] {root} - {symbol_info['desc']}")
         print(f"{'='*80}")
-        
+
         for schema in symbol_info["schemas"]:
-            rows = fetch_and_load_to_bq(
-                db_client, bq_client, symbol_info, schema, end_date
+            total_rows += fetch_and_load_to_bq(
+                db_client, bq_client, symbol_info, schema, end_date, checkpoint,
+                stage_dir, args.workers, args.chunk_rows, load_bq,
             )
-            total_rows += rows
-            time.sleep(1)  # Rate limit
-        
-        # #region agent log
-        symbol_duration = time.time() - symbol_start
-        debug_log("download_ALL_databento_historical.py:450", "Symbol complete", {"root": root, "duration_sec": symbol_duration, "rows_this_symbol": rows if 'rows' in locals() else 0}, "H1")
-        # #endregion
-    
+
     # Summary
+    elapsed = time.time() - started
     print("\n" + "="*80)
     print("LOAD COMPLETE")
     print("="*80)
-    print(f"✅ Total rows loaded to BigQuery: {total_rows:,}")
-    
+    print(f"✅ Total rows {'loaded to BigQuery' if load_bq else 'written to Parquet'}: {total_rows:,} "
+          f"({elapsed:.0f}s, {total_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    if not load_bq:
+        return 0
+
     # Verify counts
     print("\n📊 Verification:")
     for schema, table in BQ_TABLE_MAP.items():
         result = bq_client.query(f"SELECT COUNT(*) as cnt FROM `{PROJECT_ID}.{DATASET_ID}.{table}`").result()
         for row in result:
             print(f"   {table}: {row.cnt:,} rows")
-    
+
     return 0
 
 
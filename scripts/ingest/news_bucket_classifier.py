@@ -3,11 +3,19 @@
 News Bucket Classifier - Regime-Based Organization
 Classifies news articles into 10 major buckets/regimes for ZL intelligence
 Works for both ScrapeCreators and Alpha Vantage sources
+
+All bucket keywords/triggers are compiled once into an Aho-Corasick automaton,
+so each article is matched in a single pass over its text regardless of how
+many keywords the buckets define. Use classify_articles_dataframe() for
+backfills of large article sets.
 """
 
-from typing import Dict, List, Tuple, Optional
+from collections import deque
+from typing import Dict, Iterable, List, Tuple, Optional
 import re
 
+import pandas as pd
+
 # ============================================================================
 # BUCKET DEFINITIONS - 10 Major Regimes
 # ============================================================================
@@ -220,6 +228,194 @@ BUCKET_KEYWORDS = {
 # Bucket priority to integer mapping
 BUCKET_PRIORITY_SCORE = {'P0': 100, 'P1': 50, 'P2': 25}
 
+# Irrelevant patterns disqualify an article unless it has commodity context
+IRRELEVANT_PATTERNS = [
+    'tech startup', 'venture capital', 'crypto', 'bitcoin', 'nft',
+    'movie', 'film', 'tv show', 'entertainment', 'celebrity',
+    'sports', 'football', 'basketball', 'gaming',
+    'stock split', 'dividend', 'earnings call', 'quarterly results'
+]
+
+COMMODITY_CONTEXT_KEYWORDS = [
+    'soybean', 'soy', 'palm oil', 'edible oil', 'vegetable oil',
+    'commodity', 'futures', 'agricultural', 'crop', 'biofuel'
+]
+
+# Output columns of classify_articles_dataframe()
+CLASSIFICATION_COLUMNS = [
+    'bucket', 'bucket_priority', 'bucket_impact', 'bucket_lead_days',
+    'category', 'match_score', 'matched_keywords', 'matched_triggers'
+]
+
+
+# ============================================================================
+# MULTI-PATTERN MATCHER
+# ============================================================================
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of lowercase patterns.
+
+    find() reports every pattern that occurs as a substring of the text
+    (same semantics as `pattern in text`) in one pass over the text.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._out[state] += (pattern_id,)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def find(self, text: str) -> set:
+        """Return the ids of all patterns found in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+def _build_bucket_matcher() -> Tuple[KeywordAutomaton, List[List[Tuple[str, str, int]]]]:
+    """
+    Compile every bucket keyword/trigger plus the irrelevant and commodity
+    context lists into one automaton.
+
+    Returns the automaton and, per pattern id, the roles that pattern plays:
+    (bucket_name, 'keywords'|'triggers', position) or ('_filter', list_name, position).
+    """
+    pattern_ids: Dict[str, int] = {}
+    roles: List[List[Tuple[str, str, int]]] = []
+
+    def register(pattern: str, role: Tuple[str, str, int]) -> None:
+        pattern = pattern.lower()
+        if pattern not in pattern_ids:
+            pattern_ids[pattern] = len(roles)
+            roles.append([])
+        roles[pattern_ids[pattern]].append(role)
+
+    for bucket_name, bucket_data in BUCKET_KEYWORDS.items():
+        for kind in ('keywords', 'triggers'):
+            for position, pattern in enumerate(bucket_data.get(kind, [])):
+                register(pattern, (bucket_name, kind, position))
+
+    for position, pattern in enumerate(IRRELEVANT_PATTERNS):
+        register(pattern, ('_filter', 'irrelevant', position))
+    for position, pattern in enumerate(COMMODITY_CONTEXT_KEYWORDS):
+        register(pattern, ('_filter', 'commodity_context', position))
+
+    return KeywordAutomaton(pattern_ids), roles
+
+
+_BUCKET_AUTOMATON, _PATTERN_ROLES = _build_bucket_matcher()
+
+
+def _score_article(search_text: str, query: str) -> Optional[Dict]:
+    """Score all buckets for pre-lowercased search text in a single automaton pass."""
+    hits = {name: {'keywords': [], 'triggers': []} for name in BUCKET_KEYWORDS}
+    has_irrelevant_patterns = False
+    has_commodity_context = False
+
+    for pattern_id in _BUCKET_AUTOMATON.find(search_text):
+        for owner, kind, position in _PATTERN_ROLES[pattern_id]:
+            if owner != '_filter':
+                hits[owner][kind].append(position)
+            elif kind == 'irrelevant':
+                has_irrelevant_patterns = True
+            else:
+                has_commodity_context = True
+
+    if has_irrelevant_patterns and not has_commodity_context:
+        # Article should be filtered out
+        return None
+
+    # Buckets whose keywords appear in the query (ScrapeCreators bonus)
+    query_buckets = set()
+    if query:
+        for pattern_id in _BUCKET_AUTOMATON.find(query.lower()):
+            for owner, kind, _ in _PATTERN_ROLES[pattern_id]:
+                if kind == 'keywords':
+                    query_buckets.add(owner)
+
+    best_name = None
+    best_result = None
+    for bucket_name, bucket_data in BUCKET_KEYWORDS.items():
+        # Keep matches in definition order so the top-N lists are stable
+        keyword_positions = sorted(hits[bucket_name]['keywords'])
+        trigger_positions = sorted(hits[bucket_name]['triggers'])
+
+        score = 10 * len(keyword_positions) + 25 * len(trigger_positions)
+        if bucket_name in query_buckets:
+            score += 15
+        if bucket_data['priority'] == 'P0':
+            score += 5
+
+        # Strict comparison keeps the first bucket on ties (matches max())
+        if best_result is None or score > best_result['score']:
+            best_name = bucket_name
+            best_result = {
+                'score': score,
+                'matched_keywords': [bucket_data['keywords'][i] for i in keyword_positions],
+                'matched_triggers': [bucket_data['triggers'][i] for i in trigger_positions]
+            }
+
+    # Require minimum score of 15 to be classified (otherwise filter out)
+    # This prevents weak matches from being included
+    if best_result['score'] < 15:
+        return None
+
+    bucket_data = BUCKET_KEYWORDS[best_name]
+
+    return {
+        'bucket': best_name,
+        'bucket_priority': bucket_data['priority'],
+        'bucket_impact': bucket_data['impact'],
+        'bucket_lead_days': bucket_data['lead_days'],
+        'category': None,  # TODO: Map to specific category if needed
+        'match_score': best_result['score'],
+        'matched_keywords': best_result['matched_keywords'][:5],  # Top 5
+        'matched_triggers': best_result['matched_triggers'][:3]   # Top 3
+    }
+
+
+def _build_search_text(title, description, query, av_topics) -> str:
+    """Combine all article text for matching."""
+    return ' '.join([
+        str(title),
+        str(description),
+        str(query),
+        str(av_topics) if av_topics else ''
+    ]).lower()
+
 
 def classify_article_to_bucket(
     title: str,
@@ -251,90 +447,60 @@ def classify_article_to_bucket(
             'matched_triggers': ['proposed rule']
         }
     """
-    # Combine all text for matching
-    search_text = ' '.join([
-        str(title),
-        str(description),
-        str(query),
-        str(av_topics) if av_topics else ''
-    ]).lower()
-    
-    # Score each bucket
-    bucket_scores = {}
-    
-    for bucket_name, bucket_data in BUCKET_KEYWORDS.items():
-        score = 0
-        matched_keywords = []
-        matched_triggers = []
-        
-        # Check primary keywords
-        for keyword in bucket_data['keywords']:
-            if keyword.lower() in search_text:
-                score += 10
-                matched_keywords.append(keyword)
-        
-        # Check trigger phrases (worth more)
-        for trigger in bucket_data.get('triggers', []):
-            if trigger.lower() in search_text:
-                score += 25
-                matched_triggers.append(trigger)
-        
-        # Bonus if query matches bucket (ScrapeCreators)
-        if query and any(kw.lower() in query.lower() for kw in bucket_data['keywords']):
-            score += 15
-        
-        # Bonus for P0 buckets (prioritize high-impact)
-        if bucket_data['priority'] == 'P0':
-            score += 5
-        
-        bucket_scores[bucket_name] = {
-            'score': score,
-            'matched_keywords': matched_keywords,
-            'matched_triggers': matched_triggers
-        }
-    
-    # Check for irrelevant keywords that disqualify the article
-    irrelevant_patterns = [
-        'tech startup', 'venture capital', 'crypto', 'bitcoin', 'nft',
-        'movie', 'film', 'tv show', 'entertainment', 'celebrity',
-        'sports', 'football', 'basketball', 'gaming',
-        'stock split', 'dividend', 'earnings call', 'quarterly results'
-    ]
-    
-    # Check if article contains irrelevant patterns WITHOUT commodity context
-    commodity_context_keywords = [
-        'soybean', 'soy', 'palm oil', 'edible oil', 'vegetable oil',
-        'commodity', 'futures', 'agricultural', 'crop', 'biofuel'
-    ]
-    
-    has_commodity_context = any(kw in search_text for kw in commodity_context_keywords)
-    has_irrelevant_patterns = any(pattern in search_text for pattern in irrelevant_patterns)
-    
-    if has_irrelevant_patterns and not has_commodity_context:
-        # Return None to indicate article should be filtered out
-        return None
-    
-    # Find best match
-    best_bucket = max(bucket_scores.items(), key=lambda x: x[1]['score'])
-    bucket_name, bucket_result = best_bucket
-    
-    # Require minimum score of 15 to be classified (otherwise filter out)
-    # This prevents weak matches from being included
-    if bucket_result['score'] < 15:
-        return None
-    
-    bucket_data = BUCKET_KEYWORDS[bucket_name]
-    
-    return {
-        'bucket': bucket_name,
-        'bucket_priority': bucket_data['priority'],
-        'bucket_impact': bucket_data['impact'],
-        'bucket_lead_days': bucket_data['lead_days'],
-        'category': None,  # TODO: Map to specific category if needed
-        'match_score': bucket_result['score'],
-        'matched_keywords': bucket_result['matched_keywords'][:5],  # Top 5
-        'matched_triggers': bucket_result['matched_triggers'][:3]   # Top 3
-    }
+    search_text = _build_search_text(title, description, query, av_topics)
+    return _score_article(search_text, query)
+
+
+def classify_articles_dataframe(
+    df: pd.DataFrame,
+    title_col: str = 'title',
+    description_col: str = 'description',
+    query_col: Optional[str] = 'query',
+    topics_col: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Classify a whole DataFrame of articles (backfill path).
+
+    Each row costs one automaton pass over its text, so runtime is linear
+    in total text length rather than keywords x articles. Missing optional
+    columns are treated as empty.
+
+    Args:
+        df: Articles (ScrapeCreators or Alpha Vantage)
+        title_col: Headline column
+        description_col: Summary/snippet column
+        query_col: Search query column (ScrapeCreators only)
+        topics_col: Alpha Vantage topics column
+
+    Returns:
+        DataFrame aligned to df.index with CLASSIFICATION_COLUMNS plus
+        'is_classified'. Filtered-out rows are missing (NaN) in every
+        classification column, so select them with is_classified or
+        result['bucket'].isna(), not `bucket is None`.
+    """
+    n = len(df)
+
+    def column(name):
+        if name and name in df.columns:
+            return df[name].fillna('').tolist() if name != topics_col else df[name].tolist()
+        return [''] * n
+
+    titles = column(title_col)
+    descriptions = column(description_col)
+    queries = column(query_col)
+    topics = column(topics_col)
+
+    records = []
+    for title, description, query, av_topics in zip(titles, descriptions, queries, topics):
+        if not isinstance(av_topics, (list, tuple, dict, str)):
+            av_topics = None  # NaN / None from a missing topics payload
+        query = str(query) if query else ''
+        search_text = _build_search_text(title, description, query, av_topics)
+        records.append(_score_article(search_text, query) or {})
+
+    result = pd.DataFrame.from_records(records, index=df.index, columns=CLASSIFICATION_COLUMNS)
+    result['is_classified'] = result['bucket'].notna()
+    return result
 
 
 def get_bucket_keywords_for_filter(bucket_name: str) -> List[str]:
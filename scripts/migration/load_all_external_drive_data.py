@@ -12,6 +12,10 @@ from google.cloud import bigquery
 import pandas as pd
 import pyarrow.parquet as pq
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.utils.partitioned_store import list_series, read_series
+
 PROJECT_ID = "cbi-v14"
 LOCATION = "us-central1"
 EXTERNAL_DRIVE = Path("/Volumes/Satechi Hub/Projects/CBI-V14/TrainingData")
@@ -80,15 +84,15 @@ def load_parquet_to_bq(parquet_path, table_id, client):
         return False
 
 def load_directory_to_bq(dir_path, table_id, client):
-    """Load all Parquet files in a directory to BigQuery"""
+    """Load every series in a directory to BigQuery (partitioned stores read once, via read_series)"""
     print(f"Loading directory {dir_path} → {table_id}")
     
     if not Path(dir_path).exists():
         print(f"  ⚠️  Directory not found: {dir_path}")
         return False
     
-    parquet_files = list(Path(dir_path).rglob("*.parquet"))
-    print(f"  Found {len(parquet_files)} Parquet files")
+    parquet_files = list_series(dir_path, recursive=True)
+    print(f"  Found {len(parquet_files)} Parquet series")
     
     if len(parquet_files) == 0:
         print(f"  ⚠️  No Parquet files found")
@@ -97,7 +101,7 @@ def load_directory_to_bq(dir_path, table_id, client):
     total_rows = 0
     for pfile in parquet_files:
         try:
-            df = pd.read_parquet(pfile)
+            df = read_series(pfile)
             if len(df) > 0:
                 job_config = bigquery.LoadJobConfig(
                     write_disposition="WRITE_APPEND",
@@ -6,13 +6,22 @@ Fixes High < Low violations by swapping High and Low values.
 These are data errors from Yahoo Finance where values are reversed.
 
 Location: TrainingData/raw/yahoo_finance/prices/
+
+Series are read through read_series (partitioned store, else legacy file).
+Fixed rows are appended to the store as a revision (latest write wins on
+read); series that were never migrated are rewritten in place.
 """
 
+import sys
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 import logging
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.utils.partitioned_store import PartitionedSeriesStore, list_series, read_series
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,11 +35,11 @@ YAHOO_DIR = EXTERNAL_DRIVE / "TrainingData/raw/yahoo_finance/prices"
 
 def fix_ohlc_violations(file_path: Path) -> tuple:
     """
-    Fix OHLC violations in a single file.
+    Fix OHLC violations in a single series (`file_path` is its legacy file path).
     Returns: (fixed_count, total_violations)
     """
     try:
-        df = pd.read_parquet(file_path)
+        df = read_series(file_path, date_column='Date')
         
         # Find High < Low violations
         violations = df['High'] < df['Low']
@@ -48,8 +57,12 @@ def fix_ohlc_violations(file_path: Path) -> tuple:
             logger.warning(f"  ⚠️  {file_path.name}: {remaining} violations remain after fix")
             return (violation_count - remaining, violation_count)
         
-        # Save fixed file
-        df.to_parquet(file_path, index=False)
+        # Save fixed rows
+        store = PartitionedSeriesStore(file_path.with_suffix(""), date_column='Date')
+        if store.exists():
+            store.append(df.loc[violations], only_new=False)
+        else:
+            df.to_parquet(file_path, index=False)
         
         return (violation_count, violation_count)
         
@@ -80,7 +93,7 @@ def main():
             continue
         
         logger.info(f"\nProcessing {category}/...")
-        files = list(cat_dir.glob('*.parquet'))
+        files = list_series(cat_dir)
         
         for file_path in files:
             fixed, violations = fix_ohlc_violations(file_path)
@@ -297,28 +297,32 @@ class NightlyPipeline:
         self.logger.info("="*80)
         self.logger.info("")
         
-        all_success = True
+        # Train tree models (LightGBM + XGBoost) for all horizons in one parallel
+        # run: shared feature matrix, horizon × model jobs in a process pool
+        stage = PipelineStage("Train Tree Models (all horizons)", self.logger)
+        summary_path = LOGS_DIR / f"tree_training_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        for horizon in HORIZONS:
-            # Train tree models (LightGBM + XGBoost)
-            stage = PipelineStage(f"Train Tree Models ({horizon})", self.logger)
-            
-            command = [
-                PYTHON,
-                str(REPO_ROOT / "src" / "training" / "baselines" / "tree_models.py"),
-                "--horizon", horizon,
-                "--surface", "prod"
-            ]
-            
-            success = stage.run(command, critical=False)
-            self.stages.append(stage)
-            
-            if not success:
-                self.logger.warning(f"⚠️  Training failed for {horizon}, continuing with next horizon")
-                all_success = False
+        command = [
+            PYTHON,
+            str(REPO_ROOT / "src" / "training" / "baselines" / "train_all_horizons.py"),
+            "--horizons", *HORIZONS,
+            "--surface", "prod",
+            "--summary-json", str(summary_path)
+        ]
+        
+        stage.run(command, critical=False)
+        self.stages.append(stage)
         
-        # At least some models must succeed
-        successful_trainings = sum(1 for s in self.stages[-len(HORIZONS):] if s.success)
+        # A horizon counts as trained if at least one of its models succeeded
+        trained_horizons = set()
+        if summary_path.exists():
+            with open(summary_path) as f:
+                for job in json.load(f)['jobs']:
+                    if job['success']:
+                        trained_horizons.add(job['horizon'])
+                    else:
+                        self.logger.warning(f"⚠️  {job['model']} failed for {job['horizon']}: {job.get('error')}")
+        successful_trainings = len(trained_horizons)
         
         if successful_trainings == 0:
             self.logger.error("❌ All training runs failed - cannot continue")
@@ -21,8 +21,12 @@ Reference: docs/plans/MASTER_PLAN.md (Hybrid Python + BigQuery SQL section)
 
 import os
 import json
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime, timedelta
 import logging
@@ -46,6 +50,97 @@ DRIVE = Path("/Volumes/Satechi Hub/Projects/CBI-V14")
 SENTIMENT_DIR = DRIVE / "TrainingData/sentiment"
 SENTIMENT_DIR.mkdir(parents=True, exist_ok=True)
 
+FINBERT_MODEL = "ProsusAI/finbert"
+FINBERT_CACHE_PATH = SENTIMENT_DIR / "finbert_score_cache"  # directory of part files
+FINBERT_MAX_LENGTH = 128   # Headlines/snippets; longer text is truncated
+FINBERT_BATCH_SIZE = 32
+
+
+class FinBERTScoreCache:
+    """
+    Persistent FinBERT score cache keyed by (text hash, model).
+
+    Stored as a directory of Parquet part files (text_hash, model, positive,
+    negative, neutral, scored_at) so already-scored headlines are never
+    re-run. New scores are buffered in memory and each flush() writes them
+    as one new part file; existing parts are never rewritten until compact().
+    """
+
+    COLUMNS = ['text_hash', 'model', 'positive', 'negative', 'neutral', 'scored_at']
+
+    def __init__(self, path: Path = FINBERT_CACHE_PATH, model_name: str = FINBERT_MODEL):
+        self.path = Path(path)
+        self.model_name = model_name
+        self._scores: Dict[str, Tuple[float, float, float]] = {}
+        self._pending: List[Dict] = []
+
+        parts = self._part_files()
+        if parts:
+            cached = pd.concat(
+                [pq.read_table(p, filters=[('model', '==', model_name)]).to_pandas() for p in parts],
+                ignore_index=True
+            )
+            # Parts are read oldest first, so a re-scored hash keeps its latest value
+            self._scores = {
+                h: (p, n, u) for h, p, n, u in zip(
+                    cached['text_hash'], cached['positive'], cached['negative'], cached['neutral']
+                )
+            }
+            logger.info(f"Loaded {len(self._scores):,} cached {model_name} scores "
+                        f"from {len(parts)} part(s) in {self.path}")
+
+    def _part_files(self) -> List[Path]:
+        return sorted(self.path.glob('part-*.parquet')) if self.path.is_dir() else []
+
+    def _write_part(self, rows: pd.DataFrame):
+        self.path.mkdir(parents=True, exist_ok=True)
+        name = f"part-{datetime.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = self.path / f"_{name}.tmp"
+        rows.to_parquet(tmp, index=False)
+        tmp.replace(self.path / name)
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Stable key for a text (whitespace-normalized)."""
+        return hashlib.sha1(' '.join(str(text).split()).encode('utf-8')).hexdigest()
+
+    def get(self, text_hash: str) -> Optional[Tuple[float, float, float]]:
+        return self._scores.get(text_hash)
+
+    def put(self, text_hash: str, scores: Tuple[float, float, float]):
+        self._scores[text_hash] = scores
+        self._pending.append({
+            'text_hash': text_hash,
+            'model': self.model_name,
+            'positive': scores[0],
+            'negative': scores[1],
+            'neutral': scores[2],
+            'scored_at': datetime.now()
+        })
+
+    def flush(self):
+        """Write pending scores as one new part file."""
+        if not self._pending:
+            return
+        self._write_part(pd.DataFrame(self._pending, columns=self.COLUMNS))
+        logger.info(f"FinBERT cache: wrote {len(self._pending):,} new scores ({len(self._scores):,} total)")
+        self._pending = []
+
+    def compact(self):
+        """Merge all part files (every model) into one, keeping the latest score per key."""
+        parts = self._part_files()
+        if len(parts) <= 1:
+            return
+        merged = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        merged = merged.drop_duplicates(['text_hash', 'model'], keep='last')
+        self._write_part(merged[self.COLUMNS])
+        for p in parts:
+            p.unlink()
+        logger.info(f"FinBERT cache: compacted {len(parts)} parts into one ({len(merged):,} scores)")
+
+    def __len__(self):
+        return len(self._scores)
+
 
 class UnifiedSentimentNeuralSystem:
     """
@@ -58,29 +153,159 @@ class UnifiedSentimentNeuralSystem:
     6. Neural network pattern recognition
     """
     
-    def __init__(self):
+    def __init__(self,
+                 quantize_finbert: bool = False,
+                 finbert_cache_path: Optional[Path] = FINBERT_CACHE_PATH):
         # Initialize transformer models for advanced NLP
         self.finbert = None
-        self.init_finbert()
+        self.finbert_model = None
+        self.finbert_tokenizer = None
+        self.finbert_labels = {}
+        self.finbert_model_name = None
+        self.init_finbert(quantize=quantize_finbert)
+        # Keyed on the model actually loaded, so fallback or int8 scores never
+        # mix with full-precision FinBERT scores
+        self.finbert_cache = (
+            FinBERTScoreCache(finbert_cache_path, model_name=self.finbert_model_name)
+            if finbert_cache_path else None
+        )
         
         # Initialize neural network for pattern recognition
         self.sentiment_nn = None
         self.scaler = StandardScaler()
         self.pca = PCA(n_components=50)  # Reduce dimensionality
         
-    def init_finbert(self):
-        """Initialize FinBERT for financial sentiment analysis"""
+    def init_finbert(self, quantize: bool = False, num_threads: Optional[int] = None):
+        """
+        Initialize FinBERT for financial sentiment analysis
+
+        Args:
+            quantize: Apply dynamic int8 quantization to Linear layers (CPU only)
+            num_threads: Torch intra-op threads for CPU inference (default: torch's)
+        """
+        device = 0 if torch.cuda.is_available() else -1
         try:
+            self.finbert_model_name = FINBERT_MODEL
+            self.finbert_tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL)
+            self.finbert_model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL)
+            self.finbert_model.eval()
+
+            if device == -1:
+                if num_threads:
+                    torch.set_num_threads(num_threads)
+                if quantize:
+                    self.finbert_model = torch.quantization.quantize_dynamic(
+                        self.finbert_model, {nn.Linear}, dtype=torch.qint8
+                    )
+                    self.finbert_model_name = f"{FINBERT_MODEL}:int8"
+                    logger.info("FinBERT quantized to int8 for CPU inference")
+            else:
+                self.finbert_model.to('cuda')
+
+            self.finbert_labels = {
+                idx: label.lower() for idx, label in self.finbert_model.config.id2label.items()
+            }
             self.finbert = pipeline(
                 "sentiment-analysis",
-                model="ProsusAI/finbert",
-                device=0 if torch.cuda.is_available() else -1
+                model=self.finbert_model,
+                tokenizer=self.finbert_tokenizer,
+                device=device
             )
             logger.info("✅ FinBERT loaded for financial sentiment")
         except Exception as e:
             logger.warning(f"FinBERT unavailable, using fallback: {e}")
             # Fallback to general sentiment
             self.finbert = pipeline("sentiment-analysis")
+            self.finbert_model = self.finbert.model
+            self.finbert_tokenizer = self.finbert.tokenizer
+            self.finbert_model_name = self.finbert_model.config.name_or_path
+            self.finbert_labels = {
+                idx: label.lower() for idx, label in self.finbert_model.config.id2label.items()
+            }
+
+    def _tokenize_finbert(self, texts: List[str], max_length: int, n_workers: int) -> List[Dict]:
+        """Tokenize without padding, in parallel chunks (fast tokenizers release the GIL)."""
+        chunk_size = max(1, -(-len(texts) // n_workers))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+        def encode(chunk):
+            enc = self.finbert_tokenizer(chunk, truncation=True, max_length=max_length)
+            return [
+                {key: enc[key][i] for key in enc.keys()}
+                for i in range(len(chunk))
+            ]
+
+        if len(chunks) == 1:
+            return encode(chunks[0])
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            return [item for part in pool.map(encode, chunks) for item in part]
+
+    def score_texts_finbert(self,
+                            texts: List[str],
+                            batch_size: int = FINBERT_BATCH_SIZE,
+                            max_length: int = FINBERT_MAX_LENGTH,
+                            tokenizer_workers: int = 4) -> pd.DataFrame:
+        """
+        Batch FinBERT inference with a persistent text-hash cache
+
+        Only texts missing from the cache are run. Those are tokenized in a
+        thread pool, sorted by token length and batched so each batch is
+        padded only to its own longest sequence (dynamic padding).
+
+        Returns:
+            DataFrame (one row per input text, same order) with
+            finbert_positive, finbert_negative, finbert_neutral and
+            finbert_sentiment = positive - negative
+        """
+        texts = ['' if t is None or (isinstance(t, float) and np.isnan(t)) else str(t) for t in texts]
+        hashes = [FinBERTScoreCache.text_hash(t) for t in texts]
+
+        cached = {}
+        to_score = {}
+        for h, t in zip(hashes, texts):
+            hit = self.finbert_cache.get(h) if self.finbert_cache is not None else None
+            if hit is not None:
+                cached[h] = hit
+            elif h not in to_score:
+                to_score[h] = t
+
+        logger.info(f"FinBERT: {len(texts):,} texts, {len(to_score):,} to score, "
+                    f"{len(texts) - len(to_score):,} from cache/duplicates")
+
+        if to_score:
+            miss_hashes = list(to_score.keys())
+            encodings = self._tokenize_finbert(list(to_score.values()), max_length, tokenizer_workers)
+
+            # Length-bucketed batches: neighbours in sorted order pad to similar lengths
+            order = sorted(range(len(encodings)), key=lambda i: len(encodings[i]['input_ids']))
+            device = next(self.finbert_model.parameters()).device
+            label_idx = {name: idx for idx, name in self.finbert_labels.items()}
+
+            with torch.inference_mode():
+                for start in range(0, len(order), batch_size):
+                    batch_ids = order[start:start + batch_size]
+                    batch = self.finbert_tokenizer.pad(
+                        [encodings[i] for i in batch_ids], padding='longest', return_tensors='pt'
+                    )
+                    batch = {k: v.to(device) for k, v in batch.items()}
+                    probs = torch.softmax(self.finbert_model(**batch).logits, dim=-1).cpu().numpy()
+
+                    for row, i in zip(probs, batch_ids):
+                        scores = tuple(
+                            float(row[label_idx[name]]) if name in label_idx else 0.0
+                            for name in ('positive', 'negative', 'neutral')
+                        )
+                        cached[miss_hashes[i]] = scores
+                        if self.finbert_cache is not None:
+                            self.finbert_cache.put(miss_hashes[i], scores)
+
+            if self.finbert_cache is not None:
+                self.finbert_cache.flush()
+
+        scores = np.array([cached[h] for h in hashes], dtype=float).reshape(-1, 3)
+        result = pd.DataFrame(scores, columns=['finbert_positive', 'finbert_negative', 'finbert_neutral'])
+        result['finbert_sentiment'] = result['finbert_positive'] - result['finbert_negative']
+        return result
     
     # ==================== QUALITATIVE DATA SOURCES ====================
     
@@ -125,6 +350,11 @@ class UnifiedSentimentNeuralSystem:
             if max_val > 0:
                 sentiment_scores[col] = sentiment_scores[col] / max_val
         
+        # FinBERT tone of the same text (already on a -1 to 1 scale)
+        if 'text' in df.columns and self.finbert_model is not None:
+            finbert_scores = self.score_texts_finbert(df['text'].tolist())
+            sentiment_scores['policy_finbert_sentiment'] = finbert_scores['finbert_sentiment'].values
+        
         return sentiment_scores
     
     def extract_weather_sentiment(self, weather_df: pd.DataFrame) -> pd.DataFrame:
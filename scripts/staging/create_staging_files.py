@@ -13,6 +13,10 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 import re
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.utils.partitioned_store import read_series
 
 DRIVE = Path("/Volumes/Satechi Hub/Projects/CBI-V14/TrainingData")
 
@@ -28,12 +32,12 @@ def create_yahoo_staging():
     # Look for ZL_F.parquet specifically
     zl_file = DRIVE / "raw/yahoo_finance/prices/commodities/ZL_F.parquet"
     
-    if not zl_file.exists():
+    if not zl_file.exists() and not zl_file.with_suffix("").exists():
         print(f"❌ ZL_F.parquet not found at {zl_file}")
         return None
     
-    # Load ZL=F data ONLY
-    df = pd.read_parquet(zl_file)
+    # Load ZL=F data ONLY (partitioned store written by daily_data_updates, or legacy file)
+    df = read_series(zl_file, date_column='Date')
     
     print(f"  ✅ Loaded ZL=F: {len(df)} rows × {len(df.columns)} cols")
     
@@ -4,7 +4,7 @@ Build MES 15-minute training dataset for micro confirmations.
 
 Inputs:
 - TrainingData/staging/mes_15min.parquet
-- TrainingData/staging/mes_15min_features.parquet
+- TrainingData/staging/mes_15min_features/ (date-partitioned, from scripts/features/mes_15min_features.py)
 
 Target:
 - Next 1 bar (15m) return of mes_close (y+1)
@@ -26,7 +26,8 @@ EXPORTS = DRIVE / 'TrainingData/exports'
 
 def main():
     price = pd.read_parquet(STAGING / 'mes_15min.parquet')
-    feat = pd.read_parquet(STAGING / 'mes_15min_features.parquet')
+    # Hive partitions add a `date` column; the _state.json sidecar is skipped
+    feat = pd.read_parquet(STAGING / 'mes_15min_features').drop(columns=['date'], errors='ignore')
     price['datetime'] = pd.to_datetime(price['datetime'])
     feat['datetime'] = pd.to_datetime(feat['datetime'])
     df = price.merge(feat, on='datetime', how='left').sort_values('datetime').reset_index(drop=True)
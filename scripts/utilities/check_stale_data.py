@@ -2,24 +2,38 @@
 """
 Comprehensive Stale Data Check for All Day 1 Export Datasets
 Checks data freshness, date gaps, and completeness for all 12 export datasets
+
+Every table is reduced to a per-date row-count summary, and all checks
+(freshness, duplicates, gaps, regime slices) are computed locally from it:
+- existence, row counts and last-modified times come from each dataset's
+  __TABLES__ metadata, with datasets queried concurrently;
+- day-partitioned tables take their summary from INFORMATION_SCHEMA.PARTITIONS,
+  the rest are summarised together in one UNION ALL query;
+- summaries are cached in cache/stale_data/ keyed by last-modified time, so
+  unchanged tables cost nothing on the next run;
+- --parquet-dir summarises local Parquet exports (<dir>/<table>.parquet)
+  instead of BigQuery.
 """
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import bigquery
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
+from pathlib import Path
 import sys
 from typing import Dict, List, Optional, Tuple
 
+import pandas as pd
+import pyarrow.parquet as pq
+
 PROJECT_ID = "cbi-v14"
 DATASET_ID = "models_v4"
 WAREHOUSE_DATASET = "forecasting_data_warehouse"
 
-client = bigquery.Client(project=PROJECT_ID)
-
-print("="*80)
-print("🔍 COMPREHENSIVE STALE DATA CHECK - ALL DAY 1 DATASETS")
-print("="*80)
-print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print(f"Project: {PROJECT_ID}")
-print("="*80)
+REPO_ROOT = Path(__file__).resolve().parents[2]
+CACHE_DIR = REPO_ROOT / "cache" / "stale_data"
+MAX_GAP_DAYS = 30
+MAX_WORKERS = 8
 
 all_checks_passed = True
 stale_issues = []
@@ -83,17 +97,18 @@ DATASETS_TO_CHECK = {
 }
 
 # Regime-specific datasets (filtered from production_training_data_1m)
+# date_ranges: [start, end) pairs; None leaves that side open
 REGIME_DATASETS = {
     'trump_2.0_2023_2025': {
         'base_table': f'{PROJECT_ID}.{DATASET_ID}.production_training_data_1m',
-        'date_filter': "date >= '2023-01-01' AND date < '2026-01-01'",
+        'date_ranges': [('2023-01-01', '2026-01-01')],
         'expected_min_date': '2023-01-01',
         'expected_max_date': '2025-12-31',
         'description': 'Trump 2.0 regime (2023-2025)'
     },
     'trade_war_2017_2019': {
         'base_table': f'{PROJECT_ID}.{DATASET_ID}.production_training_data_1m',
-        'date_filter': "date >= '2017-01-01' AND date < '2020-01-01'",
+        'date_ranges': [('2017-01-01', '2020-01-01')],
         'expected_min_date': '2017-01-01',
         'expected_max_date': '2019-12-31',
         'description': 'Trade war regime (2017-2019)',
@@ -101,14 +116,14 @@ REGIME_DATASETS = {
     },
     'inflation_2021_2022': {
         'base_table': f'{PROJECT_ID}.{DATASET_ID}.production_training_data_1m',
-        'date_filter': "date >= '2021-01-01' AND date < '2023-01-01'",
+        'date_ranges': [('2021-01-01', '2023-01-01')],
         'expected_min_date': '2021-01-01',
         'expected_max_date': '2022-12-31',
         'description': 'Inflation regime (2021-2022)'
     },
     'crisis_2008_2020': {
         'base_table': f'{PROJECT_ID}.{DATASET_ID}.production_training_data_1m',
-        'date_filter': "(date >= '2008-01-01' AND date < '2009-01-01') OR (date >= '2020-01-01' AND date < '2021-01-01')",
+        'date_ranges': [('2008-01-01', '2009-01-01'), ('2020-01-01', '2021-01-01')],
         'expected_min_date': '2008-01-01',
         'expected_max_date': '2020-12-31',
         'description': 'Crisis regime (2008 + 2020)',
@@ -116,191 +131,366 @@ REGIME_DATASETS = {
     },
     'historical_pre2000': {
         'base_table': f'{PROJECT_ID}.{DATASET_ID}.production_training_data_1m',
-        'date_filter': "date < '2000-01-01'",
+        'date_ranges': [(None, '2000-01-01')],
         'expected_max_date': '1999-12-31',
         'description': 'Historical pre-2000',
         'note': 'WARNING: Base table only starts from 2020 - this regime will have no data'
     }
 }
 
-def check_table_exists(table_path: str) -> bool:
-    """Check if table exists"""
-    try:
-        parts = table_path.split('.')
-        if len(parts) != 3:
-            return False
-        project, dataset, table = parts
-        
+def date_expr(date_col: str) -> str:
+    """TIMESTAMP 'time' columns are reduced to DATE; 'date' columns are used as-is"""
+    return f"DATE({date_col})" if date_col == 'time' else date_col
+
+def tables_to_audit() -> Dict[str, str]:
+    """table path → date column for every table the checks read"""
+    tables = {config['table']: config['date_col'] for config in DATASETS_TO_CHECK.values()}
+    for config in REGIME_DATASETS.values():
+        tables.setdefault(config['base_table'], 'date')
+    return tables
+
+def _empty_daily() -> pd.DataFrame:
+    return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'n_rows': pd.Series(dtype='int64')})
+
+class SummaryCache:
+    """Per-table date summaries on disk, valid while the table's version is unchanged"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.manifest_path = cache_dir / "manifest.json"
+        self.manifest = json.loads(self.manifest_path.read_text()) if self.manifest_path.exists() else {}
+
+    def get(self, table_path: str, version: Optional[str]) -> Optional[pd.DataFrame]:
+        path = self.cache_dir / f"{table_path}.parquet"
+        if version is None or self.manifest.get(table_path) != version or not path.exists():
+            return None
+        return pd.read_parquet(path)
+
+    def put(self, table_path: str, version: Optional[str], daily: pd.DataFrame):
+        if version is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        daily.to_parquet(self.cache_dir / f"{table_path}.parquet", index=False)
+        self.manifest[table_path] = version
+
+    def save(self):
+        if self.manifest:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.manifest_path.write_text(json.dumps(self.manifest, indent=2, sort_keys=True))
+
+class BigQuerySummarySource:
+    """Table metadata and per-date row counts from BigQuery with as few queries as possible"""
+
+    def __init__(self, client: bigquery.Client):
+        self.client = client
+
+    def _dataset_metadata(self, project: str, dataset: str, tables: List[str]) -> Dict[str, Dict]:
         query = f"""
-        SELECT COUNT(*) as table_exists
-        FROM `{project}.{dataset}.INFORMATION_SCHEMA.TABLES`
-        WHERE table_name = '{table}'
+        SELECT t.table_id AS table_name, t.row_count, t.last_modified_time, t.type,
+               c.column_name AS partition_col
+        FROM `{project}.{dataset}.__TABLES__` t
+        LEFT JOIN `{project}.{dataset}.INFORMATION_SCHEMA.COLUMNS` c
+          ON c.table_name = t.table_id AND c.is_partitioning_column = 'YES'
+        WHERE t.table_id IN UNNEST(@tables)
         """
-        result = client.query(query).to_dataframe()
-        return result.iloc[0]['table_exists'] > 0
-    except Exception as e:
-        print(f"  ❌ Error checking table existence: {e}")
-        return False
-
-def check_data_freshness(table_path: str, date_col: str, expected_fresh_days: int) -> Optional[Dict]:
-    """Check data freshness and return statistics"""
-    try:
-        # Handle both DATE and TIMESTAMP columns
-        if date_col == 'time':
-            # TIMESTAMP column - need to convert to DATE
-            date_expr = f"DATE({date_col})"
-            max_date_expr = f"DATE(MAX({date_col}))"
-        else:
-            # DATE column
-            date_expr = date_col
-            max_date_expr = f"MAX({date_col})"
-        
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter('tables', 'STRING', tables)]
+        )
+        metadata = {}
+        for row in self.client.query(query, job_config=job_config).result():
+            metadata[f"{project}.{dataset}.{row.table_name}"] = {
+                'row_count': int(row.row_count or 0),
+                # Views (type 2) don't change last_modified_time when their sources change
+                'version': f"bq:{row.last_modified_time}" if row.type == 1 else None,
+                'partition_col': row.partition_col,
+            }
+        return metadata
+
+    def _dataset_partitions(self, project: str, dataset: str, tables: List[str]) -> Dict[str, pd.DataFrame]:
         query = f"""
-        SELECT 
-            COUNT(*) as total_rows,
-            MIN({date_expr}) as earliest_date,
-            MAX({date_expr}) as latest_date,
-            DATE_DIFF(CURRENT_DATE(), {max_date_expr}, DAY) as days_behind,
-            COUNT(DISTINCT {date_expr}) as unique_dates,
-            COUNT(*) - COUNT(DISTINCT {date_expr}) as duplicate_dates
+        SELECT table_name, partition_id, total_rows
+        FROM `{project}.{dataset}.INFORMATION_SCHEMA.PARTITIONS`
+        WHERE table_name IN UNNEST(@tables)
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter('tables', 'STRING', tables)]
+        )
+        parts = self.client.query(query, job_config=job_config).to_dataframe()
+        summaries = {}
+        for table, group in parts.groupby('table_name'):
+            group = group[group['partition_id'] != '__NULL__']
+            unpartitioned = group[group['partition_id'] == '__UNPARTITIONED__']['total_rows'].sum()
+            daily = group[group['partition_id'] != '__UNPARTITIONED__']
+            # Only daily partitions (YYYYMMDD) with nothing left in the streaming buffer map to dates
+            if unpartitioned > 0 or not daily['partition_id'].str.len().eq(8).all():
+                continue
+            daily = daily[daily['total_rows'] > 0]
+            summaries[f"{project}.{dataset}.{table}"] = pd.DataFrame({
+                'date': pd.to_datetime(daily['partition_id'], format='%Y%m%d'),
+                'n_rows': daily['total_rows'].astype('int64'),
+            }).sort_values('date').reset_index(drop=True)
+        return summaries
+
+    def _by_dataset(self, tables) -> Dict[Tuple[str, str], List[str]]:
+        grouped = {}
+        for table_path in tables:
+            project, dataset, table = table_path.split('.')
+            grouped.setdefault((project, dataset), []).append(table)
+        return grouped
+
+    def metadata(self, tables: Dict[str, str]) -> Dict[str, Optional[Dict]]:
+        """table path → {'row_count', 'version', 'partition_col'}, or None if it doesn't exist"""
+        grouped = self._by_dataset(tables)
+        metadata = {}
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = {key: pool.submit(self._dataset_metadata, *key, names) for key, names in grouped.items()}
+            for (project, dataset), future in futures.items():
+                try:
+                    metadata.update(future.result())
+                except Exception as e:
+                    print(f"  ❌ Error reading metadata for {project}.{dataset}: {e}")
+        return {table_path: metadata.get(table_path) for table_path in tables}
+
+    def partition_summaries(self, tables: Dict[str, str], metadata: Dict[str, Dict]) -> Dict[str, pd.DataFrame]:
+        """Summaries for tables partitioned by day on their date column (no table scan)"""
+        partitioned = [t for t, col in tables.items() if metadata.get(t) and metadata[t]['partition_col'] == col]
+        summaries = {}
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = [pool.submit(self._dataset_partitions, *key, names)
+                       for key, names in self._by_dataset(partitioned).items()]
+            for future in futures:
+                try:
+                    summaries.update(future.result())
+                except Exception as e:
+                    print(f"  ⚠️  Partition summary unavailable, falling back to scan: {e}")
+        return summaries
+
+    def _scan_query(self, table_path: str, date_col: str) -> str:
+        return f"""
+        SELECT '{table_path}' AS table_path, {date_expr(date_col)} AS date, COUNT(*) AS n_rows
         FROM `{table_path}`
         WHERE {date_col} IS NOT NULL
-        """
-        result = client.query(query).to_dataframe()
-        
-        if result.empty or result.iloc[0]['total_rows'] == 0:
-            return None
-        
-        row = result.iloc[0]
-        return {
-            'total_rows': int(row['total_rows']),
-            'earliest_date': row['earliest_date'],
-            'latest_date': row['latest_date'],
-            'days_behind': int(row['days_behind']) if row['days_behind'] is not None else None,
-            'unique_dates': int(row['unique_dates']),
-            'duplicate_dates': int(row['duplicate_dates'])
-        }
-    except Exception as e:
-        print(f"  ❌ Error checking freshness: {e}")
+        GROUP BY date"""
+
+    def _run_scan(self, query: str) -> pd.DataFrame:
+        result = self.client.query(query).to_dataframe()
+        result['date'] = pd.to_datetime(result['date'].astype(str))
+        result['n_rows'] = result['n_rows'].astype('int64')
+        return result
+
+    def scan_summaries(self, tables: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+        """Per-date row counts for all `tables` in one UNION ALL query (per-table queries on failure)"""
+        if not tables:
+            return {}
+        try:
+            frames = [self._run_scan("\n        UNION ALL".join(
+                self._scan_query(t, col) for t, col in tables.items()))]
+            scanned_ok = set(tables)
+        except Exception as e:
+            print(f"  ⚠️  Combined date scan failed ({e}); scanning tables individually")
+            frames, scanned_ok = [], set()
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+                futures = {t: pool.submit(self._run_scan, self._scan_query(t, col)) for t, col in tables.items()}
+                for table_path, future in futures.items():
+                    try:
+                        frames.append(future.result())
+                        scanned_ok.add(table_path)
+                    except Exception as table_error:
+                        print(f"  ❌ Error scanning {table_path}: {table_error}")
+
+        summaries = {}
+        if frames:
+            scanned = pd.concat(frames, ignore_index=True)
+            summaries = {
+                table_path: group[['date', 'n_rows']].sort_values('date').reset_index(drop=True)
+                for table_path, group in scanned.groupby('table_path')
+            }
+        # A table that scanned fine but has no dated rows gets an empty summary
+        return {t: summaries.get(t, _empty_daily()) for t in tables if t in scanned_ok}
+
+class ParquetSummarySource:
+    """Same summaries from local Parquet exports: <parquet_dir>/<table>.parquet (file or directory)"""
+
+    def __init__(self, parquet_dir: Path):
+        self.parquet_dir = parquet_dir
+
+    def _path(self, table_path: str) -> Optional[Path]:
+        table = table_path.split('.')[-1]
+        for path in (self.parquet_dir / f"{table}.parquet", self.parquet_dir / table):
+            if path.exists():
+                return path
         return None
 
-def check_date_gaps(table_path: str, date_col: str, max_gap_days: int = 30) -> List[Tuple]:
-    """Check for significant gaps in date sequences"""
-    try:
-        # Handle both DATE and TIMESTAMP columns
-        if date_col == 'time':
-            date_expr = f"DATE({date_col})"
-        else:
-            date_expr = date_col
-        
-        query = f"""
-        WITH date_sequence AS (
-            SELECT 
-                {date_expr} as date_val,
-                LAG({date_expr}) OVER (ORDER BY {date_expr}) as prev_date
-            FROM `{table_path}`
-            WHERE {date_col} IS NOT NULL
-            ORDER BY {date_expr}
-        )
-        SELECT 
-            prev_date as gap_start,
-            date_val as gap_end,
-            DATE_DIFF(date_val, prev_date, DAY) as gap_days
-        FROM date_sequence
-        WHERE prev_date IS NOT NULL
-          AND DATE_DIFF(date_val, prev_date, DAY) > {max_gap_days}
-        ORDER BY gap_days DESC
-        LIMIT 10
-        """
-        result = client.query(query).to_dataframe()
-        
-        gaps = []
-        for _, row in result.iterrows():
-            gaps.append((row['gap_start'], row['gap_end'], int(row['gap_days'])))
-        
-        return gaps
-    except Exception as e:
-        print(f"  ⚠️  Error checking date gaps: {e}")
-        return []
-
-def check_dataset(name: str, config: Dict):
+    def metadata(self, tables: Dict[str, str]) -> Dict[str, Optional[Dict]]:
+        metadata = {}
+        for table_path in tables:
+            path = self._path(table_path)
+            if path is None:
+                metadata[table_path] = None
+                continue
+            files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+            metadata[table_path] = {
+                'row_count': sum(pq.ParquetFile(f).metadata.num_rows for f in files),
+                'version': "parquet:" + ",".join(f"{f.stat().st_mtime_ns}:{f.stat().st_size}" for f in files),
+                'partition_col': None,
+            }
+        return metadata
+
+    def partition_summaries(self, tables: Dict[str, str], metadata: Dict[str, Dict]) -> Dict[str, pd.DataFrame]:
+        return {}
+
+    def _summarize(self, table_path: str, date_col: str) -> pd.DataFrame:
+        dates = pq.read_table(self._path(table_path), columns=[date_col]).column(date_col).to_pandas()
+        dates = pd.to_datetime(dates, utc=True).dt.tz_localize(None).dropna().dt.normalize()
+        counts = dates.value_counts().sort_index()
+        return pd.DataFrame({'date': counts.index.astype('datetime64[ns]'),
+                             'n_rows': counts.to_numpy().astype('int64')})
+
+    def scan_summaries(self, tables: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+        summaries = {}
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = {t: pool.submit(self._summarize, t, col) for t, col in tables.items()}
+            for table_path, future in futures.items():
+                try:
+                    summaries[table_path] = future.result()
+                except Exception as e:
+                    print(f"  ❌ Error reading {table_path}: {e}")
+        return summaries
+
+def collect_summaries(source, cache: Optional[SummaryCache]) -> Tuple[Dict, Dict[str, pd.DataFrame]]:
+    """Metadata and per-date summaries for every audited table, reusing cached summaries"""
+    tables = tables_to_audit()
+    metadata = source.metadata(tables)
+    existing = {t: col for t, col in tables.items() if metadata[t] is not None}
+
+    summaries = {}
+    if cache is not None:
+        for table_path in existing:
+            cached = cache.get(table_path, metadata[table_path]['version'])
+            if cached is not None:
+                summaries[table_path] = cached
+    pending = {t: col for t, col in existing.items() if t not in summaries}
+
+    fresh = source.partition_summaries(pending, metadata)
+    fresh.update(source.scan_summaries({t: col for t, col in pending.items() if t not in fresh}))
+    if cache is not None:
+        for table_path, daily in fresh.items():
+            cache.put(table_path, metadata[table_path]['version'], daily)
+        cache.save()
+    summaries.update(fresh)
+
+    print(f"Tables: {len(tables)} audited, {len(existing)} found, "
+          f"{len(existing) - len(pending)} cached, {len(fresh)} summarised this run")
+    return metadata, summaries
+
+def summarize_dates(daily: pd.DataFrame, today: date) -> Optional[Dict]:
+    """Freshness statistics from a per-date row-count summary"""
+    if daily is None or daily.empty or daily['n_rows'].sum() == 0:
+        return None
+    total_rows = int(daily['n_rows'].sum())
+    latest = daily['date'].max().date()
+    return {
+        'total_rows': total_rows,
+        'earliest_date': daily['date'].min().date(),
+        'latest_date': latest,
+        'days_behind': (today - latest).days,
+        'unique_dates': len(daily),
+        'duplicate_dates': total_rows - len(daily)
+    }
+
+def find_date_gaps(daily: pd.DataFrame, max_gap_days: int = MAX_GAP_DAYS, limit: int = 10) -> List[Tuple]:
+    """Largest gaps (gap_start, gap_end, gap_days) longer than max_gap_days"""
+    dates = daily['date'].sort_values().reset_index(drop=True)
+    gap_days = dates.diff().dt.days
+    gaps = pd.DataFrame({'gap_start': dates.shift(), 'gap_end': dates, 'gap_days': gap_days})
+    gaps = gaps[gaps['gap_days'] > max_gap_days].nlargest(limit, 'gap_days')
+    return [(start.date(), end.date(), int(days)) for start, end, days in gaps.itertuples(index=False)]
+
+def filter_date_ranges(daily: pd.DataFrame, ranges: List[Tuple[Optional[str], Optional[str]]]) -> pd.DataFrame:
+    mask = pd.Series(False, index=daily.index)
+    for start, end in ranges:
+        in_range = pd.Series(True, index=daily.index)
+        if start:
+            in_range &= daily['date'] >= pd.Timestamp(start)
+        if end:
+            in_range &= daily['date'] < pd.Timestamp(end)
+        mask |= in_range
+    return daily[mask]
+
+def check_dataset(name: str, config: Dict, metadata: Dict, summaries: Dict[str, pd.DataFrame], today: date):
     """Comprehensive check for a dataset"""
     global all_checks_passed, stale_issues, warnings, freshness_report
-    
+
     print(f"\n{'='*80}")
     print(f"📊 CHECKING: {name}")
     print(f"   {config['description']}")
     print(f"{'='*80}")
-    
+
     table_path = config['table']
-    date_col = config['date_col']
     expected_fresh_days = config.get('expected_fresh_days', 7)
-    
+
     # Check table exists
-    if not check_table_exists(table_path):
+    if metadata.get(table_path) is None:
         print(f"  ❌ Table does not exist: {table_path}")
         stale_issues.append(f"{name}: Table missing")
         all_checks_passed = False
         return
-    
+
     print(f"  ✅ Table exists")
-    
+
     # Check data freshness
-    freshness = check_data_freshness(table_path, date_col, expected_fresh_days)
-    
+    daily = summaries.get(table_path)
+    freshness = summarize_dates(daily, today)
+
     if not freshness:
         print(f"  ❌ No data found in table")
         stale_issues.append(f"{name}: No data")
         all_checks_passed = False
         return
-    
+
     # Report freshness
     print(f"  📊 Total rows: {freshness['total_rows']:,}")
     print(f"  📅 Date range: {freshness['earliest_date']} to {freshness['latest_date']}")
     print(f"  📈 Unique dates: {freshness['unique_dates']:,}")
-    
+
     if freshness['duplicate_dates'] > 0:
         print(f"  ⚠️  Duplicate dates: {freshness['duplicate_dates']:,}")
         warnings.append(f"{name}: {freshness['duplicate_dates']} duplicate dates")
-    
+
     # Check if data is stale
     days_behind = freshness['days_behind']
-    if days_behind is not None:
-        print(f"  ⏰ Days behind current date: {days_behind}")
-        
-        if days_behind > expected_fresh_days:
-            status = "🔴 STALE"
-            if days_behind > 30:
-                status = "🔴 VERY STALE"
-            elif days_behind > 60:
-                status = "🔴 CRITICALLY STALE"
-            
-            print(f"  {status}: Data is {days_behind} days old (expected < {expected_fresh_days} days)")
-            stale_issues.append(f"{name}: {days_behind} days stale (latest: {freshness['latest_date']})")
-            all_checks_passed = False
-        else:
-            print(f"  ✅ Data is fresh ({days_behind} days old)")
+    print(f"  ⏰ Days behind current date: {days_behind}")
+
+    if days_behind > expected_fresh_days:
+        status = "🔴 STALE"
+        if days_behind > 60:
+            status = "🔴 CRITICALLY STALE"
+        elif days_behind > 30:
+            status = "🔴 VERY STALE"
+
+        print(f"  {status}: Data is {days_behind} days old (expected < {expected_fresh_days} days)")
+        stale_issues.append(f"{name}: {days_behind} days stale (latest: {freshness['latest_date']})")
+        all_checks_passed = False
     else:
-        print(f"  ⚠️  Could not calculate days behind")
-        warnings.append(f"{name}: Could not determine freshness")
-    
+        print(f"  ✅ Data is fresh ({days_behind} days old)")
+
     # Check minimum rows
     min_rows = config.get('min_rows', 0)
     if freshness['total_rows'] < min_rows:
         print(f"  ⚠️  Low row count: {freshness['total_rows']:,} (< {min_rows:,} expected)")
         warnings.append(f"{name}: Low row count ({freshness['total_rows']:,} < {min_rows:,})")
-    
+
     # Check expected max date if specified
     expected_max_date = config.get('expected_max_date')
     if expected_max_date:
-        latest_date_str = str(freshness['latest_date']).split()[0]  # Get date part only
+        latest_date_str = str(freshness['latest_date'])
         if latest_date_str < expected_max_date:
             print(f"  ⚠️  Latest date ({latest_date_str}) is before expected max ({expected_max_date})")
             warnings.append(f"{name}: Latest date {latest_date_str} < expected {expected_max_date}")
-    
+
     # Check for date gaps
-    print(f"  🔍 Checking for date gaps (>30 days)...")
-    gaps = check_date_gaps(table_path, date_col, max_gap_days=30)
+    print(f"  🔍 Checking for date gaps (>{MAX_GAP_DAYS} days)...")
+    gaps = find_date_gaps(daily)
     if gaps:
         print(f"  ⚠️  Found {len(gaps)} significant date gaps:")
         for gap_start, gap_end, gap_days in gaps[:5]:  # Show top 5
@@ -308,156 +498,164 @@ def check_dataset(name: str, config: Dict):
         warnings.append(f"{name}: {len(gaps)} date gaps found")
     else:
         print(f"  ✅ No significant date gaps found")
-    
+
     # Store freshness report
     freshness_report.append({
         'dataset': name,
         'latest_date': freshness['latest_date'],
         'days_behind': days_behind,
         'total_rows': freshness['total_rows'],
-        'status': 'STALE' if (days_behind and days_behind > expected_fresh_days) else 'FRESH'
+        'status': 'STALE' if days_behind > expected_fresh_days else 'FRESH'
     })
 
-def check_regime_dataset(name: str, config: Dict):
+def check_regime_dataset(name: str, config: Dict, metadata: Dict, summaries: Dict[str, pd.DataFrame], today: date):
     """Check regime-specific dataset (filtered from base table)"""
     global all_checks_passed, stale_issues, warnings
-    
+
     print(f"\n{'='*80}")
     print(f"📊 CHECKING REGIME: {name}")
     print(f"   {config['description']}")
     if 'note' in config:
         print(f"   ⚠️  {config['note']}")
     print(f"{'='*80}")
-    
+
     base_table = config['base_table']
-    date_filter = config['date_filter']
-    
+
     # Check base table exists
-    if not check_table_exists(base_table):
+    if metadata.get(base_table) is None:
         print(f"  ❌ Base table does not exist: {base_table}")
         stale_issues.append(f"{name}: Base table missing")
         all_checks_passed = False
         return
-    
-    try:
-        # Query regime-specific data
-        query = f"""
-        SELECT 
-            COUNT(*) as total_rows,
-            MIN(date) as earliest_date,
-            MAX(date) as latest_date,
-            DATE_DIFF(CURRENT_DATE(), DATE(MAX(date)), DAY) as days_behind,
-            COUNT(DISTINCT date) as unique_dates
-        FROM `{base_table}`
-        WHERE {date_filter}
-          AND date IS NOT NULL
-        """
-        result = client.query(query).to_dataframe()
-        
-        if result.empty or result.iloc[0]['total_rows'] == 0:
-            if 'note' in config and 'WARNING' in config['note']:
-                # Expected missing data - don't treat as critical error
-                print(f"  ⚠️  No data found for regime filter (expected - see note above)")
-                warnings.append(f"{name}: No data matching regime filter (expected due to base table date range)")
-            else:
-                print(f"  ❌ No data found for regime filter")
-                stale_issues.append(f"{name}: No data matching regime filter")
-                all_checks_passed = False
-            return
-        
-        row = result.iloc[0]
-        total_rows = int(row['total_rows'])
-        earliest_date = row['earliest_date']
-        latest_date = row['latest_date']
-        days_behind = int(row['days_behind']) if row['days_behind'] is not None else None
-        unique_dates = int(row['unique_dates'])
-        
-        print(f"  ✅ Data found: {total_rows:,} rows")
-        print(f"  📅 Date range: {earliest_date} to {latest_date}")
-        print(f"  📈 Unique dates: {unique_dates:,}")
-        
-        # Check expected date ranges
-        expected_min = config.get('expected_min_date')
-        expected_max = config.get('expected_max_date')
-        
-        if expected_min:
-            earliest_str = str(earliest_date).split()[0]
-            if earliest_str > expected_min:
-                print(f"  ⚠️  Earliest date ({earliest_str}) is after expected min ({expected_min})")
-                warnings.append(f"{name}: Earliest date {earliest_str} > expected {expected_min}")
-        
-        if expected_max:
-            latest_str = str(latest_date).split()[0]
-            if latest_str < expected_max:
-                print(f"  ⚠️  Latest date ({latest_str}) is before expected max ({expected_max})")
-                warnings.append(f"{name}: Latest date {latest_str} < expected {expected_max}")
-        
-        # Check if data is stale (for current regime)
-        if 'trump_2.0' in name and days_behind is not None:
-            if days_behind > 7:
-                print(f"  🔴 STALE: Current regime data is {days_behind} days old")
-                stale_issues.append(f"{name}: {days_behind} days stale")
-                all_checks_passed = False
-            else:
-                print(f"  ✅ Current regime data is fresh ({days_behind} days old)")
-        
-    except Exception as e:
-        print(f"  ❌ Error checking regime dataset: {e}")
-        stale_issues.append(f"{name}: Check failed - {e}")
+
+    daily = summaries.get(base_table)
+    if daily is None:
+        print(f"  ❌ Error checking regime dataset: no date summary for {base_table}")
+        stale_issues.append(f"{name}: Check failed - no date summary")
         all_checks_passed = False
+        return
+
+    regime = summarize_dates(filter_date_ranges(daily, config['date_ranges']), today)
+
+    if not regime:
+        if 'note' in config and 'WARNING' in config['note']:
+            # Expected missing data - don't treat as critical error
+            print(f"  ⚠️  No data found for regime filter (expected - see note above)")
+            warnings.append(f"{name}: No data matching regime filter (expected due to base table date range)")
+        else:
+            print(f"  ❌ No data found for regime filter")
+            stale_issues.append(f"{name}: No data matching regime filter")
+            all_checks_passed = False
+        return
+
+    days_behind = regime['days_behind']
+
+    print(f"  ✅ Data found: {regime['total_rows']:,} rows")
+    print(f"  📅 Date range: {regime['earliest_date']} to {regime['latest_date']}")
+    print(f"  📈 Unique dates: {regime['unique_dates']:,}")
+
+    # Check expected date ranges
+    expected_min = config.get('expected_min_date')
+    expected_max = config.get('expected_max_date')
+
+    if expected_min:
+        earliest_str = str(regime['earliest_date'])
+        if earliest_str > expected_min:
+            print(f"  ⚠️  Earliest date ({earliest_str}) is after expected min ({expected_min})")
+            warnings.append(f"{name}: Earliest date {earliest_str} > expected {expected_min}")
+
+    if expected_max:
+        latest_str = str(regime['latest_date'])
+        if latest_str < expected_max:
+            print(f"  ⚠️  Latest date ({latest_str}) is before expected max ({expected_max})")
+            warnings.append(f"{name}: Latest date {latest_str} < expected {expected_max}")
+
+    # Check if data is stale (for current regime)
+    if 'trump_2.0' in name:
+        if days_behind > 7:
+            print(f"  🔴 STALE: Current regime data is {days_behind} days old")
+            stale_issues.append(f"{name}: {days_behind} days stale")
+            all_checks_passed = False
+        else:
+            print(f"  ✅ Current regime data is fresh ({days_behind} days old)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stale data check for all Day 1 export datasets")
+    parser.add_argument('--parquet-dir', help="Audit local Parquet exports (<dir>/<table>.parquet) instead of BigQuery")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore and don't update cached date summaries")
+    parser.add_argument('--cache-dir', default=str(CACHE_DIR), help="Where date summaries are cached between runs")
+    args = parser.parse_args()
+
+    print("="*80)
+    print("🔍 COMPREHENSIVE STALE DATA CHECK - ALL DAY 1 DATASETS")
+    print("="*80)
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Project: {PROJECT_ID}")
+    print(f"Source: {args.parquet_dir or 'BigQuery'}")
+    print("="*80)
+
+    if args.parquet_dir:
+        source = ParquetSummarySource(Path(args.parquet_dir))
+    else:
+        source = BigQuerySummarySource(bigquery.Client(project=PROJECT_ID))
+    cache = None if args.no_cache else SummaryCache(Path(args.cache_dir))
+    metadata, summaries = collect_summaries(source, cache)
+    today = datetime.now().date()
+
+    # Run checks for all primary datasets
+    print("\n" + "="*80)
+    print("CHECKING PRIMARY TRAINING TABLES")
+    print("="*80)
+
+    for name, config in DATASETS_TO_CHECK.items():
+        check_dataset(name, config, metadata, summaries, today)
+
+    # Run checks for regime-specific datasets
+    print("\n" + "="*80)
+    print("CHECKING REGIME-SPECIFIC DATASETS")
+    print("="*80)
 
-# Run checks for all primary datasets
-print("\n" + "="*80)
-print("CHECKING PRIMARY TRAINING TABLES")
-print("="*80)
-
-for name, config in DATASETS_TO_CHECK.items():
-    check_dataset(name, config)
-
-# Run checks for regime-specific datasets
-print("\n" + "="*80)
-print("CHECKING REGIME-SPECIFIC DATASETS")
-print("="*80)
-
-for name, config in REGIME_DATASETS.items():
-    check_regime_dataset(name, config)
-
-# Final summary
-print("\n" + "="*80)
-print("📋 STALE DATA CHECK SUMMARY")
-print("="*80)
-
-if all_checks_passed:
-    print("✅ ALL DATASETS ARE FRESH - No stale data detected")
-else:
-    print("❌ STALE DATA DETECTED - Review issues below")
-
-if stale_issues:
-    print(f"\n🔴 STALE DATA ISSUES ({len(stale_issues)}):")
-    for issue in stale_issues:
-        print(f"   - {issue}")
-
-if warnings:
-    print(f"\n⚠️  WARNINGS ({len(warnings)}):")
-    for warning in warnings:
-        print(f"   - {warning}")
-
-# Freshness summary table
-print(f"\n📊 FRESHNESS SUMMARY:")
-print(f"{'Dataset':<40} {'Latest Date':<15} {'Days Behind':<15} {'Status':<10}")
-print("-" * 80)
-for report in freshness_report:
-    latest = str(report['latest_date']).split()[0] if report['latest_date'] else 'N/A'
-    days = report['days_behind'] if report['days_behind'] is not None else 'N/A'
-    status = report['status']
-    print(f"{report['dataset']:<40} {latest:<15} {str(days):<15} {status:<10}")
-
-print("="*80)
-
-# Exit with error code if stale data found
-if not all_checks_passed:
-    print("\n❌ ACTION REQUIRED: Fix stale data issues before proceeding with Day 1 exports")
-    sys.exit(1)
-else:
-    print("\n✅ ALL CHECKS PASSED - Ready for Day 1 data exports")
+    for name, config in REGIME_DATASETS.items():
+        check_regime_dataset(name, config, metadata, summaries, today)
+
+    # Final summary
+    print("\n" + "="*80)
+    print("📋 STALE DATA CHECK SUMMARY")
+    print("="*80)
+
+    if all_checks_passed:
+        print("✅ ALL DATASETS ARE FRESH - No stale data detected")
+    else:
+        print("❌ STALE DATA DETECTED - Review issues below")
+
+    if stale_issues:
+        print(f"\n🔴 STALE DATA ISSUES ({len(stale_issues)}):")
+        for issue in stale_issues:
+            print(f"   - {issue}")
+
+    if warnings:
+        print(f"\n⚠️  WARNINGS ({len(warnings)}):")
+        for warning in warnings:
+            print(f"   - {warning}")
+
+    # Freshness summary table
+    print(f"\n📊 FRESHNESS SUMMARY:")
+    print(f"{'Dataset':<40} {'Latest Date':<15} {'Days Behind':<15} {'Status':<10}")
+    print("-" * 80)
+    for report in freshness_report:
+        latest = str(report['latest_date']) if report['latest_date'] else 'N/A'
+        days = report['days_behind'] if report['days_behind'] is not None else 'N/A'
+        status = report['status']
+        print(f"{report['dataset']:<40} {latest:<15} {str(days):<15} {status:<10}")
+
+    print("="*80)
+
+    # Exit with error code if stale data found
+    if not all_checks_passed:
+        print("\n❌ ACTION REQUIRED: Fix stale data issues before proceeding with Day 1 exports")
+        sys.exit(1)
+    else:
+        print("\n✅ ALL CHECKS PASSED - Ready for Day 1 data exports")
 
+if __name__ == "__main__":
+    main()
@@ -53,6 +53,35 @@ def load_historical_predictions(client: bigquery.Client, start_date: str, end_da
     """
     return client.query(query).to_dataframe()
 
+REPLAY_HORIZON_DAYS = {'1W': 7, '1M': 30, '3M': 90, '6M': 180, '12M': 365}
+REPLAY_MODEL_PREFERENCE = ['ensemble', 'lightgbm', 'xgboost']
+
+def load_replay_predictions(replay_path: Path, start_date: str, end_date: str,
+                            horizon: str = '1M', model: str = None):
+    """
+    Load predictions from a local replay Parquet (date, horizon, model, prediction)
+    written by generate_local_predictions.py --replay, in the same shape as
+    load_historical_predictions().
+    """
+    df = pd.read_parquet(replay_path)
+    df = df[df['horizon'].str.upper() == horizon.upper()]
+    df['date'] = pd.to_datetime(df['date'])
+    df = df[(df['date'] >= pd.Timestamp(start_date)) & (df['date'] <= pd.Timestamp(end_date))]
+    
+    if model is None:
+        # Same headline model choice as the live predictions
+        available = df['model'].unique().tolist()
+        model = next((m for m in REPLAY_MODEL_PREFERENCE if m in available), available[0] if available else None)
+    df = df[df['model'] == model]
+    
+    return pd.DataFrame({
+        'prediction_date': df['date'].dt.date,
+        'horizon': horizon.upper(),
+        'predicted_price': df['prediction'].to_numpy(),
+        'model_used': model,
+        'target_date': (df['date'] + pd.Timedelta(days=REPLAY_HORIZON_DAYS.get(horizon.upper(), 30))).dt.date,
+    }).sort_values('prediction_date').reset_index(drop=True)
+
 def load_actual_prices(client: bigquery.Client, start_date: str, end_date: str):
     """Load actual soybean oil prices."""
     query = f"""
@@ -223,7 +252,8 @@ def simulate_procurement_strategy(predictions_df: pd.DataFrame, actuals_df: pd.D
         'results': results_df
     }
 
-def run_backtest(start_date: str, end_date: str, strategies: list = ['conservative', 'aggressive', 'risk_averse']):
+def run_backtest(start_date: str, end_date: str, strategies: list = ['conservative', 'aggressive', 'risk_averse'],
+                 replay_path: Path = None):
     """Run backtest for specified date range and strategies."""
     print("=" * 80)
     print("🔬 PROCUREMENT STRATEGY BACKTESTING ENGINE")
@@ -236,7 +266,10 @@ def run_backtest(start_date: str, end_date: str, strategies: list = ['conservati
     
     # Load data
     print("Loading historical predictions...")
-    predictions_df = load_historical_predictions(client, start_date, end_date)
+    if replay_path is not None:
+        predictions_df = load_replay_predictions(replay_path, start_date, end_date)
+    else:
+        predictions_df = load_historical_predictions(client, start_date, end_date)
     print(f"✅ Loaded {len(predictions_df)} predictions")
     
     print("Loading actual prices...")
@@ -306,10 +339,15 @@ def main():
         default=['conservative', 'aggressive', 'risk_averse'],
         help="Strategies to test (conservative, aggressive, risk_averse)"
     )
+    parser.add_argument(
+        "--replay-path",
+        help="Use a local prediction replay Parquet instead of predictions.daily_forecasts"
+    )
     
     args = parser.parse_args()
     
-    run_backtest(args.start_date, args.end_date, args.strategies)
+    run_backtest(args.start_date, args.end_date, args.strategies,
+                 replay_path=Path(args.replay_path).expanduser() if args.replay_path else None)
 
 if __name__ == "__main__":
     main()
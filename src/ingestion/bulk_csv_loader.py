@@ -3,11 +3,22 @@
 Bulk CSV Loader for CBI-V14 Historical Data
 Handles 20-year datasets for all symbols (rates, dollar, soy, wheat, oil, corn, notes)
 Uses CBI-V14 standard BigQuery utilities with db_dtypes for type conversion
+
+Bulk path (zip dumps and CSV batches):
+- zip members are decompressed in memory (nothing extracted to disk)
+- each file is parsed by the multithreaded Arrow CSV reader with declared
+  column types (price columns float64, everything else string)
+- files are parsed/standardized concurrently
+- rows are grouped per target table and loaded with one job per table,
+  using a declared BigQuery schema instead of autodetect
 """
+import csv
+import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import zipfile
-import tempfile
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from google.cloud import bigquery
 from datetime import datetime, timezone
@@ -20,10 +31,77 @@ from bigquery_utils import safe_load_to_bigquery
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Vendor header → canonical column (applied by standardize_csv)
+COLUMN_MAP = {
+    'Time': 'date', 'Date': 'date', 'DATE': 'date', 'date': 'date',
+    'Open': 'open', 'OPEN': 'open', 'open': 'open',
+    'High': 'high', 'HIGH': 'high', 'high': 'high',
+    'Low': 'low', 'LOW': 'low', 'low': 'low',
+    'Close': 'close', 'CLOSE': 'close', 'close': 'close',
+    'Last': 'close', 'LAST': 'close', 'last': 'close',
+    'Adj Close': 'close', 'Adj_Close': 'close', 'adj_close': 'close',
+    'Volume': 'volume', 'VOLUME': 'volume', 'volume': 'volume',
+    'Price': 'close', 'PRICE': 'close', 'price': 'close',
+    'Value': 'close', 'VALUE': 'close', 'value': 'close'
+}
+
+# Declared parse types by canonical column (anything else is read as string)
+PARSE_TYPES = {
+    'open': pa.float64(), 'high': pa.float64(), 'low': pa.float64(),
+    'close': pa.float64(), 'volume': pa.float64(),
+}
+
+# Declared BigQuery types for every column standardize_csv can emit
+BQ_FIELD_TYPES = {
+    'date': 'TIMESTAMP', 'time': 'TIMESTAMP', 'symbol': 'STRING',
+    'open': 'FLOAT64', 'high': 'FLOAT64', 'low': 'FLOAT64', 'close': 'FLOAT64', 'volume': 'INT64',
+    'from_currency': 'STRING', 'to_currency': 'STRING', 'rate': 'FLOAT64',
+    'source_name': 'STRING', 'confidence_score': 'FLOAT64',
+    'ingest_timestamp_utc': 'TIMESTAMP', 'provenance_uuid': 'STRING',
+}
+
+
+def read_csv_arrow(data: bytes) -> pd.DataFrame:
+    """
+    Parse CSV bytes with the Arrow reader (multithreaded, declared types).
+
+    Only the first column (date candidates) and columns known to COLUMN_MAP
+    are read. Rows with a different field count (vendor footers) are skipped;
+    if a footer still breaks numeric conversion, the file is re-read as
+    strings and coerced like pandas would.
+    """
+    text = data.lstrip(b'\xef\xbb\xbf')
+    first_line = text.split(b'\n', 1)[0].decode('utf-8', errors='replace').strip('\r')
+    names = next(csv.reader([first_line]), []) if first_line else []
+    if not names:
+        return pd.DataFrame()
+    include = [n for i, n in enumerate(names) if i == 0 or n in COLUMN_MAP]
+    column_types = {n: PARSE_TYPES.get(COLUMN_MAP.get(n), pa.string()) for n in include}
+    column_types[names[0]] = pa.string()
+
+    read_options = pacsv.ReadOptions(use_threads=True)
+    parse_options = pacsv.ParseOptions(invalid_row_handler=lambda row: 'skip')
+    try:
+        table = pacsv.read_csv(pa.py_buffer(data), read_options=read_options, parse_options=parse_options,
+                               convert_options=pacsv.ConvertOptions(column_types=column_types,
+                                                                    include_columns=include))
+        return table.to_pandas()
+    except pa.ArrowInvalid:
+        as_text = {n: pa.string() for n in include}
+        table = pacsv.read_csv(pa.py_buffer(data), read_options=read_options, parse_options=parse_options,
+                               convert_options=pacsv.ConvertOptions(column_types=as_text,
+                                                                    include_columns=include))
+        df = table.to_pandas()
+        for n in include[1:]:
+            if n in column_types and column_types[n] != pa.string():
+                df[n] = pd.to_numeric(df[n].str.replace(',', '', regex=False), errors='coerce')
+        return df
+
 class BulkCSVLoader:
-    def __init__(self, project_id='cbi-v14'):
+    def __init__(self, project_id='cbi-v14', max_workers=None):
         self.client = bigquery.Client(project=project_id)
         self.project_id = project_id
+        self.max_workers = max_workers or min(8, os.cpu_count() or 4)
         
         # Research-based FX weights (soybean oil correlation impact)
         self.fx_weights = {
@@ -49,14 +127,15 @@ class BulkCSVLoader:
         # Biofuel symbols (ethanol impact on soy oil)
         self.biofuel_symbols = ['BDOV', 'ETH', 'RIN']
 
-    def extract_zip(self, zip_path: Path, extract_to: Path) -> list:
-        """Extract zip file and return list of CSV files"""
-        csv_files = []
+    def list_zip_csvs(self, zip_path: Path) -> list:
+        """CSV members of a zip archive (macOS resource forks skipped)"""
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_to)
-            for file in extract_to.rglob('*.csv'):
-                csv_files.append(file)
-        return csv_files
+            return [
+                info.filename for info in zip_ref.infolist()
+                if not info.is_dir()
+                and info.filename.lower().endswith('.csv')
+                and not info.filename.startswith('__MACOSX/')
+            ]
 
     def detect_symbol_type(self, filename: str) -> tuple:
         """Detect symbol and target table from filename with enhanced categorization"""
@@ -141,25 +220,11 @@ class BulkCSVLoader:
         # Remove rows where the first column can't be parsed as a date (flexible formats)
         if len(df) > 0:
             first_col = df.columns[0]
-            parsed = pd.to_datetime(df[first_col], errors='coerce', infer_datetime_format=True)
+            parsed = pd.to_datetime(df[first_col], errors='coerce')
             df = df[parsed.notna()]
         
-        # Common column mappings
-        col_map = {
-            'Time': 'date', 'Date': 'date', 'DATE': 'date', 'date': 'date',
-            'Open': 'open', 'OPEN': 'open', 'open': 'open',
-            'High': 'high', 'HIGH': 'high', 'high': 'high', 
-            'Low': 'low', 'LOW': 'low', 'low': 'low',
-            'Close': 'close', 'CLOSE': 'close', 'close': 'close',
-            'Last': 'close', 'LAST': 'close', 'last': 'close',
-            'Adj Close': 'close', 'Adj_Close': 'close', 'adj_close': 'close',
-            'Volume': 'volume', 'VOLUME': 'volume', 'volume': 'volume',
-            'Price': 'close', 'PRICE': 'close', 'price': 'close',
-            'Value': 'close', 'VALUE': 'close', 'value': 'close'
-        }
-
         # Rename columns
-        df = df.rename(columns=col_map)
+        df = df.rename(columns=COLUMN_MAP)
 
         # Ensure required columns exist
         required_cols = ['date', 'close']
@@ -220,14 +285,21 @@ class BulkCSVLoader:
 
         return df
 
+    def bq_schema(self, df: pd.DataFrame) -> list:
+        """Declared BigQuery schema for a standardized frame"""
+        return [bigquery.SchemaField(col, BQ_FIELD_TYPES.get(col, 'STRING')) for col in df.columns]
+
     def load_to_bigquery(self, df: pd.DataFrame, table_name: str, dataset: str = 'forecasting_data_warehouse'):
         """Load DataFrame to BigQuery table using CBI-V14 standard approach"""
         table_id = f"{self.project_id}.{dataset}.{table_name}"
 
-        # Use CBI-V14 standard job config with autodetect and db_dtypes
+        if 'volume' in df.columns:
+            df = df.assign(volume=df['volume'].round().astype('Int64'))
+
+        # Declared schema (no autodetect); new columns may still be added to the table
         job_config = bigquery.LoadJobConfig(
             write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
-            autodetect=True,  # Let BigQuery detect schema automatically
+            schema=self.bq_schema(df),
             schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION]
         )
 
@@ -246,117 +318,106 @@ class BulkCSVLoader:
             logger.error(f"❌ Failed to load to {table_id}: {e}")
             return False
 
-    def process_single_csv(self, csv_path: Path):
-        """Process a single CSV file"""
-        logger.info(f"Processing single CSV: {csv_path}")
-
+    def prepare_file(self, name: str, read_bytes) -> tuple:
+        """Parse + standardize one CSV; returns (result, DataFrame or None)"""
         try:
             # Detect symbol and table
-            symbol, table_name = self.detect_symbol_type(csv_path.name)
-            logger.info(f"Processing {csv_path.name} → {symbol} → {table_name}")
-
-            # Load and standardize CSV
-            df = pd.read_csv(csv_path)
-            df = self.standardize_csv(df, symbol)
+            symbol, table_name = self.detect_symbol_type(Path(name).name)
+            logger.info(f"Processing {Path(name).name} → {symbol} → {table_name}")
 
+            df = self.standardize_csv(read_csv_arrow(read_bytes()), symbol)
+            result = {'file': Path(name).name, 'symbol': symbol, 'table': table_name,
+                      'rows': len(df), 'success': False}
             if len(df) == 0:
-                logger.warning(f"⚠️ Empty DataFrame for {csv_path.name}")
-                return []
-
-            # Load to BigQuery
-            success = self.load_to_bigquery(df, table_name)
-
-            result = {
-                'file': csv_path.name,
-                'symbol': symbol,
-                'table': table_name,
-                'rows': len(df),
-                'success': success
-            }
-
-            logger.info(f"📊 SINGLE CSV SUMMARY:")
-            logger.info(f"File: {csv_path.name}")
-            logger.info(f"Symbol: {symbol} → Table: {table_name}")
-            logger.info(f"Rows loaded: {len(df):,}")
-            logger.info(f"Status: {'✅ SUCCESS' if success else '❌ FAILED'}")
-
-            return [result]
+                logger.warning(f"⚠️ Empty DataFrame for {Path(name).name}")
+                return result, None
+            return result, df
 
         except Exception as e:
-            logger.error(f"❌ Failed to process {csv_path.name}: {e}")
-            return [{
-                'file': csv_path.name,
+            logger.error(f"❌ Failed to process {Path(name).name}: {e}")
+            return {
+                'file': Path(name).name,
                 'symbol': 'ERROR',
                 'table': 'ERROR',
                 'rows': 0,
                 'success': False,
                 'error': str(e)
-            }]
+            }, None
+
+    def load_grouped(self, prepared: list) -> list:
+        """One load job per target table for all prepared files"""
+        by_table = {}
+        for result, df in prepared:
+            if df is not None:
+                by_table.setdefault(result['table'], []).append((result, df))
+
+        for table_name, items in by_table.items():
+            df = pd.concat([df for _, df in items], ignore_index=True)
+            # Same symbol/date can appear in several files of a dump
+            date_col = 'time' if 'time' in df.columns else 'date'
+            keys = [date_col, 'from_currency', 'to_currency'] if 'from_currency' in df.columns else [date_col, 'symbol']
+            df = df.drop_duplicates(subset=[k for k in keys if k in df.columns]).reset_index(drop=True)
+
+            logger.info(f"⬆️  {table_name}: {len(items)} files, {len(df):,} rows in one load job")
+            success = self.load_to_bigquery(df, table_name)
+            for result, _ in items:
+                result['success'] = success
+
+        return [result for result, _ in prepared]
+
+    def process_files(self, sources: list) -> list:
+        """sources: [(name, read_bytes callable)], parsed concurrently, loaded per table"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            prepared = list(pool.map(lambda src: self.prepare_file(*src), sources))
+        return self.load_grouped(prepared)
+
+    def process_single_csv(self, csv_path: Path):
+        """Process a single CSV file"""
+        logger.info(f"Processing single CSV: {csv_path}")
+
+        results = self.process_files([(csv_path.name, csv_path.read_bytes)])
+        result = results[0]
+
+        logger.info(f"📊 SINGLE CSV SUMMARY:")
+        logger.info(f"File: {csv_path.name}")
+        logger.info(f"Symbol: {result['symbol']} → Table: {result['table']}")
+        logger.info(f"Rows loaded: {result['rows'] if result['success'] else 0:,}")
+        logger.info(f"Status: {'✅ SUCCESS' if result['success'] else '❌ FAILED'}")
+
+        return results
 
     def process_zip_file(self, zip_path: Path):
-        """Process entire zip file of CSV data"""
+        """Process entire zip file of CSV data (members are read in memory)"""
         logger.info(f"Processing zip file: {zip_path}")
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Extract zip
-            csv_files = self.extract_zip(zip_path, temp_path)
-            logger.info(f"Found {len(csv_files)} CSV files")
-
-            results = []
-
-            for csv_file in csv_files:
-                try:
-                    # Detect symbol and table
-                    symbol, table_name = self.detect_symbol_type(csv_file.name)
-                    logger.info(f"Processing {csv_file.name} → {symbol} → {table_name}")
-
-                    # Load and standardize CSV
-                    df = pd.read_csv(csv_file)
-                    df = self.standardize_csv(df, symbol)
-
-                    if len(df) == 0:
-                        logger.warning(f"⚠️ Empty DataFrame for {csv_file.name}")
-                        continue
-
-                    # Load to BigQuery
-                    success = self.load_to_bigquery(df, table_name)
-
-                    results.append({
-                        'file': csv_file.name,
-                        'symbol': symbol,
-                        'table': table_name,
-                        'rows': len(df),
-                        'success': success
-                    })
-
-                except Exception as e:
-                    logger.error(f"❌ Failed to process {csv_file.name}: {e}")
-                    results.append({
-                        'file': csv_file.name,
-                        'symbol': 'ERROR',
-                        'table': 'ERROR',
-                        'rows': 0,
-                        'success': False,
-                        'error': str(e)
-                    })
-
-            # Summary
-            successful = sum(1 for r in results if r['success'])
-            total_rows = sum(r['rows'] for r in results if r['success'])
-
-            logger.info(f"\n📊 BULK LOAD SUMMARY:")
-            logger.info(f"Files processed: {len(results)}")
-            logger.info(f"Successful loads: {successful}")
-            logger.info(f"Total rows loaded: {total_rows:,}")
-
-            return results
+        members = self.list_zip_csvs(zip_path)
+        logger.info(f"Found {len(members)} CSV files")
+
+        def reader(member):
+            def read_bytes():
+                # One handle per task: members decompress in parallel
+                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                    return zip_ref.read(member)
+            return read_bytes
+
+        results = self.process_files([(member, reader(member)) for member in members])
+
+        # Summary
+        successful = sum(1 for r in results if r['success'])
+        total_rows = sum(r['rows'] for r in results if r['success'])
+
+        logger.info(f"\n📊 BULK LOAD SUMMARY:")
+        logger.info(f"Files processed: {len(results)}")
+        logger.info(f"Successful loads: {successful}")
+        logger.info(f"Total rows loaded: {total_rows:,}")
+
+        return results
 
 def main():
     parser = argparse.ArgumentParser(description='Bulk CSV Loader for CBI-V14')
     parser.add_argument('file_path', help='Path to CSV file or zip archive')
     parser.add_argument('--project', default='cbi-v14', help='BigQuery project ID')
+    parser.add_argument('--workers', type=int, help='Files parsed concurrently (default: min(8, CPUs))')
 
     args = parser.parse_args()
 
@@ -365,7 +426,7 @@ def main():
         logger.error(f"File not found: {file_path}")
         return
 
-    loader = BulkCSVLoader(project_id=args.project)
+    loader = BulkCSVLoader(project_id=args.project, max_workers=args.workers)
 
     # Determine file type and process accordingly
     if file_path.suffix.lower() == '.zip':
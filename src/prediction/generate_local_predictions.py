@@ -4,14 +4,21 @@ Generate predictions using locally trained models (NO Vertex AI needed).
 Loads models from Models/local/ and generates predictions for all horizons.
 """
 import pandas as pd
-import numpy as np
-import joblib
 from pathlib import Path
 import sys
-from datetime import datetime
 
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from training.features.feature_catalog import FeatureCatalog
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from prediction.inference_service import HORIZONS, InferenceService, select_feature_columns
+
+_SERVICES = {}
+
+
+def get_inference_service(model_dir: Path) -> InferenceService:
+    """Process-wide service per model directory (models are loaded once)."""
+    key = str(Path(model_dir).resolve())
+    if key not in _SERVICES:
+        _SERVICES[key] = InferenceService(Path(model_dir))
+    return _SERVICES[key]
 
 
 def get_repo_root():
@@ -23,67 +30,6 @@ def get_repo_root():
     raise FileNotFoundError("Repository root not found")
 
 
-def load_local_model(model_path: Path, model_type: str):
-    """Load a locally trained model."""
-    if not model_path.exists():
-        return None
-    
-    try:
-        if model_type in ['lightgbm', 'xgboost', 'regime_ensemble']:
-            return joblib.load(model_path)
-        elif model_type in ['lstm', 'gru', 'tcn', 'cnn_lstm', 'attention', 'transformer']:
-            import tensorflow as tf
-            return tf.keras.models.load_model(str(model_path))
-        else:
-            return joblib.load(model_path)
-    except Exception as e:
-        print(f"⚠️  Could not load {model_path}: {e}")
-        return None
-
-
-def prepare_features(df: pd.DataFrame, feature_cols: list, scaler_path: Path = None):
-    """Prepare features for prediction."""
-    # Select features
-    X = df[feature_cols].fillna(0)
-    
-    # Apply scaler if provided (for neural models)
-    if scaler_path and scaler_path.exists():
-        scaler = joblib.load(scaler_path)
-        X_scaled = pd.DataFrame(
-            scaler.transform(X),
-            columns=feature_cols,
-            index=X.index
-        )
-        return X, X_scaled
-    
-    return X, None
-
-
-def predict_with_tree_model(model, X: pd.DataFrame):
-    """Predict using tree-based model (LightGBM, XGBoost)."""
-    return model.predict(X.iloc[-1:].values)[0]
-
-
-def predict_with_neural_model(model, X_scaled: pd.DataFrame, time_steps: int = 30):
-    """Predict using neural model (LSTM, GRU, TCN, etc.)."""
-    import tensorflow as tf
-    
-    # Create sequence
-    if len(X_scaled) < time_steps:
-        # Pad with last values if not enough history
-        padding = pd.concat([X_scaled.iloc[-1:]] * (time_steps - len(X_scaled)))
-        sequence = pd.concat([padding, X_scaled]).values
-    else:
-        sequence = X_scaled.iloc[-time_steps:].values
-    
-    # Reshape for model input: (1, time_steps, num_features)
-    sequence = sequence.reshape(1, time_steps, sequence.shape[1])
-    
-    # Predict
-    prediction = model.predict(sequence, verbose=0)[0][0]
-    return float(prediction)
-
-
 def generate_local_predictions(
     horizon: str = 'all',
     data_path: Path = None,
@@ -123,22 +69,13 @@ def generate_local_predictions(
     df = pd.read_parquet(data_path)
     print(f"✅ Loaded data: {len(df)} rows, latest date: {df['date'].max() if 'date' in df.columns else 'N/A'}")
     
-    # Get features
-    available_cols = set(df.columns)
-    feature_cols = FeatureCatalog.get_features_for_model('tree')
-    feature_cols = [col for col in feature_cols if col in available_cols]
-    
-    if len(feature_cols) < 100:
-        numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
-        feature_cols = [col for col in numeric_cols if col not in FeatureCatalog.EXCLUDED]
+    # Resident service: models stay loaded across calls and hot-reload on change
+    service = get_inference_service(model_dir)
+    service.load_data(df=df)
+    print(f"✅ Using {len(service.feature_cols)} features")
     
-    print(f"✅ Using {len(feature_cols)} features")
-    
-    # Prepare features
-    X, X_scaled = prepare_features(df, feature_cols)
-    
-    # Models to try (in order of preference)
-    horizons_to_check = ['1w', '1m', '3m', '6m', '12m'] if horizon == 'all' else [horizon]
+    horizons_to_check = HORIZONS if horizon == 'all' else [horizon]
+    raw = service.predict(horizons=horizons_to_check)
     
     predictions = {}
     
@@ -147,100 +84,21 @@ def generate_local_predictions(
         print(f"  {hz.upper()} HORIZON")
         print(f"{'='*60}")
         
-        hz_predictions = {}
-        
-        # Try ensemble first (best)
-        ensemble_path = model_dir / "ensemble" / f"regime_ensemble_{hz}.pkl"
-        if ensemble_path.exists():
-            print(f"  Trying regime ensemble...")
-            model = load_local_model(ensemble_path, 'regime_ensemble')
-            if model:
-                try:
-                    pred = predict_with_tree_model(model, X)
-                    hz_predictions['ensemble'] = pred
-                    print(f"    ✅ Ensemble: ${pred:.2f}")
-                except Exception as e:
-                    print(f"    ❌ Ensemble failed: {e}")
-        
-        # Try LightGBM
-        lgbm_path = model_dir / "baselines" / f"lightgbm_dart_{hz}.pkl"
-        if lgbm_path.exists():
-            print(f"  Trying LightGBM...")
-            model = load_local_model(lgbm_path, 'lightgbm')
-            if model:
-                try:
-                    pred = predict_with_tree_model(model, X)
-                    hz_predictions['lightgbm'] = pred
-                    print(f"    ✅ LightGBM: ${pred:.2f}")
-                except Exception as e:
-                    print(f"    ❌ LightGBM failed: {e}")
+        for key, error in raw['_errors'].items():
+            if key.startswith(f"{hz}/"):
+                print(f"    ❌ {key.split('/', 1)[1].upper()} failed: {error}")
         
-        # Try XGBoost
-        xgb_path = model_dir / "baselines" / f"xgboost_dart_{hz}.pkl"
-        if xgb_path.exists():
-            print(f"  Trying XGBoost...")
-            model = load_local_model(xgb_path, 'xgboost')
-            if model:
-                try:
-                    pred = predict_with_tree_model(model, X)
-                    hz_predictions['xgboost'] = pred
-                    print(f"    ✅ XGBoost: ${pred:.2f}")
-                except Exception as e:
-                    print(f"    ❌ XGBoost failed: {e}")
-        
-        # Try neural models (if X_scaled available)
-        if X_scaled is not None:
-            neural_models = [
-                ('lstm', model_dir / "baselines" / f"simple_lstm_{hz}"),
-                ('tcn', model_dir / "advanced" / f"tcn_{hz}"),
-                ('attention', model_dir / "advanced" / f"attention_{hz}"),
-            ]
-            
-            for name, model_path in neural_models:
-                if model_path.exists():
-                    print(f"  Trying {name.upper()}...")
-                    model = load_local_model(model_path, name)
-                    scaler_path = model_path.parent / f"{model_path.name}_scaler.pkl"
-                    
-                    if model:
-                        try:
-                            # Re-prepare with scaler
-                            _, X_scaled_neural = prepare_features(df, feature_cols, scaler_path)
-                            if X_scaled_neural is not None:
-                                pred = predict_with_neural_model(model, X_scaled_neural)
-                                hz_predictions[name] = pred
-                                print(f"    ✅ {name.upper()}: ${pred:.2f}")
-                        except Exception as e:
-                            print(f"    ❌ {name.upper()} failed: {e}")
-        
-        if hz_predictions:
-            # Use ensemble if available, otherwise best tree model
-            if 'ensemble' in hz_predictions:
-                predictions[hz] = {
-                    'value': hz_predictions['ensemble'],
-                    'model': 'ensemble',
-                    'all_models': hz_predictions
-                }
-            elif 'lightgbm' in hz_predictions:
-                predictions[hz] = {
-                    'value': hz_predictions['lightgbm'],
-                    'model': 'lightgbm',
-                    'all_models': hz_predictions
-                }
-            elif 'xgboost' in hz_predictions:
-                predictions[hz] = {
-                    'value': hz_predictions['xgboost'],
-                    'model': 'xgboost',
-                    'all_models': hz_predictions
-                }
-            else:
-                # Use first available
-                first_model = list(hz_predictions.keys())[0]
-                predictions[hz] = {
-                    'value': hz_predictions[first_model],
-                    'model': first_model,
-                    'all_models': hz_predictions
-                }
+        if hz in raw:
+            info = raw[hz]
+            hz_predictions = {name: preds[0] for name, preds in info['all_models'].items()}
+            for name, pred in hz_predictions.items():
+                timing = raw['_timing_ms'].get(f"{hz}/{name}", {})
+                print(f"    ✅ {name.upper()}: ${pred:.2f} ({timing.get('last_ms', 0):.1f} ms)")
+            predictions[hz] = {
+                'value': hz_predictions[info['model']],
+                'model': info['model'],
+                'all_models': hz_predictions
+            }
         else:
             print(f"    ⚠️  No models found for {hz}")
     
@@ -262,6 +120,62 @@ def generate_local_predictions(
     return predictions
 
 
+def replay_local_predictions(
+    horizon: str = 'all',
+    data_path: Path = None,
+    model_dir: Path = None,
+    output_path: Path = None,
+    start_date: str = None,
+    end_date: str = None
+):
+    """
+    Score every historical date with every local model (no per-date loop) and
+    write a long-format Parquet of (date, horizon, model, prediction).
+
+    Used to backfill prediction history and as input for
+    src/analysis/backtesting_engine.py (--replay-path).
+    """
+    repo_root = get_repo_root()
+    if data_path is None:
+        data_path = repo_root / "TrainingData/exports/zl_training_prod_allhistory_1m.parquet"
+    if model_dir is None:
+        model_dir = repo_root / "Models/local"
+    if output_path is None:
+        output_path = repo_root / "TrainingData/exports/zl_prediction_replay.parquet"
+    
+    print("="*80)
+    print("⏪ LOCAL PREDICTION REPLAY")
+    print("="*80)
+    print(f"Data: {data_path}")
+    print(f"Models: {model_dir}")
+    
+    if not data_path.exists():
+        print(f"❌ Data file not found: {data_path}")
+        return None
+    
+    df = pd.read_parquet(data_path)
+    print(f"✅ Loaded data: {len(df)} rows ({df['date'].min()} → {df['date'].max()})")
+    
+    service = get_inference_service(model_dir)
+    service.feature_cols = select_feature_columns(df)
+    horizons = HORIZONS if horizon == 'all' else [horizon]
+    replay = service.replay(df, horizons=horizons, start=start_date, end=end_date)
+    
+    if replay.empty:
+        print("❌ No predictions generated - train models first!")
+        return replay
+    
+    timings = service.timings()
+    for (hz, model), group in replay.groupby(['horizon', 'model'], sort=False):
+        timing = timings[f"{hz}/{model}"]
+        print(f"  {hz.upper():4s} {model:10s}: {len(group):,} dates in {timing['last_ms']:.0f} ms")
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    replay.to_parquet(output_path, index=False)
+    print(f"\n✅ Wrote {len(replay):,} rows to {output_path}")
+    return replay
+
+
 if __name__ == "__main__":
     import argparse
     
@@ -269,9 +183,24 @@ if __name__ == "__main__":
     parser.add_argument("--horizon", default="all", choices=['all', '1w', '1m', '3m', '6m', '12m'])
     parser.add_argument("--data-path", help="Path to training data")
     parser.add_argument("--model-dir", help="Directory with trained models")
+    parser.add_argument("--replay", action="store_true", help="Score every historical date (long-format Parquet)")
+    parser.add_argument("--output", help="Replay output path")
+    parser.add_argument("--start-date", help="Replay start date (YYYY-MM-DD)")
+    parser.add_argument("--end-date", help="Replay end date (YYYY-MM-DD)")
     
     args = parser.parse_args()
     
+    if args.replay:
+        replay_local_predictions(
+            horizon=args.horizon,
+            data_path=Path(args.data_path).expanduser() if args.data_path else None,
+            model_dir=Path(args.model_dir).expanduser() if args.model_dir else None,
+            output_path=Path(args.output).expanduser() if args.output else None,
+            start_date=args.start_date,
+            end_date=args.end_date
+        )
+        sys.exit(0)
+    
     predictions = generate_local_predictions(
         horizon=args.horizon,
         data_path=Path(args.data_path).expanduser() if args.data_path else None,
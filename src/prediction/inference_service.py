@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Resident multi-horizon inference service.
+
+Loads every horizon model (regime ensemble, LightGBM, XGBoost, neural) once
+into a registry and keeps them in memory. The registry re-checks model files
+at most every few seconds and reloads only the models whose artifacts changed
+(e.g. a new version written by training/utils/model_saver.py), so a
+long-lived process always serves the latest models without paying load cost
+per request.
+
+Predictions are batched: all what-if scenarios of a request (and of
+concurrent requests, via submit()) are scored in one predict call per model,
+and models run concurrently in a thread pool. Per-model timing is recorded.
+
+Usage:
+    service = InferenceService(model_dir)
+    service.load_data(data_path)
+    service.predict_latest()                                   # same shape as generate_local_predictions
+    service.predict([{'crude_price': 85.0}, {'vix_level': 30}])  # what-if batch
+    service.replay(df)                                         # every historical date (long format)
+"""
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Empty, Queue
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from training.features.feature_catalog import FeatureCatalog
+
+HORIZONS = ['1w', '1m', '3m', '6m', '12m']
+
+# Preference order for the headline prediction of a horizon
+MODEL_PREFERENCE = ['ensemble', 'lightgbm', 'xgboost']
+
+NEURAL_MODELS = [
+    ('lstm', 'baselines', 'simple_lstm_{hz}'),
+    ('tcn', 'advanced', 'tcn_{hz}'),
+    ('attention', 'advanced', 'attention_{hz}'),
+]
+
+# Versioned artifacts written by model_saver (Models/local/horizon_{hz}/{surface}/baselines/<name>[_vN]/)
+SAVER_MODELS = [
+    ('lightgbm', 'lightgbm_dart'),
+    ('xgboost', 'xgboost_dart'),
+]
+
+_tf = None
+
+
+def _tensorflow():
+    """Import TensorFlow once, only if a neural model is actually loaded."""
+    global _tf
+    if _tf is None:
+        import tensorflow as tf
+        _tf = tf
+    return _tf
+
+
+def select_feature_columns(df: pd.DataFrame) -> List[str]:
+    """Tree feature set from the catalog, falling back to all numeric columns."""
+    available_cols = set(df.columns)
+    feature_cols = [col for col in FeatureCatalog.get_features_for_model('tree') if col in available_cols]
+    if len(feature_cols) < 100:
+        numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
+        feature_cols = [col for col in numeric_cols if col not in FeatureCatalog.EXCLUDED]
+    return feature_cols
+
+
+@dataclass
+class ModelSpec:
+    """Where a model lives on disk and how to load it."""
+    horizon: str
+    name: str
+    kind: str  # 'tree' or 'neural'
+    path: Path
+    scaler_path: Optional[Path] = None
+    columns_path: Optional[Path] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.horizon}/{self.name}"
+
+    def signature(self) -> tuple:
+        """Changes whenever the artifact is rewritten."""
+        paths = [self.path]
+        if self.path.is_dir():
+            paths = [p for p in self.path.rglob('*') if p.is_file()]
+        if self.scaler_path is not None and self.scaler_path.exists():
+            paths.append(self.scaler_path)
+        return (str(self.path), max((p.stat().st_mtime_ns for p in paths), default=0))
+
+
+@dataclass
+class LoadedModel:
+    spec: ModelSpec
+    model: Any
+    scaler: Any = None
+    feature_cols: Optional[List[str]] = None
+    signature: tuple = ()
+    load_seconds: float = 0.0
+    calls: int = 0
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+
+    def record(self, elapsed_ms: float):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+
+    def timing(self) -> Dict[str, float]:
+        return {
+            'last_ms': round(self.last_ms, 3),
+            'mean_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'calls': self.calls,
+            'load_seconds': round(self.load_seconds, 3),
+        }
+
+
+def _latest_saver_dir(base: Path, prefix: str) -> Optional[Path]:
+    """Newest <prefix>[_vN] directory written by model_saver (by run_id.txt mtime)."""
+    if not base.exists():
+        return None
+    candidates = [
+        d for d in base.iterdir()
+        if d.is_dir() and (d.name == prefix or d.name.startswith(f"{prefix}_v")) and (d / 'run_id.txt').exists()
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda d: (d / 'run_id.txt').stat().st_mtime_ns)
+
+
+def discover_model_specs(model_dir: Path, horizons: List[str] = HORIZONS, surface: str = 'prod') -> List[ModelSpec]:
+    """All model artifacts available for the horizons (same locations generate_local_predictions used)."""
+    specs = []
+    for hz in horizons:
+        candidates = [
+            ModelSpec(hz, 'ensemble', 'tree', model_dir / "ensemble" / f"regime_ensemble_{hz}.pkl"),
+            ModelSpec(hz, 'lightgbm', 'tree', model_dir / "baselines" / f"lightgbm_dart_{hz}.pkl"),
+            ModelSpec(hz, 'xgboost', 'tree', model_dir / "baselines" / f"xgboost_dart_{hz}.pkl"),
+        ]
+        found = {c.name for c in candidates if c.path.exists()}
+
+        # Versioned model_saver artifacts win over legacy flat pickles
+        saver_base = model_dir / f"horizon_{hz}" / surface / "baselines"
+        for name, prefix in SAVER_MODELS:
+            latest = _latest_saver_dir(saver_base, prefix)
+            if latest is None:
+                continue
+            artifact = next((latest / f for f in ('model.pkl', 'model.bin') if (latest / f).exists()), None)
+            if artifact is None:
+                continue
+            candidates = [c for c in candidates if c.name != name]
+            candidates.append(ModelSpec(hz, name, 'tree', artifact, columns_path=latest / 'columns_used.txt'))
+            found.add(name)
+
+        specs.extend(c for c in candidates if c.name in found)
+
+        for name, subdir, pattern in NEURAL_MODELS:
+            path = model_dir / subdir / pattern.format(hz=hz)
+            if path.exists():
+                specs.append(ModelSpec(hz, name, 'neural', path,
+                                       scaler_path=path.parent / f"{path.name}_scaler.pkl"))
+    return specs
+
+
+def load_model_artifact(spec: ModelSpec) -> Any:
+    """Load one model artifact according to its format."""
+    if spec.kind == 'neural':
+        return _tensorflow().keras.models.load_model(str(spec.path))
+    if spec.path.suffix == '.bin':
+        if spec.name == 'lightgbm':
+            import lightgbm as lgb
+            return lgb.Booster(model_file=str(spec.path))
+        import xgboost as xgb
+        model = xgb.XGBRegressor()
+        model.load_model(str(spec.path))
+        return model
+    return joblib.load(spec.path)
+
+
+class ModelRegistry:
+    """In-memory registry of loaded models with mtime-based hot reload."""
+
+    def __init__(self, model_dir: Path, horizons: List[str] = HORIZONS,
+                 surface: str = 'prod', reload_interval: float = 5.0):
+        self.model_dir = Path(model_dir)
+        self.horizons = horizons
+        self.surface = surface
+        self.reload_interval = reload_interval
+        self.models: Dict[str, LoadedModel] = {}
+        self.errors: Dict[str, str] = {}
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def _load(self, spec: ModelSpec) -> Optional[LoadedModel]:
+        started = time.perf_counter()
+        try:
+            model = load_model_artifact(spec)
+            scaler = joblib.load(spec.scaler_path) if spec.scaler_path and spec.scaler_path.exists() else None
+            feature_cols = None
+            if spec.columns_path is not None and spec.columns_path.exists():
+                feature_cols = spec.columns_path.read_text().split("\n")
+        except Exception as e:
+            self.errors[spec.key] = str(e)
+            print(f"⚠️  Could not load {spec.path}: {e}")
+            return None
+        self.errors.pop(spec.key, None)
+        return LoadedModel(spec, model, scaler, feature_cols, spec.signature(),
+                           load_seconds=time.perf_counter() - started)
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """Reload models whose artifacts changed; returns the reloaded keys."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return []
+        with self._lock:
+            self._last_check = now
+            specs = {s.key: s for s in discover_model_specs(self.model_dir, self.horizons, self.surface)}
+            reloaded = []
+            for key, spec in specs.items():
+                current = self.models.get(key)
+                if current is not None and current.signature == spec.signature():
+                    continue
+                loaded = self._load(spec)
+                if loaded is not None:
+                    self.models[key] = loaded
+                    reloaded.append(key)
+            for key in set(self.models) - set(specs):
+                del self.models[key]
+        if reloaded and not force:
+            print(f"🔄 Reloaded models: {', '.join(sorted(reloaded))}")
+        return reloaded
+
+    def snapshot(self) -> Dict[str, LoadedModel]:
+        """Copy of the loaded models, taken under the lock refresh() mutates them with."""
+        with self._lock:
+            return dict(self.models)
+
+    def for_horizon(self, horizon: str) -> List[LoadedModel]:
+        return [m for m in self.snapshot().values() if m.spec.horizon == horizon]
+
+
+class InferenceService:
+    """
+    Long-lived predictor over a ModelRegistry.
+
+    Keeps the latest feature history in memory; each request may carry a
+    batch of what-if scenarios (feature overrides applied to the latest row)
+    that are scored together in one call per model.
+    """
+
+    def __init__(self, model_dir: Path, horizons: List[str] = HORIZONS, surface: str = 'prod',
+                 time_steps: int = 30, reload_interval: float = 5.0, max_workers: int = 4,
+                 batch_window_ms: float = 5.0):
+        self.registry = ModelRegistry(model_dir, horizons, surface, reload_interval)
+        self.horizons = horizons
+        self.time_steps = time_steps
+        self.batch_window_ms = batch_window_ms
+        self.features: Optional[pd.DataFrame] = None
+        self.feature_cols: List[str] = []
+        self.latest_date = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._queue: Queue = Queue()
+        self._batcher: Optional[threading.Thread] = None
+        self._batcher_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+
+    def load_data(self, data_path: Optional[Path] = None, df: Optional[pd.DataFrame] = None,
+                  feature_cols: Optional[List[str]] = None):
+        """Load feature history once (only the last time_steps rows are kept)."""
+        if df is None:
+            df = pd.read_parquet(data_path)
+        if 'date' in df.columns:
+            df = df.sort_values('date')
+            self.latest_date = df['date'].max()
+        self.feature_cols = feature_cols or select_feature_columns(df)
+        tail = df.iloc[-self.time_steps:]
+        self.features = tail.reindex(columns=list(dict.fromkeys(self.feature_cols + [
+            c for c in df.columns if c not in FeatureCatalog.EXCLUDED and pd.api.types.is_numeric_dtype(df[c])
+        ]))).fillna(0).astype(float)
+
+    def _scenario_frame(self, scenarios: List[Dict[str, float]]) -> pd.DataFrame:
+        """Latest row repeated per scenario with overrides applied."""
+        base = self.features.iloc[[-1] * len(scenarios)].reset_index(drop=True)
+        for i, overrides in enumerate(scenarios):
+            for col, value in (overrides or {}).items():
+                if col in base.columns:
+                    base.iat[i, base.columns.get_loc(col)] = value
+        return base
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def _score(self, loaded: LoadedModel, scenarios: pd.DataFrame) -> np.ndarray:
+        cols = loaded.feature_cols or self.feature_cols
+        X = scenarios.reindex(columns=cols, fill_value=0).to_numpy(dtype=float)
+        started = time.perf_counter()
+        if loaded.spec.kind == 'tree':
+            preds = np.asarray(loaded.model.predict(X), dtype=float).reshape(len(X), -1)[:, 0]
+        else:
+            if loaded.scaler is None:
+                raise ValueError(f"No scaler for {loaded.spec.key}")
+            history = self.features.reindex(columns=cols, fill_value=0)
+            history = loaded.scaler.transform(history.to_numpy(dtype=float))
+            if len(history) < self.time_steps:
+                # Pad with last values if not enough history
+                pad = np.repeat(history[-1:], self.time_steps - len(history), axis=0)
+                history = np.vstack([pad, history])
+            batch = np.repeat(history[None, :, :], len(X), axis=0).astype(np.float32)
+            batch[:, -1, :] = loaded.scaler.transform(X)
+            preds = np.asarray(loaded.model(batch, training=False)).reshape(len(X), -1)[:, 0]
+        loaded.record((time.perf_counter() - started) * 1000)
+        return preds
+
+    def predict(self, scenarios: Optional[List[Dict[str, float]]] = None,
+                horizons: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Score scenarios for every loaded model of the requested horizons.
+
+        Returns:
+            {horizon: {'value': [...], 'model': name, 'all_models': {name: [...]}},
+             '_timing_ms': {horizon/name: {...}}, '_errors': {...}}
+        """
+        if self.features is None:
+            raise RuntimeError("Call load_data() before predict()")
+        self.registry.refresh()
+        scenarios = scenarios or [{}]
+        frame = self._scenario_frame(scenarios)
+        horizons = horizons or self.horizons
+
+        jobs = {
+            loaded.spec.key: (loaded, self._pool.submit(self._score, loaded, frame))
+            for hz in horizons for loaded in self.registry.for_horizon(hz)
+        }
+
+        result: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for key, (loaded, future) in jobs.items():
+            try:
+                preds = future.result()
+            except Exception as e:
+                errors[key] = str(e)
+                continue
+            hz_result = result.setdefault(loaded.spec.horizon, {'all_models': {}})
+            hz_result['all_models'][loaded.spec.name] = preds.tolist()
+
+        for hz, hz_result in result.items():
+            names = list(hz_result['all_models'])
+            primary = next((m for m in MODEL_PREFERENCE if m in names), names[0])
+            hz_result['model'] = primary
+            hz_result['value'] = hz_result['all_models'][primary]
+
+        result['_timing_ms'] = {key: loaded.timing() for key, (loaded, _) in jobs.items()}
+        result['_errors'] = {**self.registry.errors, **errors}
+        return result
+
+    def predict_latest(self, horizons: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Latest-row predictions in the generate_local_predictions() format (scalar values)."""
+        raw = self.predict(None, horizons)
+        return {
+            hz: {
+                'value': info['value'][0],
+                'model': info['model'],
+                'all_models': {name: preds[0] for name, preds in info['all_models'].items()},
+            }
+            for hz, info in raw.items() if not hz.startswith('_')
+        }
+
+    # ------------------------------------------------------------------
+    # Historical replay
+    # ------------------------------------------------------------------
+
+    def _sequence_batches(self, scaled: np.ndarray, rows: np.ndarray, chunk_size: int):
+        """
+        Yield (row_positions, (n, time_steps, F) batch) for every requested row.
+
+        Rows with a full window are strided views over the scaled matrix (no
+        copy); the first time_steps-1 rows are front-padded with their own
+        values, as single-request predict() pads short histories.
+        """
+        T = self.time_steps
+        windows = np.lib.stride_tricks.sliding_window_view(scaled, T, axis=0).transpose(0, 2, 1)
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            full = chunk[chunk >= T - 1]
+            short = chunk[chunk < T - 1]
+            parts = []
+            if len(short):
+                idx = short[:, None] - (T - 1) + np.arange(T)[None, :]
+                idx = np.where(idx < 0, short[:, None], idx)
+                parts.append((short, scaled[idx]))
+            if len(full):
+                parts.append((full, windows[full - (T - 1)]))
+            for positions, batch in parts:
+                yield positions, np.ascontiguousarray(batch, dtype=np.float32)
+
+    def _replay_model(self, loaded: LoadedModel, df: pd.DataFrame, rows: np.ndarray,
+                      chunk_size: int) -> np.ndarray:
+        cols = loaded.feature_cols or self.feature_cols
+        X = df.reindex(columns=cols, fill_value=0).fillna(0).to_numpy(dtype=float)
+        started = time.perf_counter()
+        if loaded.spec.kind == 'tree':
+            preds = np.asarray(loaded.model.predict(X[rows]), dtype=float).reshape(len(rows), -1)[:, 0]
+        else:
+            if loaded.scaler is None:
+                raise ValueError(f"No scaler for {loaded.spec.key}")
+            scaled = loaded.scaler.transform(X)
+            preds = np.empty(len(rows))
+            for positions, batch in self._sequence_batches(scaled, rows, chunk_size):
+                out = np.asarray(loaded.model(batch, training=False)).reshape(len(batch), -1)[:, 0]
+                preds[np.searchsorted(rows, positions)] = out
+        loaded.record((time.perf_counter() - started) * 1000)
+        return preds
+
+    def replay(self, df: pd.DataFrame, horizons: Optional[List[str]] = None,
+               start=None, end=None, chunk_size: int = 2048) -> pd.DataFrame:
+        """
+        Score every historical date with every loaded model in one vectorized
+        call per model (tree models over the full matrix, neural models over
+        strided sequence batches).
+
+        Returns:
+            Long-format frame with columns date, horizon, model, prediction
+        """
+        self.registry.refresh()
+        df = df.sort_values('date').reset_index(drop=True)
+        if not self.feature_cols:
+            self.feature_cols = select_feature_columns(df)
+
+        dates = pd.to_datetime(df['date'])
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= (dates >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (dates <= pd.Timestamp(end)).to_numpy()
+        rows = np.flatnonzero(mask)
+
+        columns = ['date', 'horizon', 'model', 'prediction']
+        if len(rows) == 0:
+            return pd.DataFrame(columns=columns)
+
+        jobs = [
+            (loaded, self._pool.submit(self._replay_model, loaded, df, rows, chunk_size))
+            for hz in (horizons or self.horizons) for loaded in self.registry.for_horizon(hz)
+        ]
+
+        frames = []
+        for loaded, future in jobs:
+            try:
+                preds = future.result()
+            except Exception as e:
+                print(f"    ❌ {loaded.spec.key} replay failed: {e}")
+                continue
+            frames.append(pd.DataFrame({
+                'date': dates.to_numpy()[rows],
+                'horizon': loaded.spec.horizon,
+                'model': loaded.spec.name,
+                'prediction': preds,
+            }))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    # ------------------------------------------------------------------
+    # Request coalescing
+    # ------------------------------------------------------------------
+
+    def submit(self, overrides: Optional[Dict[str, float]] = None) -> Future:
+        """
+        Queue one what-if scenario; concurrent submissions arriving within
+        batch_window_ms are scored together in a single predict() call.
+        The future resolves to {horizon: {'value', 'model', 'all_models'}}.
+        """
+        with self._batcher_lock:
+            if self._batcher is None or not self._batcher.is_alive():
+                self._batcher = threading.Thread(target=self._run_batcher, daemon=True)
+                self._batcher.start()
+        future: Future = Future()
+        self._queue.put((overrides or {}, future))
+        return future
+
+    def _run_batcher(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window_ms / 1000
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except Empty:
+                    break
+
+            try:
+                raw = self.predict([overrides for overrides, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for i, (_, future) in enumerate(batch):
+                future.set_result({
+                    hz: {
+                        'value': info['value'][i],
+                        'model': info['model'],
+                        'all_models': {name: preds[i] for name, preds in info['all_models'].items()},
+                    }
+                    for hz, info in raw.items() if not hz.startswith('_')
+                })
+
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        return {key: loaded.timing() for key, loaded in self.registry.snapshot().items()}
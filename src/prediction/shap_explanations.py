@@ -1,16 +1,36 @@
 #!/usr/bin/env python3
 """
 Generate SHAP explanations for trained models to understand feature importance.
+
+SHAP values are kept in an incremental store instead of being recomputed over
+the whole history on every run:
+
+    TrainingData/shap_store/{horizon}/{model}_{version}/part-*.parquet
+
+One row per date (date, base_value, one float32 column per feature). The
+version is a hash of the model file and feature list, so retraining starts a
+fresh store while old versions stay readable. Each run only explains dates
+missing from the store, split into row chunks scored in parallel (native
+LightGBM/XGBoost TreeSHAP via pred_contrib, shap.TreeExplainer otherwise).
+Per-forecast top-k drivers are served straight from the store.
 """
 import argparse
+import hashlib
+import json
 import pandas as pd
+import numpy as np
 import joblib
 import shap
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
 import warnings
 
 warnings.filterwarnings("ignore")
 
+CHUNK_ROWS = 512
+
 def get_repo_root():
     """Finds the repository root."""
     current_path = Path(__file__).resolve()
@@ -19,46 +39,166 @@ def get_repo_root():
             return parent
     raise FileNotFoundError("Repository root not found.")
 
-def generate_shap_explanations(horizon: str, model_dir: Path, data_dir: Path):
-    """Generates and saves SHAP explanation plots for a given model."""
+def select_shap_features(df: pd.DataFrame) -> List[str]:
+    """Feature columns used for SHAP (everything except date, price and targets)."""
+    return [col for col in df.columns if col not in ['date', 'zl_price_current'] and 'target' not in col]
+
+def tree_contributions(model, X: pd.DataFrame) -> np.ndarray:
+    """
+    TreeSHAP values with the base value as the last column, shape (rows, features + 1).
+    Uses the libraries' native (multi-threaded, GIL-free) implementation when available.
+    """
+    if hasattr(model, 'booster_') or type(model).__module__.startswith('lightgbm'):
+        return np.asarray(model.predict(X, pred_contrib=True), dtype=np.float64)
+    if type(model).__module__.startswith('xgboost'):
+        import xgboost as xgb
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        return booster.predict(xgb.DMatrix(X), pred_contribs=True)
+    explainer = shap.TreeExplainer(model)
+    values = np.asarray(explainer.shap_values(X))
+    base = np.full((len(X), 1), float(np.ravel(explainer.expected_value)[0]))
+    return np.hstack([values.reshape(len(X), -1), base])
+
+
+class ShapStore:
+    """Columnar (date × feature) SHAP store for one model version."""
+
+    def __init__(self, root: Path, horizon: str, model_name: str, version: str):
+        self.path = Path(root) / horizon / f"{model_name}_{version}"
+
+    @staticmethod
+    def model_version(model_path: Path, feature_cols: List[str]) -> str:
+        digest = hashlib.sha1(Path(model_path).read_bytes())
+        digest.update(json.dumps(feature_cols).encode())
+        return digest.hexdigest()[:12]
+
+    def parts(self) -> List[Path]:
+        return sorted(self.path.glob("part-*.parquet"))
+
+    def stored_dates(self) -> pd.DatetimeIndex:
+        """Dates already explained (reads only the date column)."""
+        parts = self.parts()
+        if not parts:
+            return pd.DatetimeIndex([])
+        dates = pd.concat([pd.read_parquet(p, columns=['date'])['date'] for p in parts])
+        return pd.DatetimeIndex(pd.to_datetime(dates))
+
+    def update(self, model, df: pd.DataFrame, feature_cols: List[str],
+               chunk_rows: int = CHUNK_ROWS, max_workers: int = 4) -> int:
+        """Explain dates not yet in the store; returns the number of new rows."""
+        dates = pd.to_datetime(df['date'])
+        new = df.loc[~dates.isin(self.stored_dates())]
+        if new.empty:
+            return 0
+
+        X = new[feature_cols]
+        chunks = [X.iloc[i:i + chunk_rows] for i in range(0, len(X), chunk_rows)]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            values = np.vstack(list(pool.map(lambda chunk: tree_contributions(model, chunk), chunks)))
+
+        out = pd.DataFrame(values[:, :-1].astype(np.float32), columns=feature_cols)
+        out.insert(0, 'base_value', values[:, -1])
+        out.insert(0, 'date', pd.to_datetime(new['date']).to_numpy())
+        self.path.mkdir(parents=True, exist_ok=True)
+        out.to_parquet(self.path / f"part-{datetime.now().strftime('%Y%m%d%H%M%S%f')}.parquet", index=False)
+        return len(out)
+
+    def load(self, dates=None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Stored SHAP rows, optionally restricted to dates / columns."""
+        parts = self.parts()
+        if not parts:
+            return pd.DataFrame()
+        filters = [('date', 'in', list(pd.to_datetime(dates)))] if dates is not None else None
+        cols = None if columns is None else ['date', 'base_value'] + list(columns)
+        df = pd.concat([pd.read_parquet(p, columns=cols, filters=filters) for p in parts], ignore_index=True)
+        return df.sort_values('date').drop_duplicates('date', keep='last').reset_index(drop=True)
+
+    def compact(self):
+        """Merge all parts into one file (fewer files to open when serving)."""
+        parts = self.parts()
+        if len(parts) <= 1:
+            return
+        merged = self.load()
+        target = self.path / f"part-{datetime.now().strftime('%Y%m%d%H%M%S%f')}.parquet"
+        merged.to_parquet(target, index=False)
+        for p in parts:
+            p.unlink()
+
+    def top_drivers(self, dates=None, k: int = 10) -> pd.DataFrame:
+        """Long frame (date, rank, feature, shap_value, base_value) of the k largest |SHAP| per date."""
+        stored = self.load(dates)
+        if stored.empty:
+            return pd.DataFrame(columns=['date', 'rank', 'feature', 'shap_value', 'base_value'])
+        features = np.array([c for c in stored.columns if c not in ('date', 'base_value')])
+        values = stored[features].to_numpy()
+        k = min(k, len(features))
+        top = np.argpartition(-np.abs(values), k - 1, axis=1)[:, :k]
+        top_vals = np.take_along_axis(values, top, axis=1)
+        order = np.argsort(-np.abs(top_vals), axis=1)
+        top, top_vals = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_vals, order, axis=1)
+        return pd.DataFrame({
+            'date': np.repeat(stored['date'].to_numpy(), k),
+            'rank': np.tile(np.arange(1, k + 1), len(stored)),
+            'feature': features[top].ravel(),
+            'shap_value': top_vals.ravel(),
+            'base_value': np.repeat(stored['base_value'].to_numpy(), k),
+        })
+
+
+def open_store(horizon: str, model_path: Path, feature_cols: List[str],
+               store_root: Optional[Path] = None) -> ShapStore:
+    store_root = store_root or get_repo_root() / "TrainingData/shap_store"
+    version = ShapStore.model_version(model_path, feature_cols)
+    return ShapStore(store_root, horizon, model_path.stem.replace(f"_{horizon}", ""), version)
+
+def generate_shap_explanations(horizon: str, model_dir: Path, data_dir: Path,
+                               store_root: Optional[Path] = None, top_k: int = 10):
+    """Updates the SHAP store for a model and saves the summary plot and latest drivers."""
     print(f"\n--- Generating SHAP explanations for {horizon} horizon ---")
-    
+
     # Load model
     model_path = model_dir / f"lightgbm_dart_{horizon}.pkl" # Using LightGBM for SHAP
     if not model_path.exists():
         print(f"⚠️ Model not found for {horizon} at {model_path}. Skipping.")
         return
     model = joblib.load(model_path)
-    
+
     # Load data
     data_path = data_dir / f"processed_training_data_{horizon}.parquet"
     if not data_path.exists():
         print(f"⚠️ Processed data not found for {horizon} at {data_path}. Skipping.")
         return
     df = pd.read_parquet(data_path)
-    
-    # Prepare data for SHAP
-    feature_cols = [col for col in df.columns if col not in ['date', 'zl_price_current'] and 'target' not in col]
-    X = df[feature_cols]
-    
-    # Create SHAP explainer
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(X)
-    
-    # Generate and save summary plot
+    if 'date' not in df.columns:
+        print(f"⚠️ No date column in {data_path}; SHAP store needs dates. Skipping.")
+        return
+
+    # Explain only dates not yet in the store
+    feature_cols = select_shap_features(df)
+    store = open_store(horizon, model_path, feature_cols, store_root)
+    new_rows = store.update(model, df, feature_cols)
+    print(f"✅ SHAP store {store.path}: {new_rows} new dates explained")
+
+    # Latest forecast drivers for the dashboard
     output_dir = get_repo_root() / "docs/analysis/shap_plots"
     output_dir.mkdir(parents=True, exist_ok=True)
-    
+    latest = pd.to_datetime(df['date']).max()
+    drivers = store.top_drivers([latest], k=top_k)
+    drivers_path = output_dir / f"shap_drivers_{horizon}.json"
+    drivers.assign(date=drivers['date'].astype(str)).to_json(drivers_path, orient='records', indent=2)
+    print(f"✅ Top {top_k} drivers for {latest.date()} saved to {drivers_path}")
+
     try:
         import matplotlib.pyplot as plt
-        
+
+        shap_values = store.load(columns=feature_cols)[feature_cols].to_numpy()
         plt.figure()
-        shap.summary_plot(shap_values, X, plot_type="bar", max_display=20, show=False)
+        shap.summary_plot(shap_values, feature_names=feature_cols, plot_type="bar", max_display=20, show=False)
         plot_path = output_dir / f"shap_summary_{horizon}.png"
         plt.savefig(plot_path, bbox_inches='tight')
         plt.close()
         print(f"✅ SHAP summary plot for {horizon} saved to {plot_path}")
-        
+
     except ImportError:
         print("⚠️ Matplotlib not installed. Skipping plot generation.")
     except Exception as e:
@@ -67,25 +207,27 @@ def generate_shap_explanations(horizon: str, model_dir: Path, data_dir: Path):
 def main():
     parser = argparse.ArgumentParser(description="Generate SHAP explanations for models.")
     parser.add_argument("--horizon", required=True, help="Horizon to analyze (e.g., 1w, 1m, or 'all').")
-    
+    parser.add_argument("--top-k", type=int, default=10, help="Drivers exported per forecast date.")
+    parser.add_argument("--store-dir", help="SHAP store root (default: TrainingData/shap_store).")
+    parser.add_argument("--compact", action="store_true", help="Merge store parts after updating.")
+
     args = parser.parse_args()
-    
+
     repo_root = get_repo_root()
     model_dir = repo_root / "Models/local/baselines"
     data_dir = repo_root / "TrainingData/processed"
-    
+    store_root = Path(args.store_dir).expanduser() if args.store_dir else None
+
     horizons = ['1w', '1m', '3m', '6m', '12m'] if args.horizon == 'all' else [args.horizon]
-    
+
     for horizon in horizons:
-        generate_shap_explanations(horizon, model_dir, data_dir)
-        
+        generate_shap_explanations(horizon, model_dir, data_dir, store_root, args.top_k)
+        if args.compact:
+            for store_dir in (store_root or repo_root / "TrainingData/shap_store").glob(f"{horizon}/*"):
+                model_name, version = store_dir.name.rsplit("_", 1)
+                ShapStore(store_dir.parent.parent, horizon, model_name, version).compact()
+
     print("\n--- SHAP explanation generation complete! ---")
 
 if __name__ == "__main__":
     main()
-
-
-
-
-
-
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Resumable hyperparameter search for the tree baselines (LightGBM / XGBoost DART).
+
+- One Optuna study per (model, horizon, surface), persisted in a local SQLite
+  store: killing the job and re-running the same command resumes where it
+  stopped (trials from a dead worker are retried via heartbeats).
+- Trials are scored on expanding walk-forward folds of the training window;
+  the final 20% holdout used by tree_models.py is never seen by the search.
+  Each fold purges `horizon` rows between train and validation (targets are
+  `horizon` trading days ahead, so the last training labels would otherwise
+  overlap the validation period). Early stopping runs on an inner split at
+  the end of the fold's training rows (purged the same way), never on the
+  validation rows that score the trial.
+- MedianPruner stops unpromising trials after the first folds.
+- Trials run in parallel worker processes that share the study through
+  SQLite and the feature matrix through train_all_horizons.SharedFeatureMatrix.
+  Binned fold datasets come from training.utils.dataset_cache, so each
+  worker bins a fold once and reuses it for every later trial.
+- Every trial is logged to MLflow (experiment "hyperparameter_search");
+  best params are written to Models/tuning/ and picked up by
+  tree_models.py --tuned.
+
+Usage:
+    python src/training/baselines/hyperparameter_search.py --horizons 1m --models lightgbm --trials 100
+    python src/training/baselines/hyperparameter_search.py --trials 200 --workers 3   # all horizons, overnight
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from cbi_v14.markets.zl import ZL_HORIZON_DAYS
+from training.config.m4_config import get_config_for_model, get_cpu_count
+from training.baselines.train_all_horizons import (
+    HORIZONS, MODELS, THREAD_PARAMS, SharedFeatureMatrix, export_path, thread_budget
+)
+from training.utils.dataset_cache import TreeDatasetCache, export_fingerprint
+
+try:
+    import optuna
+    from optuna.storages import RDBStorage, RetryFailedTrialCallback
+    from optuna.study import MaxTrialsCallback
+    from optuna.trial import TrialState
+    # Failed trials count towards the budget so a broken setup cannot loop forever
+    COUNTED_STATES = (TrialState.COMPLETE, TrialState.PRUNED, TrialState.FAIL)
+    OPTUNA_AVAILABLE = True
+except ImportError:
+    OPTUNA_AVAILABLE = False
+
+EXTERNAL_DRIVE = os.getenv("EXTERNAL_DRIVE", "/Volumes/Satechi Hub")
+CBI_V14_REPO = os.getenv("CBI_V14_REPO", f"{EXTERNAL_DRIVE}/Projects/CBI-V14")
+TUNING_DIR = Path(f"{CBI_V14_REPO}/Models/tuning")
+STUDY_DB = TUNING_DIR / "studies.db"
+MLFLOW_EXPERIMENT = "hyperparameter_search"
+
+N_FOLDS = 4
+MIN_TRAIN_FRACTION = 0.5      # first fold trains on the first half of the training window
+EARLY_STOPPING_ROUNDS = 50
+EARLY_STOPPING_FRACTION = 0.1  # tail of each fold's training rows held out for early stopping
+
+
+def study_name(model: str, horizon: str, surface: str) -> str:
+    return f"zl_{model}_{horizon}_{surface}"
+
+
+def best_params_path(model: str, horizon: str, surface: str) -> Path:
+    return TUNING_DIR / f"best_params_{study_name(model, horizon, surface)}.json"
+
+
+def load_best_params(model: str, horizon: str, surface: str = "prod") -> Optional[Dict]:
+    """Tuned overrides for get_config_for_model(model, horizon), or None if not tuned yet."""
+    path = best_params_path(model, horizon, surface)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)['params']
+
+
+def walk_forward_folds(n: int, n_folds: int = N_FOLDS,
+                       min_train_fraction: float = MIN_TRAIN_FRACTION,
+                       gap: int = 0) -> List[Tuple[int, int, int]]:
+    """
+    Expanding-window folds as (train_end, val_start, val_end) row indices over
+    n sorted rows; `gap` rows before each validation block are purged from
+    training (use at least the forecast horizon).
+    """
+    bounds = np.linspace(int(n * min_train_fraction), n, n_folds + 1).astype(int)
+    return [(int(bounds[i]) - gap, int(bounds[i]), int(bounds[i + 1]))
+            for i in range(n_folds) if bounds[i + 1] > bounds[i] and bounds[i] - gap > 0]
+
+
+def early_stopping_split(train_end: int, gap: int = 0,
+                         fraction: float = EARLY_STOPPING_FRACTION) -> Tuple[int, int]:
+    """(fit_end, stop_start): rows [0, fit_end) fit, [stop_start, train_end) drive early stopping."""
+    stop_start = train_end - max(1, int(train_end * fraction))
+    return stop_start - gap, stop_start
+
+
+def suggest_params(trial, model: str) -> Dict:
+    """Search space around the M4 configs (boosting type and objective stay fixed)."""
+    if model == 'lightgbm':
+        return {
+            'num_leaves': trial.suggest_int('num_leaves', 15, 127, log=True),
+            'max_depth': trial.suggest_int('max_depth', 3, 10),
+            'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.2, log=True),
+            'subsample': trial.suggest_float('subsample', 0.5, 1.0),
+            'subsample_freq': 1,
+            'colsample_bytree': trial.suggest_float('colsample_bytree', 0.4, 1.0),
+            'min_child_samples': trial.suggest_int('min_child_samples', 20, 300, log=True),
+            'reg_lambda': trial.suggest_float('reg_lambda', 1e-3, 10.0, log=True),
+            'drop_rate': trial.suggest_float('drop_rate', 0.05, 0.3),
+        }
+    return {
+        'max_depth': trial.suggest_int('max_depth', 3, 10),
+        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.2, log=True),
+        'subsample': trial.suggest_float('subsample', 0.5, 1.0),
+        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.4, 1.0),
+        'min_child_weight': trial.suggest_float('min_child_weight', 1.0, 20.0, log=True),
+        'reg_lambda': trial.suggest_float('reg_lambda', 1e-3, 10.0, log=True),
+        'rate_drop': trial.suggest_float('rate_drop', 0.05, 0.3),
+    }
+
+
+def _fit_fold(model: str, config: Dict, cache: TreeDatasetCache, key: str, arrays,
+              X_val: np.ndarray, y_val: np.ndarray) -> float:
+    """Train on one fold (early stopping on its inner split) and return validation MAPE (%)."""
+    # Same sklearn -> native mapping as the real training runs
+    from training.baselines.tree_models import XGBOOST_NATIVE_RENAMES, _booster_params
+    params, rounds = _booster_params(config, {} if model == 'lightgbm' else XGBOOST_NATIVE_RENAMES)
+    if model == 'lightgbm':
+        import lightgbm as lgb
+        fit_set, stop_set = cache.lightgbm(key, arrays, config)
+        booster = lgb.train(params, fit_set, num_boost_round=rounds, valid_sets=[stop_set],
+                            callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+        pred = booster.predict(X_val, num_iteration=booster.best_iteration)
+    else:
+        import xgboost as xgb
+        dfit, dstop = cache.xgboost(key, arrays,
+                                    quantile=params.get('tree_method') == 'hist',
+                                    max_bin=params.get('max_bin', 256))
+        booster = xgb.train(params, dfit, num_boost_round=rounds, evals=[(dstop, 'validation_0')],
+                            early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False)
+        pred = booster.inplace_predict(X_val, iteration_range=(0, booster.best_iteration + 1))
+    return float(np.mean(np.abs((y_val - pred) / y_val)) * 100)
+
+
+def _storage(url: str):
+    """SQLite study store with heartbeats so trials of a killed worker are retried."""
+    return RDBStorage(
+        url,
+        heartbeat_interval=60,
+        grace_period=180,
+        failed_trial_callback=RetryFailedTrialCallback(max_retry=2),
+        engine_kwargs={'connect_args': {'timeout': 60}},
+    )
+
+
+def _run_worker(job: Dict) -> Dict:
+    """Worker process: pull trials from the shared study until n_trials is reached."""
+    import mlflow
+    # tree_models sets its own MLflow experiment on import; import it before ours is set
+    from training.baselines import tree_models  # noqa: F401
+    import training.config_mlflow  # noqa: F401  (sets the tracking URI)
+
+    started = time.time()
+    model, horizon = job['model'], job['horizon']
+    try:
+        mlflow.set_experiment(MLFLOW_EXPERIMENT)
+        # Memmap view of the training rows (NaN targets were dropped at build time)
+        X, _, y, _, feature_cols, _ = SharedFeatureMatrix(job['root']).load(horizon)
+        gap = ZL_HORIZON_DAYS[horizon]
+        folds = walk_forward_folds(len(y), job['n_folds'], gap=gap)
+        cache = TreeDatasetCache(job.get('cache_dir'))
+
+        def objective(trial):
+            config = get_config_for_model(model, horizon)
+            config.update(suggest_params(trial, model))
+            config.update({THREAD_PARAMS[model]: job['threads'], 'n_estimators': job['max_rounds']})
+            fold_mapes = []
+            with mlflow.start_run(run_name=f"{job['study']}_t{trial.number}"):
+                mlflow.set_tags({'study': job['study'], 'trial': trial.number,
+                                 'model': model, 'horizon': horizon})
+                mlflow.log_params(trial.params)
+                try:
+                    for step, (train_end, val_start, val_end) in enumerate(folds):
+                        fit_end, stop_start = early_stopping_split(train_end, gap)
+                        key = cache.key(job['source'], feature_cols, f"target_{horizon}",
+                                        split=f"fold{step}:{fit_end}:{stop_start}:{train_end}")
+                        arrays = lambda a=fit_end, b=stop_start, c=train_end: (X[:a], X[b:c], y[:a], y[b:c])
+                        fold_mapes.append(_fit_fold(model, config, cache, key, arrays,
+                                                    X[val_start:val_end], y[val_start:val_end]))
+                        mlflow.log_metric("fold_mape", fold_mapes[-1], step=step)
+                        trial.report(float(np.mean(fold_mapes)), step)
+                        if trial.should_prune():
+                            mlflow.set_tag("state", "pruned")
+                            raise optuna.TrialPruned()
+                finally:
+                    if fold_mapes:
+                        mlflow.log_metric("mean_mape", float(np.mean(fold_mapes)))
+                mlflow.set_tag("state", "complete")
+            return float(np.mean(fold_mapes))
+
+        study = optuna.load_study(
+            study_name=job['study'],
+            storage=_storage(job['storage']),
+            sampler=optuna.samplers.TPESampler(seed=job['seed']),
+        )
+        study.optimize(
+            objective,
+            timeout=job.get('timeout'),
+            callbacks=[MaxTrialsCallback(job['n_trials'], states=COUNTED_STATES)],
+            catch=(ValueError, RuntimeError),
+            gc_after_trial=True,
+        )
+        return {**job, 'success': True, 'seconds': time.time() - started}
+    except Exception as e:
+        traceback.print_exc()
+        return {**job, 'success': False, 'error': str(e), 'seconds': time.time() - started}
+
+
+def _finished_trials(study) -> int:
+    return len(study.get_trials(deepcopy=False, states=COUNTED_STATES))
+
+
+def tune(horizons: List[str], models: List[str], surface: str = "prod", n_trials: int = 100,
+         workers: Optional[int] = None, n_folds: int = N_FOLDS, max_rounds: int = 500,
+         timeout_hours: Optional[float] = None, storage_url: Optional[str] = None,
+         scratch_dir: Optional[Path] = None, dataset_cache_dir: Optional[Path] = None) -> List[Dict]:
+    """Run (or resume) one study per model × horizon and write the best params."""
+    if not OPTUNA_AVAILABLE:
+        raise ImportError("optuna is required for hyperparameter search (pip install optuna)")
+    TUNING_DIR.mkdir(parents=True, exist_ok=True)
+    storage_url = storage_url or f"sqlite:///{STUDY_DB}"
+    cpu_count = get_cpu_count()
+    workers, threads = thread_budget(workers or cpu_count, cpu_count)
+    summaries = []
+
+    with tempfile.TemporaryDirectory(prefix="zl_tuning_features_", dir=scratch_dir) as tmp:
+        shared = SharedFeatureMatrix.build(horizons, surface, Path(tmp))
+        available = [h for h in horizons if h in shared.horizons()]
+        fingerprints = {h: export_fingerprint(export_path(h, surface)) for h in available}
+
+        for horizon in available:
+            for model in models:
+                name = study_name(model, horizon, surface)
+                study = optuna.create_study(
+                    study_name=name,
+                    storage=_storage(storage_url),
+                    direction="minimize",
+                    pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1),
+                    load_if_exists=True,
+                )
+                done = _finished_trials(study)
+                if done >= n_trials:
+                    print(f"⏭️  {name}: {done} trials already finished")
+                else:
+                    print(f"🔎 {name}: {done}/{n_trials} trials done → {workers} workers × {threads} threads")
+                    base = {
+                        'study': name, 'storage': storage_url, 'model': model, 'horizon': horizon,
+                        'root': str(shared.root), 'n_trials': n_trials, 'n_folds': n_folds,
+                        'max_rounds': max_rounds, 'threads': threads,
+                        'timeout': timeout_hours * 3600 if timeout_hours else None,
+                        'source': f"shared:{fingerprints[available[0]]}+{fingerprints[horizon]}",
+                        'cache_dir': str(dataset_cache_dir) if dataset_cache_dir else None,
+                    }
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        jobs = [{**base, 'seed': done * 1000 + i} for i in range(workers)]
+                        for result in pool.map(_run_worker, jobs):
+                            if not result['success']:
+                                print(f"   ❌ worker failed: {result['error']}")
+                summaries.append(_write_best(study, model, horizon, surface))
+    return summaries
+
+
+def _write_best(study, model: str, horizon: str, surface: str) -> Dict:
+    """Persist the best trial as config overrides for tree_models.py --tuned."""
+    counts = {state.name.lower(): len(study.get_trials(deepcopy=False, states=(state,)))
+              for state in (TrialState.COMPLETE, TrialState.PRUNED, TrialState.FAIL)}
+    summary = {'study': study.study_name, 'model': model, 'horizon': horizon, 'trials': counts}
+    try:
+        best = study.best_trial
+    except ValueError:
+        print(f"⚠️  {study.study_name}: no completed trials yet")
+        return {**summary, 'best_value': None}
+
+    params = dict(best.params)
+    if model == 'lightgbm' and 'subsample' in params:
+        params['subsample_freq'] = 1
+    summary.update({'best_value': best.value, 'best_trial': best.number})
+    with open(best_params_path(model, horizon, surface), "w") as f:
+        json.dump({**summary, 'params': params, 'updated_at': datetime.now().isoformat()}, f, indent=2)
+    print(f"✅ {study.study_name}: best walk-forward MAPE {best.value:.2f}% (trial {best.number}, "
+          f"{counts['complete']} complete / {counts['pruned']} pruned)")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable hyperparameter search for tree baselines")
+    parser.add_argument("--surface", choices=["prod", "full"], default="prod")
+    parser.add_argument("--horizons", nargs="+", default=HORIZONS, choices=HORIZONS)
+    parser.add_argument("--models", nargs="+", default=MODELS, choices=MODELS)
+    parser.add_argument("--trials", type=int, default=100, help="Finished trials per study (resume counts earlier ones)")
+    parser.add_argument("--workers", type=int, help="Parallel worker processes (default: CPU budget)")
+    parser.add_argument("--folds", type=int, default=N_FOLDS, help="Walk-forward folds per trial")
+    parser.add_argument("--max-rounds", type=int, default=500, help="Boosting rounds cap per fold")
+    parser.add_argument("--timeout-hours", type=float, help="Per-study wall clock limit")
+    parser.add_argument("--storage", help=f"Optuna storage URL (default: sqlite:///{STUDY_DB})")
+    parser.add_argument("--scratch-dir", help="Directory for the memory-mapped feature matrix")
+    parser.add_argument("--dataset-cache", help="Pre-binned dataset cache directory")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🎛️  TREE BASELINE HYPERPARAMETER SEARCH")
+    print("=" * 80)
+    print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    started = time.time()
+
+    summaries = tune(args.horizons, args.models, args.surface, args.trials, args.workers,
+                     args.folds, args.max_rounds, args.timeout_hours, args.storage,
+                     Path(args.scratch_dir) if args.scratch_dir else None,
+                     Path(args.dataset_cache) if args.dataset_cache else None)
+
+    print("\n" + "=" * 80)
+    print(f"📊 SUMMARY ({time.time() - started:.0f}s wall clock)")
+    print("=" * 80)
+    for s in summaries:
+        best = f"MAPE = {s['best_value']:6.2f}%" if s['best_value'] is not None else "no completed trials"
+        print(f"{s['horizon']:4s} {s['model']:9s} {best}  {s['trials']}")
+
+    sys.exit(0 if any(s['best_value'] is not None for s in summaries) else 1)
+
+
+if __name__ == "__main__":
+    main()
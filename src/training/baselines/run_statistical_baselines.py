@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Parallel statistical baselines - all horizons × models in one run.
+
+Each (horizon, model) job runs in its own process; only date + target are
+read from the exports. Jobs go through statistical.py's train_* functions, so
+saved fits are updated with newly appended observations instead of being
+refitted and the Auto-ARIMA order search is cached. Together that makes a
+daily refresh cheap enough to run after every ingest.
+
+Usage:
+    python src/training/baselines/run_statistical_baselines.py
+    python src/training/baselines/run_statistical_baselines.py --horizons 1w 1m --models arima exp_smoothing
+    python src/training/baselines/run_statistical_baselines.py --no-reuse-state   # full refit
+"""
+import os
+
+# One BLAS thread per process: parallelism comes from the process pool
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+import sys
+import json
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from training.config.m4_config import get_cpu_count
+
+EXTERNAL_DRIVE = os.getenv("EXTERNAL_DRIVE", "/Volumes/Satechi Hub")
+CBI_V14_REPO = os.getenv("CBI_V14_REPO", f"{EXTERNAL_DRIVE}/Projects/CBI-V14")
+
+HORIZONS = ["1w", "1m", "3m", "6m", "12m"]
+# Slowest first so the longest jobs start immediately
+MODELS = ["auto_arima", "prophet", "arima", "exp_smoothing"]
+TRAIN_FUNCTIONS = {
+    'arima': 'train_arima',
+    'auto_arima': 'train_auto_arima',
+    'prophet': 'train_prophet',
+    'exp_smoothing': 'train_exponential_smoothing',
+}
+
+
+def _run_job(job: Dict) -> Dict:
+    """Worker: fit (or update) one statistical model for one horizon."""
+    from training.baselines import statistical
+
+    started = time.time()
+    horizon, model = job['horizon'], job['model']
+    target_col = f"target_{horizon}"
+    try:
+        df = statistical.load_training_data(horizon, job['surface'], columns=['date', target_col])
+        train, val = statistical.prepare_time_series(df, target_col)
+        train_fn = getattr(statistical, TRAIN_FUNCTIONS[model])
+        models_dir = f"{CBI_V14_REPO}/Models/local/horizon_{horizon}/{job['surface']}/baselines"
+        _, val_mape = train_fn(train, val, target_col, horizon, models_dir, reuse_state=job['reuse_state'])
+        return {**job, 'success': True, 'val_mape': float(val_mape), 'seconds': time.time() - started}
+    except Exception as e:
+        traceback.print_exc()
+        return {**job, 'success': False, 'error': str(e), 'seconds': time.time() - started}
+
+
+def run_statistical_baselines(horizons: List[str], models: List[str], surface: str = "prod",
+                              workers: Optional[int] = None, reuse_state: bool = True) -> List[Dict]:
+    """Run every horizon × model job in a process pool."""
+    jobs = [
+        {'horizon': h, 'model': m, 'surface': surface, 'reuse_state': reuse_state}
+        for m in models for h in horizons
+    ]
+    workers = max(1, min(len(jobs), workers or get_cpu_count()))
+    print(f"🧵 {len(jobs)} jobs → {workers} worker processes")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            status = f"Val MAPE = {result['val_mape']:6.2f}%" if result['success'] else f"FAILED: {result['error']}"
+            print(f"{'✅' if result['success'] else '❌'} {result['horizon']:4s} {result['model']:14s} "
+                  f"{status} ({result['seconds']:.0f}s)")
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train statistical baselines for all horizons in parallel")
+    parser.add_argument("--surface", choices=["prod", "full"], default="prod")
+    parser.add_argument("--horizons", nargs="+", default=HORIZONS, choices=HORIZONS)
+    parser.add_argument("--models", nargs="+", default=MODELS, choices=MODELS)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: m4_config.get_cpu_count())")
+    parser.add_argument("--no-reuse-state", action="store_true", help="Refit from scratch instead of updating saved fits")
+    parser.add_argument("--summary-json", help="Write per-job results to this JSON file")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🔬 PARALLEL STATISTICAL BASELINES - ALL HORIZONS")
+    print("=" * 80)
+    print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    started = time.time()
+
+    results = run_statistical_baselines(args.horizons, args.models, args.surface, args.workers,
+                                        reuse_state=not args.no_reuse_state)
+
+    print("\n" + "=" * 80)
+    print(f"📊 SUMMARY ({time.time() - started:.0f}s wall clock)")
+    print("=" * 80)
+    for r in sorted(results, key=lambda r: (HORIZONS.index(r['horizon']), r['model'])):
+        status = f"Val MAPE = {r['val_mape']:6.2f}%" if r['success'] else "FAILED"
+        print(f"{r['horizon']:4s} {r['model']:14s} {status} ({r['seconds']:.0f}s)")
+
+    if args.summary_json:
+        with open(args.summary_json, "w") as f:
+            json.dump({'created_at': datetime.now().isoformat(), 'jobs': results}, f, indent=2)
+
+    sys.exit(0 if any(r['success'] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,19 @@
 """
 Statistical Baselines - ARIMA, Prophet, Exponential Smoothing
 Day 2, Track A: Train statistical models for all 5 horizons
+
+Fitted models keep a state.json next to model.bin. When a later run sees the
+same series with new observations appended, the saved fit is updated instead
+of refitted (ARIMA: state-space filtering with fixed params; Holt-Winters:
+recursion with fixed smoothing params and initial states; Prophet: warm
+start; Auto-ARIMA: cached order + short update). Any change to the existing
+history triggers a full refit. run_statistical_baselines.py runs all
+horizons in parallel.
 """
 import os
+import json
+import hashlib
+import pickle
 import argparse
 import polars as pl
 import mlflow
@@ -28,12 +39,15 @@ MLFLOW_DIR = f"{CBI_V14_REPO}/Models/mlflow"
 mlflow.set_tracking_uri(f"file://{MLFLOW_DIR}")
 mlflow.set_experiment("baselines_statistical")
 
-def load_training_data(horizon, surface="prod"):
+# Auto-ARIMA order search is re-run only when the cached order is older than this
+ORDER_CACHE_MAX_AGE_DAYS = 30
+
+def load_training_data(horizon, surface="prod", columns=None):
     """Load cached training data for horizon (new naming convention)"""
     data_path = f"{TRAINING_DATA}/exports/zl_training_{surface}_allhistory_{horizon}.parquet"
     
     print(f"Loading data from: {data_path}")
-    df = pl.read_parquet(data_path)
+    df = pl.read_parquet(data_path, columns=columns)
     
     print(f"✅ Loaded {len(df)} rows × {len(df.columns)} columns")
     return df
@@ -51,8 +65,51 @@ def prepare_time_series(df, target_col):
     
     return train, val
 
-def train_arima(train, val, target_col, horizon, models_dir):
-    """Train ARIMA model"""
+def _prefix_hash(series, n):
+    """Hash of the first n observations (index + values)."""
+    head = series.iloc[:n]
+    digest = hashlib.sha1(np.asarray(head.index.astype('int64')).tobytes())
+    digest.update(np.asarray(head.values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def load_fitted_state(model_subdir, series):
+    """
+    Saved fit for a series that only gained new observations since it was fitted.
+
+    Returns (fit, new_observations) or (None, None) when there is no usable
+    state (missing, history changed, or series shorter than the fit).
+    """
+    state_path = Path(model_subdir) / "state.json"
+    model_path = Path(model_subdir) / "model.bin"
+    if not state_path.exists() or not model_path.exists():
+        return None, None
+    with open(state_path) as f:
+        state = json.load(f)
+    n_obs = state.get('n_obs', 0)
+    if len(series) < n_obs or _prefix_hash(series, n_obs) != state.get('prefix_hash'):
+        return None, None
+    with open(model_path, 'rb') as f:
+        fit = pickle.load(f)
+    return fit, series.iloc[n_obs:]
+
+def save_fitted_state(model_subdir, series, fit, **extra):
+    """Save the fit (model.bin) and the series identity it was fitted on (state.json)."""
+    os.makedirs(model_subdir, exist_ok=True)
+    model_path = f"{model_subdir}/model.bin"
+    with open(model_path, 'wb') as f:
+        pickle.dump(fit, f)
+    with open(f"{model_subdir}/state.json", 'w') as f:
+        json.dump({
+            'n_obs': len(series),
+            'prefix_hash': _prefix_hash(series, len(series)),
+            'last_date': str(series.index[-1]) if len(series) else None,
+            'updated_at': datetime.now().isoformat(),
+            **extra
+        }, f, indent=2)
+    return model_path
+
+def train_arima(train, val, target_col, horizon, models_dir, reuse_state=True):
+    """Train ARIMA model (updates the saved fit by filtering when only new data was appended)"""
     print(f"\n{'='*60}")
     print(f"Training ARIMA for {horizon}")
     print(f"{'='*60}")
@@ -63,9 +120,22 @@ def train_arima(train, val, target_col, horizon, models_dir):
         mlflow.log_param("horizon", horizon)
         mlflow.log_param("target", target_col)
         
-        # Fit ARIMA
-        model = ARIMA(train[target_col], order=(5,1,2))  # Default ARIMA(5,1,2)
-        model_fit = model.fit()
+        # Fit ARIMA (or filter new observations through the saved fit)
+        model_subdir = f"{models_dir}/arima"
+        series = train[target_col]
+        model_fit, new_obs = load_fitted_state(model_subdir, series) if reuse_state else (None, None)
+        fit_mode = "unchanged" if model_fit is not None and len(new_obs) == 0 else "update"
+        if model_fit is not None and len(new_obs):
+            try:
+                model_fit = model_fit.append(new_obs, refit=False)
+            except Exception as e:
+                print(f"   ⚠️  State update failed ({e}), refitting")
+                model_fit = None
+        if model_fit is None:
+            fit_mode = "refit"
+            model = ARIMA(series, order=(5,1,2))  # Default ARIMA(5,1,2)
+            model_fit = model.fit()
+        mlflow.log_param("fit_mode", fit_mode)
         
         # Predictions
         train_pred = model_fit.fittedvalues
@@ -80,21 +150,27 @@ def train_arima(train, val, target_col, horizon, models_dir):
         mlflow.log_metric("val_mape", val_mape)
         
         # Save model (new structure: Models/local/horizon_{h}/{surface}/{family}/{model}_v{ver}/)
-        model_subdir = f"{models_dir}/arima"
-        os.makedirs(model_subdir, exist_ok=True)
-        model_path = f"{model_subdir}/model.bin"
-        import pickle
-        with open(model_path, 'wb') as f:
-            pickle.dump(model_fit, f)
+        model_path = save_fitted_state(model_subdir, series, model_fit, order=[5, 1, 2])
         
         mlflow.log_artifact(model_path)
         
-        print(f"✅ ARIMA {horizon}: Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
+        print(f"✅ ARIMA {horizon} ({fit_mode}): Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
         
         return model_fit, val_mape
 
-def train_auto_arima(train, val, target_col, horizon, models_dir):
-    """Train Auto-ARIMA model"""
+def _cached_order(order_path):
+    """(order, seasonal_order) from a recent auto_arima search, or None."""
+    if not os.path.exists(order_path):
+        return None
+    with open(order_path) as f:
+        cached = json.load(f)
+    age = datetime.now() - datetime.fromisoformat(cached['selected_at'])
+    if age.days > ORDER_CACHE_MAX_AGE_DAYS:
+        return None
+    return tuple(cached['order']), tuple(cached['seasonal_order'])
+
+def train_auto_arima(train, val, target_col, horizon, models_dir, reuse_state=True):
+    """Train Auto-ARIMA model (order search cached, saved fit updated with new data)"""
     print(f"\n{'='*60}")
     print(f"Training Auto-ARIMA for {horizon}")
     print(f"{'='*60}")
@@ -104,16 +180,44 @@ def train_auto_arima(train, val, target_col, horizon, models_dir):
         mlflow.log_param("model_type", "Auto-ARIMA")
         mlflow.log_param("horizon", horizon)
         
-        # Fit Auto-ARIMA
-        model = pm.auto_arima(
-            train[target_col],
-            seasonal=True,
-            m=7,  # Weekly seasonality
-            trace=True,
-            error_action='ignore',
-            suppress_warnings=True,
-            stepwise=True
-        )
+        model_subdir = f"{models_dir}/auto_arima"
+        order_path = f"{model_subdir}/order.json"
+        series = train[target_col]
+        model, new_obs = load_fitted_state(model_subdir, series) if reuse_state else (None, None)
+        fit_mode = "unchanged" if model is not None and len(new_obs) == 0 else "update"
+        if model is not None and len(new_obs):
+            try:
+                model.update(new_obs)  # warm-started from the current params
+            except Exception as e:
+                print(f"   ⚠️  State update failed ({e}), refitting")
+                model = None
+        
+        cached = _cached_order(order_path) if reuse_state else None
+        if model is None and cached is not None:
+            # Fit the cached order (skips the stepwise order search)
+            fit_mode = "refit_cached_order"
+            model = pm.ARIMA(order=cached[0], seasonal_order=cached[1], suppress_warnings=True)
+            model.fit(series)
+        elif model is None:
+            fit_mode = "search"
+            model = pm.auto_arima(
+                series,
+                seasonal=True,
+                m=7,  # Weekly seasonality
+                trace=True,
+                error_action='ignore',
+                suppress_warnings=True,
+                stepwise=True
+            )
+            os.makedirs(model_subdir, exist_ok=True)
+            with open(order_path, 'w') as f:
+                json.dump({
+                    'order': list(model.order),
+                    'seasonal_order': list(model.seasonal_order),
+                    'selected_at': datetime.now().isoformat()
+                }, f, indent=2)
+        mlflow.log_param("fit_mode", fit_mode)
+        mlflow.log_param("order", str(model.order))
         
         # Predictions
         train_pred = model.predict_in_sample()
@@ -127,21 +231,22 @@ def train_auto_arima(train, val, target_col, horizon, models_dir):
         mlflow.log_metric("val_mape", val_mape)
         
         # Save model (new structure)
-        model_subdir = f"{models_dir}/auto_arima"
-        os.makedirs(model_subdir, exist_ok=True)
-        model_path = f"{model_subdir}/model.bin"
-        import pickle
-        with open(model_path, 'wb') as f:
-            pickle.dump(model, f)
+        model_path = save_fitted_state(model_subdir, series, model)
         
         mlflow.log_artifact(model_path)
         
-        print(f"✅ Auto-ARIMA {horizon}: Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
+        print(f"✅ Auto-ARIMA {horizon} ({fit_mode}): Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
         
         return model, val_mape
 
-def train_prophet(train, val, target_col, horizon, models_dir):
-    """Train Facebook Prophet model"""
+def _prophet_warm_start(model):
+    """Fitted Prophet params as init for the next fit (Prophet's documented warm start)"""
+    params = {name: model.params[name][0][0] for name in ['k', 'm', 'sigma_obs']}
+    params.update({name: model.params[name][0] for name in ['delta', 'beta']})
+    return params
+
+def train_prophet(train, val, target_col, horizon, models_dir, reuse_state=True):
+    """Train Facebook Prophet model (warm-started from the saved fit when data was appended)"""
     print(f"\n{'='*60}")
     print(f"Training Prophet for {horizon}")
     print(f"{'='*60}")
@@ -157,13 +262,26 @@ def train_prophet(train, val, target_col, horizon, models_dir):
             'y': train[target_col].values
         })
         
-        # Fit Prophet
-        model = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=False
-        )
-        model.fit(prophet_train)
+        # Fit Prophet (warm start from the saved fit if the history is unchanged)
+        model_subdir = f"{models_dir}/prophet"
+        series = train[target_col]
+        previous, new_obs = load_fitted_state(model_subdir, series) if reuse_state else (None, None)
+        if previous is not None and len(new_obs) == 0:
+            fit_mode = "unchanged"
+            model = previous
+        else:
+            model = Prophet(
+                yearly_seasonality=True,
+                weekly_seasonality=True,
+                daily_seasonality=False
+            )
+            if previous is not None:
+                fit_mode = "update"
+                model.fit(prophet_train, init=_prophet_warm_start(previous))
+            else:
+                fit_mode = "refit"
+                model.fit(prophet_train)
+        mlflow.log_param("fit_mode", fit_mode)
         
         # Predictions
         future = model.make_future_dataframe(periods=len(val), freq='D')
@@ -180,21 +298,16 @@ def train_prophet(train, val, target_col, horizon, models_dir):
         mlflow.log_metric("val_mape", val_mape)
         
         # Save model (new structure)
-        model_subdir = f"{models_dir}/prophet"
-        os.makedirs(model_subdir, exist_ok=True)
-        model_path = f"{model_subdir}/model.bin"
-        import pickle
-        with open(model_path, 'wb') as f:
-            pickle.dump(model, f)
+        model_path = save_fitted_state(model_subdir, series, model)
         
         mlflow.log_artifact(model_path)
         
-        print(f"✅ Prophet {horizon}: Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
+        print(f"✅ Prophet {horizon} ({fit_mode}): Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
         
         return model, val_mape
 
-def train_exponential_smoothing(train, val, target_col, horizon, models_dir):
-    """Train Exponential Smoothing model"""
+def train_exponential_smoothing(train, val, target_col, horizon, models_dir, reuse_state=True):
+    """Train Exponential Smoothing model (re-runs the recursion with saved params when data was appended)"""
     print(f"\n{'='*60}")
     print(f"Training Exponential Smoothing for {horizon}")
     print(f"{'='*60}")
@@ -204,14 +317,43 @@ def train_exponential_smoothing(train, val, target_col, horizon, models_dir):
         mlflow.log_param("model_type", "Exponential_Smoothing")
         mlflow.log_param("horizon", horizon)
         
-        # Fit Exponential Smoothing
-        model = ExponentialSmoothing(
-            train[target_col],
-            seasonal_periods=7,
-            trend='add',
-            seasonal='add'
-        )
-        model_fit = model.fit()
+        # Fit Exponential Smoothing (or extend the saved fit with fixed params)
+        model_subdir = f"{models_dir}/exp_smoothing"
+        series = train[target_col]
+        model_fit, new_obs = load_fitted_state(model_subdir, series) if reuse_state else (None, None)
+        fit_mode = "unchanged" if model_fit is not None and len(new_obs) == 0 else "update"
+        if model_fit is not None and len(new_obs):
+            params = model_fit.params
+            try:
+                model = ExponentialSmoothing(
+                    series,
+                    seasonal_periods=7,
+                    trend='add',
+                    seasonal='add',
+                    initialization_method='known',
+                    initial_level=params['initial_level'],
+                    initial_trend=params['initial_trend'],
+                    initial_seasonal=params['initial_seasons']
+                )
+                model_fit = model.fit(
+                    smoothing_level=params['smoothing_level'],
+                    smoothing_trend=params['smoothing_trend'],
+                    smoothing_seasonal=params['smoothing_seasonal'],
+                    optimized=False
+                )
+            except Exception as e:
+                print(f"   ⚠️  State update failed ({e}), refitting")
+                model_fit = None
+        if model_fit is None:
+            fit_mode = "refit"
+            model = ExponentialSmoothing(
+                series,
+                seasonal_periods=7,
+                trend='add',
+                seasonal='add'
+            )
+            model_fit = model.fit()
+        mlflow.log_param("fit_mode", fit_mode)
         
         # Predictions
         train_pred = model_fit.fittedvalues
@@ -225,16 +367,11 @@ def train_exponential_smoothing(train, val, target_col, horizon, models_dir):
         mlflow.log_metric("val_mape", val_mape)
         
         # Save model (new structure)
-        model_subdir = f"{models_dir}/exp_smoothing"
-        os.makedirs(model_subdir, exist_ok=True)
-        model_path = f"{model_subdir}/model.bin"
-        import pickle
-        with open(model_path, 'wb') as f:
-            pickle.dump(model_fit, f)
+        model_path = save_fitted_state(model_subdir, series, model_fit)
         
         mlflow.log_artifact(model_path)
         
-        print(f"✅ Exp Smoothing {horizon}: Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
+        print(f"✅ Exp Smoothing {horizon} ({fit_mode}): Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
         
         return model_fit, val_mape
 
@@ -243,7 +380,10 @@ def main():
     parser.add_argument("--horizon", required=True, choices=["1w", "1m", "3m", "6m", "12m"], help="Prediction horizon")
     parser.add_argument("--surface", choices=["prod", "full"], default="prod",
                        help="Surface type: prod (≈290 cols) or full (1,948+ cols)")
+    parser.add_argument("--no-reuse-state", action="store_true",
+                       help="Refit from scratch instead of updating saved fits")
     args = parser.parse_args()
+    reuse_state = not args.no_reuse_state
     
     horizon = args.horizon
     target_col = f"target_{horizon}"
@@ -261,7 +401,7 @@ def main():
     models_dir = f"{CBI_V14_REPO}/Models/local/horizon_{horizon}/{surface}/baselines"
     
     # Load data
-    df = load_training_data(horizon, surface)
+    df = load_training_data(horizon, surface, columns=['date', target_col])
     train, val = prepare_time_series(df, target_col)
     
     print(f"\n📊 Data split:")
@@ -273,25 +413,25 @@ def main():
     results = {}
     
     try:
-        _, results['arima'] = train_arima(train, val, target_col, horizon, models_dir)
+        _, results['arima'] = train_arima(train, val, target_col, horizon, models_dir, reuse_state)
     except Exception as e:
         print(f"❌ ARIMA failed: {e}")
         results['arima'] = None
     
     try:
-        _, results['auto_arima'] = train_auto_arima(train, val, target_col, horizon, models_dir)
+        _, results['auto_arima'] = train_auto_arima(train, val, target_col, horizon, models_dir, reuse_state)
     except Exception as e:
         print(f"❌ Auto-ARIMA failed: {e}")
         results['auto_arima'] = None
     
     try:
-        _, results['prophet'] = train_prophet(train, val, target_col, horizon, models_dir)
+        _, results['prophet'] = train_prophet(train, val, target_col, horizon, models_dir, reuse_state)
     except Exception as e:
         print(f"❌ Prophet failed: {e}")
         results['prophet'] = None
     
     try:
-        _, results['exp_smoothing'] = train_exponential_smoothing(train, val, target_col, horizon, models_dir)
+        _, results['exp_smoothing'] = train_exponential_smoothing(train, val, target_col, horizon, models_dir, reuse_state)
     except Exception as e:
         print(f"❌ Exponential Smoothing failed: {e}")
         results['exp_smoothing'] = None
@@ -307,8 +447,9 @@ def main():
         else:
             print(f"❌ {model_name:20s}: FAILED")
     
-    best_model = min((k, v) for k, v in results.items() if v is not None, key=lambda x: x[1])
-    print(f"\n🏆 Best model: {best_model[0]} (MAPE = {best_model[1]:.2f}%)")
+    if any(v is not None for v in results.values()):
+        best_model = min(((k, v) for k, v in results.items() if v is not None), key=lambda x: x[1])
+        print(f"\n🏆 Best model: {best_model[0]} (MAPE = {best_model[1]:.2f}%)")
     print("="*80)
     print()
 
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Parallel multi-horizon tree training scheduler.
+
+Loads the feature matrix ONCE, writes it to a memory-mapped .npy file that
+every worker process maps read-only (pages are shared, not copied), and
+dispatches horizon × model jobs (LightGBM DART, XGBoost DART) to a process
+pool sized from m4_config.get_cpu_count(). Threads per job are balanced so
+the pool never oversubscribes the CPU; the whole run takes roughly as long
+as the slowest job instead of the sum of all jobs.
+
+Training itself is unchanged: each job calls tree_models.train_lightgbm_dart /
+train_xgboost_dart with the same walk-forward split tree_models.py uses.
+Binned datasets come from training.utils.dataset_cache, so reruns on an
+unchanged export skip binning entirely.
+
+Usage:
+    python src/training/baselines/train_all_horizons.py --surface prod
+    python src/training/baselines/train_all_horizons.py --horizons 1w 1m --models lightgbm
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from training.config.m4_config import get_cpu_count
+from training.utils.dataset_cache import TreeDatasetCache, export_fingerprint
+
+EXTERNAL_DRIVE = os.getenv("EXTERNAL_DRIVE", "/Volumes/Satechi Hub")
+CBI_V14_REPO = os.getenv("CBI_V14_REPO", f"{EXTERNAL_DRIVE}/Projects/CBI-V14")
+TRAINING_DATA = f"{CBI_V14_REPO}/TrainingData"
+
+HORIZONS = ["1w", "1m", "3m", "6m", "12m"]
+MODELS = ["xgboost", "lightgbm"]  # slowest first so the longest jobs start immediately
+
+# Thread-count parameter of each model's config
+THREAD_PARAMS = {'lightgbm': 'num_threads', 'xgboost': 'n_jobs'}
+
+
+def export_path(horizon: str, surface: str) -> Path:
+    return Path(f"{TRAINING_DATA}/exports/zl_training_{surface}_allhistory_{horizon}.parquet")
+
+
+def thread_budget(n_jobs: int, cpu_count: Optional[int] = None) -> Tuple[int, int]:
+    """(worker processes, threads per job) so workers × threads ≈ cpu_count."""
+    cpu_count = cpu_count or get_cpu_count()
+    workers = max(1, min(n_jobs, cpu_count))
+    return workers, max(1, cpu_count // workers)
+
+
+class SharedFeatureMatrix:
+    """
+    Feature matrix shared by all horizons, stored as a memory-mapped .npy.
+
+    Layout of the scratch directory:
+        features.npy       float64 (rows, features), sorted by date
+        meta.parquet       date (+ non-numeric columns such as market_regime)
+        targets_{h}.npy    row positions and target values per horizon (rows
+                           with a NaN target are dropped here, once)
+        columns.json       feature column names
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    @classmethod
+    def build(cls, horizons: List[str], surface: str, root: Path) -> "SharedFeatureMatrix":
+        """Read features from one export and only date/target from the others."""
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        available = [h for h in horizons if export_path(h, surface).exists()]
+        if not available:
+            raise FileNotFoundError(f"No training exports found for {horizons} ({surface})")
+
+        base_path = export_path(available[0], surface)
+        df = pd.read_parquet(base_path)
+        if 'date' in df.columns:
+            df = df.sort_values('date', kind='stable').reset_index(drop=True)
+        print(f"✅ Loaded shared features from {base_path.name}: {len(df)} rows × {len(df.columns)} columns")
+
+        feature_cols = [c for c in df.columns if c != 'date' and not c.startswith('target_')]
+        numeric_cols = [c for c in feature_cols if pd.api.types.is_numeric_dtype(df[c]) or df[c].dtype == bool]
+        skipped = sorted(set(feature_cols) - set(numeric_cols))
+        if skipped:
+            print(f"   ⚠️  Non-numeric columns kept out of the matrix: {skipped}")
+
+        matrix = np.lib.format.open_memmap(root / "features.npy", mode='w+', dtype=np.float64,
+                                           shape=(len(df), len(numeric_cols)))
+        for j, col in enumerate(numeric_cols):
+            matrix[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        matrix.flush()
+        del matrix
+
+        meta_cols = (['date'] if 'date' in df.columns else []) + skipped
+        df[meta_cols].to_parquet(root / "meta.parquet", index=False)
+        with open(root / "columns.json", "w") as f:
+            json.dump(numeric_cols, f)
+
+        # Per-horizon targets: only date + target are read from the other exports
+        for h in available:
+            target_col = f"target_{h}"
+            if h == available[0] or 'date' not in df.columns:
+                positions = np.arange(len(df))
+                target = df[target_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                t = pq.read_table(export_path(h, surface), columns=['date', target_col]).to_pandas()
+                t = t.sort_values('date', kind='stable')
+                lookup = pd.Series(np.arange(len(df)), index=df['date'])
+                lookup = lookup[~lookup.index.duplicated(keep='first')]
+                positions = lookup.reindex(t['date']).to_numpy()
+                keep = ~np.isnan(positions)
+                if not keep.all():
+                    print(f"   ⚠️  {h}: {int((~keep).sum())} dates not in shared features, skipped")
+                positions = positions[keep].astype(np.int64)
+                target = t[target_col].to_numpy(dtype=np.float64, na_value=np.nan)[keep]
+            # Unlabelled rows (e.g. the last `horizon` days) are dropped once here, so
+            # load() keeps returning contiguous memmap views instead of masked copies
+            labelled = ~np.isnan(target)
+            positions, target = positions[labelled], target[labelled]
+            np.save(root / f"targets_{h}.npy", np.vstack([positions.astype(np.float64), target]))
+
+        return cls(root)
+
+    def horizons(self) -> List[str]:
+        return [p.stem.split("_", 1)[1] for p in self.root.glob("targets_*.npy")]
+
+    @staticmethod
+    def _rows(features: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Rows at `positions`: a zero-copy memmap view when they are one contiguous run, else a copy."""
+        if len(positions) == 0:
+            return features[:0]
+        start, stop = int(positions[0]), int(positions[-1]) + 1
+        if stop - start == len(positions) and np.all(np.diff(positions) == 1):
+            return features[start:stop]
+        return features[positions]
+
+    def load(self, horizon: str):
+        """
+        Walk-forward split for one horizon.
+
+        Features are mapped read-only. When a horizon's target rows are a
+        contiguous run of the shared matrix (the usual case: every date has a
+        target), X_train / X_val are slice views of the memmap and nothing is
+        copied; gaps in the target dates fall back to an in-memory copy.
+        """
+        features = np.load(self.root / "features.npy", mmap_mode='r')
+        with open(self.root / "columns.json") as f:
+            feature_cols = json.load(f)
+        positions, target = np.load(self.root / f"targets_{horizon}.npy")
+        positions = positions.astype(np.int64)
+
+        # Same split as tree_models.prepare_features: last 20% for validation
+        split_idx = int(len(positions) * 0.8)
+        train_rows, val_rows = positions[:split_idx], positions[split_idx:]
+        X_train = self._rows(features, train_rows)
+        X_val = self._rows(features, val_rows)
+        y_train, y_val = target[:split_idx], target[split_idx:]
+
+        meta = pd.read_parquet(self.root / "meta.parquet").iloc[val_rows].reset_index(drop=True)
+        return X_train, X_val, y_train, y_val, feature_cols, meta
+
+
+def _run_job(job: Dict) -> Dict:
+    """Worker: train one (horizon, model) on the shared matrix."""
+    import polars as pl
+    from training.baselines import tree_models
+
+    started = time.time()
+    horizon, model = job['horizon'], job['model']
+    try:
+        X_train, X_val, y_train, y_val, feature_cols, meta = SharedFeatureMatrix(job['root']).load(horizon)
+        df_val = pl.from_pandas(meta) if len(meta.columns) else None
+        overrides = {THREAD_PARAMS[model]: job['threads']}
+        cache, cache_key = None, None
+        if job.get('source'):
+            cache = TreeDatasetCache(job.get('cache_dir'))
+            cache_key = cache.key(job['source'], feature_cols, f"target_{horizon}", split=0.8)
+        train = tree_models.train_lightgbm_dart if model == 'lightgbm' else tree_models.train_xgboost_dart
+        _, val_mape = train(X_train, X_val, y_train, y_val, horizon, job['models_dir'], df_val,
+                            config_overrides=overrides, dataset_cache=cache, cache_key=cache_key)
+        return {**job, 'success': True, 'val_mape': float(val_mape), 'seconds': time.time() - started}
+    except Exception as e:
+        traceback.print_exc()
+        return {**job, 'success': False, 'error': str(e), 'seconds': time.time() - started}
+
+
+def _dataset_sources(horizons: List[str], surface: str) -> Dict[str, str]:
+    """Cache source per horizon: features export (first available) + target export."""
+    available = [h for h in horizons if export_path(h, surface).exists()]
+    if not available:
+        return {}
+    fingerprints = {h: export_fingerprint(export_path(h, surface)) for h in available}
+    return {h: f"shared:{fingerprints[available[0]]}+{fingerprints[h]}" for h in available}
+
+
+def run_schedule(horizons: List[str], models: List[str], surface: str = "prod",
+                 cpu_count: Optional[int] = None, scratch_dir: Optional[Path] = None,
+                 dataset_cache_dir: Optional[Path] = None, use_dataset_cache: bool = True) -> List[Dict]:
+    """Build the shared matrix and train every horizon × model job in parallel."""
+    sources = _dataset_sources(horizons, surface) if use_dataset_cache else {}
+    with tempfile.TemporaryDirectory(prefix="zl_shared_features_", dir=scratch_dir) as tmp:
+        shared = SharedFeatureMatrix.build(horizons, surface, Path(tmp))
+        jobs = [
+            {
+                'horizon': h,
+                'model': m,
+                'root': str(shared.root),
+                'models_dir': f"{CBI_V14_REPO}/Models/local/horizon_{h}/{surface}/baselines",
+                'source': sources.get(h),
+                'cache_dir': str(dataset_cache_dir) if dataset_cache_dir else None,
+            }
+            for m in models for h in horizons if h in shared.horizons()
+        ]
+        workers, threads = thread_budget(len(jobs), cpu_count)
+        for job in jobs:
+            job['threads'] = threads
+        print(f"🧵 {len(jobs)} jobs → {workers} worker processes × {threads} threads each")
+
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_job, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                status = f"Val MAPE = {result['val_mape']:6.2f}%" if result['success'] else f"FAILED: {result['error']}"
+                print(f"{'✅' if result['success'] else '❌'} {result['horizon']:4s} {result['model']:9s} "
+                      f"{status} ({result['seconds']:.0f}s)")
+                results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train tree baselines for all horizons in parallel")
+    parser.add_argument("--surface", choices=["prod", "full"], default="prod")
+    parser.add_argument("--horizons", nargs="+", default=HORIZONS, choices=HORIZONS)
+    parser.add_argument("--models", nargs="+", default=MODELS, choices=MODELS)
+    parser.add_argument("--cpus", type=int, help="CPU budget (default: m4_config.get_cpu_count())")
+    parser.add_argument("--scratch-dir", help="Directory for the memory-mapped feature matrix")
+    parser.add_argument("--summary-json", help="Write per-job results to this JSON file")
+    parser.add_argument("--dataset-cache", help="Pre-binned dataset cache directory (default: TrainingData/cache/tree_datasets)")
+    parser.add_argument("--no-dataset-cache", action="store_true", help="Bin features on every fit")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🌳 PARALLEL TREE BASELINES - ALL HORIZONS")
+    print("=" * 80)
+    print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    started = time.time()
+
+    results = run_schedule(args.horizons, args.models, args.surface, args.cpus,
+                           Path(args.scratch_dir) if args.scratch_dir else None,
+                           Path(args.dataset_cache) if args.dataset_cache else None,
+                           use_dataset_cache=not args.no_dataset_cache)
+
+    print("\n" + "=" * 80)
+    print(f"📊 SUMMARY ({time.time() - started:.0f}s wall clock)")
+    print("=" * 80)
+    for r in sorted(results, key=lambda r: (HORIZONS.index(r['horizon']), r['model'])):
+        status = f"Val MAPE = {r['val_mape']:6.2f}%" if r['success'] else "FAILED"
+        print(f"{r['horizon']:4s} {r['model']:9s} {status} ({r['seconds']:.0f}s)")
+
+    if args.summary_json:
+        with open(args.summary_json, "w") as f:
+            json.dump({'created_at': datetime.now().isoformat(), 'jobs': results}, f, indent=2)
+
+    # Non-zero exit only if nothing trained
+    sys.exit(0 if any(r['success'] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
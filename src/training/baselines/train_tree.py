@@ -8,6 +8,7 @@ import lightgbm as lgb
 import xgboost as xgb
 from sklearn.model_selection import train_test_split
 import joblib
+import numpy as np
 from pathlib import Path
 import sys
 from datetime import datetime
@@ -16,6 +17,35 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from training.features.feature_catalog import FeatureCatalog
 from training.utils.model_saver import save_model_with_metadata
+from training.utils.dataset_cache import TreeDatasetCache, export_fingerprint
+
+LIGHTGBM_PARAMS = {
+    'boosting_type': 'dart',
+    'num_leaves': 31,
+    'learning_rate': 0.05,
+    'objective': 'regression_l1',
+    'n_jobs': -1,
+    'random_state': 42,
+}
+XGBOOST_PARAMS = {
+    'booster': 'dart',
+    'objective': 'reg:squarederror',
+    'eval_metric': 'mae',
+    'learning_rate': 0.05,
+    'nthread': -1,
+    'seed': 42,
+}
+NUM_BOOST_ROUND = 1000
+
+
+def _mape(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=float)
+    return float(np.mean(np.abs((y_true - y_pred) / y_true)) * 100)
+
+
+def _cached_arrays(X_train, X_val, y_train, y_val):
+    """Loader for the dataset cache (only called on a cache miss)."""
+    return lambda: tuple(np.asarray(a, dtype=np.float64) for a in (X_train, X_val, y_train, y_val))
 
 def get_repo_root():
     """Find the repository root by looking for a marker file."""
@@ -51,26 +81,27 @@ def train_lightgbm(data_path: Path, horizon: str, model_dir: Path):
         
         X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, shuffle=False)
         
-        model = lgb.LGBMRegressor(
-            boosting_type='dart',
-            num_leaves=31,
-            learning_rate=0.05,
-            n_estimators=1000,
-            objective='regression_l1',
-            n_jobs=-1,
-            random_state=42
+        # Pre-binned Datasets: re-fits on the same export skip binning
+        cache = TreeDatasetCache()
+        cache_key = cache.key(export_fingerprint(data_path), feature_cols, target_col, split=0.8)
+        train_set, val_set = cache.lightgbm(
+            cache_key, _cached_arrays(X_train, X_val, y_train, y_val), LIGHTGBM_PARAMS, feature_cols
         )
         
-        model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
+        model = lgb.train(
+            LIGHTGBM_PARAMS, train_set,
+            num_boost_round=NUM_BOOST_ROUND,
+            valid_sets=[val_set],
             callbacks=[lgb.early_stopping(50, verbose=False), lgb.log_evaluation(period=200)]
         )
+        n_estimators_used = model.best_iteration or model.current_iteration()
+        train_mape = _mape(y_train, model.predict(X_train.to_numpy()))
+        val_mape = _mape(y_val, model.predict(X_val.to_numpy()))
         
         # Log feature importance
         feature_importance = pd.DataFrame({
             'feature': feature_cols,
-            'importance': model.feature_importances_
+            'importance': model.feature_importance()
         }).sort_values('importance', ascending=False)
         
         print(f"\nTop 10 features by importance:")
@@ -87,13 +118,13 @@ def train_lightgbm(data_path: Path, horizon: str, model_dir: Path):
                 'boosting_type': 'dart',
                 'num_leaves': 31,
                 'learning_rate': 0.05,
-                'n_estimators': model.n_estimators_,
+                'n_estimators': n_estimators_used,
                 'horizon': horizon
             },
             metrics={
                 'train_mape': train_mape,
                 'val_mape': val_mape,
-                'n_estimators_used': model.n_estimators_
+                'n_estimators_used': n_estimators_used
             },
             model_type="lightgbm"
         )
@@ -129,27 +160,30 @@ def train_xgboost(data_path: Path, horizon: str, model_dir: Path):
         
         X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, shuffle=False)
 
-        model = xgb.XGBRegressor(
-            booster='dart',
-            objective='reg:squarederror',
-            eval_metric='mae',
-            learning_rate=0.05,
-            n_estimators=1000,
-            n_jobs=-1,
-            random_state=42
+        # Cached DMatrix binaries: re-fits on the same export skip conversion
+        cache = TreeDatasetCache()
+        cache_key = cache.key(export_fingerprint(data_path), feature_cols, target_col, split=0.8)
+        dtrain, dval = cache.xgboost(
+            cache_key, _cached_arrays(X_train, X_val, y_train, y_val), feature_cols=feature_cols
         )
 
-        model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
+        model = xgb.train(
+            XGBOOST_PARAMS, dtrain,
+            num_boost_round=NUM_BOOST_ROUND,
+            evals=[(dval, 'validation_0')],
             early_stopping_rounds=50,
-            verbose=False
+            verbose_eval=False
         )
+        best_range = (0, model.best_iteration + 1)
+        train_mape = _mape(y_train, model.predict(dtrain, iteration_range=best_range))
+        val_mape = _mape(y_val, model.predict(dval, iteration_range=best_range))
         
-        # Log feature importance
+        # Log feature importance (gain, normalised like XGBRegressor.feature_importances_)
+        gain = model.get_score(importance_type='gain')
+        total = sum(gain.values()) or 1.0
         feature_importance = pd.DataFrame({
             'feature': feature_cols,
-            'importance': model.feature_importances_
+            'importance': [gain.get(col, 0.0) / total for col in feature_cols]
         }).sort_values('importance', ascending=False)
         
         print(f"\nTop 10 features by importance:")
@@ -166,13 +200,13 @@ def train_xgboost(data_path: Path, horizon: str, model_dir: Path):
                 'booster': 'dart',
                 'max_depth': 8,
                 'learning_rate': 0.03,
-                'n_estimators': model.best_iteration if hasattr(model, 'best_iteration') else 1000,
+                'n_estimators': model.best_iteration + 1,
                 'horizon': horizon
             },
             metrics={
                 'train_mape': train_mape,
                 'val_mape': val_mape,
-                'best_iteration': model.best_iteration if hasattr(model, 'best_iteration') else None
+                'best_iteration': model.best_iteration
             },
             model_type="xgboost"
         )
@@ -27,6 +27,7 @@ from training.config.m4_config import (
 from training.evaluation.metrics import (
     comprehensive_evaluation, print_evaluation_summary, calculate_sharpe
 )
+from training.utils.dataset_cache import TreeDatasetCache, export_fingerprint
 
 # Environment setup
 EXTERNAL_DRIVE = os.getenv("EXTERNAL_DRIVE", "/Volumes/Satechi Hub")
@@ -73,8 +74,22 @@ def prepare_features(df, target_col):
     
     return X_train, X_val, y_train, y_val, feature_cols, df_val
 
-def train_lightgbm_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_val=None):
-    """Train LightGBM DART model with M4-optimized config"""
+XGBOOST_NATIVE_RENAMES = {'n_jobs': 'nthread', 'random_state': 'seed'}
+
+def _booster_params(config, renames):
+    """sklearn-wrapper config -> native params (n_estimators split out, thresholds dropped)"""
+    params = {renames.get(k, k): v for k, v in config.items()
+              if k != 'n_estimators' and not k.startswith('target_')}
+    return params, config.get('n_estimators', 100)
+
+def train_lightgbm_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_val=None,
+                        config_overrides=None, dataset_cache=None, cache_key=None):
+    """
+    Train LightGBM DART model with M4-optimized config.
+
+    With dataset_cache + cache_key the pre-binned Dataset from the cache is
+    trained on directly (native API, same params), skipping re-binning.
+    """
     print(f"\n{'='*60}")
     print(f"Training LightGBM DART for {horizon}")
     print(f"{'='*60}")
@@ -82,6 +97,8 @@ def train_lightgbm_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_
     with mlflow.start_run(run_name=f"lgbm_dart_{horizon}"):
         # Get M4-optimized config
         config = get_config_for_model('lightgbm', horizon)
+        if config_overrides:
+            config.update(config_overrides)  # e.g. thread count from train_all_horizons
         
         # Log parameters
         for k, v in config.items():
@@ -90,12 +107,28 @@ def train_lightgbm_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_
         mlflow.log_param("horizon", horizon)
         
         # Train
-        model = lgb.LGBMRegressor(**config)
-        model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
-            callbacks=[lgb.early_stopping(stopping_rounds=100, verbose=False)]
-        )
+        if dataset_cache is not None and cache_key:
+            train_set, val_set = dataset_cache.lightgbm(
+                cache_key, lambda: (X_train, X_val, y_train, y_val), config
+            )
+            params, num_boost_round = _booster_params(config, {})
+            booster = lgb.train(
+                params, train_set,
+                num_boost_round=num_boost_round,
+                valid_sets=[val_set],
+                callbacks=[lgb.early_stopping(stopping_rounds=100, verbose=False)]
+            )
+            model = booster
+            n_estimators_used = booster.best_iteration or booster.current_iteration()
+        else:
+            model = lgb.LGBMRegressor(**config)
+            model.fit(
+                X_train, y_train,
+                eval_set=[(X_val, y_val)],
+                callbacks=[lgb.early_stopping(stopping_rounds=100, verbose=False)]
+            )
+            booster = model.booster_
+            n_estimators_used = model.n_estimators_
         
         # Predictions
         train_pred = model.predict(X_train)
@@ -107,7 +140,7 @@ def train_lightgbm_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_
         
         mlflow.log_metric("train_mape", train_mape)
         mlflow.log_metric("val_mape", val_mape)
-        mlflow.log_metric("n_estimators_used", model.n_estimators_)
+        mlflow.log_metric("n_estimators_used", n_estimators_used)
         
         # Comprehensive evaluation if validation dataframe provided
         if df_val is not None:
@@ -147,16 +180,22 @@ def train_lightgbm_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_
         model_subdir = f"{models_dir}/lightgbm_dart"
         os.makedirs(model_subdir, exist_ok=True)
         model_path = f"{model_subdir}/model.bin"
-        model.booster_.save_model(model_path)
+        booster.save_model(model_path)
         mlflow.log_artifact(model_path)
         
         print(f"✅ LightGBM DART {horizon}: Train MAPE={train_mape:.2f}%, Val MAPE={val_mape:.2f}%")
-        print(f"   Estimators used: {model.n_estimators_}")
+        print(f"   Estimators used: {n_estimators_used}")
         
         return model, val_mape
 
-def train_xgboost_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_val=None):
-    """Train XGBoost DART model with M4-optimized config"""
+def train_xgboost_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_val=None,
+                       config_overrides=None, dataset_cache=None, cache_key=None):
+    """
+    Train XGBoost DART model with M4-optimized config.
+
+    With dataset_cache + cache_key the cached QuantileDMatrix pair is trained
+    on directly (native API, same params), skipping conversion and sketching.
+    """
     print(f"\n{'='*60}")
     print(f"Training XGBoost DART for {horizon}")
     print(f"{'='*60}")
@@ -164,6 +203,8 @@ def train_xgboost_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_v
     with mlflow.start_run(run_name=f"xgb_dart_{horizon}"):
         # Get M4-optimized config
         config = get_config_for_model('xgboost', horizon)
+        if config_overrides:
+            config.update(config_overrides)  # e.g. thread count from train_all_horizons
         
         # Log parameters
         for k, v in config.items():
@@ -172,17 +213,34 @@ def train_xgboost_dart(X_train, X_val, y_train, y_val, horizon, models_dir, df_v
         mlflow.log_param("horizon", horizon)
         
         # Train
-        model = xgb.XGBRegressor(**config)
-        model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
-            early_stopping_rounds=100,
-            verbose=False
-        )
-        
-        # Predictions
-        train_pred = model.predict(X_train)
-        val_pred = model.predict(X_val)
+        if dataset_cache is not None and cache_key:
+            params, num_boost_round = _booster_params(config, XGBOOST_NATIVE_RENAMES)
+            dtrain, dval = dataset_cache.xgboost(
+                cache_key, lambda: (X_train, X_val, y_train, y_val),
+                quantile=params.get('tree_method') == 'hist', max_bin=params.get('max_bin', 256)
+            )
+            model = xgb.train(
+                params, dtrain,
+                num_boost_round=num_boost_round,
+                evals=[(dval, 'validation_0')],
+                early_stopping_rounds=100,
+                verbose_eval=False
+            )
+            best_range = (0, model.best_iteration + 1)
+            train_pred = model.inplace_predict(X_train, iteration_range=best_range)
+            val_pred = model.inplace_predict(X_val, iteration_range=best_range)
+        else:
+            model = xgb.XGBRegressor(**config)
+            model.fit(
+                X_train, y_train,
+                eval_set=[(X_val, y_val)],
+                early_stopping_rounds=100,
+                verbose=False
+            )
+            
+            # Predictions
+            train_pred = model.predict(X_train)
+            val_pred = model.predict(X_val)
         
         # Basic metrics
         train_mape = np.mean(np.abs((y_train - train_pred) / y_train)) * 100
@@ -232,6 +290,10 @@ def main():
     parser.add_argument("--horizon", required=True, choices=["1w", "1m", "3m", "6m", "12m"], help="Prediction horizon")
     parser.add_argument("--surface", choices=["prod", "full"], default="prod",
                        help="Surface type: prod (≈290 cols) or full (1,948+ cols)")
+    parser.add_argument("--dataset-cache", help="Pre-binned dataset cache directory (default: TrainingData/cache/tree_datasets)")
+    parser.add_argument("--no-dataset-cache", action="store_true", help="Bin features on every fit")
+    parser.add_argument("--tuned", action="store_true",
+                       help="Apply best params from hyperparameter_search.py (Models/tuning/)")
     args = parser.parse_args()
     
     horizon = args.horizon
@@ -259,12 +321,29 @@ def main():
     print(f"   Validation: {len(X_val)} samples")
     print()
     
+    # Pre-binned datasets keyed by export content + feature list
+    dataset_cache, cache_key = None, None
+    if not args.no_dataset_cache:
+        dataset_cache = TreeDatasetCache(args.dataset_cache)
+        data_path = f"{TRAINING_DATA}/exports/zl_training_{surface}_allhistory_{horizon}.parquet"
+        cache_key = dataset_cache.key(export_fingerprint(data_path), feature_cols, target_col, split=0.8)
+        print(f"🗄️  Dataset cache: {dataset_cache.root} (key {cache_key})")
+    
+    # Tuned overrides (None until a study for this horizon has finished trials)
+    tuned = {'lightgbm': None, 'xgboost': None}
+    if args.tuned:
+        from training.baselines.hyperparameter_search import load_best_params
+        for model_type in tuned:
+            tuned[model_type] = load_best_params(model_type, horizon, surface)
+            print(f"🎛️  {model_type}: {'tuned params ' + str(tuned[model_type]) if tuned[model_type] else 'no tuned params, using M4 config'}")
+    
     # Train all tree models
     results = {}
     
     try:
         _, results['lgbm_dart'] = train_lightgbm_dart(
-            X_train, X_val, y_train, y_val, horizon, models_dir, df_val
+            X_train, X_val, y_train, y_val, horizon, models_dir, df_val,
+            config_overrides=tuned['lightgbm'], dataset_cache=dataset_cache, cache_key=cache_key
         )
     except Exception as e:
         print(f"❌ LightGBM DART failed: {e}")
@@ -274,7 +353,8 @@ def main():
     
     try:
         _, results['xgb_dart'] = train_xgboost_dart(
-            X_train, X_val, y_train, y_val, horizon, models_dir, df_val
+            X_train, X_val, y_train, y_val, horizon, models_dir, df_val,
+            config_overrides=tuned['xgboost'], dataset_cache=dataset_cache, cache_key=cache_key
         )
     except Exception as e:
         print(f"❌ XGBoost DART failed: {e}")
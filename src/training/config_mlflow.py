@@ -26,7 +26,8 @@ EXPERIMENTS = {
     'regime_models': 'Regime-specific models (crisis, bull, bear, normal)',
     'volatility': 'Volatility forecasting models',
     'ensemble': 'Ensemble meta-learners',
-    'validation': 'Walk-forward validation results'
+    'validation': 'Walk-forward validation results',
+    'hyperparameter_search': 'Tree baseline tuning trials (walk-forward folds, pruned)'
 }
 
 def setup_experiments():
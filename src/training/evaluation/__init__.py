@@ -2,6 +2,8 @@
 from .metrics import (
     calculate_mape,
     calculate_sharpe,
+    calculate_returns_from_predictions,
+    evaluate_groups,
     comprehensive_evaluation,
     print_evaluation_summary,
     evaluate_by_regime,
@@ -12,6 +14,8 @@ from .metrics import (
 __all__ = [
     'calculate_mape',
     'calculate_sharpe',
+    'calculate_returns_from_predictions',
+    'evaluate_groups',
     'comprehensive_evaluation',
     'print_evaluation_summary',
     'evaluate_by_regime',
@@ -37,18 +37,28 @@ def calculate_sharpe(
     returns: np.ndarray,
     risk_free_rate: float = 0.0,
     periods_per_year: int = 252
-) -> float:
+):
     """
     Calculate annualized Sharpe ratio.
     
     Args:
-        returns: Array of returns (not prices)
+        returns: Array of returns (not prices); 2-D arrays are treated as
+            one return series per column
         risk_free_rate: Risk-free rate (default 0)
         periods_per_year: Trading periods per year (252 for daily)
         
     Returns:
-        Annualized Sharpe ratio
+        Annualized Sharpe ratio (array of ratios for 2-D input)
     """
+    returns = np.asarray(returns, dtype=float)
+    if returns.ndim == 2:
+        if len(returns) == 0:
+            return np.zeros(returns.shape[1])
+        excess_returns = returns - risk_free_rate
+        std = np.std(excess_returns, axis=0)
+        safe_std = np.where(std == 0, 1.0, std)
+        return np.where(std == 0, 0.0, np.mean(excess_returns, axis=0) / safe_std * np.sqrt(periods_per_year))
+    
     if len(returns) == 0:
         return 0.0
     
@@ -69,30 +79,152 @@ def calculate_returns_from_predictions(
     
     Args:
         prices: Current prices
-        predictions: Predicted future prices
+        predictions: Predicted future prices; shape (n,) or (n, n_models)
         initial_price: Starting price (if None, uses first price)
         
     Returns:
-        Array of returns
+        Array of returns, shape (n-1,) or (n-1, n_models)
     """
-    if initial_price is None:
+    prices = np.asarray(prices, dtype=float)
+    predictions = np.asarray(predictions)
+    if initial_price is None and len(prices):
         initial_price = prices[0]
     
+    if len(prices) < 2:
+        return np.empty((0,) + predictions.shape[1:])
+    
     # Simple strategy: go long if prediction > current price
-    positions = np.where(predictions > prices, 1, -1)
-    
-    # Calculate returns
-    returns = []
-    for i in range(1, len(prices)):
-        if positions[i-1] > 0:
-            # Long position
-            ret = (prices[i] - prices[i-1]) / prices[i-1]
-        else:
-            # Short position
-            ret = (prices[i-1] - prices[i]) / prices[i-1]
-        returns.append(ret)
+    price_view = prices if predictions.ndim == 1 else prices[:, None]
+    positions = np.where(predictions > price_view, 1, -1)
+    
+    # Long earns the price change, short earns its negative
+    price_returns = (prices[1:] - prices[:-1]) / prices[:-1]
+    if predictions.ndim == 2:
+        price_returns = price_returns[:, None]
+    return positions[:-1] * price_returns
+
+def _group_sum(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """Per-group column sums of a (rows, models) array in one pass."""
+    out = np.zeros((n_groups, values.shape[1]))
+    np.add.at(out, codes, values)
+    return out
+
+def evaluate_groups(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    groupings: Optional[Dict[str, np.ndarray]] = None,
+    prices: Optional[np.ndarray] = None,
+    min_samples: int = 10
+) -> Dict[str, Dict]:
+    """
+    Vectorized evaluation kernel for many models and many groupings at once.
+    
+    All groupings (e.g. overall, regime, season) are stacked into one set of
+    group codes, so MAPE, MAE, RMSE, R², directional accuracy and Sharpe for
+    every group and every model come out of a single grouped pass.
     
-    return np.array(returns)
+    Args:
+        y_true: True values, shape (n,)
+        y_pred: Predictions, shape (n,) or (n, n_models)
+        groupings: {grouping name: label per row}; defaults to {'overall': all rows}
+        prices: Optional current prices for Sharpe / directional accuracy
+        min_samples: Groups with fewer rows are dropped (as in evaluate_by_regime)
+        
+    Returns:
+        {grouping: {label: metrics}}; metric values are arrays of length
+        n_models for 2-D y_pred and floats for 1-D y_pred. NaN/inf pairs are
+        excluded per model; Sharpe uses consecutive valid rows of the group.
+    """
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    single = y_pred.ndim == 1
+    P = y_pred[:, None] if single else y_pred
+    n, m = P.shape
+    if groupings is None:
+        groupings = {'overall': np.zeros(n, dtype=int)}
+    
+    # Stack groupings: row r of grouping g becomes code offset_g + label code
+    codes, rows, labels = [], [], []
+    for name, group_labels in groupings.items():
+        label_codes, uniques = pd.factorize(np.asarray(group_labels), use_na_sentinel=True)
+        keep = label_codes >= 0
+        codes.append(label_codes[keep] + len(labels))
+        rows.append(np.flatnonzero(keep))
+        labels.extend((name, label) for label in uniques.tolist())
+    codes = np.concatenate(codes)
+    rows = np.concatenate(rows)
+    G = len(labels)
+    
+    # Stable sort by group so each group's rows stay in time order
+    order = np.argsort(codes, kind='stable')
+    codes, rows = codes[order], rows[order]
+    t = y_true[rows][:, None]
+    p = P[rows]
+    valid = np.isfinite(t) & np.isfinite(p)
+    w = valid.astype(float)
+    err = np.where(valid, t - p, 0.0)
+    
+    row_count = np.bincount(codes, minlength=G)
+    count = _group_sum(w, codes, G)
+    safe_count = np.where(count == 0, 1.0, count)
+    
+    t_valid = np.where(valid, t, 0.0)
+    nonzero = valid & (t != 0)
+    ape = np.where(nonzero, np.abs(err) / np.where(nonzero, np.abs(t), 1.0), 0.0)
+    nonzero_count = _group_sum(nonzero.astype(float), codes, G)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mape = np.where(nonzero_count > 0, _group_sum(ape, codes, G) / np.where(nonzero_count == 0, 1.0, nonzero_count) * 100, np.nan)
+        mae = _group_sum(np.abs(err), codes, G) / safe_count
+        sse = _group_sum(err ** 2, codes, G)
+        rmse = np.sqrt(sse / safe_count)
+        t_mean = _group_sum(t_valid, codes, G) / safe_count
+        sst = _group_sum(np.where(valid, (t - t_mean[codes]) ** 2, 0.0), codes, G)
+        r2 = 1 - sse / sst
+    
+    metrics = {'mape': mape, 'mae': mae, 'rmse': rmse, 'r2': r2}
+    
+    if prices is not None:
+        px = np.asarray(prices, dtype=float)[rows]
+        px_col = px[:, None]
+        
+        # Directional accuracy: predicted vs realized move from the current price
+        dir_hit = valid & (np.sign(p - px_col) == np.sign(t - px_col))
+        metrics['directional_accuracy'] = _group_sum(dir_hit.astype(float), codes, G) / safe_count * 100
+        
+        # Strategy returns between consecutive valid rows of the same group
+        idx = np.where(valid, np.arange(len(rows))[:, None], -1)
+        last_valid = np.maximum.accumulate(idx, axis=0)
+        prev = np.vstack([np.full((1, m), -1), last_valid[:-1]])
+        has_prev = valid & (prev >= 0)
+        prev_safe = np.where(has_prev, prev, 0)
+        has_prev &= codes[prev_safe] == codes[:, None]
+        prev_px = px[prev_safe]
+        positions = np.where(p[prev_safe, np.arange(m)] > prev_px, 1, -1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rets = np.where(has_prev, positions * (px_col - prev_px) / prev_px, 0.0)
+        n_ret = _group_sum(has_prev.astype(float), codes, G)
+        safe_n_ret = np.where(n_ret == 0, 1.0, n_ret)
+        ret_mean = _group_sum(rets, codes, G) / safe_n_ret
+        ret_var = _group_sum(np.where(has_prev, (rets - ret_mean[codes]) ** 2, 0.0), codes, G) / safe_n_ret
+        ret_std = np.sqrt(ret_var)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metrics['sharpe'] = np.where(ret_std == 0, 0.0, ret_mean / ret_std * np.sqrt(252))
+    
+    results: Dict[str, Dict] = {name: {} for name in groupings}
+    for g, (name, label) in enumerate(labels):
+        if row_count[g] < min_samples:
+            continue
+        entry = {key: values[g] for key, values in metrics.items()}
+        entry['n_samples'] = count[g].astype(int)
+        if single:
+            entry = {key: value[0] for key, value in entry.items()}
+            if entry['n_samples'] == 0:
+                continue
+            entry['n_samples'] = int(entry['n_samples'])
+            if 'sharpe' in entry and entry['n_samples'] < 2:
+                del entry['sharpe']  # needs two valid prices, as in the scalar path
+        results[name][label] = entry
+    return results
 
 def evaluate_by_regime(
     df: pl.DataFrame,
@@ -114,48 +246,16 @@ def evaluate_by_regime(
     Returns:
         Dictionary mapping regime -> metrics dict
     """
-    results = {}
-    
     if regime_col not in df.columns:
-        return results
-    
-    regimes = df[regime_col].unique().to_list()
-    
-    for regime in regimes:
-        df_regime = df.filter(pl.col(regime_col) == regime)
-        
-        if len(df_regime) < 10:  # Need minimum samples
-            continue
-        
-        y_true = df_regime[y_true_col].to_numpy()
-        y_pred = df_regime[y_pred_col].to_numpy()
-        
-        # Remove NaN/inf
-        mask = np.isfinite(y_true) & np.isfinite(y_pred)
-        y_true = y_true[mask]
-        y_pred = y_pred[mask]
-        
-        if len(y_true) == 0:
-            continue
-        
-        metrics = {
-            'mape': calculate_mape(y_true, y_pred),
-            'mae': np.mean(np.abs(y_true - y_pred)),
-            'rmse': np.sqrt(np.mean((y_true - y_pred) ** 2)),
-            'r2': 1 - np.sum((y_true - y_pred) ** 2) / np.sum((y_true - np.mean(y_true)) ** 2),
-            'n_samples': len(y_true)
-        }
-        
-        # Calculate Sharpe if price column provided
-        if price_col and price_col in df_regime.columns:
-            prices = df_regime[price_col].to_numpy()[mask]
-            if len(prices) > 1:
-                returns = calculate_returns_from_predictions(prices, y_pred)
-                metrics['sharpe'] = calculate_sharpe(returns)
-        
-        results[regime] = metrics
-    
-    return results
+        return {}
+    
+    prices = df[price_col].to_numpy() if price_col and price_col in df.columns else None
+    return evaluate_groups(
+        df[y_true_col].to_numpy(),
+        df[y_pred_col].to_numpy(),
+        {'regime': df[regime_col].to_numpy()},
+        prices
+    )['regime']
 
 def evaluate_by_season(
     df: pl.DataFrame,
@@ -175,40 +275,16 @@ def evaluate_by_season(
     Returns:
         Dictionary mapping quarter -> metrics dict
     """
-    results = {}
-    
     if date_col not in df.columns:
-        return results
-    
-    # Extract quarter
-    df_with_quarter = df.with_columns([
-        pl.col(date_col).dt.quarter().alias('quarter')
-    ])
-    
-    for quarter in [1, 2, 3, 4]:
-        df_q = df_with_quarter.filter(pl.col('quarter') == quarter)
-        
-        if len(df_q) < 10:
-            continue
-        
-        y_true = df_q[y_true_col].to_numpy()
-        y_pred = df_q[y_pred_col].to_numpy()
-        
-        mask = np.isfinite(y_true) & np.isfinite(y_pred)
-        y_true = y_true[mask]
-        y_pred = y_pred[mask]
-        
-        if len(y_true) == 0:
-            continue
-        
-        results[f'Q{quarter}'] = {
-            'mape': calculate_mape(y_true, y_pred),
-            'mae': np.mean(np.abs(y_true - y_pred)),
-            'rmse': np.sqrt(np.mean((y_true - y_pred) ** 2)),
-            'n_samples': len(y_true)
-        }
-    
-    return results
+        return {}
+    
+    quarters = df[date_col].dt.quarter().to_numpy()
+    by_quarter = evaluate_groups(
+        df[y_true_col].to_numpy(),
+        df[y_pred_col].to_numpy(),
+        {'season': quarters}
+    )['season']
+    return {f'Q{q}': by_quarter[q] for q in sorted(by_quarter)}
 
 def check_data_leakage(
     df: pl.DataFrame,
@@ -261,7 +337,7 @@ def check_data_leakage(
 def comprehensive_evaluation(
     df: pl.DataFrame,
     y_true_col: str,
-    y_pred_col: str,
+    y_pred_col,
     date_col: str = 'date',
     regime_col: Optional[str] = 'market_regime',
     price_col: Optional[str] = None,
@@ -270,69 +346,84 @@ def comprehensive_evaluation(
     """
     Comprehensive evaluation with all metrics.
     
+    Overall, per-regime and per-season metrics come from one evaluate_groups()
+    pass. Pass a list of prediction columns to evaluate many models or folds
+    at once.
+    
     Args:
         df: DataFrame with predictions
         y_true_col: Column name for true values
-        y_pred_col: Column name for predictions
+        y_pred_col: Column name for predictions, or a list of them
         date_col: Date column name
         regime_col: Optional regime column
         price_col: Optional price column for Sharpe
         horizon: Optional horizon label (e.g., '1m')
         
     Returns:
-        Dictionary with all evaluation metrics
+        Dictionary with all evaluation metrics (for a list of prediction
+        columns: {column: results})
     """
-    y_true = df[y_true_col].to_numpy()
-    y_pred = df[y_pred_col].to_numpy()
-    
-    # Remove NaN/inf
-    mask = np.isfinite(y_true) & np.isfinite(y_pred)
-    y_true = y_true[mask]
-    y_pred = y_pred[mask]
-    
-    if len(y_true) == 0:
-        return {'error': 'No valid predictions'}
-    
-    # Overall metrics
-    results = {
-        'overall': {
-            'mape': calculate_mape(y_true, y_pred),
-            'mae': np.mean(np.abs(y_true - y_pred)),
-            'rmse': np.sqrt(np.mean((y_true - y_pred) ** 2)),
-            'r2': 1 - np.sum((y_true - y_pred) ** 2) / np.sum((y_true - np.mean(y_true)) ** 2),
-            'n_samples': len(y_true)
-        }
-    }
-    
-    # Sharpe ratio if price column provided
-    if price_col and price_col in df.columns:
-        prices = df[price_col].to_numpy()[mask]
-        if len(prices) > 1:
-            returns = calculate_returns_from_predictions(prices, y_pred)
-            results['overall']['sharpe'] = calculate_sharpe(returns)
-    
-    # Regime-specific metrics
+    pred_cols = [y_pred_col] if isinstance(y_pred_col, str) else list(y_pred_col)
+    y_true = df[y_true_col].to_numpy().astype(float)
+    y_pred = np.column_stack([df[col].to_numpy().astype(float) for col in pred_cols])
+    
+    # Regime/season labels; rows with non-finite values are excluded inside the kernel
+    n = len(y_true)
+    groupings = {'overall': np.zeros(n, dtype=int)}
     if regime_col and regime_col in df.columns:
-        results['by_regime'] = evaluate_by_regime(
-            df.filter(mask), y_true_col, y_pred_col, regime_col, price_col
-        )
+        groupings['by_regime'] = df[regime_col].to_numpy()
+    if date_col in df.columns:
+        groupings['by_season'] = df[date_col].dt.quarter().to_numpy()
+    prices = df[price_col].to_numpy() if price_col and price_col in df.columns else None
     
-    # Season-specific metrics
-    results['by_season'] = evaluate_by_season(
-        df.filter(mask), y_true_col, y_pred_col, date_col
-    )
+    grouped = evaluate_groups(y_true, y_pred, groupings, prices, min_samples=0)
     
-    # Leakage checks
     feature_cols = [col for col in df.columns 
-                   if col not in [y_true_col, y_pred_col, date_col, regime_col, price_col]]
-    results['leakage_checks'] = check_data_leakage(
-        df.filter(mask), feature_cols, y_true_col, date_col
-    )
+                   if col not in [y_true_col, date_col, regime_col, price_col] + pred_cols]
     
-    if horizon:
-        results['horizon'] = horizon
+    all_results = {}
+    for j, col in enumerate(pred_cols):
+        mask = np.isfinite(y_true) & np.isfinite(y_pred[:, j])
+        if not mask.any():
+            all_results[col] = {'error': 'No valid predictions'}
+            continue
+        
+        def model_metrics(entry: Dict) -> Dict:
+            metrics = {key: value[j] for key, value in entry.items()}
+            metrics['n_samples'] = int(metrics['n_samples'])
+            if 'sharpe' in metrics and metrics['n_samples'] < 2:
+                del metrics['sharpe']
+            return metrics
+        
+        def keep_group(entry: Dict, min_samples: int) -> bool:
+            return entry['n_samples'][j] >= max(min_samples, 1)
+        
+        results = {'overall': model_metrics(grouped['overall'][0])}
+        
+        if 'by_regime' in grouped:
+            results['by_regime'] = {
+                regime: model_metrics(entry)
+                for regime, entry in grouped['by_regime'].items() if keep_group(entry, 10)
+            }
+        
+        if 'by_season' in grouped:
+            results['by_season'] = {
+                f'Q{q}': model_metrics(grouped['by_season'][q])
+                for q in sorted(grouped['by_season']) if keep_group(grouped['by_season'][q], 10)
+            }
+        else:
+            results['by_season'] = {}
+        
+        # Leakage checks
+        results['leakage_checks'] = check_data_leakage(
+            df.filter(mask), feature_cols, y_true_col, date_col
+        )
+        
+        if horizon:
+            results['horizon'] = horizon
+        all_results[col] = results
     
-    return results
+    return all_results[y_pred_col] if isinstance(y_pred_col, str) else all_results
 
 def print_evaluation_summary(results: Dict):
     """Print formatted evaluation summary."""
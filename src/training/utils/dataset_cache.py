@@ -0,0 +1,249 @@
+"""
+On-disk cache of pre-binned tree-model datasets.
+
+LightGBM re-bins every feature (and XGBoost re-sketches quantiles) on each
+fit. This cache stores the constructed datasets once per
+(export, feature list, target, split, binning params) so that early-stopping
+reruns, hyperparameter sweeps and repeated horizon runs skip both the
+frame -> NumPy conversion and histogram construction:
+
+    lightgbm/{key}.train.bin, {key}.val.bin   Dataset.save_binary (bins included)
+    xgboost/{key}.train.buffer, .val.buffer   DMatrix.save_binary
+    xgboost/{key}.{X,y}_{train,val}.npy       float32 arrays for QuantileDMatrix
+                                              (QuantileDMatrix cannot be saved)
+
+Constructed objects are also kept in memory, so fits inside one process
+(e.g. a sweep) reuse the same Dataset / QuantileDMatrix without touching disk.
+
+Usage:
+    cache = TreeDatasetCache()
+    key = cache.key(export_fingerprint(path), feature_cols, 'target_1m', split=0.8)
+    train_set, val_set = cache.lightgbm(key, lambda: (X_train, X_val, y_train, y_val), config)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import lightgbm as lgb
+    LIGHTGBM_AVAILABLE = True
+except ImportError:
+    LIGHTGBM_AVAILABLE = False
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+
+EXTERNAL_DRIVE = os.getenv("EXTERNAL_DRIVE", "/Volumes/Satechi Hub")
+CBI_V14_REPO = os.getenv("CBI_V14_REPO", f"{EXTERNAL_DRIVE}/Projects/CBI-V14")
+DEFAULT_CACHE_DIR = os.getenv("TREE_DATASET_CACHE", f"{CBI_V14_REPO}/TrainingData/cache/tree_datasets")
+
+# Parameters that change how LightGBM bins a Dataset. Everything else
+# (learning rate, leaves, DART settings, ...) can vary without a rebuild.
+LIGHTGBM_DATASET_PARAMS = (
+    'max_bin', 'min_data_in_bin', 'bin_construct_sample_cnt', 'use_missing',
+    'zero_as_missing', 'linear_tree', 'data_random_seed', 'categorical_feature',
+)
+# Keeps the binary independent of min_data_in_leaf, so sweeps over it reuse bins
+LIGHTGBM_DATASET_DEFAULTS = {'feature_pre_filter': False}
+
+Arrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]  # X_train, X_val, y_train, y_val
+
+
+def export_fingerprint(path: Path) -> str:
+    """
+    Content hash of an export file.
+
+    For Parquet only the footer (schema, row groups, column statistics) is
+    hashed, which changes whenever the data does but costs one small read.
+    Other formats are hashed in full.
+    """
+    path = Path(path)
+    digest = hashlib.sha1()
+    size = path.stat().st_size
+    digest.update(str(size).encode())
+    with open(path, "rb") as f:
+        if path.suffix == ".parquet" and size > 12:
+            f.seek(-8, os.SEEK_END)
+            tail = f.read(8)
+            footer_len = int.from_bytes(tail[:4], "little")
+            if tail[4:] == b"PAR1" and footer_len + 8 <= size:
+                f.seek(-(footer_len + 8), os.SEEK_END)
+                digest.update(f.read(footer_len))
+                return digest.hexdigest()
+            f.seek(0)
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TreeDatasetCache:
+    """Pre-binned LightGBM Datasets and XGBoost DMatrices, keyed by content."""
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_entries: int = 64):
+        self.root = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.max_entries = max_entries
+        self._live: Dict[str, Tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------ keys
+
+    @staticmethod
+    def key(source: str, feature_cols: Sequence[str], target: str, split: Any) -> str:
+        """
+        Cache key from the export fingerprint, feature list, target and split
+        definition. Binning params are folded in per backend.
+        """
+        payload = json.dumps({
+            'source': source,
+            'features': list(feature_cols),
+            'target': target,
+            'split': split,
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+    @staticmethod
+    def _variant(key: str, params: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:8]
+        return f"{key}-{digest}"
+
+    # -------------------------------------------------------------- LightGBM
+
+    def lightgbm(self, key: str, load_arrays: Callable[[], Arrays],
+                 params: Optional[Dict[str, Any]] = None,
+                 feature_cols: Optional[List[str]] = None):
+        """
+        (train_set, val_set) LightGBM Datasets. load_arrays() is only called
+        when the binaries are not cached yet.
+        """
+        if not LIGHTGBM_AVAILABLE:
+            raise ImportError("lightgbm is required for the LightGBM dataset cache")
+        ds_params = {**LIGHTGBM_DATASET_DEFAULTS,
+                     **{k: v for k, v in (params or {}).items() if k in LIGHTGBM_DATASET_PARAMS},
+                     'verbose': -1}
+        key = self._variant(key, ds_params)
+        live_key = f"lgb/{key}"
+        with self._lock:
+            if live_key in self._live:
+                self.hits += 1
+                return self._live[live_key]
+
+        directory = self.root / "lightgbm"
+        train_path, val_path = directory / f"{key}.train.bin", directory / f"{key}.val.bin"
+
+        if train_path.exists() and val_path.exists():
+            self.hits += 1
+            train_set = lgb.Dataset(str(train_path), params=ds_params, free_raw_data=False).construct()
+            val_set = lgb.Dataset(str(val_path), reference=train_set, params=ds_params,
+                                  free_raw_data=False).construct()
+        else:
+            self.misses += 1
+            X_train, X_val, y_train, y_val = load_arrays()
+            names = list(feature_cols) if feature_cols is not None else 'auto'
+            train_set = lgb.Dataset(X_train, label=y_train, feature_name=names, params=ds_params,
+                                    free_raw_data=False).construct()
+            val_set = lgb.Dataset(X_val, label=y_val, reference=train_set, feature_name=names,
+                                  params=ds_params, free_raw_data=False).construct()
+            directory.mkdir(parents=True, exist_ok=True)
+            self._atomic(train_path, train_set.save_binary)
+            self._atomic(val_path, val_set.save_binary)
+            self._prune(directory)
+
+        with self._lock:
+            self._live[live_key] = (train_set, val_set)
+        return train_set, val_set
+
+    # --------------------------------------------------------------- XGBoost
+
+    def xgboost(self, key: str, load_arrays: Callable[[], Arrays], quantile: bool = False,
+                max_bin: int = 256, feature_cols: Optional[List[str]] = None):
+        """
+        (dtrain, dval) XGBoost matrices. quantile=True returns QuantileDMatrix
+        objects (sketch built once per process, from cached float32 arrays);
+        otherwise DMatrix binaries are loaded directly.
+        """
+        if not XGBOOST_AVAILABLE:
+            raise ImportError("xgboost is required for the XGBoost dataset cache")
+        live_key = f"xgb/{key}/{'q' + str(max_bin) if quantile else 'd'}"
+        with self._lock:
+            if live_key in self._live:
+                self.hits += 1
+                return self._live[live_key]
+
+        directory = self.root / "xgboost"
+        directory.mkdir(parents=True, exist_ok=True)
+        names = list(feature_cols) if feature_cols is not None else None
+
+        if quantile:
+            parts = ('X_train', 'X_val', 'y_train', 'y_val')
+            paths = {p: directory / f"{key}.{p}.npy" for p in parts}
+            if all(p.exists() for p in paths.values()):
+                self.hits += 1
+            else:
+                self.misses += 1
+                for part, arr in zip(parts, load_arrays()):
+                    self._atomic(paths[part], lambda tmp, a=arr: np.save(tmp, np.asarray(a, dtype=np.float32)))
+                self._prune(directory)
+            X_train, X_val, y_train, y_val = (np.load(paths[p], mmap_mode='r') for p in parts)
+            dtrain = xgb.QuantileDMatrix(X_train, label=y_train, max_bin=max_bin, feature_names=names)
+            dval = xgb.QuantileDMatrix(X_val, label=y_val, ref=dtrain, feature_names=names)
+        else:
+            train_path, val_path = directory / f"{key}.train.buffer", directory / f"{key}.val.buffer"
+            if train_path.exists() and val_path.exists():
+                self.hits += 1
+                dtrain, dval = xgb.DMatrix(str(train_path)), xgb.DMatrix(str(val_path))
+            else:
+                self.misses += 1
+                X_train, X_val, y_train, y_val = load_arrays()
+                dtrain = xgb.DMatrix(X_train, label=y_train, feature_names=names)
+                dval = xgb.DMatrix(X_val, label=y_val, feature_names=names)
+                self._atomic(train_path, dtrain.save_binary)
+                self._atomic(val_path, dval.save_binary)
+                self._prune(directory)
+
+        with self._lock:
+            self._live[live_key] = (dtrain, dval)
+        return dtrain, dval
+
+    # --------------------------------------------------------------- helpers
+
+    @staticmethod
+    def _atomic(path: Path, write: Callable[[str], Any]):
+        """Write via a temp file + rename so concurrent jobs never read partial files."""
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        if path.suffix == ".npy":
+            tmp = tmp.with_suffix(".npy")  # np.save appends .npy otherwise
+        write(str(tmp))
+        os.replace(tmp, path)
+
+    def _prune(self, directory: Path):
+        """Keep the newest max_entries keys (by mtime) in a cache directory."""
+        groups: Dict[str, List[Path]] = {}
+        for p in directory.iterdir():
+            if not p.name.startswith("."):
+                groups.setdefault(p.name.split(".", 1)[0], []).append(p)
+        if len(groups) <= self.max_entries:
+            return
+        by_age = sorted(groups, key=lambda k: max(p.stat().st_mtime for p in groups[k]))
+        for stale in by_age[:len(groups) - self.max_entries]:
+            for p in groups[stale]:
+                p.unlink(missing_ok=True)
+
+    def clear(self):
+        """Drop in-memory datasets (files on disk are kept)."""
+        with self._lock:
+            self._live.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"live": len(self._live), "hits": self.hits, "misses": self.misses}
@@ -48,7 +48,7 @@ def save_model_with_metadata(
         joblib.dump(model, model_path)
     elif model_type == "lightgbm":
         model_path = model_subdir / "model.bin"
-        model.booster_.save_model(str(model_path))
+        getattr(model, 'booster_', model).save_model(str(model_path))  # LGBMRegressor or Booster
     elif model_type == "xgboost":
         model_path = model_subdir / "model.bin"
         model.save_model(str(model_path))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Single-pass multi-timeframe OHLCV bar resampler.
+
+Rolls 1-minute bars up to any set of higher timeframes without per-symbol /
+per-rule `groupby().resample()` loops:
+
+- the input is sorted once by (symbol, time);
+- for each timeframe the bucket index is integer arithmetic on the int64
+  UTC timestamps (floor((ts - origin) / step)), so bucket starts are where
+  symbol or bucket changes;
+- open/close are the first/last non-NaN value inside each bucket, high/low/
+  volume come from `np.fmax.reduceat` / `np.fmin.reduceat` / `np.add.reduceat`
+  (NaN is skipped, as in pandas).
+
+Buckets are fixed steps of elapsed time from local midnight of the first day,
+the `DataFrame.resample` default (origin='start_day'), so across a DST change
+tz-aware bars are never merged or stamped NaT. Results match
+`resample(rule).agg(first/max/min/last/sum)` followed by dropping empty bins,
+for every symbol whose first day has the frame's UTC offset. Extra memory is
+a few int64 arrays per timeframe.
+
+Used by scripts/ingest/aggregate_{zl,mes,es}_intraday.py.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS = ['datetime', 'open', 'high', 'low', 'close', 'volume', 'symbol', 'timeframe']
+
+TIMEFRAME_MINUTES: Dict[str, int] = {
+    '1min': 1, '5min': 5, '15min': 15, '30min': 30, '60min': 60, '240min': 240, '1440min': 1440,
+}
+
+_NS_PER_MINUTE = 60 * 1_000_000_000
+
+
+def _epoch_ns(times: pd.Series) -> np.ndarray:
+    """int64 UTC nanoseconds of naive or tz-aware timestamps."""
+    times = pd.to_datetime(times)
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+    return times.astype('datetime64[ns]').to_numpy().view(np.int64)
+
+
+def _first_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """First non-NaN value in each [start, end] run (NaN when there is none)."""
+    index = np.where(np.isnan(values), len(values), np.arange(len(values)))
+    index = np.minimum.accumulate(index[::-1])[::-1][starts]
+    hit = index <= ends
+    return np.where(hit, values[np.where(hit, index, 0)], np.nan)
+
+
+def _last_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Last non-NaN value in each [start, end] run (NaN when there is none)."""
+    index = np.where(np.isnan(values), -1, np.arange(len(values)))
+    index = np.maximum.accumulate(index)[ends]
+    hit = index >= starts
+    return np.where(hit, values[np.where(hit, index, 0)], np.nan)
+
+
+def resample_bars(
+    df: pd.DataFrame,
+    timeframes: Iterable[str],
+    time_col: str = 'datetime',
+    symbol_col: Optional[str] = 'symbol',
+) -> pd.DataFrame:
+    """
+    Aggregate base bars (normally 1-minute) to every timeframe in `timeframes`.
+
+    Args:
+        df: Bars with time_col, open/high/low/close/volume and (optionally) symbol_col.
+        timeframes: Target timeframes, keys of TIMEFRAME_MINUTES (e.g. '5min', '240min').
+        time_col: Timestamp column (naive or tz-aware).
+        symbol_col: Contract column; bars of different contracts are never mixed.
+            None treats the input as a single series.
+
+    Returns:
+        Long DataFrame with BAR_COLUMNS (symbol is None when symbol_col is None),
+        ordered by timeframe, symbol, datetime.
+    """
+    timeframes = list(timeframes)
+    unknown = [tf for tf in timeframes if tf not in TIMEFRAME_MINUTES]
+    if unknown:
+        raise ValueError(f"Unsupported timeframes: {unknown}")
+    if df.empty or not timeframes:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+
+    stamps_in = pd.to_datetime(df[time_col])
+    tz = stamps_in.dt.tz
+    times = _epoch_ns(stamps_in)
+    # Local midnight of the first day, like resample(origin='start_day')
+    origin = _epoch_ns(pd.Series([stamps_in.min().normalize()]))[0]
+    times = times - origin
+    if symbol_col is not None:
+        codes, symbols = pd.factorize(df[symbol_col], sort=True)
+    else:
+        codes, symbols = np.zeros(len(df), dtype=np.int64), np.array([None], dtype=object)
+
+    # One sort shared by every timeframe
+    order = np.lexsort((times, codes))
+    times, codes = times[order], codes[order]
+    o = df['open'].to_numpy(dtype=np.float64)[order]
+    h = df['high'].to_numpy(dtype=np.float64)[order]
+    l = df['low'].to_numpy(dtype=np.float64)[order]
+    c = df['close'].to_numpy(dtype=np.float64)[order]
+    v = np.nan_to_num(df['volume'].to_numpy(dtype=np.float64)[order])
+    symbol_change = codes[1:] != codes[:-1]
+
+    frames = []
+    for tf in timeframes:
+        step = TIMEFRAME_MINUTES[tf] * _NS_PER_MINUTE
+        bucket = np.floor_divide(times, step)
+        starts = np.flatnonzero(np.r_[True, symbol_change | (bucket[1:] != bucket[:-1])])
+        ends = np.r_[starts[1:], len(times)] - 1
+
+        stamps = pd.DatetimeIndex((bucket[starts] * step + origin).astype('datetime64[ns]'))
+        if tz is not None:
+            stamps = stamps.tz_localize('UTC').tz_convert(tz)
+        frames.append(pd.DataFrame({
+            'datetime': stamps,
+            'open': _first_valid(o, starts, ends),
+            'high': np.fmax.reduceat(h, starts),
+            'low': np.fmin.reduceat(l, starts),
+            'close': _last_valid(c, starts, ends),
+            'volume': np.add.reduceat(v, starts),
+            'symbol': np.asarray(symbols, dtype=object)[codes[starts]],
+            'timeframe': tf,
+        }))
+    return pd.concat(frames, ignore_index=True)[BAR_COLUMNS]
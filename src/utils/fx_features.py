@@ -22,6 +22,7 @@ from src.utils.timeseries import (
     exponential_moving_average,
     bollinger_bands,
     relative_strength_index,
+    rolling_pair_correlation,
 )
 
 
@@ -119,16 +120,13 @@ def add_cross_currency_features(df: pd.DataFrame) -> pd.DataFrame:
         symbol = col.replace("_close", "")
         out[f"fx_{symbol}_ret"] = out[col].pct_change()
 
-    # Cross-currency correlations (30d, 90d)
+    # Cross-currency correlations (30d, 90d), all pairs per window in one pass
     ret_cols = [c for c in out.columns if c.startswith("fx_") and c.endswith("_ret")]
+    symbols = {col: col.replace("fx_", "").replace("_ret", "") for col in ret_cols}
     for window in [30, 90]:
-        for i, col1 in enumerate(ret_cols):
-            for col2 in ret_cols[i + 1 :]:
-                symbol1 = col1.replace("fx_", "").replace("_ret", "")
-                symbol2 = col2.replace("fx_", "").replace("_ret", "")
-                out[f"fx_corr_{symbol1}_{symbol2}_{window}d"] = (
-                    out[col1].rolling(window, min_periods=window // 2).corr(out[col2])
-                )
+        corr = rolling_pair_correlation(out[ret_cols], window, min_periods=window // 2)
+        names = [f"fx_corr_{symbols[col1]}_{symbols[col2]}_{window}d" for col1, col2 in corr.columns]
+        out[names] = corr.to_numpy()
 
     # Currency spreads (BRL-CNY, EUR-USD, etc.)
     if "6l_close" in out.columns and "cnh_close" in out.columns:
@@ -199,23 +197,18 @@ def add_zl_fx_correlations(df: pd.DataFrame, staging_dir, logger=None) -> pd.Dat
 
     merged["zl_return"] = merged["zl_close"].pct_change()
 
-    for window in [30, 90]:
-        if "fx_6l_ret" in merged.columns:
-            merged[f"cross_corr_fx_brl_{window}d"] = (
-                merged["zl_return"].rolling(window, min_periods=window // 2).corr(merged["fx_6l_ret"])
-            )
-        if "fx_cnh_ret" in merged.columns:
-            merged[f"cross_corr_fx_cny_{window}d"] = (
-                merged["zl_return"].rolling(window, min_periods=window // 2).corr(merged["fx_cnh_ret"])
-            )
-        if "fx_6e_ret" in merged.columns:
-            merged[f"cross_corr_fx_eur_{window}d"] = (
-                merged["zl_return"].rolling(window, min_periods=window // 2).corr(merged["fx_6e_ret"])
-            )
-        if "fx_strength_index" in merged.columns:
-            merged[f"cross_corr_fx_usd_index_{window}d"] = (
-                merged["zl_return"].rolling(window, min_periods=window // 2).corr(merged["fx_strength_index"])
-            )
+    fx_cols = {
+        "fx_6l_ret": "brl",
+        "fx_cnh_ret": "cny",
+        "fx_6e_ret": "eur",
+        "fx_strength_index": "usd_index",
+    }
+    fx_cols = {col: name for col, name in fx_cols.items() if col in merged.columns}
+    pairs = [("zl_return", col) for col in fx_cols]
+    if pairs:
+        for window in [30, 90]:
+            corr = rolling_pair_correlation(merged, window, pairs=pairs, min_periods=window // 2)
+            merged[[f"cross_corr_fx_{fx_cols[col]}_{window}d" for _, col in pairs]] = corr.to_numpy()
 
     # Impact scores
     if "fx_6l_ret" in merged.columns and "cross_corr_fx_brl_30d" in merged.columns:
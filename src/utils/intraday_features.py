@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Intraday microstructure features per (date, timeframe), computed as grouped
+reductions instead of a Python loop over groups.
+
+Rows are stably sorted by (date, timeframe) once (bar order inside a group is
+kept), group boundaries come from the sorted keys, and every statistic is a
+segment sum (`np.add.reduceat`) of per-bar terms:
+
+- realized_vol  std of bar returns (pct_change within the group, ddof=1)
+- hl_vol        sqrt(mean(log(high/low)^2))  (Parkinson-style range vol)
+- vwap          sum(close*volume) / max(sum(volume), 1)
+- num_bars      bars in the group
+- bipower_var   pi/2 * sum(|r_t| * |r_t-1|)  (jump-robust variation)
+- amihud        mean(|r_t| / (close_t * volume_t)) over bars with volume
+- overnight_gap first open of the day / last close of the previous day - 1
+                (same timeframe)
+
+Groups with fewer than two bars are dropped. Output is one row per date with
+columns {prefix}_{timeframe}_{feature}, as the aggregate_*_intraday.py
+scripts have always produced.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ['realized_vol', 'hl_vol', 'vwap', 'num_bars', 'bipower_var', 'amihud', 'overnight_gap']
+
+
+def _segment_sum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    return np.add.reduceat(values, starts) if len(values) else np.zeros(0)
+
+
+def microstructure_features(df: pd.DataFrame, prefix: str, time_col: str = 'datetime') -> pd.DataFrame:
+    """
+    Wide (date × timeframe feature) table from intraday bars.
+
+    Args:
+        df: Bars with time_col, open/high/low/close/volume and timeframe.
+        prefix: Column prefix (e.g. 'zl', 'mes', 'es').
+        time_col: Timestamp column; dates are the local calendar day.
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    times = pd.to_datetime(df[time_col])
+    dates = times.dt.normalize()
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    date_codes, date_values = pd.factorize(dates, sort=True)
+    tf_codes, tf_values = pd.factorize(df['timeframe'], sort=True)
+
+    # Stable: bar order inside each (date, timeframe) group is preserved
+    order = np.lexsort((tf_codes, date_codes))
+    date_codes, tf_codes = date_codes[order], tf_codes[order]
+    o = df['open'].to_numpy(dtype=np.float64)[order]
+    h = df['high'].to_numpy(dtype=np.float64)[order]
+    l = df['low'].to_numpy(dtype=np.float64)[order]
+    c = df['close'].to_numpy(dtype=np.float64)[order]
+    v = df['volume'].to_numpy(dtype=np.float64)[order]
+
+    n = len(c)
+    new_group = np.r_[True, (date_codes[1:] != date_codes[:-1]) | (tf_codes[1:] != tf_codes[:-1])]
+    starts = np.flatnonzero(new_group)
+    ends = np.r_[starts[1:], n] - 1
+    num_bars = np.diff(np.r_[starts, n])
+
+    # Bar returns within each group (first bar of a group has none)
+    ret = np.full(n, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret[1:] = c[1:] / c[:-1] - 1.0
+    ret[new_group] = np.nan
+    valid = ~np.isnan(ret)
+    r0 = np.where(valid, ret, 0.0)
+
+    n_ret = _segment_sum(valid.astype(np.float64), starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_ret = _segment_sum(r0, starts) / n_ret
+        dev = np.where(valid, ret - np.repeat(mean_ret, num_bars), 0.0)
+        realized_vol = np.sqrt(_segment_sum(dev ** 2, starts) / (n_ret - 1))
+        realized_vol[n_ret < 2] = np.nan
+
+        # Parkinson-style range volatility
+        log_range_sq = np.log(h / l) ** 2
+        lr_valid = ~np.isnan(log_range_sq)
+        hl_vol = np.sqrt(_segment_sum(np.where(lr_valid, log_range_sq, 0.0), starts)
+                         / _segment_sum(lr_valid.astype(np.float64), starts))
+
+        # VWAP
+        pv = np.nan_to_num(c * v)
+        vwap = _segment_sum(pv, starts) / np.maximum(_segment_sum(np.nan_to_num(v), starts), 1)
+
+        # Bipower variation: consecutive |r| products inside the group
+        abs_r = np.abs(r0)
+        pair = np.zeros(n)
+        pair[1:] = abs_r[1:] * abs_r[:-1]
+        pair[1:][~(valid[1:] & valid[:-1])] = 0.0
+        bipower_var = np.pi / 2 * _segment_sum(pair, starts)
+        bipower_var[n_ret < 2] = np.nan
+
+        # Amihud illiquidity: |r| per unit of dollar volume
+        dollar_vol = c * v
+        am_valid = valid & (dollar_vol > 0)
+        amihud = (_segment_sum(np.where(am_valid, abs_r / np.where(am_valid, dollar_vol, 1.0), 0.0), starts)
+                  / _segment_sum(am_valid.astype(np.float64), starts))
+
+    groups = pd.DataFrame({
+        'date': date_values[date_codes[starts]],
+        'timeframe': tf_values[tf_codes[starts]],
+        'realized_vol': realized_vol,
+        'hl_vol': hl_vol,
+        'vwap': vwap,
+        'num_bars': num_bars,
+        'bipower_var': bipower_var,
+        'amihud': amihud,
+        'first_open': o[starts],
+        'last_close': c[ends],
+    })
+
+    # Overnight gap vs the previous trading day's last close, per timeframe
+    groups = groups.sort_values(['timeframe', 'date'], kind='stable')
+    prev_close = groups.groupby('timeframe', sort=False)['last_close'].shift(1)
+    groups['overnight_gap'] = groups['first_open'] / prev_close - 1.0
+
+    groups = groups[groups['num_bars'] >= 2]
+    if groups.empty:
+        return pd.DataFrame()
+    piv = groups.pivot(index='date', columns='timeframe', values=FEATURES)
+    piv.columns = [f"{prefix}_{tf}_{feat}" for feat, tf in piv.columns]
+    return piv.reset_index()
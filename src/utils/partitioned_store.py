@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Append-only, year-partitioned Parquet store for CBI-V14 raw series.
+
+Layout (one store per symbol/series):
+    <root>/_manifest.json             last date, row/part counts, next part seq
+    <root>/year=YYYY/part-00000042.parquet
+
+Purpose:
+- Daily updates write only the new rows as a small part file, so update I/O
+  stays constant as history grows (no read-modify-write of the full file).
+- Readers get the whole history through one scan of the partitions.
+- Revised observations (e.g. FRED re-publishing the last 30 days) are simply
+  appended; on read, the latest write for a date wins (part seq order).
+- Year partitions are compacted (deduplicated, sorted, rewritten as one
+  file) once they accumulate too many parts.
+
+Notes:
+- A legacy single-file Parquet next to the store is imported once on first
+  use and left in place (stale from then on); `read_series` prefers the
+  store when it exists. Enumerate series with `list_series` rather than
+  globbing *.parquet, which would pick up the stale legacy files and every
+  part file of every store.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.json"
+DEFAULT_COMPACT_THRESHOLD = 32  # parts per year partition before compaction
+
+
+class PartitionedSeriesStore:
+    """Append-only year-partitioned Parquet dataset with a small JSON manifest."""
+
+    def __init__(self, root: Path, date_column: str = "date",
+                 compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        self.root = Path(root)
+        self.date_column = date_column
+        self.compact_threshold = compact_threshold
+        self.manifest = self._load_manifest()
+        # An existing store keeps the date column it was created with
+        self.date_column = self.manifest.get("date_column") or date_column
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def _load_manifest(self) -> dict:
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {"date_column": self.date_column, "last_date": None, "rows": 0,
+                "next_seq": 0, "parts": {}, "compacted_at": None}
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest["updated_at"] = datetime.now().isoformat()
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    @property
+    def last_date(self) -> Optional[pd.Timestamp]:
+        value = self.manifest.get("last_date")
+        return pd.Timestamp(value) if value else None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _part_files(self, year: str) -> List[Path]:
+        return sorted((self.root / f"year={year}").glob("part-*.parquet"))
+
+    def _write_part(self, year: str, frame: pd.DataFrame) -> Path:
+        seq = self.manifest["next_seq"]
+        self.manifest["next_seq"] = seq + 1
+        part_dir = self.root / f"year={year}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        path = part_dir / f"part-{seq:08d}.parquet"
+        frame.to_parquet(path, index=False)
+        return path
+
+    def append(self, df: pd.DataFrame, only_new: bool = True) -> int:
+        """
+        Append rows as new part files (one per touched year).
+
+        Args:
+            df: Rows to append (must contain the date column)
+            only_new: Drop rows dated on/before the manifest's last date.
+                Set False for sources that revise recent history; the latest
+                write wins on read.
+
+        Returns:
+            Number of rows written
+        """
+        if df.empty:
+            return 0
+        df = df.copy()
+        df[self.date_column] = pd.to_datetime(df[self.date_column])
+        if only_new and self.last_date is not None:
+            df = df[df[self.date_column] > self.last_date]
+        if df.empty:
+            return 0
+
+        df = df.sort_values(self.date_column)
+        years = df[self.date_column].dt.year.astype(str)
+        for year, part in df.groupby(years, sort=True):
+            self._write_part(year, part)
+            self.manifest["parts"][year] = self.manifest["parts"].get(year, 0) + 1
+
+        latest = df[self.date_column].max()
+        if self.last_date is None or latest > self.last_date:
+            self.manifest["last_date"] = latest.strftime("%Y-%m-%d")
+        self.manifest["rows"] += len(df)
+        self._save_manifest()
+
+        for year in sorted(set(years)):
+            if self.manifest["parts"].get(year, 0) > self.compact_threshold:
+                self.compact_year(year)
+        return len(df)
+
+    def import_legacy(self, legacy_file: Path) -> int:
+        """One-time import of a single-file Parquet into the partitioned layout."""
+        legacy_file = Path(legacy_file)
+        if self.exists() or not legacy_file.exists():
+            return 0
+        df = pd.read_parquet(legacy_file)
+        if self.date_column not in df.columns:
+            raise ValueError(f"{legacy_file} has no '{self.date_column}' column")
+        df = df.drop_duplicates(subset=[self.date_column], keep="last")
+        self.manifest["migrated_from"] = str(legacy_file)
+        rows = self.append(df, only_new=False)
+        logger.info(f"Imported {rows:,} rows from {legacy_file.name} into {self.root}")
+        return rows
+
+    # ------------------------------------------------------------------
+    # Reads / compaction
+    # ------------------------------------------------------------------
+
+    def _read_parts(self, parts: List[Path], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if not parts:
+            return pd.DataFrame()
+        if columns and self.date_column not in columns:
+            columns = [self.date_column] + list(columns)
+        tables = [pq.read_table(p, columns=columns) for p in parts]
+        df = pa.concat_tables(tables, promote_options="default").to_pandas()
+        # Parts are read in seq order, so keep='last' keeps the latest write
+        df = df.drop_duplicates(subset=[self.date_column], keep="last")
+        return df.sort_values(self.date_column).reset_index(drop=True)
+
+    def read(self, columns: Optional[List[str]] = None,
+             start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Scan all (or start-year onward) partitions into one deduplicated frame."""
+        years = sorted(p.name.split("=", 1)[1] for p in self.root.glob("year=*") if p.is_dir())
+        if start is not None:
+            years = [y for y in years if int(y) >= pd.Timestamp(start).year]
+        parts = sorted(
+            (p for y in years for p in self._part_files(y)),
+            key=lambda p: p.name
+        )
+        df = self._read_parts(parts, columns)
+        if start is not None and not df.empty:
+            df = df[df[self.date_column] >= pd.Timestamp(start)].reset_index(drop=True)
+        return df
+
+    def compact_year(self, year: str):
+        """Rewrite one year partition as a single deduplicated, sorted file."""
+        parts = self._part_files(year)
+        if len(parts) <= 1:
+            return
+        before = sum(pq.ParquetFile(p).metadata.num_rows for p in parts)
+        df = self._read_parts(parts)
+        self._write_part(year, df)
+        for p in parts:
+            p.unlink()
+        self.manifest["parts"][year] = 1
+        self.manifest["rows"] += len(df) - before
+        self.manifest["compacted_at"] = datetime.now().isoformat()
+        self._save_manifest()
+        logger.info(f"Compacted {self.root.name} year={year}: {len(parts)} parts → 1 ({len(df):,} rows)")
+
+    def compact(self):
+        """Compact every year partition that has more than one part."""
+        for year, count in sorted(self.manifest["parts"].items()):
+            if count > 1:
+                self.compact_year(year)
+
+
+def read_series(path: Path, date_column: str = "date") -> pd.DataFrame:
+    """
+    Read a series stored either as a partitioned store (directory) or as a
+    legacy single Parquet file. `path` is the legacy file path
+    (e.g. .../commodities/ZL_F.parquet); the store lives at the same path
+    without the suffix.
+    """
+    path = Path(path)
+    store = PartitionedSeriesStore(path.with_suffix(""), date_column=date_column)
+    if store.exists():
+        return store.read()
+    return pd.read_parquet(path)
+
+
+def list_series(directory: Path, recursive: bool = False) -> List[Path]:
+    """
+    Legacy file paths of every series in `directory` (each series once,
+    whether it is a store, a legacy file, or both), for use with read_series.
+    Parquet files inside a store are never returned on their own.
+    """
+    directory = Path(directory)
+    find = directory.rglob if recursive else directory.glob
+    stores = {m.parent for m in find(MANIFEST_NAME if recursive else f"*/{MANIFEST_NAME}")}
+    series = {store.parent / f"{store.name}.parquet" for store in stores}
+    for path in find("*.parquet"):
+        if not any(parent in stores for parent in path.parents):
+            series.add(path)
+    return sorted(series)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Futures roll calendar: the active (front) contract per trading day.
+
+The active contract on a day is the one with the highest total volume over a
+trailing calendar window (default: that day and the 7 days before it), which
+keeps the continuous series from flip-flopping intraday during roll weeks.
+
+Computed in one pass instead of one filter + groupby per date:
+
+- daily volume is pivoted to a (calendar day × contract) matrix, zero-filled;
+- a rolling window sum runs down the rows;
+- a row-wise argmax picks the contract (ties go to the first symbol in sorted
+  order, as `groupby('symbol').sum().idxmax()` did).
+
+The calendar (date, active_contract, window_volume, rolled, day_volume,
+window_days) is saved next to the staged data so training datasets and the
+live continuous series select contracts from the same artifact:
+`ensure_roll_calendar` loads it and only rebuilds it when the bars contain
+days it does not cover, were built with another window, or carry different
+daily volume (late prints, re-downloaded bars). Works for any root
+(ZL, MES, ES).
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_COLUMNS = ['date', 'active_contract', 'window_volume', 'rolled', 'day_volume', 'window_days']
+DEFAULT_WINDOW_DAYS = 7
+
+
+def _trading_dates(times: pd.Series) -> pd.Series:
+    """Calendar day (midnight, tz-naive local wall clock) of each timestamp."""
+    times = pd.to_datetime(times)
+    dates = times.dt.normalize()
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates
+
+
+def _daily_volume(df: pd.DataFrame, time_col: str, symbol_col: str, volume_col: str) -> pd.Series:
+    """Total volume per (date, symbol)."""
+    dates = _trading_dates(df[time_col])
+    volume = pd.to_numeric(df[volume_col], errors='coerce').fillna(0)
+    return volume.groupby([dates.rename('date'), df[symbol_col].rename('symbol')]).sum()
+
+
+def build_roll_calendar(
+    df: pd.DataFrame,
+    time_col: str = 'datetime',
+    symbol_col: str = 'symbol',
+    volume_col: str = 'volume',
+    window_days: int = DEFAULT_WINDOW_DAYS,
+) -> pd.DataFrame:
+    """
+    Active contract per trading day from bars of several contracts.
+
+    Args:
+        df: Bars (any timeframe) with time_col, symbol_col and volume_col.
+        window_days: Look-back in calendar days; the window is
+            [date - window_days, date] inclusive.
+
+    Returns:
+        DataFrame with CALENDAR_COLUMNS, one row per date present in df;
+        `rolled` is True where the active contract differs from the previous day;
+        `day_volume` (all contracts) and `window_days` record what it was built from.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=CALENDAR_COLUMNS)
+
+    daily = _daily_volume(df, time_col, symbol_col, volume_col)
+
+    # (calendar day × contract), every calendar day present so the window is in days
+    matrix = daily.unstack('symbol', fill_value=0).sort_index(axis=1)
+    traded = matrix.index
+    matrix = matrix.reindex(pd.date_range(traded.min(), traded.max(), freq='D'), fill_value=0)
+
+    window = matrix.rolling(window_days + 1, min_periods=1).sum().loc[traded]
+    values = window.to_numpy(dtype=np.float64)
+    best = values.argmax(axis=1)
+
+    calendar = pd.DataFrame({
+        'date': traded,
+        'active_contract': matrix.columns.to_numpy()[best],
+        'window_volume': values[np.arange(len(values)), best],
+    })
+    calendar['rolled'] = calendar['active_contract'].ne(calendar['active_contract'].shift()) & calendar.index.to_series().gt(0)
+    calendar['day_volume'] = matrix.loc[traded].sum(axis=1).to_numpy(dtype=np.float64)
+    calendar['window_days'] = window_days
+    return calendar.reset_index(drop=True)
+
+
+def apply_roll_calendar(
+    df: pd.DataFrame,
+    calendar: pd.DataFrame,
+    time_col: str = 'datetime',
+    symbol_col: str = 'symbol',
+) -> pd.DataFrame:
+    """Keep only bars of the active contract for their day (dates missing from the calendar are dropped)."""
+    if df.empty or calendar.empty:
+        return df.iloc[0:0].copy()
+    active = _trading_dates(df[time_col]).map(calendar.set_index('date')['active_contract'])
+    return df[df[symbol_col].to_numpy() == active.to_numpy()].copy()
+
+
+def save_roll_calendar(calendar: pd.DataFrame, path: Union[str, Path]) -> Path:
+    """Write the calendar as Parquet and log the roll dates."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    calendar.to_parquet(path, index=False)
+    rolls = calendar[calendar['rolled']]
+    logger.info(f"   💾 Roll calendar: {len(calendar)} days, {len(rolls)} rolls → {path}")
+    for _, row in rolls.tail(4).iterrows():
+        logger.info(f"      {row['date'].date()} → {row['active_contract']}")
+    return path
+
+
+def load_roll_calendar(path: Union[str, Path]) -> Optional[pd.DataFrame]:
+    """Read a saved calendar, or None if it does not exist yet."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    calendar = pd.read_parquet(path)
+    calendar['date'] = pd.to_datetime(calendar['date'])
+    return calendar
+
+
+def ensure_roll_calendar(
+    df: pd.DataFrame,
+    path: Union[str, Path],
+    time_col: str = 'datetime',
+    symbol_col: str = 'symbol',
+    volume_col: str = 'volume',
+    window_days: int = DEFAULT_WINDOW_DAYS,
+) -> pd.DataFrame:
+    """
+    Saved calendar at `path` if it was built with `window_days` and covers every
+    day in df with the same daily volume; otherwise build it from df and save it.
+    """
+    calendar = load_roll_calendar(path)
+    if calendar is not None and not df.empty:
+        if not set(CALENDAR_COLUMNS).issubset(calendar.columns):
+            logger.info(f"   📅 Roll calendar {path} predates volume fingerprints, rebuilding")
+        elif (calendar['window_days'] != window_days).any():
+            logger.info(f"   📅 Roll calendar {path} was built with another window, rebuilding")
+        else:
+            totals = _daily_volume(df, time_col, symbol_col, volume_col).groupby(level='date').sum()
+            saved = calendar.set_index('date')['day_volume'].reindex(totals.index)
+            if saved.isna().any():
+                logger.info(f"   📅 Roll calendar {path} does not cover every day, rebuilding")
+            elif not np.allclose(saved.to_numpy(), totals.to_numpy()):
+                logger.info(f"   📅 Roll calendar {path} volumes differ from the bars, rebuilding")
+            else:
+                logger.info(f"   📅 Using roll calendar {path} ({len(calendar)} days)")
+                return calendar
+    calendar = build_roll_calendar(df, time_col, symbol_col, volume_col, window_days)
+    save_roll_calendar(calendar, path)
+    return calendar
@@ -16,7 +16,8 @@ Notes:
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Union
+from itertools import combinations
+from typing import Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -167,3 +168,109 @@ def seasonal_adjustment_rolling(
     trend = s.rolling(window=window, center=True, min_periods=window // 4).mean()
     return s - trend
 
+
+def _rolling_pair_moments(
+    data: pd.DataFrame,
+    window: int,
+    pairs: Optional[Sequence[Tuple[str, str]]],
+    min_periods: Optional[int],
+):
+    """
+    Windowed co-moments for many column pairs at once.
+
+    Running (cumulative) sums of x, y, x², y², xy and the joint observation
+    count are built for every pair in one vectorized pass, restarted every
+    `window` rows, and each window is assembled from at most two of them. Observations are pairwise: a row
+    counts for a pair only if both values are finite. Columns are demeaned
+    first so the cumulative sums stay well conditioned.
+    """
+    if pairs is None:
+        cols = list(data.columns)
+        pairs = list(combinations(cols, 2))
+    pairs = list(pairs)
+    min_periods = window if min_periods is None else min_periods
+
+    names = list(dict.fromkeys(name for pair in pairs for name in pair))
+    values = data[names].to_numpy(dtype=float)
+    valid = np.isfinite(values)
+    values = np.where(valid, values, np.nan)
+    values = np.where(valid, values - np.nanmean(values, axis=0), 0.0)
+
+    position = {name: i for i, name in enumerate(names)}
+    left = np.array([position[a] for a, _ in pairs], dtype=int)
+    right = np.array([position[b] for _, b in pairs], dtype=int)
+
+    mask = (valid[:, left] & valid[:, right]).astype(float)
+    x = values[:, left] * mask
+    y = values[:, right] * mask
+
+    rows = len(values)
+    blocks = -(-rows // window)
+
+    def windowed(a: np.ndarray) -> np.ndarray:
+        # Prefix sums restart every `window` rows, so each window is at most one
+        # block tail plus one block head and rounding stays on the scale of
+        # nearby rows rather than the whole history
+        padded = np.zeros((blocks * window, a.shape[1]))
+        padded[:rows] = a
+        prefix = np.cumsum(padded.reshape(blocks, window, -1), axis=1).reshape(-1, a.shape[1])[:rows]
+        out = prefix.copy()
+        totals = np.repeat(prefix[window - 1::window], window, axis=0)
+        out[window:] += totals[:rows - window] - prefix[:-window]
+        return out
+
+    n = windowed(mask)
+    sx, sy = windowed(x), windowed(y)
+    sxx, syy, sxy = windowed(x * x), windowed(y * y), windowed(x * y)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+    # Rounding noise is proportional to the window's sum of squares; anything
+    # below it is a constant window
+    var_x[var_x <= 1e-12 * sxx] = 0.0
+    var_y[var_y <= 1e-12 * syy] = 0.0
+    enough = n >= max(min_periods, 1)
+    # from_tuples([]) cannot infer the number of levels (no pairs / < 2 columns)
+    index = pd.MultiIndex.from_tuples(pairs) if pairs else pd.MultiIndex.from_arrays([[], []])
+    return n, cov, var_x, var_y, enough, index
+
+
+def rolling_pair_covariance(
+    data: pd.DataFrame,
+    window: int,
+    pairs: Optional[Sequence[Tuple[str, str]]] = None,
+    min_periods: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Rolling sample covariance for column pairs (all pairs by default), one pass.
+
+    Returns a (date × pair) frame indexed like `data`, columns a MultiIndex of
+    the (col_a, col_b) pairs. Matches `data[a].rolling(window, min_periods).cov(data[b])`.
+    """
+    n, cov, _, _, enough, index = _rolling_pair_moments(data, window, pairs, min_periods)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = np.where(enough & (n > 1), cov / (n - 1), np.nan)
+    return pd.DataFrame(result, index=data.index, columns=index)
+
+
+def rolling_pair_correlation(
+    data: pd.DataFrame,
+    window: int,
+    pairs: Optional[Sequence[Tuple[str, str]]] = None,
+    min_periods: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Rolling Pearson correlation for column pairs (all pairs by default), one pass.
+
+    Replaces nested `data[a].rolling(window, min_periods).corr(data[b])` loops:
+    cost grows with the number of pairs, not with the number of rolling passes.
+    Returns a (date × pair) frame indexed like `data`, columns a MultiIndex of
+    the (col_a, col_b) pairs. Windows with zero variance in either column are NaN.
+    """
+    _, cov, var_x, var_y, enough, index = _rolling_pair_moments(data, window, pairs, min_periods)
+    denom = var_x * var_y
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = np.where(enough & (denom > 0), cov / np.sqrt(denom), np.nan)
+    return pd.DataFrame(np.clip(result, -1.0, 1.0), index=data.index, columns=index)